@@ -3,14 +3,19 @@ Policy Engine - INSTANT 執行標準
 
 政策引擎，執行治理策略
 延遲目標：<100ms (p99) 政策評估
+
+政策在註冊時編譯為規則閉包，並按其引用的上下文欄位建立索引
+（等值規則 → 值查表，其他規則 → 欄位查表），評估時只觸及可能適用的政策。
 """
 
 import asyncio
+import bisect
+import operator
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Tuple
 
 from namespace_registry.cache import MultiLayerCache
 
@@ -49,18 +54,143 @@ class PolicyEvaluationResult:
     latency_ms: float = 0.0
 
 
+_MISSING = object()
+
+# 操作符分派表：(上下文值, 規則值) -> bool
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "equals": operator.eq,
+    "not_equals": operator.ne,
+    "contains": lambda actual, expected: expected in str(actual),
+    "not_contains": lambda actual, expected: expected not in str(actual),
+    "in": lambda actual, expected: actual in expected,
+    "not_in": lambda actual, expected: actual not in expected,
+    "greater_than": operator.gt,
+    "less_than": operator.lt,
+    "exists": lambda actual, expected: True,
+}
+
+_ACTION_STATS = {
+    PolicyAction.ALLOW: "allows",
+    PolicyAction.DENY: "denies",
+    PolicyAction.AUDIT: "audits",
+    PolicyAction.REQUIRE_APPROVAL: "approvals_required",
+}
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _compile_rule(rule: Dict[str, Any]) -> Optional[Predicate]:
+    """將規則編譯為閉包；未知操作符返回 None"""
+    field = rule.get("field")
+    op = rule.get("operator")
+    value = rule.get("value")
+
+    if op == "not_exists":
+        return lambda context: field not in context
+    if op == "equals":
+        return lambda context: context.get(field, _MISSING) == value
+
+    compare = _OPERATORS.get(op)
+    if compare is None:
+        return None
+
+    def predicate(context: Dict[str, Any]) -> bool:
+        actual = context.get(field, _MISSING)
+        if actual is _MISSING:
+            return False
+        try:
+            return compare(actual, value)
+        except TypeError:
+            # 類型不可比較，視為不匹配
+            return False
+
+    return predicate
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+@dataclass(eq=False)
+class CompiledPolicy:
+    """編譯後的政策"""
+
+    policy: Policy
+    predicates: List[Predicate]
+    required_fields: FrozenSet[str]
+    # 索引錨點：(欄位, 可匹配的值)；值為 None 表示只要求欄位存在
+    anchor: Optional[Tuple[str, Optional[Tuple[Hashable, ...]]]]
+    # 排序鍵：(-優先級, 首次註冊序號)
+    rank: Tuple[int, int] = (0, 0)
+
+    def __lt__(self, other: "CompiledPolicy") -> bool:
+        return self.rank < other.rank
+
+    def __post_init__(self):
+        # 結果中不隨上下文變化的部分
+        self.allowed = self.policy.action != PolicyAction.DENY
+        self.reason = f"政策 {self.policy.name} 匹配"
+        self.stat_key = _ACTION_STATS[self.policy.action]
+
+    @classmethod
+    def compile(cls, policy: Policy) -> Optional["CompiledPolicy"]:
+        """編譯政策；含未知操作符的政策永不匹配，返回 None"""
+        predicates = []
+        for rule in policy.rules:
+            predicate = _compile_rule(rule)
+            if predicate is None:
+                return None
+            predicates.append(predicate)
+
+        required = frozenset(
+            rule.get("field") for rule in policy.rules if rule.get("operator") != "not_exists"
+        )
+
+        anchor = None
+        for rule in policy.rules:
+            field, op, value = rule.get("field"), rule.get("operator"), rule.get("value")
+            if op == "equals" and _hashable(value):
+                anchor = (field, (value,))
+                break
+            if (
+                op == "in"
+                and isinstance(value, (list, tuple, set, frozenset))
+                and all(_hashable(v) for v in value)
+            ):
+                anchor = (field, tuple(value))
+                break
+        if anchor is None and required:
+            anchor = (min(required, key=str), None)
+
+        return cls(policy=policy, predicates=predicates, required_fields=required, anchor=anchor)
+
+    def matches(self, context: Dict[str, Any]) -> bool:
+        for predicate in self.predicates:
+            if not predicate(context):
+                return False
+        return True
+
+
 class PolicyEngine:
     """
     Policy Engine - INSTANT 模式
 
     核心特性：
     - 延遲 <100ms (p99)
-    - 即時政策評估
+    - 即時政策評估（編譯規則、欄位索引、優先級順序）
+    - 相同上下文的決策緩存
+    - 批量評估
     - 自動執行
     - 完全自治
+
+    政策的啟用狀態與規則應透過本類的方法修改，以便同步更新索引與決策緩存。
     """
 
-    def __init__(self):
+    def __init__(self, decision_cache_size: int = 10000):
         # 緩存
         self.cache = MultiLayerCache()
 
@@ -74,8 +204,20 @@ class PolicyEngine:
             "denies": 0,
             "audits": 0,
             "approvals_required": 0,
+            "decision_cache_hits": 0,
         }
 
+        # 編譯後的政策與索引
+        self._compiled: Dict[str, CompiledPolicy] = {}
+        self._value_index: Dict[str, Dict[Hashable, List[CompiledPolicy]]] = {}
+        self._field_index: Dict[str, List[CompiledPolicy]] = {}
+        self._unanchored: List[CompiledPolicy] = []
+        self._sequence: Dict[str, int] = {}  # 政策 ID -> 首次註冊序號
+
+        # 決策緩存：上下文 -> 匹配的政策（按優先級）
+        self.decision_cache_size = decision_cache_size
+        self._decisions: "OrderedDict[Hashable, Tuple[CompiledPolicy, ...]]" = OrderedDict()
+
         # 事件回調
         self.event_handlers = {"on_policy_violation": [], "on_policy_enforcement": []}
 
@@ -93,8 +235,6 @@ class PolicyEngine:
 
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-
         policy = Policy(
             id=policy_id,
             name=name,
@@ -105,53 +245,163 @@ class PolicyEngine:
         )
 
         self.policies[policy_id] = policy
+        self._index_policy(policy)
 
         # 緩存
         await self.cache.set(f"policy:{policy_id}", policy.to_dict(), ttl=3600)
 
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ 註冊政策: {policy_id}，延遲: {latency:.2f}ms")
-
         return True
 
     async def evaluate(
-        self, context: Dict[str, Any], policy_ids: Optional[List[str]] = None
+        self,
+        context: Dict[str, Any],
+        policy_ids: Optional[List[str]] = None,
+        stop_on_deny: bool = False,
     ) -> List[PolicyEvaluationResult]:
         """
         評估政策
 
+        返回按優先級排序的匹配政策結果；stop_on_deny 時在第一個匹配的
+        DENY 政策後停止。
+
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-        self.stats["total_evaluations"] += 1
+        return self._evaluate(context, policy_ids, stop_on_deny)
 
-        # 確定要評估的政策
-        if policy_ids:
-            policies_to_evaluate = [
-                self.policies[pid] for pid in policy_ids if pid in self.policies
-            ]
-        else:
-            policies_to_evaluate = list(self.policies.values())
-
-        # 按優先級排序
-        policies_to_evaluate.sort(key=lambda p: p.priority, reverse=True)
+    async def evaluate_many(
+        self,
+        contexts: List[Dict[str, Any]],
+        policy_ids: Optional[List[str]] = None,
+        stop_on_deny: bool = False,
+    ) -> List[List[PolicyEvaluationResult]]:
+        """
+        批量評估政策
 
-        # 並行評估所有政策
-        evaluation_tasks = [
-            self._evaluate_single_policy(policy, context)
-            for policy in policies_to_evaluate
-            if policy.enabled
-        ]
+        每個上下文的結果與 evaluate() 相同，按輸入順序返回。
+        """
+        return [self._evaluate(context, policy_ids, stop_on_deny) for context in contexts]
 
-        results = await asyncio.gather(*evaluation_tasks)
+    def _evaluate(
+        self,
+        context: Dict[str, Any],
+        policy_ids: Optional[List[str]],
+        stop_on_deny: bool,
+    ) -> List[PolicyEvaluationResult]:
+        start_time = time.perf_counter()
+        self.stats["total_evaluations"] += 1
 
-        # 過濋 None 結果
-        results = [r for r in results if r is not None]
+        key = self._decision_key(context, policy_ids, stop_on_deny)
+        matched = self._decisions.get(key) if key is not None else None
+        if matched is not None:
+            self._decisions.move_to_end(key)
+            self.stats["decision_cache_hits"] += 1
+        else:
+            found = []
+            for compiled in self._candidates(context, policy_ids):
+                if compiled.policy.enabled and compiled.matches(context):
+                    found.append(compiled)
+                    if stop_on_deny and compiled.policy.action == PolicyAction.DENY:
+                        break
+            matched = tuple(found)
+            if key is not None and self.decision_cache_size > 0:
+                self._decisions[key] = matched
+                if len(self._decisions) > self.decision_cache_size:
+                    self._decisions.popitem(last=False)
+
+        latency = (time.perf_counter() - start_time) * 1000
+        return [self._make_result(compiled, latency) for compiled in matched]
+
+    def _candidates(
+        self, context: Dict[str, Any], policy_ids: Optional[List[str]]
+    ) -> List[CompiledPolicy]:
+        """可能適用於上下文的政策，按優先級排序"""
+        if policy_ids:
+            # 相同優先級按 policy_ids 中的順序
+            position: Dict[CompiledPolicy, int] = {}
+            for pid in policy_ids:
+                compiled = self._compiled.get(pid)
+                if compiled is not None and compiled.required_fields.issubset(context):
+                    position.setdefault(compiled, len(position))
+            return sorted(position, key=lambda c: (c.rank[0], position[c]))
+
+        candidates = set(self._unanchored)
+        for field, value in context.items():
+            by_value = self._value_index.get(field)
+            if by_value is not None and _hashable(value):
+                candidates.update(by_value.get(value, ()))
+            candidates.update(self._field_index.get(field, ()))
+
+        return sorted(
+            (c for c in candidates if c.required_fields.issubset(context)),
+            key=lambda c: c.rank,
+        )
 
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ 評估 {len(results)} 個政策，延遲: {latency:.2f}ms")
+    def _decision_key(
+        self, context: Dict[str, Any], policy_ids: Optional[List[str]], stop_on_deny: bool
+    ) -> Optional[Hashable]:
+        """決策緩存鍵；上下文含不可哈希的值時返回 None（不緩存）"""
+        key = (
+            tuple(policy_ids) if policy_ids else None,
+            stop_on_deny,
+            # 包含類型，避免 1 / True 等相等但字串形式不同的值共用決策
+            tuple((field, type(context[field]), context[field]) for field in sorted(context)),
+        )
+        return key if _hashable(key) else None
+
+    def _make_result(self, compiled: CompiledPolicy, latency_ms: float) -> PolicyEvaluationResult:
+        self.stats[compiled.stat_key] += 1
+        return PolicyEvaluationResult(
+            compiled.policy.id,
+            compiled.policy.action,
+            compiled.allowed,
+            compiled.reason,
+            {"rules": [True] * len(compiled.predicates)},
+            latency_ms,
+        )
 
-        return results
+    def _index_lists(self, compiled: CompiledPolicy) -> List[List[CompiledPolicy]]:
+        """政策所在的索引列表（不存在則建立）"""
+        if compiled.anchor is None:
+            return [self._unanchored]
+        field, values = compiled.anchor
+        if values is None:
+            return [self._field_index.setdefault(field, [])]
+        by_value = self._value_index.setdefault(field, {})
+        return [by_value.setdefault(value, []) for value in set(values)]
+
+    def _unindex_policy(self, compiled: CompiledPolicy) -> None:
+        for postings in self._index_lists(compiled):
+            postings.remove(compiled)
+        # 清理空列表
+        if compiled.anchor is not None:
+            field, values = compiled.anchor
+            if values is None:
+                if not self._field_index[field]:
+                    del self._field_index[field]
+            else:
+                by_value = self._value_index[field]
+                for value in set(values):
+                    if not by_value[value]:
+                        del by_value[value]
+                if not by_value:
+                    del self._value_index[field]
+
+    def _index_policy(self, policy: Policy) -> None:
+        """編譯單個政策並按優先級插入索引（註冊時呼叫）"""
+        self._decisions.clear()
+        previous = self._compiled.pop(policy.id, None)
+        if previous is not None:
+            self._unindex_policy(previous)
+
+        compiled = CompiledPolicy.compile(policy)
+        if compiled is None:
+            return
+        # 優先級高者在前；相同優先級保持首次註冊順序
+        sequence = self._sequence.setdefault(policy.id, len(self._sequence))
+        compiled.rank = (-policy.priority, sequence)
+        self._compiled[policy.id] = compiled
+        for postings in self._index_lists(compiled):
+            bisect.insort(postings, compiled)
 
     async def check_permission(
         self, action: str, resource: str, user: str, context: Dict[str, Any] = None
@@ -168,7 +418,8 @@ class PolicyEngine:
             **(context or {}),
         }
 
-        results = await self.evaluate(evaluation_context)
+        # 任一拒絕即結束，無需評估更低優先級的政策
+        results = await self.evaluate(evaluation_context, stop_on_deny=True)
 
         # 檢查是否有拒絕的政策
         for result in results:
@@ -226,6 +477,7 @@ class PolicyEngine:
         """啟用政策"""
         if policy_id in self.policies:
             self.policies[policy_id].enabled = True
+            self._decisions.clear()
             return True
         return False
 
@@ -233,6 +485,7 @@ class PolicyEngine:
         """禁用政策"""
         if policy_id in self.policies:
             self.policies[policy_id].enabled = False
+            self._decisions.clear()
             return True
         return False
 
@@ -240,80 +493,15 @@ class PolicyEngine:
         self, policy: Policy, context: Dict[str, Any]
     ) -> Optional[PolicyEvaluationResult]:
         """評估單個政策"""
-        start_time = time.time()
-
-        # 評估所有規則
-        rule_results = []
-        for rule in policy.rules:
-            result = await self._evaluate_rule(rule, context)
-            rule_results.append(result)
-
-        # 確定政策結果
-        # 如果所有規則都匹配，則執行政策動作
-        if all(rule_results):
-            allowed = policy.action != PolicyAction.DENY
-
-            # 更新統計
-            if policy.action == PolicyAction.ALLOW:
-                self.stats["allows"] += 1
-            elif policy.action == PolicyAction.DENY:
-                self.stats["denies"] += 1
-            elif policy.action == PolicyAction.AUDIT:
-                self.stats["audits"] += 1
-            elif policy.action == PolicyAction.REQUIRE_APPROVAL:
-                self.stats["approvals_required"] += 1
-
-            result = PolicyEvaluationResult(
-                policy_id=policy.id,
-                action=policy.action,
-                allowed=allowed,
-                reason=f"政策 {policy.name} 匹配",
-                details={"rules": rule_results},
-            )
-        else:
-            result = None
-
-        if result:
-            result.latency_ms = (time.time() - start_time) * 1000
+        start_time = time.perf_counter()
 
-        return result
+        compiled = self._compiled.get(policy.id)
+        if compiled is None or compiled.policy is not policy:
+            compiled = CompiledPolicy.compile(policy)
+        if compiled is None or not compiled.matches(context):
+            return None
 
-    async def _evaluate_rule(
-        self, rule: Dict[str, Any], context: Dict[str, Any]
-    ) -> bool:
-        """評估單個規則"""
-        field = rule.get("field")
-        operator = rule.get("operator")
-        value = rule.get("value")
-
-        if field not in context:
-            return False
-
-        context_value = context[field]
-
-        # 根據操作符進行比較
-        if operator == "equals":
-            return context_value == value
-        elif operator == "not_equals":
-            return context_value != value
-        elif operator == "contains":
-            return value in str(context_value)
-        elif operator == "not_contains":
-            return value not in str(context_value)
-        elif operator == "in":
-            return context_value in value
-        elif operator == "not_in":
-            return context_value not in value
-        elif operator == "greater_than":
-            return context_value > value
-        elif operator == "less_than":
-            return context_value < value
-        elif operator == "exists":
-            return field in context
-        elif operator == "not_exists":
-            return field not in context
-
-        return False
+        return self._make_result(compiled, (time.perf_counter() - start_time) * 1000)
 
     async def _trigger_event(self, event_type: str, *args):
         """觸發事件"""
@@ -14,7 +14,14 @@ Compliance:
 - INSTANT: <100ms operations, 64-256 parallel support
 """
 
-from .cache import CacheEntry, CacheLevel, MultiLayerCache
+from .cache import (
+    CacheBackend,
+    CacheEntry,
+    CacheLevel,
+    MultiLayerCache,
+    ShardedLRUCache,
+    SQLiteBackend,
+)
 from .registry_instant import NamespaceEntry, RegistryManagerInstant
 from .registry_manager import PlatformRegistryManager
 from .schema_validator import (
@@ -32,6 +39,9 @@ __all__ = [
     "CacheEntry",
     "CacheLevel",
     "MultiLayerCache",
+    "CacheBackend",
+    "ShardedLRUCache",
+    "SQLiteBackend",
     "SchemaValidationResult",
     "SchemaValidationStatus",
     "SchemaValidator",
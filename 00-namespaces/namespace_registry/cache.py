@@ -1,26 +1,42 @@
 """
 Multi-Layer Cache - INSTANT 執行標準
 
-多層緩存系統：Local → Redis → Database
+多層緩存系統：Local → L2 → L3（可插拔後端）
 延遲目標：<50ms (p99) 查找
+
+- Local：分片 LRU/TTL，條目數與記憶體雙重上限，O(1) 淘汰
+- L2 / L3：可插拔後端（SQLiteBackend：記憶體或本地檔案，檔案可跨進程共享）
+- 前綴 / 標籤索引：失效只觸及匹配的條目
+- Single-flight：同一 key 的並發未命中只載入一次
+- 統計以指標匯出，不在熱路徑上輸出
 """
 
 import asyncio
-import hashlib
+import bisect
+import heapq
+import inspect
 import json
+import logging
+import sqlite3
+import sys
+import threading
 import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 
 class CacheLevel(Enum):
     """緩存層級"""
 
     LOCAL = "local"
-    REDIS = "redis"
-    DATABASE = "database"
+    REDIS = "redis"  # 寫入 Local + L2
+    DATABASE = "database"  # 寫入 Local + L2 + L3
 
 
 @dataclass
@@ -32,10 +48,17 @@ class CacheEntry:
     level: CacheLevel
     created_at: datetime
     ttl: int = 3600  # 默認 1 小時
+    tags: Tuple[str, ...] = ()
+    size: int = 0
+    expires_at: float = 0.0
+
+    def __post_init__(self):
+        if not self.expires_at:
+            self.expires_at = self.created_at.timestamp() + self.ttl
 
-    def is_expired(self) -> bool:
+    def is_expired(self, now: Optional[float] = None) -> bool:
         """檢查是否過期"""
-        return datetime.now() > self.created_at + timedelta(seconds=self.ttl)
+        return (time.time() if now is None else now) > self.expires_at
 
     def to_dict(self) -> Dict[str, Any]:
         """轉換為字典"""
@@ -45,35 +68,482 @@ class CacheEntry:
             "level": self.level.value,
             "created_at": self.created_at.isoformat(),
             "ttl": self.ttl,
+            "tags": list(self.tags),
         }
 
 
+@dataclass
+class _Flight:
+    """進行中的合併載入與其等待者數"""
+
+    task: asyncio.Task
+    waiters: int = 0
+
+
+def _estimate_size(value: Any) -> int:
+    """估算值的記憶體佔用（位元組）"""
+    if isinstance(value, (dict, list, tuple)):
+        try:
+            return len(json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            pass
+    return sys.getsizeof(value)
+
+
+class CacheBackend(ABC):
+    """
+    緩存層後端介面
+
+    get() 對過期條目返回 None；delete_prefix() / delete_tag() 返回被刪除的 key。
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """獲取未過期的條目"""
+
+    @abstractmethod
+    def set(self, entry: CacheEntry) -> None:
+        """寫入條目（覆蓋同 key）"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """刪除條目"""
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> List[str]:
+        """刪除 key 以 prefix 開頭的條目"""
+
+    @abstractmethod
+    def delete_tag(self, tag: str) -> List[str]:
+        """刪除帶有 tag 的條目"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """條目數"""
+
+    def purge_expired(self) -> int:
+        """清除已過期條目，返回清除數"""
+        return 0
+
+    def close(self) -> None:
+        """釋放資源；預設無資源可釋放（如記憶體 LRU），持有連線的後端需覆寫"""
+        return None
+
+
+class _LRUShard:
+    """單一分片：LRU 順序、排序 key（前綴查詢）、標籤索引、過期堆"""
+
+    __slots__ = ("entries", "sorted_keys", "tags", "expiry", "bytes", "lock",
+                 "max_entries", "max_bytes")
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.sorted_keys: List[str] = []
+        self.tags: Dict[str, Set[str]] = {}
+        self.expiry: List[Tuple[float, str]] = []
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def remove(self, key: str) -> CacheEntry:
+        entry = self.entries.pop(key)
+        del self.sorted_keys[bisect.bisect_left(self.sorted_keys, key)]
+        for tag in entry.tags:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+        self.bytes -= entry.size
+        return entry
+
+    def pop_expired(self, now: float) -> int:
+        """彈出過期堆頂的過期條目（堆中已被覆蓋或刪除的記錄直接丟棄）"""
+        removed = 0
+        while self.expiry and self.expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self.expiry)
+            entry = self.entries.get(key)
+            if entry is not None and entry.expires_at == expires_at:
+                self.remove(key)
+                removed += 1
+        # 覆蓋寫入會留下過時記錄，過多時重建
+        if len(self.expiry) > 2 * len(self.entries) + 64:
+            self.expiry = [(e.expires_at, k) for k, e in self.entries.items()]
+            heapq.heapify(self.expiry)
+        return removed
+
+
+class ShardedLRUCache(CacheBackend):
+    """
+    分片 LRU/TTL 記憶體緩存
+
+    核心特性：
+    - 條目數與位元組雙重上限（平均分配到各分片），O(1) LRU 淘汰
+    - 過期條目按到期時間出堆，無需掃描
+    - 前綴失效 O(log n + 匹配數)，標籤失效 O(匹配數)
+    - 每個分片各自加鎖，可供多執行緒共用
+    """
+
+    def __init__(
+        self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, shards: int = 16
+    ):
+        shards = max(1, min(shards, max_entries))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._shards = [
+            _LRUShard(max(1, max_entries // shards), max(1, max_bytes // shards))
+            for _ in range(shards)
+        ]
+        self.evictions = 0
+        self.expirations = 0
+
+    def _shard(self, key: str) -> _LRUShard:
+        return self._shards[hash(key) % len(self._shards)]
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return None
+            if entry.is_expired():
+                shard.remove(key)
+                self.expirations += 1
+                return None
+            shard.entries.move_to_end(key)
+            return entry
+
+    def set(self, entry: CacheEntry) -> None:
+        if not entry.size:
+            entry.size = _estimate_size(entry.value)
+        shard = self._shard(entry.key)
+        with shard.lock:
+            if entry.key in shard.entries:
+                shard.remove(entry.key)
+            if entry.size > shard.max_bytes:
+                # 單一條目超過分片容量，不進入本層
+                return
+
+            shard.entries[entry.key] = entry
+            bisect.insort(shard.sorted_keys, entry.key)
+            for tag in entry.tags:
+                shard.tags.setdefault(tag, set()).add(entry.key)
+            heapq.heappush(shard.expiry, (entry.expires_at, entry.key))
+            shard.bytes += entry.size
+
+            self.expirations += shard.pop_expired(time.time())
+            while len(shard.entries) > shard.max_entries or shard.bytes > shard.max_bytes:
+                shard.remove(next(iter(shard.entries)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        shard = self._shard(key)
+        with shard.lock:
+            if key not in shard.entries:
+                return False
+            shard.remove(key)
+            return True
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        deleted = []
+        for shard in self._shards:
+            with shard.lock:
+                start = bisect.bisect_left(shard.sorted_keys, prefix)
+                end = start
+                while end < len(shard.sorted_keys) and shard.sorted_keys[end].startswith(prefix):
+                    end += 1
+                keys = shard.sorted_keys[start:end]
+                for key in keys:
+                    shard.remove(key)
+                deleted.extend(keys)
+        return deleted
+
+    def delete_tag(self, tag: str) -> List[str]:
+        deleted = []
+        for shard in self._shards:
+            with shard.lock:
+                keys = list(shard.tags.get(tag, ()))
+                for key in keys:
+                    shard.remove(key)
+                deleted.extend(keys)
+        return deleted
+
+    def keys(self) -> List[str]:
+        """所有 key（含尚未清除的過期條目）"""
+        return [key for shard in self._shards for key in shard.entries]
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.sorted_keys.clear()
+                shard.tags.clear()
+                shard.expiry.clear()
+                shard.bytes = 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.pop_expired(now)
+        self.expirations += removed
+        return removed
+
+    @property
+    def bytes(self) -> int:
+        return sum(shard.bytes for shard in self._shards)
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    SQLite 緩存後端
+
+    path 為 ":memory:" 時僅限本進程；使用檔案路徑（WAL 模式）時可由同一主機上的
+    多個進程共享。值以 JSON 序列化，前綴與標籤失效走索引查詢。
+    """
+
+    def __init__(self, path: str = ":memory:", max_entries: Optional[int] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    level TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    ttl INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    tags TEXT NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)"
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags(key)")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, level, created_at, ttl, expires_at, tags "
+                "FROM cache_entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            value, level, created_at, ttl, expires_at, tags = row
+            if time.time() > expires_at:
+                self._delete_keys([key])
+                return None
+        return CacheEntry(
+            key=key,
+            value=json.loads(value),
+            level=CacheLevel(level),
+            created_at=datetime.fromtimestamp(created_at),
+            ttl=ttl,
+            tags=tuple(json.loads(tags)),
+            size=len(value),
+            expires_at=expires_at,
+        )
+
+    def set(self, entry: CacheEntry) -> None:
+        value = json.dumps(entry.value)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries "
+                "(key, value, level, created_at, ttl, expires_at, tags) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.key,
+                    value,
+                    entry.level.value,
+                    entry.created_at.timestamp(),
+                    entry.ttl,
+                    entry.expires_at,
+                    json.dumps(list(entry.tags)),
+                ),
+            )
+            self._conn.execute("DELETE FROM cache_tags WHERE key = ?", (entry.key,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)",
+                [(tag, entry.key) for tag in entry.tags],
+            )
+            self._writes += 1
+            if self._writes % 256 == 0:
+                self._trim()
+
+    def _trim(self) -> int:
+        """
+        清除過期條目；超過上限時淘汰最早到期的條目（呼叫者持有鎖與交易）
+
+        返回移除的條目數（不含連帶刪除的標籤列）
+        """
+        now = time.time()
+        self._conn.execute(
+            "DELETE FROM cache_tags WHERE key IN "
+            "(SELECT key FROM cache_entries WHERE expires_at <= ?)",
+            (now,),
+        )
+        removed = self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at <= ?", (now,)
+        ).rowcount
+        if self.max_entries is not None:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                keys = [
+                    row[0]
+                    for row in self._conn.execute(
+                        "SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?", (excess,)
+                    )
+                ]
+                self._delete_keys(keys)
+                removed += len(keys)
+        return removed
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in keys])
+        self._conn.executemany("DELETE FROM cache_tags WHERE key = ?", [(k,) for k in keys])
+        self._conn.commit()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            found = self._conn.execute(
+                "SELECT 1 FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if found:
+                self._delete_keys([key])
+            return found is not None
+
+    def delete_prefix(self, prefix: str) -> List[str]:
+        with self._lock:
+            keys = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT key FROM cache_entries WHERE key >= ? AND key < ?",
+                    (prefix, prefix + "\U0010ffff"),
+                )
+                if row[0].startswith(prefix)
+            ]
+            self._delete_keys(keys)
+        return keys
+
+    def delete_tag(self, tag: str) -> List[str]:
+        with self._lock:
+            keys = [
+                row[0] for row in self._conn.execute("SELECT key FROM cache_tags WHERE tag = ?", (tag,))
+            ]
+            self._delete_keys(keys)
+        return keys
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.execute("DELETE FROM cache_tags")
+
+    def purge_expired(self) -> int:
+        with self._lock, self._conn:
+            return self._trim()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+Loader = Callable[[], Union[Any, Awaitable[Any]]]
+
+
 class MultiLayerCache:
     """
     多層緩存系統 - INSTANT 模式
 
     緩存層級：
-    1. Local (記憶體) - <1ms
-    2. Redis (分散式) - <10ms
-    3. Database (持久化) - <50ms
+    1. Local (分片 LRU/TTL 記憶體) - <1ms
+    2. L2 (可插拔，如 SQLiteBackend 記憶體 / 共享檔案) - <10ms
+    3. L3 (可插拔，如 SQLiteBackend 持久化檔案) - <50ms
 
     核心特性：
     - 延遲 <50ms (p99)
-    - 自動失效
-    - 層級穿透
+    - 有界容量，LRU + TTL 淘汰
+    - 層級穿透與回填
+    - 前綴 / 標籤批量失效
+    - 未命中合併載入 (single-flight)
     - 熱點預熱
     """
 
-    def __init__(self):
-        self.local_cache: Dict[str, CacheEntry] = {}
-        self.redis_simulator: Dict[str, CacheEntry] = {}  # 模擬 Redis
-        self.database_simulator: Dict[str, CacheEntry] = {}  # 模擬 Database
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        shards: int = 16,
+        l2: Optional[CacheBackend] = None,
+        l3: Optional[CacheBackend] = None,
+        hot_key_limit: int = 1000,
+    ):
+        self.local = ShardedLRUCache(max_entries, max_bytes, shards)
+        self.l2 = l2
+        self.l3 = l3
 
         # 統計
         self.stats = {"local_hits": 0, "redis_hits": 0, "database_hits": 0, "misses": 0}
+        self.counters = {
+            "sets": 0,
+            "deletes": 0,
+            "invalidated": 0,
+            "loads": 0,
+            "coalesced": 0,
+            "backend_errors": 0,
+        }
+        self._get_latency = [0.0, 0.0]  # 總計, 最大 (ms)
 
-        # 熱點追蹤
+        # 熱點追蹤（上限 hot_key_limit）
         self.hot_keys: Dict[str, int] = {}
+        self.hot_key_limit = hot_key_limit
+
+        self._inflight: Dict[str, _Flight] = {}
+
+    def _lower_tiers(self) -> List[Tuple[CacheBackend, str]]:
+        tiers = []
+        if self.l2 is not None:
+            tiers.append((self.l2, "redis_hits"))
+        if self.l3 is not None:
+            tiers.append((self.l3, "database_hits"))
+        return tiers
+
+    def _backend_error(self, operation: str, key: str, error: Exception) -> None:
+        self.counters["backend_errors"] += 1
+        logger.warning("Cache backend %s failed for %s: %s", operation, key, error)
 
     async def get(self, key: str) -> Optional[Any]:
         """
@@ -81,58 +551,43 @@ class MultiLayerCache:
 
         延遲目標：<50ms (p99)
         - Local: <1ms
-        - Redis: <10ms
-        - Database: <50ms
+        - L2: <10ms
+        - L3: <50ms
         """
-        start_time = time.time()
-
-        # 1. 檢查 Local Cache
-        if key in self.local_cache:
-            entry = self.local_cache[key]
-            if not entry.is_expired():
-                self.stats["local_hits"] += 1
-                self._track_hot_key(key)
-                latency = (time.time() - start_time) * 1000
-                print(f"✅ Cache HIT (Local): {key}, 延遲: {latency:.2f}ms")
-                return entry.value
-            else:
-                # 過期，刪除
-                del self.local_cache[key]
-
-        # 2. 檢查 Redis Cache
-        if key in self.redis_simulator:
-            entry = self.redis_simulator[key]
-            if not entry.is_expired():
-                self.stats["redis_hits"] += 1
-                # 回填 Local Cache
-                self.local_cache[key] = entry
-                self._track_hot_key(key)
-                latency = (time.time() - start_time) * 1000
-                print(f"✅ Cache HIT (Redis): {key}, 延遲: {latency:.2f}ms")
-                return entry.value
-            else:
-                del self.redis_simulator[key]
-
-        # 3. 檢查 Database
-        if key in self.database_simulator:
-            entry = self.database_simulator[key]
-            if not entry.is_expired():
-                self.stats["database_hits"] += 1
-                # 回填 Redis 和 Local Cache
-                self.redis_simulator[key] = entry
-                self.local_cache[key] = entry
-                self._track_hot_key(key)
-                latency = (time.time() - start_time) * 1000
-                print(f"✅ Cache HIT (Database): {key}, 延遲: {latency:.2f}ms")
-                return entry.value
+        start_time = time.perf_counter()
+
+        entry = self.local.get(key)
+        if entry is not None:
+            self.stats["local_hits"] += 1
+        else:
+            missed: List[CacheBackend] = []
+            for backend, stat in self._lower_tiers():
+                try:
+                    entry = backend.get(key)
+                except Exception as e:
+                    self._backend_error("get", key, e)
+                    continue
+                if entry is not None:
+                    self.stats[stat] += 1
+                    # 回填上層
+                    self.local.set(entry)
+                    for upper in missed:
+                        try:
+                            upper.set(entry)
+                        except Exception as e:
+                            self._backend_error("backfill", key, e)
+                    break
+                missed.append(backend)
             else:
-                del self.database_simulator[key]
+                self.stats["misses"] += 1
 
-        # Cache Miss
-        self.stats["misses"] += 1
-        latency = (time.time() - start_time) * 1000
-        print(f"❌ Cache MISS: {key}, 延遲: {latency:.2f}ms")
-        return None
+        if entry is not None:
+            self._track_hot_key(key)
+
+        latency = (time.perf_counter() - start_time) * 1000
+        self._get_latency[0] += latency
+        self._get_latency[1] = max(self._get_latency[1], latency)
+        return entry.value if entry is not None else None
 
     async def set(
         self,
@@ -140,34 +595,38 @@ class MultiLayerCache:
         value: Any,
         ttl: int = 3600,
         level: CacheLevel = CacheLevel.DATABASE,
+        tags: Iterable[str] = (),
     ) -> bool:
         """
         設置緩存值
 
         延遲目標：<50ms (p99)
         """
-        start_time = time.time()
-
         entry = CacheEntry(
-            key=key, value=value, level=level, created_at=datetime.now(), ttl=ttl
+            key=key,
+            value=value,
+            level=level,
+            created_at=datetime.now(),
+            ttl=ttl,
+            tags=tuple(tags),
         )
-
-        # 根據層級設置緩存
-        if level in [CacheLevel.DATABASE, CacheLevel.REDIS]:
-            self.database_simulator[key] = entry
-
-        if level in [CacheLevel.DATABASE, CacheLevel.REDIS]:
-            self.redis_simulator[key] = entry
-
-        if level == CacheLevel.LOCAL:
-            self.local_cache[key] = entry
-        else:
-            # 回填 Local Cache
-            self.local_cache[key] = entry
-
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ Cache SET: {key} (level: {level.value}), 延遲: {latency:.2f}ms")
-        return True
+        self.counters["sets"] += 1
+
+        self.local.set(entry)
+        targets = []
+        if level in (CacheLevel.REDIS, CacheLevel.DATABASE) and self.l2 is not None:
+            targets.append(self.l2)
+        if level == CacheLevel.DATABASE and self.l3 is not None:
+            targets.append(self.l3)
+
+        stored = True
+        for backend in targets:
+            try:
+                backend.set(entry)
+            except Exception as e:
+                self._backend_error("set", key, e)
+                stored = False
+        return stored
 
     async def delete(self, key: str) -> bool:
         """
@@ -175,57 +634,92 @@ class MultiLayerCache:
 
         延遲目標：<50ms (p99)
         """
-        start_time = time.time()
-
-        # 從所有層級刪除
-        deleted = False
-        if key in self.local_cache:
-            del self.local_cache[key]
-            deleted = True
-
-        if key in self.redis_simulator:
-            del self.redis_simulator[key]
-            deleted = True
-
-        if key in self.database_simulator:
-            del self.database_simulator[key]
-            deleted = True
-
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ Cache DELETE: {key}, 延遲: {latency:.2f}ms")
+        self.counters["deletes"] += 1
+        deleted = self.local.delete(key)
+        for backend, _ in self._lower_tiers():
+            try:
+                deleted = backend.delete(key) or deleted
+            except Exception as e:
+                self._backend_error("delete", key, e)
         return deleted
 
-    async def invalidate(self, pattern: str) -> int:
+    def _invalidate(self, operation: str, argument: str) -> int:
+        keys = set(getattr(self.local, operation)(argument))
+        for backend, _ in self._lower_tiers():
+            try:
+                keys.update(getattr(backend, operation)(argument))
+            except Exception as e:
+                self._backend_error(operation, argument, e)
+        self.counters["invalidated"] += len(keys)
+        return len(keys)
+
+    async def invalidate(self, prefix: str) -> int:
         """
-        批量失效緩存
+        批量失效 key 以 prefix 開頭的緩存，返回失效的 key 數
 
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-
-        count = 0
+        return self._invalidate("delete_prefix", prefix)
 
-        # Local Cache
-        keys_to_delete = [k for k in self.local_cache.keys() if pattern in k]
-        for key in keys_to_delete:
-            del self.local_cache[key]
-            count += 1
+    async def invalidate_tag(self, tag: str) -> int:
+        """批量失效帶有 tag 的緩存，返回失效的 key 數"""
+        return self._invalidate("delete_tag", tag)
 
-        # Redis Cache
-        keys_to_delete = [k for k in self.redis_simulator.keys() if pattern in k]
-        for key in keys_to_delete:
-            del self.redis_simulator[key]
-
-        # Database Cache
-        keys_to_delete = [k for k in self.database_simulator.keys() if pattern in k]
-        for key in keys_to_delete:
-            del self.database_simulator[key]
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Loader,
+        ttl: int = 3600,
+        level: CacheLevel = CacheLevel.DATABASE,
+        tags: Iterable[str] = (),
+    ) -> Optional[Any]:
+        """
+        獲取緩存值，未命中時呼叫 loader 載入並寫入
 
-        latency = (time.time() - start_time) * 1000
-        print(
-            f"✅ Cache INVALIDATE: {pattern}, 刪除 {count} 個條目, 延遲: {latency:.2f}ms"
-        )
-        return count
+        同一 key 的並發未命中共用一次載入 (single-flight)；loader 可為同步或
+        async 函數，返回 None 時不寫入緩存。
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        # 載入在獨立任務中執行，每個呼叫方各自等待；某個呼叫方被取消
+        # 不影響其他等待者，最後一個等待者離開時才取消載入
+        flight = self._inflight.get(key)
+        if flight is None:
+            task = asyncio.create_task(self._load_shared(key, loader, ttl, level, tags))
+            flight = self._inflight[key] = _Flight(task)
+        else:
+            self.counters["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def _load_shared(
+        self, key: str, loader: Loader, ttl: int, level: CacheLevel, tags: Iterable[str]
+    ) -> Optional[Any]:
+        """合併載入的實際執行：先寫入緩存再移除進行中標記"""
+        try:
+            value = loader()
+            if inspect.isawaitable(value):
+                value = await value
+            self.counters["loads"] += 1
+            if value is not None:
+                await self.set(key, value, ttl=ttl, level=level, tags=tags)
+            return value
+        finally:
+            flight = self._inflight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._inflight[key]
 
     async def warmup(self, keys: List[str], values: List[Any]):
         """
@@ -233,8 +727,6 @@ class MultiLayerCache:
 
         延遲目標：<100ms (p99) 每個 key
         """
-        start_time = time.time()
-
         tasks = [
             self.set(key, value, ttl=7200)  # 2 小時 TTL
             for key, value in zip(keys, values)
@@ -242,23 +734,21 @@ class MultiLayerCache:
 
         await asyncio.gather(*tasks)
 
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ Cache WARMUP: 預熱 {len(keys)} 個條目, 延遲: {latency:.2f}ms")
+    def purge_expired(self) -> int:
+        """清除所有層級的過期條目"""
+        removed = self.local.purge_expired()
+        for backend, _ in self._lower_tiers():
+            try:
+                removed += backend.purge_expired()
+            except Exception as e:
+                self._backend_error("purge", "*", e)
+        return removed
 
     def get_stats(self) -> Dict[str, Any]:
         """獲取緩存統計"""
         total_requests = sum(self.stats.values())
-        hit_rate = (
-            (
-                self.stats["local_hits"]
-                + self.stats["redis_hits"]
-                + self.stats["database_hits"]
-            )
-            / total_requests
-            * 100
-            if total_requests > 0
-            else 0
-        )
+        hits = total_requests - self.stats["misses"]
+        hit_rate = hits / total_requests * 100 if total_requests > 0 else 0
 
         return {
             "total_requests": total_requests,
@@ -267,40 +757,65 @@ class MultiLayerCache:
             "database_hits": self.stats["database_hits"],
             "misses": self.stats["misses"],
             "hit_rate": f"{hit_rate:.2f}%",
-            "local_cache_size": len(self.local_cache),
-            "redis_cache_size": len(self.redis_simulator),
-            "database_cache_size": len(self.database_simulator),
+            "local_cache_size": len(self.local),
+            "local_cache_bytes": self.local.bytes,
+            "redis_cache_size": len(self.l2) if self.l2 is not None else 0,
+            "database_cache_size": len(self.l3) if self.l3 is not None else 0,
+            "evictions": self.local.evictions,
+            "expirations": self.local.expirations,
+            "avg_get_latency_ms": self._get_latency[0] / total_requests if total_requests else 0.0,
+            "max_get_latency_ms": self._get_latency[1],
+            **self.counters,
         }
 
+    def export_metrics(self) -> Dict[str, float]:
+        """以數值指標匯出統計（cache_<name>）"""
+        metrics = {}
+        for name, value in self.get_stats().items():
+            if name == "hit_rate":
+                name, value = "hit_ratio", float(value.rstrip("%")) / 100
+            metrics[f"cache_{name}"] = float(value)
+        return metrics
+
     def _track_hot_key(self, key: str):
         """追蹤熱點 key"""
         self.hot_keys[key] = self.hot_keys.get(key, 0) + 1
+        if len(self.hot_keys) > 2 * self.hot_key_limit:
+            self.hot_keys = dict(
+                heapq.nlargest(self.hot_key_limit, self.hot_keys.items(), key=lambda x: x[1])
+            )
 
     def get_hot_keys(self, top_n: int = 10) -> List[tuple]:
         """獲取熱點 keys"""
-        sorted_keys = sorted(self.hot_keys.items(), key=lambda x: x[1], reverse=True)
-        return sorted_keys[:top_n]
+        return heapq.nlargest(top_n, self.hot_keys.items(), key=lambda x: x[1])
 
     def clear_all(self):
         """清空所有緩存"""
-        self.local_cache.clear()
-        self.redis_simulator.clear()
-        self.database_simulator.clear()
+        self.local.clear()
+        for backend, _ in self._lower_tiers():
+            backend.clear()
         self.stats = {"local_hits": 0, "redis_hits": 0, "database_hits": 0, "misses": 0}
+        self.counters = dict.fromkeys(self.counters, 0)
+        self._get_latency = [0.0, 0.0]
         self.hot_keys.clear()
 
+    def close(self):
+        """關閉後端"""
+        for backend, _ in self._lower_tiers():
+            backend.close()
+
 
 # 使用範例
 async def main():
     """測試 Multi-Layer Cache"""
-    cache = MultiLayerCache()
+    cache = MultiLayerCache(l2=SQLiteBackend())
 
     print("\n=== 測試 Multi-Layer Cache ===\n")
 
     # 1. 設置緩存
-    await cache.set("namespace:platform-registry-service", {"data": "value1"})
-    await cache.set("namespace:platform-agent-service", {"data": "value2"})
-    await cache.set("namespace:platform-gateway-service", {"data": "value3"})
+    await cache.set("namespace:platform-registry-service", {"data": "value1"}, tags=["platform"])
+    await cache.set("namespace:platform-agent-service", {"data": "value2"}, tags=["platform"])
+    await cache.set("namespace:platform-gateway-service", {"data": "value3"}, tags=["platform"])
 
     # 2. 獲取緩存（應該命中）
     await cache.get("namespace:platform-registry-service")
@@ -310,7 +825,8 @@ async def main():
     await cache.get("namespace:nonexistent")
 
     # 4. 批量失效
-    await cache.invalidate("platform-registry")
+    count = await cache.invalidate("namespace:platform-registry")
+    print(f"🗑️  前綴失效: {count} 個條目")
 
     # 5. 獲取統計
     stats = cache.get_stats()
@@ -318,9 +834,10 @@ async def main():
     print(f"  總請求數: {stats['total_requests']}")
     print(f"  命中率: {stats['hit_rate']}")
     print(f"  Local 命中: {stats['local_hits']}")
-    print(f"  Redis 命中: {stats['redis_hits']}")
-    print(f"  Database 命中: {stats['database_hits']}")
+    print(f"  L2 命中: {stats['redis_hits']}")
+    print(f"  L3 命中: {stats['database_hits']}")
     print(f"  Misses: {stats['misses']}")
+    print(f"  平均延遲: {stats['avg_get_latency_ms']:.3f}ms")
 
     # 6. 熱點預熱
     print("\n=== 熱點預熱 ===")
@@ -334,6 +851,8 @@ async def main():
     for key, count in top_hot:
         print(f"  {key}: {count} 次")
 
+    cache.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -4,15 +4,26 @@ Platform Registry Manager
 Manages namespace registration, updates, and lifecycle operations with
 taxonomy-compliant naming and instant execution capabilities.
 
+Persistence:
+- registry.yaml is a snapshot; each mutation appends one JSON line to an
+  adjacent journal, which is replayed on load and folded into the snapshot
+  every ``compact_every`` records
+- Audit entries go to a separate size-rotated JSON-lines log instead of the
+  snapshot
+
 Compliance:
 - Taxonomy: Uses taxonomy-core for all naming operations
-- INSTANT: <100ms operations, async-first, aggressive caching
+- INSTANT: <100ms operations, async-first, indexed lookups
 """
 
 import asyncio
+import bisect
+import json
+import os
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set
 
 import yaml
 
@@ -38,6 +49,91 @@ except ImportError:
             return TaxonomyMapper.mapToAllFormats(entity)
 
 
+# libyaml bindings when available; snapshots of large registries are much faster
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+# Han, kana and hangul runs are not space-delimited; they are split into
+# CJK runs and indexed as unigrams plus bigrams
+_CJK_SPLIT = re.compile(
+    r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+)"
+)
+
+
+def _tokenize(text: str) -> Set[str]:
+    """Lowercase Unicode word tokens of a text (CJK runs as uni/bigrams)"""
+    tokens: Set[str] = set()
+    for word in _TOKEN_PATTERN.findall(text.lower()):
+        for i, part in enumerate(_CJK_SPLIT.split(word)):
+            if not part:
+                continue
+            if i % 2 == 0:
+                tokens.add(part)
+            else:
+                tokens.update(part)
+                tokens.update(part[j : j + 2] for j in range(len(part) - 1))
+    return tokens
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class RotatingAuditLog:
+    """
+    Append-only JSON-lines audit log rotated by size.
+
+    When the active file would exceed ``max_bytes`` it is renamed to
+    ``<name>.1`` (older files shift up) and at most ``backup_count`` rotated
+    files are kept.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one audit record"""
+        line = json.dumps(record, default=str) + "\n"
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and self._file.tell() + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line)
+        self._file.flush()
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.path.with_name(f"{self.path.name}.{index}")
+            if source.exists():
+                os.replace(source, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backup_count > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def read(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Read records from the active file (most recent last)"""
+        if not self.path.exists():
+            return []
+        if self._file is not None:
+            self._file.flush()
+        with open(self.path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        return records[-limit:] if limit else records
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
 class PlatformRegistryManager:
     """
     Registry manager for namespace modules.
@@ -45,34 +141,230 @@ class PlatformRegistryManager:
     Features:
     - Taxonomy-compliant naming
     - Async-first operations (<100ms)
-    - Aggressive caching
-    - Auto-recovery
-    - Audit trail
+    - O(1) journaled writes with periodic snapshot compaction
+    - Indexed lookups by id, canonical name, tag and description token
+    - Auto-recovery (journal replay)
+    - Rotating audit log
     """
 
-    def __init__(self, registry_path: str = "namespace_registry/registry.yaml"):
-        """Initialize registry manager"""
+    def __init__(
+        self,
+        registry_path: str = "namespace_registry/registry.yaml",
+        compact_every: int = 1000,
+        fsync: bool = False,
+        audit_max_bytes: int = 10 * 1024 * 1024,
+        audit_backup_count: int = 5,
+    ):
+        """
+        Initialize registry manager
+
+        Args:
+            registry_path: Registry snapshot (YAML)
+            compact_every: Journal records before the snapshot is rewritten
+            fsync: fsync the journal after every record
+            audit_max_bytes: Size at which the audit log is rotated
+            audit_backup_count: Rotated audit logs to keep
+        """
         self.registry_path = Path(registry_path)
+        self.journal_path = self.registry_path.with_name(f"{self.registry_path.stem}.journal.jsonl")
+        self.audit_log = RotatingAuditLog(
+            self.registry_path.with_name(f"{self.registry_path.stem}.audit.jsonl"),
+            max_bytes=audit_max_bytes,
+            backup_count=audit_backup_count,
+        )
+        self.compact_every = compact_every
+        self.fsync = fsync
         self.taxonomy = Taxonomy.getInstance()
-        self.cache = {}
         self.lock = asyncio.Lock()
 
+        # Indexes
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+        self._canonical: Dict[str, str] = {}
+        self._tags: Dict[str, Set[str]] = {}
+        self._tokens: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []  # sorted index tokens, for prefix matching
+        self._indexed_terms: Dict[str, tuple] = {}  # id -> (tags, tokens)
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+        self._journal = None
+        self._journal_records = 0
+
         # Load registry
         self._load_registry()
 
     def _load_registry(self) -> None:
-        """Load registry from YAML file"""
+        """Load the registry snapshot and replay the journal"""
         if self.registry_path.exists():
             with open(self.registry_path, "r") as f:
-                self.registry_data = yaml.safe_load(f)
+                self.registry_data = yaml.load(f, Loader=_YAML_LOADER)
         else:
             self.registry_data = {
                 "version": "1.0.0",
                 "registry_id": "platform-namespace-registry-v1",
                 "namespaces": [],
-                "audit_trail": [],
             }
 
+        for namespace in self.registry_data.pop("namespaces", None) or []:
+            self._index(namespace)
+
+        if self.journal_path.exists():
+            valid = 0
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    # A torn final write lacks its newline or does not parse
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        break
+                    self._apply(record)
+                    self._journal_records += 1
+                    valid += len(line)
+            # Cut the torn tail so the next record starts on its own line
+            if valid < self.journal_path.stat().st_size:
+                os.truncate(self.journal_path, valid)
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    def _index(self, namespace: Dict[str, Any]) -> None:
+        namespace_id = namespace["id"]
+        if namespace_id in self._namespaces:
+            self._unindex(namespace_id)
+        if namespace_id not in self._order:
+            self._order[namespace_id] = self._next_order
+            self._next_order += 1
+
+        self._namespaces[namespace_id] = namespace
+        if namespace.get("canonical_name"):
+            self._canonical[namespace["canonical_name"]] = namespace_id
+
+        metadata = namespace.get("metadata") or {}
+        tags = {tag.lower() for tag in metadata.get("tags") or []}
+        tokens = _tokenize(
+            " ".join(
+                [namespace.get("canonical_name", ""), metadata.get("description") or ""]
+                + sorted(tags)
+            )
+        )
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(namespace_id)
+        for token in tokens:
+            postings = self._tokens.get(token)
+            if postings is None:
+                postings = self._tokens[token] = set()
+                bisect.insort(self._vocabulary, token)
+            postings.add(namespace_id)
+        self._indexed_terms[namespace_id] = (tags, tokens)
+
+    def _unindex(self, namespace_id: str) -> Optional[Dict[str, Any]]:
+        namespace = self._namespaces.pop(namespace_id, None)
+        if namespace is None:
+            return None
+        if self._canonical.get(namespace.get("canonical_name")) == namespace_id:
+            del self._canonical[namespace["canonical_name"]]
+
+        tags, tokens = self._indexed_terms.pop(namespace_id)
+        for tag in tags:
+            self._tags[tag].discard(namespace_id)
+            if not self._tags[tag]:
+                del self._tags[tag]
+        for token in tokens:
+            self._tokens[token].discard(namespace_id)
+            if not self._tokens[token]:
+                del self._tokens[token]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+        return namespace
+
+    def _resolve(self, namespace_ref: str) -> Optional[str]:
+        if namespace_ref in self._namespaces:
+            return namespace_ref
+        return self._canonical.get(namespace_ref)
+
+    def _ordered(self, namespace_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Namespaces in registration order"""
+        return [
+            self._namespaces[namespace_id]
+            for namespace_id in sorted(namespace_ids, key=self._order.__getitem__)
+        ]
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        if record["op"] == "put":
+            self._index(record["namespace"])
+        elif record["op"] == "delete":
+            self._unindex(record["id"])
+            self._order.pop(record["id"], None)
+
+    async def _commit(self, record: Dict[str, Any]) -> None:
+        """Append a mutation to the journal; compact once it is long enough"""
+        if self._journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(record, default=str) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+        self._journal_records += 1
+        if self._journal_records >= self.compact_every:
+            await self._save_registry()
+
+    async def compact(self) -> None:
+        """Write a snapshot and truncate the journal"""
+        async with self.lock:
+            await self._save_registry()
+
+    async def _save_registry(self) -> None:
+        """Save registry snapshot to YAML file and truncate the journal"""
+        self.registry_data["updated_at"] = _timestamp()
+
+        # Move an inline audit trail from older snapshots into the audit log
+        for entry in self.registry_data.pop("audit_trail", None) or []:
+            self.audit_log.append(entry)
+
+        # Ensure directory exists
+        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
+
+        snapshot = dict(self.registry_data)
+        snapshot["namespaces"] = self._ordered(self._namespaces)
+        await asyncio.to_thread(self._write_snapshot, snapshot)
+
+        # Records already in the snapshot; replaying them again would be harmless
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "w"):
+            pass
+        self._journal_records = 0
+
+    def _write_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        tmp_path = self.registry_path.with_name(self.registry_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            yaml.dump(
+                snapshot, f, Dumper=_YAML_DUMPER, default_flow_style=False, sort_keys=False
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.registry_path)
+
+    def close(self) -> None:
+        """Close the journal and audit log"""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self.audit_log.close()
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+
     async def register_namespace(
         self, namespace_id: str, metadata: Dict[str, Any]
     ) -> bool:
@@ -109,19 +401,16 @@ class PlatformRegistryManager:
                 "version": entity["version"],
                 "status": "active",
                 "owner": metadata.get("owner", "unknown"),
-                "created_at": datetime.utcnow().isoformat() + "Z",
-                "updated_at": datetime.utcnow().isoformat() + "Z",
+                "created_at": _timestamp(),
+                "updated_at": _timestamp(),
                 "metadata": metadata,
                 "schema_ref": metadata.get("schema_ref"),
                 "dependencies": metadata.get("dependencies", []),
             }
 
             # Add to registry
-            self.registry_data["namespaces"].append(namespace_entry)
-
-            # Update cache
-            self.cache[namespace_id] = namespace_entry
-            self.cache[names["canonical"]] = namespace_entry
+            self._index(namespace_entry)
+            await self._commit({"op": "put", "namespace": namespace_entry})
 
             # Add audit entry
             self._add_audit_entry(
@@ -129,9 +418,6 @@ class PlatformRegistryManager:
                 {"namespace_id": namespace_id, "canonical_name": names["canonical"]},
             )
 
-            # Save registry
-            await self._save_registry()
-
             # Register in taxonomy
             if self.taxonomy:
                 self.taxonomy.register(
@@ -154,23 +440,10 @@ class PlatformRegistryManager:
         Returns:
             Namespace metadata or None
 
-        Performance: Target <50ms (cached)
+        Performance: O(1) index lookup
         """
-        # Check cache first
-        if namespace_ref in self.cache:
-            return self.cache[namespace_ref]
-
-        # Search in registry
-        for namespace in self.registry_data.get("namespaces", []):
-            if (
-                namespace["id"] == namespace_ref
-                or namespace.get("canonical_name") == namespace_ref
-            ):
-                # Update cache
-                self.cache[namespace_ref] = namespace
-                return namespace
-
-        return None
+        namespace_id = self._resolve(namespace_ref)
+        return self._namespaces[namespace_id] if namespace_id is not None else None
 
     async def list_namespaces(
         self, domain: Optional[str] = None, status: Optional[str] = None
@@ -187,7 +460,7 @@ class PlatformRegistryManager:
 
         Performance: Target <100ms
         """
-        namespaces = self.registry_data.get("namespaces", [])
+        namespaces = self._ordered(self._namespaces)
 
         # Apply filters
         if domain:
@@ -205,7 +478,7 @@ class PlatformRegistryManager:
         Update namespace metadata.
 
         Args:
-            namespace_id: Namespace ID
+            namespace_id: Namespace ID or canonical name
             updates: Fields to update
 
         Returns:
@@ -214,16 +487,19 @@ class PlatformRegistryManager:
         Performance: Target <100ms
         """
         async with self.lock:
-            namespace = await self.get_namespace(namespace_id)
-            if not namespace:
+            resolved = self._resolve(namespace_id)
+            if resolved is None:
                 return False
 
-            # Update fields
+            # Update fields (re-indexed under the possibly changed id/name/tags)
+            namespace = self._unindex(resolved)
             namespace.update(updates)
-            namespace["updated_at"] = datetime.utcnow().isoformat() + "Z"
-
-            # Clear cache
-            self.cache.clear()
+            namespace["updated_at"] = _timestamp()
+            if namespace["id"] != resolved:
+                self._order[namespace["id"]] = self._order.pop(resolved)
+                await self._commit({"op": "delete", "id": resolved})
+            self._index(namespace)
+            await self._commit({"op": "put", "namespace": namespace})
 
             # Add audit entry
             self._add_audit_entry(
@@ -231,9 +507,6 @@ class PlatformRegistryManager:
                 {"namespace_id": namespace_id, "updates": list(updates.keys())},
             )
 
-            # Save registry
-            await self._save_registry()
-
             return True
 
     async def deprecate_namespace(self, namespace_id: str, reason: str) -> bool:
@@ -254,7 +527,7 @@ class PlatformRegistryManager:
             {
                 "status": "deprecated",
                 "deprecation_reason": reason,
-                "deprecated_at": datetime.utcnow().isoformat() + "Z",
+                "deprecated_at": _timestamp(),
             },
         )
 
@@ -271,93 +544,80 @@ class PlatformRegistryManager:
         Performance: Target <100ms
         """
         async with self.lock:
-            namespaces = self.registry_data.get("namespaces", [])
-            original_count = len(namespaces)
-
-            # Remove namespace
-            self.registry_data["namespaces"] = [
-                n for n in namespaces if n["id"] != namespace_id
-            ]
-
-            if len(self.registry_data["namespaces"]) == original_count:
+            if namespace_id not in self._namespaces:
                 return False
 
-            # Clear cache
-            self.cache.clear()
+            # Remove namespace
+            self._apply({"op": "delete", "id": namespace_id})
+            await self._commit({"op": "delete", "id": namespace_id})
 
             # Add audit entry
             self._add_audit_entry("namespace_deleted", {"namespace_id": namespace_id})
 
-            # Save registry
-            await self._save_registry()
-
             return True
 
+    async def get_namespaces_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Namespaces carrying a tag (case-insensitive)"""
+        return self._ordered(self._tags.get(tag.lower(), ()))
+
     async def search_namespaces(self, query: str) -> List[Dict[str, Any]]:
         """
         Search namespaces by name, description, or tags.
 
+        Every token of the query must prefix-match a token of the canonical
+        name, description or tags (e.g. "mcp proto" matches a description
+        "MCP protocol implementation"). CJK text is matched through its
+        character bigrams, so "註冊" matches a description "命名空間註冊表".
+        A query without any word characters matches nothing.
+
         Args:
             query: Search query
 
         Returns:
             List of matching namespaces
 
-        Performance: Target <100ms
+        Performance: Inverted index, O(matching postings)
         """
-        query_lower = query.lower()
-        results = []
-
-        for namespace in self.registry_data.get("namespaces", []):
-            # Search in name
-            if query_lower in namespace.get("canonical_name", "").lower():
-                results.append(namespace)
-                continue
-
-            # Search in description
-            description = namespace.get("metadata", {}).get("description", "")
-            if query_lower in description.lower():
-                results.append(namespace)
-                continue
-
-            # Search in tags
-            tags = namespace.get("metadata", {}).get("tags", [])
-            if any(query_lower in tag.lower() for tag in tags):
-                results.append(namespace)
-
-        return results
+        tokens = _tokenize(query)
+        if not tokens:
+            return []
+
+        matches: Optional[Set[str]] = None
+        # Most selective (longest) tokens first, so intersections stay small
+        for token in sorted(tokens, key=len, reverse=True):
+            ids: Set[str] = set()
+            start = bisect.bisect_left(self._vocabulary, token)
+            for term in self._vocabulary[start:]:
+                if not term.startswith(token):
+                    break
+                ids |= self._tokens[term]
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+
+        return self._ordered(matches or ())
 
     def _add_audit_entry(self, action: str, details: Dict[str, Any]) -> None:
-        """Add entry to audit trail"""
-        if "audit_trail" not in self.registry_data:
-            self.registry_data["audit_trail"] = []
-
-        self.registry_data["audit_trail"].append(
+        """Add entry to audit log"""
+        self.audit_log.append(
             {
-                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "timestamp": _timestamp(),
                 "action": action,
                 "actor": "system",
                 "details": details,
             }
         )
 
-    async def _save_registry(self) -> None:
-        """Save registry to YAML file"""
-        self.registry_data["updated_at"] = datetime.utcnow().isoformat() + "Z"
-
-        # Ensure directory exists
-        self.registry_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Write to file
-        with open(self.registry_path, "w") as f:
-            yaml.dump(self.registry_data, f, default_flow_style=False, sort_keys=False)
+    def get_audit_trail(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recent audit entries from the active audit log"""
+        return self.audit_log.read(limit)
 
     def get_statistics(self) -> Dict[str, Any]:
         """Get registry statistics"""
-        namespaces = self.registry_data.get("namespaces", [])
+        namespaces = self._namespaces.values()
 
         return {
-            "total_namespaces": len(namespaces),
+            "total_namespaces": len(self._namespaces),
             "active_namespaces": len(
                 [n for n in namespaces if n.get("status") == "active"]
             ),
@@ -365,6 +625,9 @@ class PlatformRegistryManager:
                 [n for n in namespaces if n.get("status") == "deprecated"]
             ),
             "domains": list(set(n.get("domain") for n in namespaces)),
+            "tags": len(self._tags),
+            "index_tokens": len(self._vocabulary),
+            "journal_records": self._journal_records,
             "registry_version": self.registry_data.get("version"),
             "last_updated": self.registry_data.get("updated_at"),
         }
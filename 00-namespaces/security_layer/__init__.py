@@ -5,6 +5,6 @@ Security Layer - INSTANT 執行標準
 """
 
 from .encryption_manager import EncryptionManager
-from .key_management import KeyManagement, KeyMetadata
+from .key_management import KeyHandle, KeyManagement, KeyMetadata
 
-__all__ = ["EncryptionManager", "KeyManagement", "KeyMetadata"]
+__all__ = ["EncryptionManager", "KeyHandle", "KeyManagement", "KeyMetadata"]
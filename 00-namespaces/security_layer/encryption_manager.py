@@ -3,17 +3,79 @@ Encryption Manager - INSTANT 執行標準
 
 加密管理器
 延遲目標：<100ms (p99) 加密/解密
+
+- 小型數據：Fernet token（已是 URL-safe base64，不再二次編碼）
+- 大型數據：分塊串流加密 / 哈希，記憶體佔用與輸入大小無關
+- 批量：encrypt_many / hash_many 在執行緒池中執行（OpenSSL 與 hashlib
+  處理大緩衝區時釋放 GIL）
 """
 
+import asyncio
 import base64
 import hashlib
 import hmac
-import time
-from typing import Dict, Optional
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+
+from .key_management import KeyHandle, KeyManagement
+
+BytesLike = Union[bytes, bytearray, memoryview]
+Source = Union[BytesLike, BinaryIO]
+
+# 串流格式：
+#   header = MAGIC | nonce 前綴 (8 bytes) | 分塊大小 (uint32)
+#   frame  = 密文長度 (uint32) | AES-GCM(分塊)
+# 每塊 nonce = 前綴 | 分塊序號 (uint32)；AAD = header | 是否最後一塊，
+# 因此分塊重排、刪除或截斷都會導致解密失敗。
+STREAM_MAGIC = b"EMS1"
+_HEADER = struct.Struct(">4s8sI")
+_FRAME = struct.Struct(">I")
+_TAG_SIZE = 16
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _to_bytes(data: Union[str, BytesLike]) -> BytesLike:
+    return data.encode() if isinstance(data, str) else data
+
+
+def _iter_chunks(source: Source, chunk_size: int) -> Iterator[BytesLike]:
+    """按塊讀取來源；memoryview / bytes 以零拷貝切片"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast("B")
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset : offset + chunk_size]
+        return
+
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    readinto = getattr(source, "readinto", None)
+    while True:
+        if readinto is not None:
+            size = readinto(buffer)
+            if not size:
+                return
+            yield view[:size]
+        else:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+def _read_exact(source: BinaryIO, size: int) -> bytes:
+    data = source.read(size)
+    while len(data) < size:
+        more = source.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
 
 
 class EncryptionManager:
@@ -23,87 +85,137 @@ class EncryptionManager:
     核心特性：
     - 延遲 <100ms (p99)
     - 自動加密/解密
-    - 密鑰管理
+    - 串流加密 / 哈希（常數記憶體）
+    - 批量操作（執行緒池）
+    - 密鑰管理（KeyManagement 密碼器緩存）
     - 完全自治
     """
 
-    def __init__(self, master_key: str = None):
+    def __init__(
+        self,
+        master_key: str = None,
+        key_management: Optional[KeyManagement] = None,
+        max_workers: Optional[int] = None,
+    ):
         # 生成或使用主密鑰
         if master_key:
             self.master_key = master_key.encode()
         else:
             self.master_key = Fernet.generate_key()
 
-        # 初始化 Fernet
-        self.cipher = Fernet(self.master_key)
-
-        # 統計
-        self.stats = {"total_encryptions": 0, "total_decryptions": 0, "total_hashes": 0}
-
-    async def encrypt(self, data: str) -> str:
+        # 初始化密碼器（只建立一次）
+        self._master_handle = KeyHandle(self.master_key)
+        self.cipher = self._master_handle.fernet
+
+        # key_id 對應的密碼器由 KeyManagement 提供並緩存
+        self.key_management = key_management
+
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # 統計（批量與串流操作在執行緒池中更新，經 _count 加鎖）
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "total_encryptions": 0,
+            "total_decryptions": 0,
+            "total_hashes": 0,
+            "failed_decryptions": 0,
+            "bytes_encrypted": 0,
+            "bytes_decrypted": 0,
+            "bytes_hashed": 0,
+        }
+
+    def _count(self, **increments: int) -> None:
+        with self._stats_lock:
+            for name, amount in increments.items():
+                self.stats[name] += amount
+
+    def _handle(self, key_id: Optional[str]) -> KeyHandle:
+        if key_id is None:
+            return self._master_handle
+        handle = self.key_management.get_handle(key_id) if self.key_management else None
+        if handle is None:
+            raise KeyError(f"密鑰不可用: {key_id}")
+        return handle
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="encryption"
+            )
+        return self._executor
+
+    async def _run_batches(self, function, items: Sequence, *args) -> List:
+        """將 items 分批交給執行緒池，按原順序返回結果"""
+        if not items:
+            return []
+        batch_size = max(1, -(-len(items) // self.max_workers))
+        loop = asyncio.get_running_loop()
+        batches = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._get_executor(), function, items[i : i + batch_size], *args
+                )
+                for i in range(0, len(items), batch_size)
+            )
+        )
+        return [result for batch in batches for result in batch]
+
+    # ------------------------------------------------------------------
+    # 單筆操作
+    # ------------------------------------------------------------------
+
+    def _encrypt_one(self, data: Union[str, BytesLike], handle: KeyHandle) -> str:
+        payload = _to_bytes(data)
+        self._count(total_encryptions=1, bytes_encrypted=len(payload))
+        return handle.fernet.encrypt(bytes(payload)).decode()
+
+    async def encrypt(self, data: Union[str, BytesLike], key_id: Optional[str] = None) -> str:
         """
-        加密數據
+        加密數據，返回 Fernet token
 
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-        self.stats["total_encryptions"] += 1
-
-        # 加密
-        encrypted = self.cipher.encrypt(data.encode())
-
-        # Base64 編碼
-        encoded = base64.b64encode(encrypted).decode()
-
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ 加密完成，延遲: {latency:.2f}ms")
+        return self._encrypt_one(data, self._handle(key_id))
 
-        return encoded
-
-    async def decrypt(self, encrypted_data: str) -> Optional[str]:
+    async def decrypt(
+        self, encrypted_data: str, key_id: Optional[str] = None, as_bytes: bool = False
+    ) -> Optional[Union[str, bytes]]:
         """
         解密數據
 
+        同時接受舊版經二次 base64 編碼的 token。解密失敗返回 None。
+
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-        self.stats["total_decryptions"] += 1
+        self._count(total_decryptions=1)
 
         try:
-            # Base64 解碼
-            encrypted = base64.b64decode(encrypted_data.encode())
-
-            # 解密
-            decrypted = self.cipher.decrypt(encrypted)
-
-            # 解碼為字符串
-            result = decrypted.decode()
+            token = encrypted_data.encode()
+            # Fernet token 以版本位元組 0x80 開頭，編碼後為 "gA"
+            if not token.startswith(b"gA"):
+                token = base64.b64decode(token)
 
-            latency = (time.time() - start_time) * 1000
-            print(f"✅ 解密完成，延遲: {latency:.2f}ms")
+            decrypted = self._handle(key_id).fernet.decrypt(token)
+            self._count(bytes_decrypted=len(decrypted))
+            return decrypted if as_bytes else decrypted.decode()
 
-            return result
-
-        except Exception as e:
-            print(f"❌ 解密失敗: {e}")
+        except (InvalidToken, KeyError, ValueError):
+            self._count(failed_decryptions=1)
             return None
 
-    async def hash(self, data: str) -> str:
+    def _hash_one(self, data: Union[str, BytesLike], algorithm: str = "sha256") -> str:
+        payload = _to_bytes(data)
+        self._count(total_hashes=1, bytes_hashed=len(payload))
+        return hashlib.new(algorithm, payload).hexdigest()
+
+    async def hash(self, data: Union[str, BytesLike], algorithm: str = "sha256") -> str:
         """
         哈希數據
 
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
-        self.stats["total_hashes"] += 1
-
-        # SHA-256 哈希
-        hashed = hashlib.sha256(data.encode()).hexdigest()
-
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ 哈希完成，延遲: {latency:.2f}ms")
-
-        return hashed
+        return self._hash_one(data, algorithm)
 
     async def generate_key(self) -> str:
         """
@@ -111,33 +223,190 @@ class EncryptionManager:
 
         延遲目標：<100ms (p99)
         """
-        start_time = time.time()
+        return Fernet.generate_key().decode()
+
+    async def verify_hash(
+        self, data: Union[str, BytesLike], hash_value: str, algorithm: str = "sha256"
+    ) -> bool:
+        """
+        驗證哈希（常數時間比較）
 
-        key = Fernet.generate_key()
-        key_str = key.decode()
+        延遲目標：<100ms (p99)
+        """
+        computed_hash = await self.hash(data, algorithm)
+        return hmac.compare_digest(computed_hash, hash_value)
+
+    # ------------------------------------------------------------------
+    # 批量操作
+    # ------------------------------------------------------------------
+
+    def _encrypt_batch(self, items: Sequence[Union[str, BytesLike]], handle: KeyHandle) -> List[str]:
+        return [self._encrypt_one(item, handle) for item in items]
+
+    def _hash_batch(self, items: Sequence[Union[str, BytesLike]], algorithm: str) -> List[str]:
+        return [self._hash_one(item, algorithm) for item in items]
+
+    async def encrypt_many(
+        self, items: Sequence[Union[str, BytesLike]], key_id: Optional[str] = None
+    ) -> List[str]:
+        """批量加密，按輸入順序返回 token"""
+        return await self._run_batches(self._encrypt_batch, list(items), self._handle(key_id))
+
+    async def hash_many(
+        self, items: Sequence[Union[str, BytesLike]], algorithm: str = "sha256"
+    ) -> List[str]:
+        """批量哈希，按輸入順序返回十六進位摘要"""
+        return await self._run_batches(self._hash_batch, list(items), algorithm)
+
+    # ------------------------------------------------------------------
+    # 串流操作
+    # ------------------------------------------------------------------
+
+    def _encrypt_stream(
+        self, source: Source, destination: BinaryIO, handle: KeyHandle, chunk_size: int
+    ) -> int:
+        aead = handle.aead
+        header = _HEADER.pack(STREAM_MAGIC, os.urandom(8), chunk_size)
+        nonce_prefix = header[4:12]
+        destination.write(header)
+        written = len(header)
+
+        def write_frame(index: int, chunk: BytesLike, final: bool) -> int:
+            nonce = nonce_prefix + struct.pack(">I", index)
+            ciphertext = aead.encrypt(nonce, bytes(chunk), header + (b"\x01" if final else b"\x00"))
+            destination.write(_FRAME.pack(len(ciphertext)))
+            destination.write(ciphertext)
+            return _FRAME.size + len(ciphertext)
+
+        # 延後一塊寫出，才能知道哪一塊是最後一塊
+        index = 0
+        plaintext = 0
+        pending: Optional[bytes] = None
+        for chunk in _iter_chunks(source, chunk_size):
+            if pending is not None:
+                written += write_frame(index, pending, final=False)
+                index += 1
+            pending = bytes(chunk)
+            plaintext += len(pending)
+        written += write_frame(index, pending or b"", final=True)
+
+        self._count(total_encryptions=1, bytes_encrypted=plaintext)
+        return written
+
+    def _decrypt_stream(self, source: BinaryIO, destination: BinaryIO, handle: KeyHandle) -> int:
+        aead = handle.aead
+        header = _read_exact(source, _HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError("串流標頭不完整")
+        magic, nonce_prefix, chunk_size = _HEADER.unpack(header)
+        if magic != STREAM_MAGIC:
+            raise ValueError("不是加密串流")
+
+        def read_frame() -> Optional[bytes]:
+            length = _read_exact(source, _FRAME.size)
+            if not length:
+                return None
+            if len(length) < _FRAME.size:
+                raise ValueError("串流已截斷")
+            (size,) = _FRAME.unpack(length)
+            if size > chunk_size + _TAG_SIZE:
+                raise ValueError("串流分塊長度無效")
+            frame = _read_exact(source, size)
+            if len(frame) < size:
+                raise ValueError("串流已截斷")
+            return frame
+
+        written = 0
+        index = 0
+        frame = read_frame()
+        if frame is None:
+            raise ValueError("串流已截斷")
+        while frame is not None:
+            following = read_frame()
+            final = following is None
+            nonce = nonce_prefix + struct.pack(">I", index)
+            try:
+                chunk = aead.decrypt(nonce, frame, header + (b"\x01" if final else b"\x00"))
+            except InvalidTag:
+                raise ValueError(f"串流分塊 {index} 驗證失敗") from None
+            destination.write(chunk)
+            written += len(chunk)
+            index += 1
+            frame = following
+
+        self._count(total_decryptions=1, bytes_decrypted=written)
+        return written
+
+    def _hash_stream(self, source: Source, algorithm: str, chunk_size: int) -> str:
+        digest = hashlib.new(algorithm)
+        hashed = 0
+        for chunk in _iter_chunks(source, chunk_size):
+            digest.update(chunk)
+            hashed += len(chunk)
+        self._count(total_hashes=1, bytes_hashed=hashed)
+        return digest.hexdigest()
+
+    async def encrypt_stream(
+        self,
+        source: Source,
+        destination: BinaryIO,
+        key_id: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> int:
+        """
+        分塊串流加密
 
-        latency = (time.time() - start_time) * 1000
-        print(f"✅ 密鑰生成完成，延遲: {latency:.2f}ms")
+        Args:
+            source: 可讀的二進位檔案物件，或 bytes / memoryview
+            destination: 可寫的二進位檔案物件
+            key_id: KeyManagement 中的密鑰，預設使用主密鑰
+            chunk_size: 分塊大小（記憶體佔用約為兩個分塊）
 
-        return key_str
+        Returns:
+            寫入的位元組數
+        """
+        return await asyncio.to_thread(
+            self._encrypt_stream, source, destination, self._handle(key_id), chunk_size
+        )
 
-    async def verify_hash(self, data: str, hash_value: str) -> bool:
+    async def decrypt_stream(
+        self, source: BinaryIO, destination: BinaryIO, key_id: Optional[str] = None
+    ) -> int:
         """
-        驗證哈希
+        分塊串流解密
 
-        延遲目標：<100ms (p99)
+        分塊在驗證後才寫出；失敗時拋出 ValueError，此時已寫出的內容應丟棄。
+
+        Returns:
+            寫入的明文位元組數
         """
-        computed_hash = await self.hash(data)
-        return computed_hash == hash_value
+        return await asyncio.to_thread(
+            self._decrypt_stream, source, destination, self._handle(key_id)
+        )
+
+    async def hash_stream(
+        self, source: Source, algorithm: str = "sha256", chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> str:
+        """分塊串流哈希，返回十六進位摘要"""
+        return await asyncio.to_thread(self._hash_stream, source, algorithm, chunk_size)
 
     async def get_stats(self) -> Dict[str, Any]:
         """獲取統計信息"""
-        return self.stats.copy()
+        with self._stats_lock:
+            return self.stats.copy()
+
+    def close(self) -> None:
+        """關閉執行緒池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
 
 
 # 使用範例
 async def main():
     """測試 Encryption Manager"""
+    import io
+
     encryption = EncryptionManager()
 
     print("\n=== 測試 Encryption Manager ===\n")
@@ -168,15 +437,27 @@ async def main():
     key = await encryption.generate_key()
     print(f"\n✅ 生成的密鑰: {key[:50]}...")
 
-    # 6. 獲取統計
+    # 6. 串流加密
+    payload = os.urandom(5 * 1024 * 1024)
+    sealed, opened = io.BytesIO(), io.BytesIO()
+    await encryption.encrypt_stream(memoryview(payload), sealed)
+    sealed.seek(0)
+    await encryption.decrypt_stream(sealed, opened)
+    print(f"\n✅ 串流加解密: {opened.getvalue() == payload}")
+
+    # 7. 批量哈希
+    digests = await encryption.hash_many([f"item-{i}" for i in range(1000)])
+    print(f"\n✅ 批量哈希: {len(digests)} 個")
+
+    # 8. 獲取統計
     stats = await encryption.get_stats()
     print(f"\n📊 統計信息:")
     print(f"  總加密次數: {stats['total_encryptions']}")
     print(f"  總解密次數: {stats['total_decryptions']}")
     print(f"  總哈希次數: {stats['total_hashes']}")
 
+    encryption.close()
 
-if __name__ == "__main__":
-    import asyncio
 
+if __name__ == "__main__":
     asyncio.run(main())
@@ -5,11 +5,18 @@ Key Management - INSTANT 執行標準
 延遲目標：<100ms (p99) 密鑰操作
 """
 
+import base64
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+# 串流加密密鑰的 HKDF 派生標籤
+STREAM_KEY_INFO = b"security-layer-stream-aesgcm-v1"
 
 
 class KeyMetadata:
@@ -28,6 +35,29 @@ class KeyMetadata:
         self.status = status
 
 
+class KeyHandle:
+    """
+    已建立的密碼器
+
+    Fernet 與串流用的 AES-GCM（由同一密鑰經 HKDF 派生）只建立一次，
+    之後的加解密直接複用。
+    """
+
+    def __init__(self, key: bytes):
+        self.key = key
+        self.fernet = Fernet(key)
+        self._aead: Optional[AESGCM] = None
+
+    @property
+    def aead(self) -> AESGCM:
+        if self._aead is None:
+            stream_key = HKDF(
+                algorithm=hashes.SHA256(), length=32, salt=None, info=STREAM_KEY_INFO
+            ).derive(base64.urlsafe_b64decode(self.key))
+            self._aead = AESGCM(stream_key)
+        return self._aead
+
+
 class KeyManagement:
     """
     Key Management - INSTANT 模式
@@ -36,6 +66,7 @@ class KeyManagement:
     - 延遲 <100ms (p99)
     - 自動密鑰生成
     - 密鑰輪換
+    - 密碼器緩存（get_handle）
     - 完全自治
     """
 
@@ -44,6 +75,9 @@ class KeyManagement:
         self.keys: Dict[str, bytes] = {}
         self.key_metadata: Dict[str, KeyMetadata] = {}
 
+        # 密碼器緩存（密鑰變更時失效）
+        self._handles: Dict[str, KeyHandle] = {}
+
         # 統計
         self.stats = {
             "total_keys_created": 0,
@@ -69,6 +103,7 @@ class KeyManagement:
 
         # 存儲密鑰
         self.keys[key_id] = key
+        self._handles.pop(key_id, None)
         self.key_metadata[key_id] = KeyMetadata(
             key_id=key_id,
             created_at=datetime.now(),
@@ -111,6 +146,24 @@ class KeyManagement:
 
         return self.keys[key_id]
 
+    def get_handle(self, key_id: str) -> Optional[KeyHandle]:
+        """
+        獲取密鑰的密碼器（緩存）
+
+        與 get_key 相同，密鑰不存在、過期或非 active 時返回 None。
+        """
+        metadata = self.key_metadata.get(key_id)
+        if metadata is None or metadata.status != "active":
+            return None
+        if metadata.expires_at and datetime.now() > metadata.expires_at:
+            self._handles.pop(key_id, None)
+            return None
+
+        handle = self._handles.get(key_id)
+        if handle is None:
+            handle = self._handles[key_id] = KeyHandle(self.keys[key_id])
+        return handle
+
     async def rotate_key(self, key_id: str, ttl_hours: int = 24) -> Optional[str]:
         """
         輪換密鑰
@@ -125,6 +178,7 @@ class KeyManagement:
 
         # 標記舊密鑰為已過期
         self.key_metadata[key_id].status = "expired"
+        self._handles.pop(key_id, None)
 
         # 創建新密鑰
         new_key = await self.create_key(key_id, ttl_hours)
@@ -151,6 +205,7 @@ class KeyManagement:
         # 刪除密鑰
         del self.keys[key_id]
         del self.key_metadata[key_id]
+        self._handles.pop(key_id, None)
 
         self.stats["total_keys_deleted"] += 1
 
@@ -31,6 +31,8 @@ def pytest_pyfunc_call(pyfuncitem):
     """Minimal async test runner without external plugins."""
     test_obj = pyfuncitem.obj
     if inspect.iscoroutinefunction(test_obj):
-        asyncio.run(test_obj(**pyfuncitem.funcargs))
+        # funcargs also holds fixtures pulled in indirectly (e.g. tmp_path_factory)
+        argnames = pyfuncitem._fixtureinfo.argnames
+        asyncio.run(test_obj(**{name: pyfuncitem.funcargs[name] for name in argnames}))
         return True
     return None
@@ -0,0 +1,223 @@
+"""
+Unit Tests for Encryption Manager - INSTANT 模式
+
+使用真實的 cryptography 後端驗證串流格式、舊版 token 與密鑰句柄
+"""
+
+import base64
+import hashlib
+import io
+import os
+
+import pytest
+
+pytest.importorskip("cryptography")
+
+from security_layer.encryption_manager import (  # noqa: E402
+    _FRAME,
+    _HEADER,
+    STREAM_MAGIC,
+    EncryptionManager,
+)
+from security_layer.key_management import KeyManagement  # noqa: E402
+
+
+class ReadOnly:
+    """只有 read() 的來源（無 readinto）"""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._buffer.read(min(size, 3) if size > 0 else size)
+
+
+def _frames(sealed):
+    """拆出串流的標頭與各分塊（含長度前綴）"""
+    header, offset, frames = sealed[: _HEADER.size], _HEADER.size, []
+    while offset < len(sealed):
+        (size,) = _FRAME.unpack_from(sealed, offset)
+        frames.append(sealed[offset : offset + _FRAME.size + size])
+        offset += _FRAME.size + size
+    return header, frames
+
+
+async def _seal(manager, payload, chunk_size, key_id=None):
+    destination = io.BytesIO()
+    written = await manager.encrypt_stream(payload, destination, key_id, chunk_size=chunk_size)
+    assert written == len(destination.getvalue())
+    return destination.getvalue()
+
+
+async def _open(manager, sealed, key_id=None):
+    destination = io.BytesIO()
+    await manager.decrypt_stream(io.BytesIO(sealed), destination, key_id)
+    return destination.getvalue()
+
+
+class TestTokens:
+    """測試 Fernet token"""
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self):
+        manager = EncryptionManager()
+        token = await manager.encrypt("secret")
+
+        assert token.startswith("gA")
+        assert await manager.decrypt(token) == "secret"
+        assert await manager.decrypt(token, as_bytes=True) == b"secret"
+        binary = await manager.encrypt(memoryview(b"\x00\xff"))
+        assert await manager.decrypt(binary, as_bytes=True) == b"\x00\xff"
+
+    @pytest.mark.asyncio
+    async def test_legacy_double_encoded_token(self):
+        manager = EncryptionManager()
+        legacy = base64.b64encode(manager.cipher.encrypt(b"old data")).decode()
+
+        assert not legacy.startswith("gA")
+        assert await manager.decrypt(legacy) == "old data"
+
+    @pytest.mark.asyncio
+    async def test_invalid_token_returns_none(self):
+        manager = EncryptionManager()
+        other = EncryptionManager()
+        token = await other.encrypt("secret")
+
+        assert await manager.decrypt(token) is None
+        assert await manager.decrypt("not a token") is None
+        stats = await manager.get_stats()
+        assert stats["failed_decryptions"] == 2
+        assert stats["total_decryptions"] == 2
+
+    @pytest.mark.asyncio
+    async def test_master_key_is_reusable(self):
+        key = await EncryptionManager().generate_key()
+        token = await EncryptionManager(master_key=key).encrypt("shared")
+
+        assert await EncryptionManager(master_key=key).decrypt(token) == "shared"
+
+
+class TestKeyHandles:
+    """測試 KeyManagement 密鑰句柄"""
+
+    @pytest.mark.asyncio
+    async def test_key_id_encryption_and_rotation(self):
+        keys = KeyManagement()
+        await keys.create_key("tenant")
+        manager = EncryptionManager(key_management=keys)
+
+        token = await manager.encrypt("data", key_id="tenant")
+        assert await manager.decrypt(token, key_id="tenant") == "data"
+        assert await manager.decrypt(token) is None  # 主密鑰無法解密
+        assert keys.get_handle("tenant") is keys.get_handle("tenant")
+
+        await keys.rotate_key("tenant")
+        assert await manager.decrypt(token, key_id="tenant") is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_key_id(self):
+        manager = EncryptionManager(key_management=KeyManagement())
+
+        with pytest.raises(KeyError):
+            await manager.encrypt("data", key_id="missing")
+        assert await manager.decrypt("gAAAA", key_id="missing") is None
+
+    @pytest.mark.asyncio
+    async def test_stream_with_key_id(self):
+        keys = KeyManagement()
+        await keys.create_key("tenant")
+        manager = EncryptionManager(key_management=keys)
+        payload = os.urandom(1000)
+
+        sealed = await _seal(manager, payload, 256, key_id="tenant")
+
+        assert await _open(manager, sealed, key_id="tenant") == payload
+        with pytest.raises(ValueError):
+            await _open(manager, sealed)
+
+
+class TestStreamFraming:
+    """測試串流格式"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("size", [0, 1, 255, 256, 257, 1024, 5000])
+    async def test_round_trip_sizes(self, size):
+        manager = EncryptionManager()
+        payload = os.urandom(size)
+
+        sealed = await _seal(manager, payload, 256)
+
+        header, frames = _frames(sealed)
+        magic, _, chunk_size = _HEADER.unpack(header)
+        assert (magic, chunk_size) == (STREAM_MAGIC, 256)
+        # 空輸入也有一個（空的）最後分塊
+        assert len(frames) == max(1, -(-size // 256))
+        assert await _open(manager, sealed) == payload
+
+    @pytest.mark.asyncio
+    async def test_file_sources(self, tmp_path):
+        manager = EncryptionManager()
+        payload = os.urandom(3000)
+        path = tmp_path / "plain.bin"
+        path.write_bytes(payload)
+
+        with open(path, "rb") as f:
+            sealed = await _seal(manager, f, 512)
+        assert await _open(manager, sealed) == payload
+
+        sealed = await _seal(manager, ReadOnly(payload), 512)
+        assert await _open(manager, sealed) == payload
+
+    @pytest.mark.asyncio
+    async def test_tampering_is_detected(self):
+        manager = EncryptionManager()
+        sealed = await _seal(manager, os.urandom(1000), 256)
+        header, frames = _frames(sealed)
+
+        flipped = bytearray(sealed)
+        flipped[_HEADER.size + _FRAME.size + 3] ^= 0x01
+        truncated = header + b"".join(frames[:-1])
+        reordered = header + frames[1] + frames[0] + b"".join(frames[2:])
+        dropped = header + frames[0] + b"".join(frames[2:])
+        extended = sealed + frames[-1]
+        bad_header = b"XXXX" + sealed[4:]
+
+        for corrupted in [bytes(flipped), truncated, reordered, dropped, extended, bad_header]:
+            with pytest.raises(ValueError):
+                await _open(manager, corrupted)
+        with pytest.raises(ValueError):
+            await _open(manager, header)
+        with pytest.raises(ValueError):
+            await _open(manager, sealed[: len(sealed) - 5])
+
+    @pytest.mark.asyncio
+    async def test_hash_stream_matches_hashlib(self):
+        manager = EncryptionManager()
+        payload = os.urandom(10_000)
+
+        digest = await manager.hash_stream(io.BytesIO(payload), chunk_size=1000)
+
+        assert digest == hashlib.sha256(payload).hexdigest()
+        assert await manager.verify_hash(payload, digest)
+        stats = await manager.get_stats()
+        assert stats["bytes_hashed"] == 2 * len(payload)
+
+
+class TestBatches:
+    """測試批量操作與統計"""
+
+    @pytest.mark.asyncio
+    async def test_batches_keep_order_and_count_exactly(self):
+        manager = EncryptionManager(max_workers=8)
+        items = [f"item-{i}" for i in range(2000)]
+
+        tokens = await manager.encrypt_many(items)
+        digests = await manager.hash_many(items, "sha1")
+
+        assert [await manager.decrypt(t) for t in tokens[:20]] == items[:20]
+        assert digests == [hashlib.sha1(i.encode()).hexdigest() for i in items]
+        stats = await manager.get_stats()
+        assert stats["total_encryptions"] == 2000
+        assert stats["total_hashes"] == 2000
+        assert stats["bytes_encrypted"] == sum(len(i) for i in items)
+        manager.close()
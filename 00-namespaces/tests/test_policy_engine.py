@@ -0,0 +1,246 @@
+"""
+Unit Tests for Policy Engine - INSTANT 模式
+
+驗證編譯索引評估與逐條規則評估結果一致
+"""
+
+import importlib.util
+import random
+from pathlib import Path
+
+import pytest
+
+# governance_layer/__init__ 會載入其他模組，直接按路徑載入 policy_engine
+_spec = importlib.util.spec_from_file_location(
+    "policy_engine",
+    Path(__file__).resolve().parents[1] / "governance_layer" / "policy_engine.py",
+)
+policy_engine = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(policy_engine)
+
+PolicyAction = policy_engine.PolicyAction
+PolicyEngine = policy_engine.PolicyEngine
+
+
+def reference_evaluate(engine, context, policy_ids=None, stop_on_deny=False):
+    """逐條規則的參考評估（原實作語義，not_exists 在欄位缺失時匹配）"""
+
+    def rule_matches(rule):
+        field, op, value = rule.get("field"), rule.get("operator"), rule.get("value")
+        if op == "not_exists":
+            return field not in context
+        if field not in context:
+            return False
+        actual = context[field]
+        return {
+            "equals": lambda: actual == value,
+            "not_equals": lambda: actual != value,
+            "contains": lambda: value in str(actual),
+            "not_contains": lambda: value not in str(actual),
+            "in": lambda: actual in value,
+            "not_in": lambda: actual not in value,
+            "greater_than": lambda: actual > value,
+            "less_than": lambda: actual < value,
+            "exists": lambda: True,
+        }.get(op, lambda: False)()
+
+    if policy_ids:
+        policies = [engine.policies[pid] for pid in policy_ids if pid in engine.policies]
+    else:
+        policies = list(engine.policies.values())
+    policies.sort(key=lambda p: p.priority, reverse=True)
+
+    matched = []
+    for policy in policies:
+        if policy.enabled and all(rule_matches(rule) for rule in policy.rules):
+            matched.append(policy.id)
+            if stop_on_deny and policy.action == PolicyAction.DENY:
+                break
+    return matched
+
+
+FIELDS = ["action", "user", "level", "region"]
+VALUES = {
+    "action": ["read", "write", "delete"],
+    "user": ["alice", "bob", "carol"],
+    "level": [1, 5, 10],
+    "region": ["eu", "us"],
+}
+OPERATORS = ["equals", "not_equals", "in", "not_in", "exists", "not_exists", "contains"]
+
+
+def random_rule(rng):
+    field = rng.choice(FIELDS)
+    op = rng.choice(OPERATORS + (["greater_than", "less_than"] if field == "level" else []))
+    if op in ("in", "not_in"):
+        value = rng.sample(VALUES[field], 2)
+    elif op == "contains":
+        value = str(rng.choice(VALUES[field]))[:2]
+    else:
+        value = rng.choice(VALUES[field])
+    return {"field": field, "operator": op, "value": value}
+
+
+def random_context(rng):
+    return {f: rng.choice(VALUES[f]) for f in FIELDS if rng.random() < 0.8}
+
+
+async def register(engine, policy_id, rules, action=PolicyAction.ALLOW, priority=100):
+    await engine.register_policy(policy_id, policy_id, "", rules, action, priority)
+
+
+def ids(results):
+    return [r.policy_id for r in results]
+
+
+class TestEquivalence:
+    """測試與逐條規則評估一致"""
+
+    @pytest.mark.asyncio
+    async def test_matches_reference_evaluator(self):
+        rng = random.Random(7)
+        engine = PolicyEngine()
+        actions = list(PolicyAction)
+        for i in range(60):
+            rules = [random_rule(rng) for _ in range(rng.randint(1, 3))]
+            await register(engine, f"p{i}", rules, rng.choice(actions), rng.choice([10, 50, 100]))
+        # 重新註冊既有政策會替換其規則與優先級
+        for i in range(0, 60, 7):
+            await register(engine, f"p{i}", [random_rule(rng)], PolicyAction.DENY, 75)
+        for i in range(0, 60, 11):
+            await engine.disable_policy(f"p{i}")
+
+        for _ in range(300):
+            context = random_context(rng)
+            stop = rng.random() < 0.5
+            expected = reference_evaluate(engine, context, stop_on_deny=stop)
+            assert ids(await engine.evaluate(context, stop_on_deny=stop)) == expected
+            subset = [f"p{i}" for i in rng.sample(range(60), 10)]
+            assert ids(await engine.evaluate(context, subset)) == reference_evaluate(
+                engine, context, subset
+            )
+
+    @pytest.mark.asyncio
+    async def test_same_priority_keeps_registration_order(self):
+        engine = PolicyEngine()
+        rule = [{"field": "user", "operator": "exists"}]
+        for name in ["c", "a", "b"]:
+            await register(engine, name, rule)
+        await register(engine, "top", rule, priority=200)
+        await register(engine, "a", rule)  # 重新註冊不改變原順序
+
+        assert ids(await engine.evaluate({"user": "x"})) == ["top", "c", "a", "b"]
+
+
+class TestOperators:
+    """測試個別操作符語義"""
+
+    @pytest.mark.asyncio
+    async def test_not_exists(self):
+        engine = PolicyEngine()
+        await register(engine, "anon", [{"field": "user", "operator": "not_exists"}])
+        await register(
+            engine,
+            "anon-read",
+            [
+                {"field": "user", "operator": "not_exists"},
+                {"field": "action", "operator": "equals", "value": "read"},
+            ],
+        )
+
+        assert ids(await engine.evaluate({"action": "read"})) == ["anon", "anon-read"]
+        assert ids(await engine.evaluate({"action": "write"})) == ["anon"]
+        assert ids(await engine.evaluate({"user": "alice", "action": "read"})) == []
+
+    @pytest.mark.asyncio
+    async def test_incomparable_values_do_not_match(self):
+        engine = PolicyEngine()
+        await register(engine, "big", [{"field": "level", "operator": "greater_than", "value": 5}])
+
+        assert ids(await engine.evaluate({"level": "high"})) == []
+        assert ids(await engine.evaluate({"level": 9})) == ["big"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_operator_never_matches(self):
+        engine = PolicyEngine()
+        await register(engine, "odd", [{"field": "user", "operator": "matches", "value": "a"}])
+
+        assert ids(await engine.evaluate({"user": "a"})) == []
+
+
+class TestStopOnDeny:
+    """測試拒絕短路"""
+
+    @pytest.mark.asyncio
+    async def test_stop_on_deny(self):
+        engine = PolicyEngine()
+        rule = [{"field": "action", "operator": "equals", "value": "delete"}]
+        await register(engine, "audit", rule, PolicyAction.AUDIT, priority=300)
+        await register(engine, "deny", rule, PolicyAction.DENY, priority=200)
+        await register(engine, "allow", rule, PolicyAction.ALLOW, priority=100)
+
+        context = {"action": "delete"}
+        assert ids(await engine.evaluate(context)) == ["audit", "deny", "allow"]
+        assert ids(await engine.evaluate(context, stop_on_deny=True)) == ["audit", "deny"]
+        assert not await engine.check_permission("delete", "r", "u")
+        assert engine.stats["denies"] == 3
+
+
+class TestDecisionCache:
+    """測試決策緩存失效"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_and_invalidation(self):
+        engine = PolicyEngine()
+        await register(engine, "p", [{"field": "user", "operator": "equals", "value": "alice"}])
+        context = {"user": "alice"}
+
+        assert ids(await engine.evaluate(context)) == ["p"]
+        assert ids(await engine.evaluate(context)) == ["p"]
+        assert engine.stats["decision_cache_hits"] == 1
+
+        await engine.disable_policy("p")
+        assert ids(await engine.evaluate(context)) == []
+        await engine.enable_policy("p")
+        assert ids(await engine.evaluate(context)) == ["p"]
+
+        await register(engine, "q", [{"field": "user", "operator": "exists"}], priority=500)
+        assert ids(await engine.evaluate(context)) == ["q", "p"]
+        assert engine.stats["decision_cache_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unhashable_context_is_not_cached(self):
+        engine = PolicyEngine()
+        await register(engine, "p", [{"field": "tags", "operator": "contains", "value": "x"}])
+
+        for _ in range(2):
+            assert ids(await engine.evaluate({"tags": ["x"]})) == ["p"]
+        assert engine.stats["decision_cache_hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_size_is_bounded(self):
+        engine = PolicyEngine(decision_cache_size=4)
+        await register(engine, "p", [{"field": "n", "operator": "exists"}])
+
+        for n in range(10):
+            await engine.evaluate({"n": n})
+
+        assert len(engine._decisions) == 4
+
+
+class TestEvaluateMany:
+    """測試批量評估"""
+
+    @pytest.mark.asyncio
+    async def test_evaluate_many_matches_evaluate(self):
+        rng = random.Random(3)
+        engine = PolicyEngine()
+        for i in range(20):
+            await register(engine, f"p{i}", [random_rule(rng)], rng.choice(list(PolicyAction)))
+        contexts = [random_context(rng) for _ in range(30)]
+
+        batch = await engine.evaluate_many(contexts, stop_on_deny=True)
+
+        assert len(batch) == len(contexts)
+        for context, results in zip(contexts, batch, strict=True):
+            assert ids(results) == ids(await engine.evaluate(context, stop_on_deny=True))
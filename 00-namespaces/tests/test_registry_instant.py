@@ -10,7 +10,7 @@ import time
 from datetime import datetime
 
 import pytest
-from namespace_registry.cache import CacheLevel, MultiLayerCache
+from namespace_registry.cache import CacheEntry, CacheLevel, MultiLayerCache, SQLiteBackend
 from namespace_registry.registry_instant import RegistryManagerInstant
 from namespace_registry.schema_validator import SchemaValidationStatus, SchemaValidator
 from namespace_registry.validator import RegistryValidator, ValidationStatus
@@ -164,6 +164,123 @@ class TestMultiLayerCache:
         assert result is not None
         assert latency < 50  # <50ms (p99)
 
+    @pytest.mark.asyncio
+    async def test_cache_bounded_lru(self):
+        """測試容量上限與 LRU 淘汰"""
+        cache = MultiLayerCache(max_entries=4, shards=1)
+        for i in range(4):
+            await cache.set(f"key{i}", i)
+        await cache.get("key0")  # key0 變為最近使用
+        await cache.set("key4", 4)
+
+        assert await cache.get("key1") is None
+        assert await cache.get("key0") == 0
+        assert cache.get_stats()["local_cache_size"] == 4
+        assert cache.get_stats()["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_invalidate_tag(self, cache):
+        """測試標籤失效"""
+        await cache.set("a", 1, tags=["team-x"])
+        await cache.set("b", 2, tags=["team-x", "team-y"])
+        await cache.set("c", 3, tags=["team-y"])
+
+        assert await cache.invalidate_tag("team-x") == 2
+        assert await cache.get("b") is None
+        assert await cache.get("c") == 3
+
+    @pytest.mark.asyncio
+    async def test_cache_l2_backfill(self):
+        """測試 L2 命中後回填 Local"""
+        l2 = SQLiteBackend()
+        cache = MultiLayerCache(l2=l2)
+        await cache.set("namespace:a", {"data": "value"}, tags=["ns"])
+        cache.local.clear()
+
+        assert await cache.get("namespace:a") == {"data": "value"}
+        assert await cache.get("namespace:a") == {"data": "value"}
+        stats = cache.get_stats()
+        assert stats["redis_hits"] == 1
+        assert stats["local_hits"] == 1
+
+        assert await cache.invalidate("namespace:") == 1
+        assert len(l2) == 0
+        cache.close()
+
+    def test_sqlite_purge_counts_entries(self):
+        """測試 purge_expired 返回條目數（不含標籤列）"""
+        l2 = SQLiteBackend()
+        past = datetime(2000, 1, 1)
+        for key in ("a", "b"):
+            l2.set(CacheEntry(key, 1, CacheLevel.REDIS, past, ttl=1, tags=("x", "y")))
+        l2.set(CacheEntry("c", 1, CacheLevel.REDIS, datetime.now(), tags=("x",)))
+
+        assert l2.purge_expired() == 2
+        assert len(l2) == 1
+        assert l2.delete_tag("x") == ["c"]
+        l2.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_single_flight(self, cache):
+        """測試並發未命中只載入一次"""
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"data": "loaded"}
+
+        results = await asyncio.gather(
+            *(cache.get_or_load("slow-key", loader) for _ in range(5))
+        )
+
+        assert all(r == {"data": "loaded"} for r in results)
+        assert len(calls) == 1
+        assert cache.get_stats()["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_cache_single_flight_survives_first_caller_cancel(self, cache):
+        """測試第一個呼叫方被取消時，等待中的呼叫方仍取得載入結果"""
+        release = asyncio.Event()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await release.wait()
+            return "value"
+
+        first = asyncio.create_task(cache.get_or_load("key", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load("key", loader))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert len(calls) == 1
+        assert await cache.get("key") == "value"
+
+    @pytest.mark.asyncio
+    async def test_cache_single_flight_cancelled_by_last_caller(self, cache):
+        """測試最後一個等待者離開時取消載入，之後可重新載入"""
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.Event().wait()
+
+        caller = asyncio.create_task(cache.get_or_load("key", hang))
+        await started.wait()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        assert await cache.get_or_load("key", lambda: "fresh") == "fresh"
+
 
 class TestSchemaValidator:
     """測試 Schema Validator"""
@@ -0,0 +1,171 @@
+"""
+Unit Tests for PlatformRegistryManager - 快照 + 日誌持久化
+
+驗證日誌重放、壓縮與撕裂寫入的復原
+"""
+
+import pytest
+from namespace_registry.registry_manager import PlatformRegistryManager
+
+
+@pytest.fixture
+def registry_path(tmp_path):
+    return tmp_path / "registry.yaml"
+
+
+def _open(path, **kwargs):
+    return PlatformRegistryManager(str(path), **kwargs)
+
+
+def _state(manager):
+    return [
+        (n["id"], n["status"], n["metadata"].get("description"))
+        for n in manager._ordered(manager._namespaces)
+    ]
+
+
+async def _populate(manager):
+    await manager.register_namespace(
+        "billing", {"description": "Invoices and payments", "tags": ["Finance"]}
+    )
+    await manager.register_namespace("search", {"description": "Full text search"})
+    await manager.register_namespace("legacy", {"description": "Old stuff"})
+    await manager.update_namespace("search", {"owner": "search-team"})
+    await manager.deprecate_namespace("billing", "replaced")
+    await manager.delete_namespace("legacy")
+
+
+class TestJournalReplay:
+    """測試日誌重放"""
+
+    @pytest.mark.asyncio
+    async def test_reopen_replays_journal(self, registry_path):
+        manager = _open(registry_path)
+        await _populate(manager)
+        expected = _state(manager)
+        manager.close()
+
+        assert not registry_path.exists()
+        reopened = _open(registry_path)
+
+        assert _state(reopened) == expected
+        assert reopened.get_statistics()["journal_records"] == 6
+        assert [n["id"] for n in await reopened.get_namespaces_by_tag("finance")] == ["billing"]
+        assert [n["id"] for n in await reopened.search_namespaces("payments")] == ["billing"]
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_torn_tail_is_truncated(self, registry_path):
+        manager = _open(registry_path)
+        await manager.register_namespace("billing", {"description": "Invoices"})
+        manager.close()
+        journal = manager.journal_path
+        intact = journal.stat().st_size
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('{"op": "put", "namespace": {"id": "tor')
+
+        reopened = _open(registry_path)
+        assert journal.stat().st_size == intact
+        assert [n[0] for n in _state(reopened)] == ["billing"]
+
+        # The next record lands on its own line and survives another reopen
+        await reopened.register_namespace("search", {"description": "Search"})
+        reopened.close()
+        again = _open(registry_path)
+        assert [n[0] for n in _state(again)] == ["billing", "search"]
+        again.close()
+
+    @pytest.mark.asyncio
+    async def test_record_without_newline_is_dropped(self, registry_path):
+        manager = _open(registry_path)
+        await manager.register_namespace("billing", {})
+        manager.close()
+        with open(manager.journal_path, "a", encoding="utf-8") as f:
+            f.write('{"op": "delete", "id": "billing"}')
+
+        reopened = _open(registry_path)
+
+        assert [n[0] for n in _state(reopened)] == ["billing"]
+        assert manager.journal_path.read_text(encoding="utf-8").endswith("\n")
+        reopened.close()
+
+
+class TestCompaction:
+    """測試快照壓縮"""
+
+    @pytest.mark.asyncio
+    async def test_compact_writes_snapshot_and_truncates_journal(self, registry_path):
+        manager = _open(registry_path)
+        await _populate(manager)
+        expected = _state(manager)
+        await manager.compact()
+
+        assert registry_path.exists()
+        assert manager.journal_path.stat().st_size == 0
+        assert manager.get_statistics()["journal_records"] == 0
+
+        # Later records go to the journal on top of the snapshot
+        await manager.register_namespace("audit", {"description": "Audit"})
+        manager.close()
+        reopened = _open(registry_path)
+
+        assert _state(reopened) == expected + [("audit", "active", "Audit")]
+        assert reopened.get_statistics()["journal_records"] == 1
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_compacts_every_n_records(self, registry_path):
+        manager = _open(registry_path, compact_every=3)
+        for name in ["a", "b", "c", "d"]:
+            await manager.register_namespace(name, {})
+
+        assert registry_path.exists()
+        assert manager.get_statistics()["journal_records"] == 1
+        manager.close()
+
+        reopened = _open(registry_path)
+        assert [n[0] for n in _state(reopened)] == ["a", "b", "c", "d"]
+        reopened.close()
+
+    @pytest.mark.asyncio
+    async def test_audit_trail_kept_outside_snapshot(self, registry_path):
+        manager = _open(registry_path)
+        await _populate(manager)
+        await manager.compact()
+        manager.close()
+
+        assert "audit_trail" not in registry_path.read_text()
+        reopened = _open(registry_path)
+        actions = [entry["action"] for entry in reopened.get_audit_trail()]
+        assert actions.count("namespace_registered") == 3
+        assert "namespace_deleted" in actions
+        reopened.close()
+
+
+class TestSearch:
+    """測試索引搜索"""
+
+    @pytest.mark.asyncio
+    async def test_cjk_query(self, registry_path):
+        manager = _open(registry_path)
+        await manager.register_namespace(
+            "registry", {"description": "命名空間註冊表", "tags": ["核心"]}
+        )
+        await manager.register_namespace("billing", {"description": "帳單與付款"})
+
+        assert [n["id"] for n in await manager.search_namespaces("註冊")] == ["registry"]
+        assert [n["id"] for n in await manager.search_namespaces("空間註冊表")] == ["registry"]
+        assert [n["id"] for n in await manager.search_namespaces("表")] == ["registry"]
+        assert [n["id"] for n in await manager.search_namespaces("核心")] == ["registry"]
+        assert [n["id"] for n in await manager.search_namespaces("付款")] == ["billing"]
+        assert await manager.search_namespaces("註冊 付款") == []
+        manager.close()
+
+    @pytest.mark.asyncio
+    async def test_query_without_tokens_matches_nothing(self, registry_path):
+        manager = _open(registry_path)
+        await _populate(manager)
+
+        assert await manager.search_namespaces("-") == []
+        assert await manager.search_namespaces("") == []
+        manager.close()
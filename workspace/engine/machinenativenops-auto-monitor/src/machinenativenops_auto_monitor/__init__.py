@@ -15,6 +15,7 @@ from .alerts import Alert, AlertManager, AlertRule
 from .app import AutoMonitorApp
 from .collectors import MetricsCollector, ServiceCollector, SystemCollector
 from .config import AutoMonitorConfig
+from .scheduler import AsyncCollector, CollectionScheduler, SystemSnapshot
 from .儲存 import StorageManager, TimeSeriesStorage
 
 __all__ = [
@@ -23,6 +24,9 @@ __all__ = [
     "MetricsCollector",
     "SystemCollector",
     "ServiceCollector",
+    "AsyncCollector",
+    "CollectionScheduler",
+    "SystemSnapshot",
     "AlertManager",
     "AlertRule",
     "Alert",
@@ -8,6 +8,7 @@ Auto-Monitor Application
 Main application logic for the auto-monitor system.
 """
 
+import asyncio
 import logging
 import threading
 import time
@@ -22,6 +23,7 @@ from .collectors import (
     SystemCollector,
 )
 from .config import AutoMonitorConfig, MonitorConfig
+from .scheduler import CollectionScheduler, run_in_thread
 from .儲存 import StorageManager
 
 
@@ -63,6 +65,19 @@ class AutoMonitorApp:
         # Storage manager
         self.storage_manager = StorageManager(config.storage)
 
+        # Async collection scheduler (collectors.scheduler.enabled): runs the
+        # collectors concurrently on their own cadence instead of the blocking loop
+        self.scheduler = None
+        self._process_lock = threading.Lock()
+        scheduler_config = config.collectors.get("scheduler", {})
+        if scheduler_config.get("enabled", False):
+            self.scheduler = CollectionScheduler.from_config(
+                config.collectors,
+                default_interval=config.collection_interval,
+                on_result=self._process_results,
+                snapshot_ttl=scheduler_config.get("snapshot_ttl", 1.0),
+            )
+
         self.logger.info("Auto-monitor initialization complete")
 
     def run(self):
@@ -71,9 +86,12 @@ class AutoMonitorApp:
         self.logger.info("Starting auto-monitor collection loop...")
 
         try:
-            while self.running:
-                self._collect_and_process()
-                time.sleep(self.config.collection_interval)
+            if self.scheduler is not None:
+                asyncio.run(self._run_scheduler())
+            else:
+                while self.running:
+                    self._collect_and_process()
+                    time.sleep(self.config.collection_interval)
 
         except KeyboardInterrupt:
             self.logger.info("Received keyboard interrupt")
@@ -97,6 +115,10 @@ class AutoMonitorApp:
 
     def _collection_loop(self):
         """Main collection loop for daemon mode."""
+        if self.scheduler is not None:
+            asyncio.run(self._run_scheduler())
+            return
+
         self.logger.info("Collection loop started")
 
         while self.running and not self._stop_event.is_set():
@@ -109,18 +131,29 @@ class AutoMonitorApp:
 
         self.logger.info("Collection loop stopped")
 
-    def _collect_and_process(self):
-        """Collect metrics, evaluate alerts, and store data."""
-        collection_start = time.time()
-
+    async def _run_scheduler(self):
+        """Scheduler mode: run the collector loops until shutdown."""
+        self.logger.info("Collection scheduler started")
+        self.scheduler.start()
         try:
-            # Collect metrics
-            self.logger.debug("Collecting metrics...")
-            metrics = self.metrics_collector.collect_all()
+            while self.running and not self._stop_event.is_set():
+                await asyncio.sleep(0.5)
+        finally:
+            await self.scheduler.stop()
+        self.logger.info("Collection scheduler stopped")
 
-            metrics_count = len(metrics)
-            self.logger.debug(f"Collected {metrics_count} metrics")
+    async def _process_results(self, collector_name: str, metrics: Dict[str, Any]):
+        """Scheduler callback: alerts and storage for one collector's results."""
+        metrics = {**metrics, **self.scheduler.export_metrics()}
+        try:
+            # Storage and alert handling block, so keep them off the event loop
+            await run_in_thread(self._process_metrics, metrics)
+        except Exception as e:
+            self.logger.error(f"Error processing {collector_name} metrics: {e}", exc_info=True)
 
+    def _process_metrics(self, metrics: Dict[str, Any]):
+        """Evaluate alerts and store metrics."""
+        with self._process_lock:
             # Evaluate alerts
             if self.config.alerts.get("enabled", True):
                 self.logger.debug("Evaluating alerts...")
@@ -131,6 +164,20 @@ class AutoMonitorApp:
                 self.logger.debug("Storing metrics...")
                 self.storage_manager.store_metrics(metrics)
 
+    def _collect_and_process(self):
+        """Collect metrics, evaluate alerts, and store data."""
+        collection_start = time.time()
+
+        try:
+            # Collect metrics
+            self.logger.debug("Collecting metrics...")
+            metrics = self.metrics_collector.collect_all()
+
+            metrics_count = len(metrics)
+            self.logger.debug(f"Collected {metrics_count} metrics")
+
+            self._process_metrics(metrics)
+
             # Log statistics
             collection_duration = time.time() - collection_start
             self.logger.info(
@@ -174,6 +221,7 @@ class AutoMonitorApp:
             },
             "alerts": self.alert_manager.get_stats(),
             "storage": self.storage_manager.get_stats(),
+            "scheduler": self.scheduler.get_stats() if self.scheduler else None,
         }
 
 
@@ -324,7 +324,7 @@ class MonitorConfig:
     event_collection_interval: int = 15
 
     # Storage settings
-    storage_backend: str = "memory"  # 'memory', 'file', 'database'
+    storage_backend: str = "memory"  # 'memory', 'file', 'segmented', 'database'
     storage_path: Optional[str] = None
     retention_days: int = 7
 
@@ -0,0 +1,556 @@
+"""
+MachineNativeOps Auto-Monitor - Async Collection Scheduler
+非同步收集排程器
+
+Runs collectors concurrently on an asyncio event loop, each on its own
+cadence, instead of calling them one after another in a blocking loop:
+
+- psutil data is read once per tick into a shared SystemSnapshot; CPU usage
+  is sampled without blocking (``interval=None``, i.e. since the last tick)
+  and expensive reads (connections, processes) happen only if a collector
+  asks for them, in a worker thread
+- HTTP probes share one pooled client (aiohttp when installed, otherwise a
+  pooled requests.Session on worker threads) behind a concurrency limit
+- cycle time, timeouts, failures and schedule overruns are tracked per
+  collector and exported as metrics
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+
+import psutil
+
+try:
+    import aiohttp
+except ImportError:  # Fall back to requests on worker threads
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+ResultCallback = Callable[[str, Dict[str, Any]], Union[None, Awaitable[None]]]
+
+
+async def run_in_thread(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking call on the default thread pool (asyncio.to_thread needs Python 3.9)"""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class SystemSnapshot:
+    """
+    psutil readings for one scheduler tick
+
+    Each reading is taken at most once per snapshot, on first access, so
+    collectors running in the same tick share it. Readings are locked
+    separately: a slow reading taken in a worker thread (see ``load``) does
+    not block the event loop from taking or using the others.
+    """
+
+    def __init__(self):
+        self.taken_at = time.time()
+        self._values: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _get(self, name: str, read: Callable[[], Any]) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._values:
+                self._values[name] = read()
+            return self._values[name]
+
+    @property
+    def cpu_percent(self) -> float:
+        # Usage since the previous call; never blocks
+        return self._get("cpu_percent", lambda: psutil.cpu_percent(interval=None))
+
+    @property
+    def cpu_count(self) -> int:
+        return self._get("cpu_count", psutil.cpu_count)
+
+    @property
+    def memory(self):
+        return self._get("memory", psutil.virtual_memory)
+
+    @property
+    def disk(self):
+        return self._get("disk", lambda: psutil.disk_usage("/"))
+
+    @property
+    def network(self):
+        return self._get("network", psutil.net_io_counters)
+
+    @property
+    def load_average(self) -> Optional[tuple]:
+        def read():
+            try:
+                return psutil.getloadavg()
+            except (AttributeError, OSError):
+                return None
+
+        return self._get("load_average", read)
+
+    @property
+    def listening_ports(self) -> Set[int]:
+        """Ports in LISTEN state (one net_connections() call per tick)"""
+        return self._get(
+            "listening_ports",
+            lambda: {
+                conn.laddr.port
+                for conn in psutil.net_connections(kind="inet")
+                if conn.status == psutil.CONN_LISTEN and conn.laddr
+            },
+        )
+
+    @property
+    def process_names(self) -> Dict[str, int]:
+        """Process name -> pid of one such process (one process_iter() per tick)"""
+
+        def read():
+            names = {}
+            for proc in psutil.process_iter(["name"]):
+                names.setdefault(proc.info["name"], proc.pid)
+            return names
+
+        return self._get("process_names", read)
+
+    async def load(self, *names: str) -> None:
+        """Take the named readings in a worker thread (for slow readings)"""
+        await run_in_thread(lambda: [getattr(self, name) for name in names])
+
+
+class AsyncCollector(ABC):
+    """Base class for collectors run by CollectionScheduler"""
+
+    def __init__(self, name: str, interval: float = 30.0, timeout: Optional[float] = None):
+        """
+        Initialize collector.
+
+        Args:
+            name: Collector name, used in exported metrics
+            interval: Seconds between runs
+            timeout: Seconds a run may take (defaults to interval)
+        """
+        self.name = name
+        self.interval = interval
+        self.timeout = timeout or interval
+
+    @abstractmethod
+    async def collect(self, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        """
+        Collect metrics.
+
+        Args:
+            snapshot: psutil readings shared by the collectors of this tick
+
+        Returns:
+            Dictionary of metric name to value
+        """
+
+    async def close(self) -> None:
+        """Release resources held by the collector; nothing to release by default"""
+        return None
+
+
+class SystemSnapshotCollector(AsyncCollector):
+    """System metrics (CPU, memory, disk, network, load) from the shared snapshot"""
+
+    def __init__(self, interval: float = 30.0, timeout: Optional[float] = None):
+        super().__init__("system", interval, timeout)
+        # Prime the CPU counter so the first tick reports a real value
+        psutil.cpu_percent(interval=None)
+
+    async def collect(self, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        memory, disk, net = snapshot.memory, snapshot.disk, snapshot.network
+        metrics = {
+            "system_cpu_percent": snapshot.cpu_percent,
+            "system_cpu_count": snapshot.cpu_count,
+            "system_memory_total": memory.total,
+            "system_memory_available": memory.available,
+            "system_memory_percent": memory.percent,
+            "system_memory_used": memory.used,
+            "system_disk_total": disk.total,
+            "system_disk_used": disk.used,
+            "system_disk_free": disk.free,
+            "system_disk_percent": disk.percent,
+            "system_network_bytes_sent": net.bytes_sent,
+            "system_network_bytes_recv": net.bytes_recv,
+            "system_network_packets_sent": net.packets_sent,
+            "system_network_packets_recv": net.packets_recv,
+        }
+        if snapshot.load_average:
+            load1, load5, load15 = snapshot.load_average
+            metrics.update(
+                {"system_load_1": load1, "system_load_5": load5, "system_load_15": load15}
+            )
+        return metrics
+
+
+class HttpProbeCollector(AsyncCollector):
+    """
+    Service health and metrics endpoints, probed concurrently
+
+    Services are configured as {"name", "health_url", "metrics_url"}, as for
+    ServiceCollector. At most ``max_concurrency`` requests are in flight.
+    """
+
+    def __init__(
+        self,
+        services: List[Dict[str, Any]],
+        interval: float = 30.0,
+        timeout: Optional[float] = None,
+        request_timeout: float = 5.0,
+        max_concurrency: int = 10,
+    ):
+        super().__init__("service", interval, timeout)
+        self.services = services
+        self.request_timeout = request_timeout
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None:
+            if aiohttp is not None:
+                self._session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                )
+            else:
+                import requests
+
+                self._session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency
+                )
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+        return self._session
+
+    async def _get(self, url: str):
+        """GET a URL; returns (status code, elapsed seconds, JSON body or None)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        session = self._get_session()
+        async with self._semaphore:
+            start = time.perf_counter()
+            if aiohttp is not None:
+                async with session.get(url) as response:
+                    body = None
+                    if response.status == 200 and response.content_type == "application/json":
+                        body = await response.json()
+                    return response.status, time.perf_counter() - start, body
+
+            def fetch():
+                response = session.get(url, timeout=self.request_timeout)
+                try:
+                    body = response.json() if response.status_code == 200 else None
+                except ValueError:
+                    body = None
+                return response.status_code, time.perf_counter() - start, body
+
+            return await run_in_thread(fetch)
+
+    async def _probe(self, service: Dict[str, Any]) -> Dict[str, float]:
+        service_name = service.get("name")
+        metrics: Dict[str, float] = {}
+        try:
+            status, elapsed, _ = await self._get(service["health_url"])
+            metrics[f"service_{service_name}_healthy"] = 1.0 if status == 200 else 0.0
+            metrics[f"service_{service_name}_response_time"] = elapsed
+
+            if service.get("metrics_url"):
+                status, _, body = await self._get(service["metrics_url"])
+                if status == 200 and isinstance(body, dict):
+                    for key, value in body.items():
+                        if isinstance(value, (int, float)):
+                            metrics[f"service_{service_name}_{key}"] = float(value)
+
+        except Exception as e:
+            logger.error(f"Error collecting metrics for {service_name}: {e}")
+            metrics[f"service_{service_name}_healthy"] = 0.0
+        return metrics
+
+    async def collect(self, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        services = [s for s in self.services if s.get("name") and s.get("health_url")]
+        metrics: Dict[str, Any] = {}
+        for result in await asyncio.gather(*(self._probe(s) for s in services)):
+            metrics.update(result)
+        return metrics
+
+    async def close(self) -> None:
+        if self._session is not None:
+            if aiohttp is not None:
+                await self._session.close()
+            else:
+                self._session.close()
+            self._session = None
+
+
+class LocalServiceCollector(AsyncCollector):
+    """
+    Port and process checks against the shared snapshot
+
+    Services are configured as {"name", "type": "port"|"process", "port",
+    "process_name"}; every check is a set/dict lookup into readings taken
+    once per tick.
+    """
+
+    def __init__(
+        self, services: List[Dict[str, Any]], interval: float = 30.0, timeout: Optional[float] = None
+    ):
+        super().__init__("local_service", interval, timeout)
+        self.services = services
+
+    async def collect(self, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        types = {s.get("type", "process") for s in self.services}
+        await snapshot.load(
+            *(["listening_ports"] if "port" in types else []),
+            *(["process_names"] if "process" in types else []),
+        )
+
+        metrics: Dict[str, Any] = {}
+        for service in self.services:
+            name = service.get("name", "unknown")
+            if service.get("type", "process") == "port":
+                healthy = service.get("port") in snapshot.listening_ports
+            else:
+                healthy = service.get("process_name", name) in snapshot.process_names
+            metrics[f"service_{name}_healthy"] = 1.0 if healthy else 0.0
+        return metrics
+
+
+class SyncCollectorAdapter(AsyncCollector):
+    """Runs an existing synchronous collector (``collect()``) in a worker thread"""
+
+    def __init__(self, collector: Any, name: Optional[str] = None, interval: float = 30.0,
+                 timeout: Optional[float] = None):
+        super().__init__(name or collector.__class__.__name__, interval, timeout)
+        self.collector = collector
+
+    async def collect(self, snapshot: SystemSnapshot) -> Dict[str, Any]:
+        return await run_in_thread(self.collector.collect)
+
+
+class _CollectorStats:
+    __slots__ = ("runs", "failures", "timeouts", "overruns", "skipped",
+                 "last_duration", "max_duration", "total_duration", "last_run")
+
+    def __init__(self):
+        self.runs = self.failures = self.timeouts = self.overruns = self.skipped = 0
+        self.last_duration = self.max_duration = self.total_duration = 0.0
+        self.last_run: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "overruns": self.overruns,
+            "skipped_runs": self.skipped,
+            "last_cycle_seconds": self.last_duration,
+            "max_cycle_seconds": self.max_duration,
+            "avg_cycle_seconds": self.total_duration / self.runs if self.runs else 0.0,
+            "last_run": self.last_run,
+        }
+
+
+class CollectionScheduler:
+    """
+    Runs AsyncCollectors concurrently, each on its own cadence
+
+    Run times are aligned to multiples of each collector's interval from the
+    scheduler start, so collectors with the same interval run in the same
+    tick and share its SystemSnapshot. A run that finishes after its next
+    slot counts as an overrun and the missed slots are skipped rather than
+    run back to back.
+    """
+
+    def __init__(
+        self,
+        collectors: Optional[List[AsyncCollector]] = None,
+        on_result: Optional[ResultCallback] = None,
+        snapshot_ttl: float = 1.0,
+    ):
+        """
+        Initialize scheduler.
+
+        Args:
+            collectors: Collectors to run
+            on_result: Called with (collector name, metrics) after each run
+            snapshot_ttl: Seconds a SystemSnapshot is shared between collectors
+        """
+        self.collectors: List[AsyncCollector] = list(collectors or [])
+        self.on_result = on_result
+        self.snapshot_ttl = snapshot_ttl
+        self.latest: Dict[str, Dict[str, Any]] = {}
+
+        self._stats: Dict[str, _CollectorStats] = {}
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping: Optional[asyncio.Event] = None
+
+    @classmethod
+    def from_config(
+        cls, collectors_config: Dict[str, Any], default_interval: float = 30.0, **kwargs
+    ) -> "CollectionScheduler":
+        """
+        Build a scheduler from the ``collectors`` configuration section.
+
+        Recognizes "system" and "service" (as used by SystemCollector and
+        ServiceCollector) plus "local_services" for port/process checks; each
+        may set "enabled", "interval" and "timeout" (seconds a whole run may
+        take). "service" also takes "request_timeout" for each HTTP request
+        and "max_concurrency".
+        """
+        collectors: List[AsyncCollector] = []
+
+        def section(name):
+            config = collectors_config.get(name)
+            if config is None or not config.get("enabled", True):
+                return None
+            return config
+
+        system = section("system")
+        if system is not None:
+            collectors.append(
+                SystemSnapshotCollector(system.get("interval", default_interval), system.get("timeout"))
+            )
+        service = section("service")
+        if service is not None and service.get("services"):
+            collectors.append(
+                HttpProbeCollector(
+                    service["services"],
+                    interval=service.get("interval", default_interval),
+                    timeout=service.get("timeout"),
+                    request_timeout=service.get("request_timeout", 5),
+                    max_concurrency=service.get("max_concurrency", 10),
+                )
+            )
+        local = section("local_services")
+        if local is not None and local.get("services"):
+            collectors.append(
+                LocalServiceCollector(
+                    local["services"], local.get("interval", default_interval), local.get("timeout")
+                )
+            )
+        return cls(collectors, **kwargs)
+
+    def add_collector(self, collector: AsyncCollector) -> None:
+        """Add a collector (takes effect on the next start)"""
+        self.collectors.append(collector)
+
+    def _get_snapshot(self) -> SystemSnapshot:
+        if self._snapshot is None or time.time() - self._snapshot.taken_at >= self.snapshot_ttl:
+            self._snapshot = SystemSnapshot()
+        return self._snapshot
+
+    async def _run_collector(self, collector: AsyncCollector) -> Optional[Dict[str, Any]]:
+        stats = self._stats.setdefault(collector.name, _CollectorStats())
+        start = time.perf_counter()
+        stats.last_run = time.time()
+        try:
+            metrics = await asyncio.wait_for(
+                collector.collect(self._get_snapshot()), timeout=collector.timeout
+            )
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            logger.warning(f"Collector {collector.name} timed out after {collector.timeout}s")
+            return None
+        except Exception as e:
+            stats.failures += 1
+            logger.error(f"Error collecting from {collector.name}: {e}")
+            return None
+        finally:
+            duration = time.perf_counter() - start
+            stats.runs += 1
+            stats.last_duration = duration
+            stats.max_duration = max(stats.max_duration, duration)
+            stats.total_duration += duration
+
+        self.latest[collector.name] = metrics
+        if self.on_result is not None:
+            try:
+                result = self.on_result(collector.name, metrics)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Error handling results of {collector.name}: {e}")
+        return metrics
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Run every collector once, concurrently, and return the merged metrics"""
+        merged: Dict[str, Any] = {}
+        for metrics in await asyncio.gather(*(self._run_collector(c) for c in self.collectors)):
+            if metrics:
+                merged.update(metrics)
+        return merged
+
+    async def _loop(self, collector: AsyncCollector, origin: float) -> None:
+        stats = self._stats.setdefault(collector.name, _CollectorStats())
+        slot = 0
+        while not self._stopping.is_set():
+            await self._run_collector(collector)
+
+            # Next slot after now; slots that passed during the run are skipped
+            elapsed_slots = int((time.monotonic() - origin) // collector.interval)
+            next_slot = max(slot + 1, elapsed_slots + 1)
+            if next_slot > slot + 1:
+                stats.overruns += 1
+                stats.skipped += next_slot - slot - 1
+            slot = next_slot
+
+            delay = origin + slot * collector.interval - time.monotonic()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=max(0.0, delay))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the collector loops on the running event loop"""
+        self._stopping = asyncio.Event()
+        origin = time.monotonic()
+        self._tasks = [
+            asyncio.create_task(self._loop(c, origin), name=f"collector-{c.name}")
+            for c in self.collectors
+        ]
+
+    async def stop(self) -> None:
+        """Stop the collector loops and close the collectors"""
+        if self._stopping is not None:
+            self._stopping.set()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        for collector in self.collectors:
+            await collector.close()
+
+    async def run_forever(self) -> None:
+        """Run until cancelled or stop() is called"""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-collector run counters and cycle times"""
+        return {name: stats.to_dict() for name, stats in self._stats.items()}
+
+    def export_metrics(self) -> Dict[str, float]:
+        """Scheduler statistics as flat metrics (collector_<name>_<stat>)"""
+        metrics = {}
+        for name, stats in self._stats.items():
+            for key, value in stats.to_dict().items():
+                if key != "last_run":
+                    metrics[f"collector_{name}_{key}"] = float(value)
+        return metrics
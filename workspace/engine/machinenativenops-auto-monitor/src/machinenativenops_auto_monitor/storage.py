@@ -1,32 +1,106 @@
 """
 Database storage for metrics data
 SQLite-based storage with proper schema and retention
+
+Besides the raw collection snapshots, every numeric value of a snapshot is
+stored as a sample of a named series (nested keys joined with "."), in a
+narrow (series_id, ts, value) table. Samples are also folded into 1m/1h/1d
+rollup tables as they are written, so range and aggregate queries read
+indexed numeric rows instead of decoding JSON snapshots.
 """
 
 import json
 import logging
+import math
+import queue
 import sqlite3
 import threading
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Rollup resolutions: name -> bucket width in seconds
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+
+def flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Flatten nested metrics into {"a.b.c": value} for numeric leaves"""
+    samples = {}
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            samples.update(flatten_metrics(value, f"{name}."))
+        elif isinstance(value, bool):
+            continue  # Flags are not series, even though bool is an int
+        elif isinstance(value, (int, float)) and not (
+            isinstance(value, float) and (math.isnan(value) or math.isinf(value))
+        ):
+            samples[name] = float(value)
+    return samples
+
+
+def _to_epoch(value: Any) -> float:
+    """Convert a datetime, ISO string or number to epoch seconds (naive = UTC)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return (value - datetime(1970, 1, 1)).total_seconds()
+    return value.timestamp()
+
+
+def _from_epoch(ts: float) -> str:
+    return (datetime(1970, 1, 1) + timedelta(seconds=ts)).isoformat()
+
+
+class ConnectionPool:
+    """Fixed pool of long-lived SQLite connections in WAL mode"""
+
+    def __init__(self, db_path: Path, size: int = 4, timeout: float = 30.0):
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all: List[sqlite3.Connection] = []
+        for _ in range(size):
+            conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+            conn.row_factory = sqlite3.Row  # Enable dict-like access
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._connections.put(conn)
+            self._all.append(conn)
 
-from .config import DatabaseConfig
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block"""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._connections.put(conn)
+
+    def close(self):
+        for conn in self._all:
+            conn.close()
+        self._all.clear()
 
 
 class DatabaseManager:
     """SQLite database manager for metrics storage"""
 
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = 4):
         self.db_path = Path(db_path)
         self.logger = logging.getLogger(__name__)
 
-        # Thread lock for database operations
-        self._lock = threading.Lock()
+        # SQLite allows one writer at a time; readers use the other pooled
+        # connections concurrently thanks to WAL
+        self._write_lock = threading.Lock()
+        self._series_ids: Dict[str, int] = {}
 
         # Ensure database directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = ConnectionPool(self.db_path, size=pool_size)
 
         # Initialize database
         self._init_database()
@@ -45,12 +119,52 @@ class DatabaseManager:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT NOT NULL,
                     data TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX(timestamp),
-                    INDEX(created_at)
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics(timestamp)"
+            )
+
+            # Create time-series tables
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS series (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
                 )
             """
             )
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS samples (
+                    series_id INTEGER NOT NULL,
+                    ts REAL NOT NULL,
+                    value REAL NOT NULL,
+                    PRIMARY KEY (series_id, ts)
+                ) WITHOUT ROWID
+            """
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_samples_ts ON samples(ts)")
+            for resolution in ROLLUP_RESOLUTIONS:
+                cursor.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS rollup_{resolution} (
+                        series_id INTEGER NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        count INTEGER NOT NULL,
+                        sum REAL NOT NULL,
+                        min REAL NOT NULL,
+                        max REAL NOT NULL,
+                        PRIMARY KEY (series_id, bucket)
+                    ) WITHOUT ROWID
+                """
+                )
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_rollup_{resolution}_bucket "
+                    f"ON rollup_{resolution}(bucket)"
+                )
 
             # Create alerts table
             cursor.execute(
@@ -64,13 +178,19 @@ class DatabaseManager:
                     data TEXT,
                     resolved BOOLEAN DEFAULT FALSE,
                     resolved_at TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX(timestamp),
-                    INDEX(alert_type),
-                    INDEX(resolved)
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """
             )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts(timestamp)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_type ON alerts(alert_type)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_alerts_resolved ON alerts(resolved)"
+            )
 
             # Create system_events table
             cursor.execute(
@@ -82,40 +202,57 @@ class DatabaseManager:
                     component TEXT NOT NULL,
                     message TEXT NOT NULL,
                     data TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX(timestamp),
-                    INDEX(event_type),
-                    INDEX(component)
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """
             )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_timestamp ON system_events(timestamp)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_type ON system_events(event_type)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_events_component ON system_events(component)"
+            )
 
             conn.commit()
             self.logger.info("Database schema initialized")
 
     @contextmanager
-    def _get_connection(self):
-        """Get database connection with thread safety"""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, timeout=30.0)
-            conn.row_factory = sqlite3.Row  # Enable dict-like access
+    def _get_connection(self, write: bool = False):
+        """Get a pooled database connection (writes are serialized)"""
+        if not write:
+            with self._pool.connection() as conn:
+                yield conn
+            return
+        with self._write_lock, self._pool.connection() as conn:
             try:
                 yield conn
-            finally:
-                conn.close()
+            except BaseException:
+                # Series created by a rolled back transaction do not exist
+                self._series_ids.clear()
+                raise
 
     def store_metrics(self, metrics: Dict[str, Any]):
-        """Store metrics data"""
+        """Store a metrics snapshot and its numeric values as series samples"""
         try:
             timestamp = metrics.get("timestamp", datetime.utcnow().isoformat())
             data_json = json.dumps(metrics, default=str)
-
-            with self._get_connection() as conn:
+            ts = _to_epoch(timestamp)
+            samples = [
+                (name, ts, value)
+                for name, value in flatten_metrics(metrics).items()
+                if name != "timestamp"
+            ]
+
+            with self._get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO metrics (timestamp, data) VALUES (?, ?)",
                     (timestamp, data_json),
                 )
+                self._insert_samples(cursor, samples)
                 conn.commit()
 
             self.logger.debug(f"Stored metrics for timestamp: {timestamp}")
@@ -124,6 +261,96 @@ class DatabaseManager:
             self.logger.error(f"Failed to store metrics: {e}")
             raise
 
+    def store_samples(self, samples: Iterable[Tuple[str, Any, float]]) -> int:
+        """
+        Store (series name, timestamp, value) samples in one transaction
+
+        Timestamps may be datetimes, ISO strings or epoch seconds. Samples for
+        a series and timestamp that already exist are ignored.
+
+        Returns:
+            Number of samples written
+        """
+        try:
+            rows = [(name, _to_epoch(ts), float(value)) for name, ts, value in samples]
+            with self._get_connection(write=True) as conn:
+                written = self._insert_samples(conn.cursor(), rows)
+                conn.commit()
+            return written
+
+        except Exception as e:
+            self.logger.error(f"Failed to store samples: {e}")
+            raise
+
+    def _series_id_map(self, cursor, names: Iterable[str]) -> Dict[str, int]:
+        """Resolve series names to ids, creating missing series"""
+        missing = [name for name in set(names) if name not in self._series_ids]
+        if missing:
+            cursor.executemany(
+                "INSERT OR IGNORE INTO series (name) VALUES (?)", [(n,) for n in missing]
+            )
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                cursor.execute(
+                    f"SELECT id, name FROM series WHERE name IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for row in cursor.fetchall():
+                    self._series_ids[row["name"]] = row["id"]
+        return self._series_ids
+
+    def _insert_samples(self, cursor, samples: List[Tuple[str, float, float]]) -> int:
+        """Insert samples and fold the new ones into the rollup tables"""
+        if not samples:
+            return 0
+        ids = self._series_id_map(cursor, (name for name, _, _ in samples))
+
+        # Drop samples that are repeated in the batch or already stored, so
+        # the rollups count each sample once. The lookup is limited to the
+        # batch's series and time span, which the (series_id, ts) key covers.
+        unique: Dict[Tuple[int, float], float] = {}
+        for name, ts, value in samples:
+            unique.setdefault((ids[name], ts), value)
+        span = (min(ts for _, ts in unique), max(ts for _, ts in unique))
+        series_ids = sorted({series_id for series_id, _ in unique})
+        for start in range(0, len(series_ids), 500):
+            chunk = series_ids[start:start + 500]
+            cursor.execute(
+                f"SELECT series_id, ts FROM samples WHERE series_id IN "
+                f"({','.join('?' * len(chunk))}) AND ts BETWEEN ? AND ?",
+                (*chunk, *span),
+            )
+            for row in cursor.fetchall():
+                unique.pop((row["series_id"], row["ts"]), None)
+        rows = [(series_id, ts, value) for (series_id, ts), value in unique.items()]
+        cursor.executemany(
+            "INSERT INTO samples (series_id, ts, value) VALUES (?, ?, ?)", rows
+        )
+
+        for resolution, width in ROLLUP_RESOLUTIONS.items():
+            buckets: Dict[Tuple[int, int], List[float]] = {}
+            for series_id, ts, value in rows:
+                key = (series_id, int(ts // width) * width)
+                agg = buckets.get(key)
+                if agg is None:
+                    buckets[key] = [1, value, value, value]
+                else:
+                    agg[0] += 1
+                    agg[1] += value
+                    agg[2] = min(agg[2], value)
+                    agg[3] = max(agg[3], value)
+            cursor.executemany(
+                f"""INSERT INTO rollup_{resolution} (series_id, bucket, count, sum, min, max)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (series_id, bucket) DO UPDATE SET
+                        count = count + excluded.count,
+                        sum = sum + excluded.sum,
+                        min = MIN(min, excluded.min),
+                        max = MAX(max, excluded.max)""",
+                [(sid, bucket, *agg) for (sid, bucket), agg in buckets.items()],
+            )
+        return len(rows)
+
     def get_metrics(
         self,
         start_time: Optional[datetime] = None,
@@ -196,6 +423,135 @@ class DatabaseManager:
             self.logger.error(f"Failed to get recent metrics: {e}")
             raise
 
+    def list_series(self, prefix: Optional[str] = None) -> List[str]:
+        """Get the names of stored series, optionally those starting with prefix"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                if prefix:
+                    cursor.execute(
+                        "SELECT name FROM series WHERE name >= ? AND name < ? ORDER BY name",
+                        (prefix, prefix + "\U0010ffff"),
+                    )
+                else:
+                    cursor.execute("SELECT name FROM series ORDER BY name")
+                return [row["name"] for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Failed to list series: {e}")
+            raise
+
+    def query_series(
+        self,
+        name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        resolution: str = "raw",
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the samples of one series over a time range, oldest first
+
+        Args:
+            name: Series name (nested snapshot keys joined with ".")
+            start_time: Inclusive range start (naive datetimes are UTC)
+            end_time: Inclusive range end
+            resolution: "raw" for samples, or "1m" / "1h" / "1d" for rollups
+            limit: Return only the most recent N points
+
+        Returns:
+            Raw points as {"timestamp", "value"}; rollup points as
+            {"timestamp", "count", "avg", "min", "max"} per bucket
+        """
+        if resolution != "raw" and resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id FROM series WHERE name = ?", (name,))
+                row = cursor.fetchone()
+                if row is None:
+                    return []
+
+                if resolution == "raw":
+                    query = "SELECT ts, value FROM samples WHERE series_id = ?"
+                    column = "ts"
+                else:
+                    query = (
+                        "SELECT bucket, count, sum, min, max "
+                        f"FROM rollup_{resolution} WHERE series_id = ?"
+                    )
+                    column = "bucket"
+                params: List[Any] = [row["id"]]
+
+                if start_time:
+                    start = _to_epoch(start_time)
+                    if resolution != "raw":
+                        # Include the bucket containing the start time
+                        width = ROLLUP_RESOLUTIONS[resolution]
+                        start = int(start // width) * width
+                    query += f" AND {column} >= ?"
+                    params.append(start)
+
+                if end_time:
+                    query += f" AND {column} <= ?"
+                    params.append(_to_epoch(end_time))
+
+                query += f" ORDER BY {column} DESC"
+                if limit:
+                    query += " LIMIT ?"
+                    params.append(limit)
+
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
+                rows.reverse()
+
+                if resolution == "raw":
+                    return [
+                        {"timestamp": _from_epoch(r["ts"]), "value": r["value"]}
+                        for r in rows
+                    ]
+                return [
+                    {
+                        "timestamp": _from_epoch(r["bucket"]),
+                        "count": r["count"],
+                        "avg": r["sum"] / r["count"],
+                        "min": r["min"],
+                        "max": r["max"],
+                    }
+                    for r in rows
+                ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to query series {name}: {e}")
+            raise
+
+    def get_latest_values(self, prefix: Optional[str] = None) -> Dict[str, float]:
+        """Get the most recent value of every series (optionally by name prefix)"""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                query = """
+                    SELECT s.name, (
+                        SELECT value FROM samples
+                        WHERE series_id = s.id ORDER BY ts DESC LIMIT 1
+                    ) AS value
+                    FROM series s"""
+                params: List[Any] = []
+                if prefix:
+                    query += " WHERE s.name >= ? AND s.name < ?"
+                    params.extend([prefix, prefix + "\U0010ffff"])
+                cursor.execute(query, params)
+                return {
+                    row["name"]: row["value"]
+                    for row in cursor.fetchall()
+                    if row["value"] is not None
+                }
+
+        except Exception as e:
+            self.logger.error(f"Failed to get latest values: {e}")
+            raise
+
     def store_alert(
         self,
         alert_type: str,
@@ -208,7 +564,7 @@ class DatabaseManager:
             timestamp = datetime.utcnow().isoformat()
             data_json = json.dumps(data) if data else None
 
-            with self._get_connection() as conn:
+            with self._get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """INSERT INTO alerts (timestamp, alert_type, severity, message, data)
@@ -257,7 +613,7 @@ class DatabaseManager:
     def resolve_alert(self, alert_id: int):
         """Mark alert as resolved"""
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """UPDATE alerts SET resolved = TRUE, resolved_at = CURRENT_TIMESTAMP
@@ -282,7 +638,7 @@ class DatabaseManager:
             timestamp = datetime.utcnow().isoformat()
             data_json = json.dumps(data) if data else None
 
-            with self._get_connection() as conn:
+            with self._get_connection(write=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     """INSERT INTO system_events (timestamp, event_type, component, message, data)
@@ -345,15 +701,34 @@ class DatabaseManager:
             self.logger.error(f"Failed to get system events: {e}")
             raise
 
-    def cleanup_old_data(self, retention_days: int = 30):
-        """Clean up old data based on retention policy"""
+    def cleanup_old_data(self, retention_days: int = 30, rollup_retention_days: int = 365):
+        """
+        Clean up old data based on retention policy
+
+        Raw samples and 1m rollups follow retention_days; 1h and 1d rollups
+        are kept for rollup_retention_days.
+        """
         try:
             cutoff_date = datetime.utcnow() - timedelta(days=retention_days)
             cutoff_iso = cutoff_date.isoformat()
+            cutoff_ts = _to_epoch(cutoff_date)
+            rollup_cutoff_ts = _to_epoch(
+                datetime.utcnow() - timedelta(days=max(retention_days, rollup_retention_days))
+            )
 
-            with self._get_connection() as conn:
+            with self._get_connection(write=True) as conn:
                 cursor = conn.cursor()
 
+                # Clean old samples and rollups
+                cursor.execute("DELETE FROM samples WHERE ts < ?", (cutoff_ts,))
+                samples_deleted = cursor.rowcount
+                cursor.execute("DELETE FROM rollup_1m WHERE bucket < ?", (cutoff_ts,))
+                for resolution in ("1h", "1d"):
+                    cursor.execute(
+                        f"DELETE FROM rollup_{resolution} WHERE bucket < ?",
+                        (rollup_cutoff_ts,),
+                    )
+
                 # Clean old metrics
                 cursor.execute(
                     "DELETE FROM metrics WHERE created_at < ?", (cutoff_iso,)
@@ -382,6 +757,7 @@ class DatabaseManager:
 
                 self.logger.info(
                     f"Cleanup completed: {metrics_deleted} metrics, "
+                    f"{samples_deleted} samples, "
                     f"{alerts_deleted} alerts, {events_deleted} events"
                 )
 
@@ -405,6 +781,12 @@ class DatabaseManager:
                 cursor.execute("SELECT COUNT(*) FROM system_events")
                 events_count = cursor.fetchone()[0]
 
+                cursor.execute("SELECT COUNT(*) FROM series")
+                series_count = cursor.fetchone()[0]
+
+                cursor.execute("SELECT COUNT(*) FROM samples")
+                samples_count = cursor.fetchone()[0]
+
                 # Get database file size
                 try:
                     db_size = self.db_path.stat().st_size
@@ -420,6 +802,8 @@ class DatabaseManager:
                     "metrics_count": metrics_count,
                     "active_alerts": active_alerts,
                     "events_count": events_count,
+                    "series_count": series_count,
+                    "samples_count": samples_count,
                     "size_bytes": db_size,
                     "oldest_record": oldest_newest[0],
                     "newest_record": oldest_newest[1],
@@ -447,5 +831,5 @@ class DatabaseManager:
 
     def close(self):
         """Close database connections"""
-        # SQLite connections are closed automatically in context manager
+        self._pool.close()
         self.logger.info("Database connections closed")
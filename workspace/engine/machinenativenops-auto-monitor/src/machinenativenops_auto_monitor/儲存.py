@@ -12,13 +12,20 @@ Handles metric and alert data storage.
 
 import json
 import logging
+import math
+import mmap
+import os
 import sqlite3
+import struct
+import threading
+import time
+import zlib
 from abc import ABC, abstractmethod
 from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -586,12 +593,428 @@ class FileStorage(MetricStorage):
         return deleted_count
 
 
+# Segment file layout: a sequence of blocks, each a fixed header followed by
+# ``count`` fixed-size records. Headers carry the block's series (or
+# MIXED_SERIES), time range and a CRC32 of the records.
+SEGMENT_BLOCK_HEADER = struct.Struct("<4sIIIdd")  # magic, series, count, crc, min_ts, max_ts
+SEGMENT_RECORD = struct.Struct("<Idd")  # series id, epoch timestamp, value
+SEGMENT_MAGIC = b"MSB1"
+MIXED_SERIES = 0xFFFFFFFF
+
+
+def _epoch(timestamp: datetime) -> float:
+    """Epoch seconds of a datetime (naive datetimes are UTC)"""
+    if timestamp.tzinfo is None:
+        return (timestamp - datetime(1970, 1, 1)).total_seconds()
+    return timestamp.timestamp()
+
+
+def _from_epoch(ts: float) -> datetime:
+    return datetime(1970, 1, 1) + timedelta(seconds=ts)
+
+
+class SegmentedFileStorage(MetricStorage):
+    """
+    Append-only segmented metric storage
+
+    Samples are appended as fixed-size binary records to the active segment
+    in CRC-checked blocks, so storing a metric never rewrites existing data.
+    Segments roll over at ``segment_bytes``. Sealed segments are compacted
+    size-tiered: a segment's tier is its size in powers of ``compact_after``
+    segments, and once ``compact_after`` adjacent newest segments share a
+    tier they are merged into one segment of the next tier (records
+    regrouped into per-series blocks sorted by time). Each record is thus
+    rewritten O(log n) times rather than on every rollover. Retention drops
+    whole expired segments and rewrites only segments straddling the cutoff.
+    Range queries mmap the segments and skip blocks by series and time range
+    from their headers. Values are stored as floats.
+    """
+
+    def __init__(
+        self,
+        storage_dir: Path = Path("/var/lib/machinenativeops/metrics/segments"),
+        segment_bytes: int = 16 * 1024 * 1024,
+        block_records: int = 256,
+        flush_interval: float = 1.0,
+        compact_after: int = 8,
+    ):
+        """
+        Initialize segmented storage
+
+        Args:
+            storage_dir: Directory holding the segments and series names
+            segment_bytes: Size at which the active segment is sealed
+            block_records: Records buffered before a block is written
+            flush_interval: Seconds after which buffered records are written anyway
+            compact_after: Number of same-tier segments merged by compaction
+        """
+        self.storage_dir = Path(storage_dir)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.block_records = block_records
+        self.flush_interval = flush_interval
+        self.compact_after = compact_after
+
+        self._lock = threading.RLock()
+        self._buffer: List[Tuple[int, float, float]] = []
+        self._last_flush = time.monotonic()
+        self._series_ids: Dict[str, int] = {}
+        self._series_file = self.storage_dir / "series.jsonl"
+        self._load_series()
+
+        # Segments are named "<first>-<last>.seg" after the segment sequence
+        # numbers they contain; a compacted segment covers its sources
+        self._segments: List[Tuple[int, int]] = self._load_segments()
+        self._active_seq = self._segments[-1][1] + 1 if self._segments else 0
+        if self._segments:
+            # Keep appending to the last segment if it was not sealed by size
+            first, last = self._segments[-1]
+            if first == last and self._segment_path(first, last).stat().st_size < segment_bytes:
+                self._active_seq = self._segments.pop()[0]
+        self._active = self._open_active()
+        logger.info(f"Initialized segmented storage at {self.storage_dir}")
+
+    # ---- Files ----
+
+    def _segment_path(self, first: int, last: int) -> Path:
+        return self.storage_dir / f"{first:08d}-{last:08d}.seg"
+
+    def _load_series(self):
+        if not self._series_file.exists():
+            return
+        with open(self._series_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._series_ids.setdefault(json.loads(line), len(self._series_ids))
+
+    def _series_id(self, metric_name: str) -> int:
+        series_id = self._series_ids.get(metric_name)
+        if series_id is None:
+            with open(self._series_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(metric_name, ensure_ascii=False) + "\n")
+            series_id = self._series_ids[metric_name] = len(self._series_ids)
+        return series_id
+
+    def _load_segments(self) -> List[Tuple[int, int]]:
+        ranges = []
+        for path in self.storage_dir.glob("*.seg"):
+            try:
+                first, last = (int(part) for part in path.stem.split("-"))
+            except ValueError:
+                continue
+            ranges.append((first, last))
+        for path in self.storage_dir.glob("*.seg.tmp"):
+            path.unlink()  # Unfinished compaction output
+
+        # Sources of a compaction that completed before they were removed
+        covered = [
+            r for r in ranges
+            if any(o != r and o[0] <= r[0] and r[1] <= o[1] for o in ranges)
+        ]
+        for first, last in covered:
+            self._segment_path(first, last).unlink()
+        return sorted(r for r in ranges if r not in covered)
+
+    def _open_active(self):
+        path = self._segment_path(self._active_seq, self._active_seq)
+        if path.exists():
+            # Drop a torn block left by a crash
+            valid = self._valid_length(path)
+            if valid != path.stat().st_size:
+                logger.warning(f"Truncating torn block at {path}:{valid}")
+                with open(path, "r+b") as f:
+                    f.truncate(valid)
+        # Unbuffered, so a failed write leaves nothing queued behind it
+        return open(path, "ab", buffering=0)
+
+    def _valid_length(self, path: Path) -> int:
+        with open(path, "rb") as f:
+            data = f.read()
+        offset = 0
+        for header, start, end in self._blocks(data):
+            if zlib.crc32(data[start:end]) != header[3]:
+                break
+            offset = end
+        return offset
+
+    @staticmethod
+    def _blocks(data) -> Iterator[Tuple[tuple, int, int]]:
+        """Yield (header, payload start, payload end) for each complete block"""
+        offset, size = 0, len(data)
+        while offset + SEGMENT_BLOCK_HEADER.size <= size:
+            header = SEGMENT_BLOCK_HEADER.unpack_from(data, offset)
+            if header[0] != SEGMENT_MAGIC:
+                break
+            start = offset + SEGMENT_BLOCK_HEADER.size
+            end = start + header[2] * SEGMENT_RECORD.size
+            if end > size:
+                break
+            yield header, start, end
+            offset = end
+
+    @staticmethod
+    def _encode_block(records: List[Tuple[int, float, float]]) -> bytes:
+        series = {r[0] for r in records}
+        payload = b"".join(SEGMENT_RECORD.pack(*r) for r in records)
+        header = SEGMENT_BLOCK_HEADER.pack(
+            SEGMENT_MAGIC,
+            series.pop() if len(series) == 1 else MIXED_SERIES,
+            len(records),
+            zlib.crc32(payload),
+            min(r[1] for r in records),
+            max(r[1] for r in records),
+        )
+        return header + payload
+
+    # ---- Writes ----
+
+    def store_metric(self, metric_name: str, value: Any, timestamp: datetime = None):
+        """Store a metric value"""
+        self.store_metrics({metric_name: value}, timestamp)
+
+    def store_metrics(self, metrics: Dict[str, Any], timestamp: datetime = None):
+        """Store several metric values with one timestamp
+
+        Non-numeric values are skipped and logged; they are converted before
+        any series is registered, so a rejected value leaves no trace.
+        """
+        if timestamp is None:
+            timestamp = datetime.utcnow()
+        ts = _epoch(timestamp)
+        values = []
+        for metric_name, value in metrics.items():
+            try:
+                values.append((metric_name, float(value)))
+            except (TypeError, ValueError):
+                logger.error(f"Skipping non-numeric value for metric {metric_name}: {value!r}")
+        with self._lock:
+            for metric_name, value in values:
+                self._buffer.append((self._series_id(metric_name), ts, value))
+            if (
+                len(self._buffer) >= self.block_records
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ):
+                self.flush()
+
+    def flush(self):
+        """Write buffered records to the active segment"""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._buffer:
+                return
+            data = memoryview(
+                b"".join(
+                    self._encode_block(self._buffer[start:start + self.block_records])
+                    for start in range(0, len(self._buffer), self.block_records)
+                )
+            )
+            offset = self._active.tell()
+            try:
+                while data:
+                    data = data[self._active.write(data):]
+            except OSError:
+                # Cut off the partial write so later blocks start at a block
+                # boundary; the records stay buffered for the next flush
+                self._active.truncate(offset)
+                self._active.seek(offset)
+                raise
+            self._buffer.clear()
+            if self._active.tell() >= self.segment_bytes:
+                self._roll_segment()
+
+    def _roll_segment(self):
+        self._active.close()
+        self._segments.append((self._active_seq, self._active_seq))
+        self._active_seq += 1
+        self._active = self._open_active()
+        self._compact_tiers()
+
+    def _tier(self, segment: Tuple[int, int]) -> int:
+        """Size tier: segments of about ``compact_after ** tier`` sealed segments"""
+        size = self._segment_path(*segment).stat().st_size
+        if size <= self.segment_bytes:
+            return 0
+        return round(math.log(size / self.segment_bytes, self.compact_after))
+
+    def _compact_tiers(self):
+        """Merge the newest segments while ``compact_after`` of them share a tier"""
+        while len(self._segments) >= self.compact_after:
+            run = self._segments[-self.compact_after:]
+            tier = self._tier(run[-1])
+            if any(self._tier(segment) != tier for segment in run[:-1]):
+                return
+            self._merge(run)
+
+    def _merge(self, sources: List[Tuple[int, int]], cutoff: Optional[float] = None) -> int:
+        """
+        Rewrite adjacent segments as one, optionally dropping records before cutoff
+
+        Records are regrouped into per-series blocks sorted by time, so reads
+        can skip other series by block header. The output is named after the
+        sequence range it covers, so a crash between writing it and removing
+        the sources is resolved on the next start.
+
+        Returns:
+            Number of records dropped
+        """
+        by_series: Dict[int, List[Tuple[int, float, float]]] = {}
+        dropped = 0
+        for source in sources:
+            for records in self._read_segment(self._segment_path(*source)):
+                for record in records:
+                    if cutoff is not None and record[1] < cutoff:
+                        dropped += 1
+                    else:
+                        by_series.setdefault(record[0], []).append(record)
+
+        merged = (sources[0][0], sources[-1][1])
+        target = self._segment_path(*merged)
+        if by_series:
+            tmp = target.with_name(target.name + ".tmp")
+            with open(tmp, "wb") as f:
+                for series_id in sorted(by_series):
+                    records = sorted(by_series[series_id], key=lambda r: r[1])
+                    for start in range(0, len(records), self.block_records):
+                        f.write(self._encode_block(records[start:start + self.block_records]))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, target)
+        for source in sources:
+            if source != merged or not by_series:
+                self._segment_path(*source).unlink()
+
+        position = self._segments.index(sources[0])
+        self._segments[position:position + len(sources)] = [merged] if by_series else []
+        logger.info(f"Compacted segments {merged[0]}-{merged[1]}, dropped {dropped} records")
+        return dropped
+
+    def _summary(self, segment: Tuple[int, int]) -> Tuple[Optional[float], Optional[float], int]:
+        """(min timestamp, max timestamp, record count) of a segment from its block headers"""
+        low = high = None
+        count = 0
+        path = self._segment_path(*segment)
+        if path.stat().st_size == 0:
+            return low, high, count
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for header, _, _ in self._blocks(data):
+                low = header[4] if low is None else min(low, header[4])
+                high = header[5] if high is None else max(high, header[5])
+                count += header[2]
+        return low, high, count
+
+    def _expire(self, cutoff: float) -> int:
+        """Drop records before cutoff, rewriting only segments that straddle it"""
+        dropped = 0
+        for segment in list(self._segments):
+            low, high, count = self._summary(segment)
+            if low is not None and low >= cutoff:
+                continue
+            if high is None or high < cutoff:
+                # Entirely expired: no need to read it
+                self._segment_path(*segment).unlink()
+                self._segments.remove(segment)
+                dropped += count
+            else:
+                dropped += self._merge([segment], cutoff)
+        return dropped
+
+    def compact(self, older_than: Optional[datetime] = None) -> int:
+        """
+        Merge all sealed segments into one (a full compaction)
+
+        Rollover only merges similar-size segments; this rewrites everything
+        sealed and is meant for explicit maintenance.
+
+        Args:
+            older_than: First drop records with timestamps before this time
+
+        Returns:
+            Number of records dropped
+        """
+        with self._lock:
+            dropped = self._expire(_epoch(older_than)) if older_than else 0
+            if len(self._segments) > 1:
+                self._merge(list(self._segments))
+            return dropped
+
+    # ---- Reads ----
+
+    def _read_segment(
+        self,
+        path: Path,
+        series_id: Optional[int] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Iterator[List[Tuple[int, float, float]]]:
+        """Yield the records of each intact block that may match the filters"""
+        if path.stat().st_size == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for header, block_start, block_end in self._blocks(data):
+                _, block_series, _, crc, min_ts, max_ts = header
+                if series_id is not None and block_series not in (series_id, MIXED_SERIES):
+                    continue
+                if (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                    continue
+                payload = data[block_start:block_end]
+                if zlib.crc32(payload) != crc:
+                    logger.error(f"CRC mismatch in {path} at offset {block_start}, skipping block")
+                    continue
+                yield list(SEGMENT_RECORD.iter_unpack(payload))
+
+    def retrieve_metrics(
+        self, metric_name: str, start_time: datetime = None, end_time: datetime = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve metric values in time order"""
+        with self._lock:
+            series_id = self._series_ids.get(metric_name)
+            if series_id is None:
+                return []
+            self.flush()
+            paths = [self._segment_path(*r) for r in self._segments]
+            paths.append(self._segment_path(self._active_seq, self._active_seq))
+
+            start = _epoch(start_time) if start_time else None
+            end = _epoch(end_time) if end_time else None
+            points = []
+            for path in paths:
+                for records in self._read_segment(path, series_id, start, end):
+                    points.extend(
+                        (ts, value)
+                        for sid, ts, value in records
+                        if sid == series_id
+                        and (start is None or ts >= start)
+                        and (end is None or ts <= end)
+                    )
+        points.sort()
+        return [
+            {"value": value, "timestamp": _from_epoch(ts).isoformat()}
+            for ts, value in points
+        ]
+
+    def delete_old_metrics(self, older_than: datetime):
+        """Delete metrics older than specified time (seals the active segment)"""
+        with self._lock:
+            self.flush()
+            if self._active.tell():
+                self._roll_segment()
+            deleted = self._expire(_epoch(older_than))
+        logger.info(f"Deleted {deleted} old metrics")
+        return deleted
+
+    def close(self):
+        """Flush buffered records and close the active segment"""
+        with self._lock:
+            self.flush()
+            self._active.close()
+
+
 def create_storage(storage_type: str = "memory", **kwargs) -> MetricStorage:
     """
     Factory function to create storage instance
 
     Args:
-        storage_type: Type of storage ('memory' or 'file')
+        storage_type: Type of storage ('memory', 'file' or 'segmented')
         **kwargs: Additional arguments for storage initialization
 
     Returns:
@@ -601,6 +1024,8 @@ def create_storage(storage_type: str = "memory", **kwargs) -> MetricStorage:
         return MemoryStorage(**kwargs)
     elif storage_type == "file":
         return FileStorage(**kwargs)
+    elif storage_type == "segmented":
+        return SegmentedFileStorage(**kwargs)
     else:
         logger.warning(f"Unknown storage type: {storage_type}, using memory")
         return MemoryStorage()
@@ -0,0 +1,264 @@
+"""
+Tests for the asyncio CollectionScheduler and shared SystemSnapshot
+"""
+
+import asyncio
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+MODULE_DIR = Path(__file__).resolve().parents[1] / "src" / "machinenativenops_auto_monitor"
+
+
+def _load(name):
+    # Loaded by path so the scheduler tests do not pull in the collector stack
+    spec = importlib.util.spec_from_file_location(f"auto_monitor_{name}", MODULE_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+scheduler = _load("scheduler")
+
+
+class RecordingCollector(scheduler.AsyncCollector):
+    """Collector that records when it runs and which snapshot it saw"""
+
+    def __init__(self, name, interval, delay=0.0, timeout=None, fail=False):
+        super().__init__(name, interval, timeout)
+        self.delay = delay
+        self.fail = fail
+        self.started = []
+        self.snapshots = []
+
+    async def collect(self, snapshot):
+        self.started.append(time.monotonic())
+        self.snapshots.append(snapshot)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("collector failed")
+        return {f"{self.name}_runs": float(len(self.started))}
+
+
+async def _run_for(sched, seconds):
+    sched.start()
+    await asyncio.sleep(seconds)
+    await sched.stop()
+
+
+class TestCadence:
+    @pytest.mark.asyncio
+    async def test_collectors_run_on_their_own_interval(self):
+        fast = RecordingCollector("fast", interval=0.05)
+        slow = RecordingCollector("slow", interval=0.2)
+        results = []
+        sched = scheduler.CollectionScheduler(
+            [fast, slow], on_result=lambda name, metrics: results.append(name)
+        )
+
+        await _run_for(sched, 0.42)
+
+        assert 7 <= len(fast.started) <= 10
+        assert 2 <= len(slow.started) <= 3
+        # Runs are aligned to the interval rather than drifting by run time
+        gaps = [b - a for a, b in zip(fast.started, fast.started[1:])]
+        assert all(0.03 <= gap <= 0.08 for gap in gaps)
+        assert results.count("slow") == len(slow.started)
+        assert sched.latest["fast"]["fast_runs"] == float(len(fast.started))
+
+    @pytest.mark.asyncio
+    async def test_run_once_merges_results_concurrently(self):
+        a = RecordingCollector("a", interval=1, delay=0.1)
+        b = RecordingCollector("b", interval=1, delay=0.1)
+        sched = scheduler.CollectionScheduler([a, b])
+
+        started = time.monotonic()
+        merged = await sched.run_once()
+
+        assert time.monotonic() - started < 0.18
+        assert merged == {"a_runs": 1.0, "b_runs": 1.0}
+
+
+class TestOverrunsAndTimeouts:
+    @pytest.mark.asyncio
+    async def test_overrun_skips_missed_slots(self):
+        slow = RecordingCollector("slow", interval=0.05, delay=0.12, timeout=1.0)
+        sched = scheduler.CollectionScheduler([slow])
+
+        await _run_for(sched, 0.4)
+
+        stats = sched.get_stats()["slow"]
+        assert stats["overruns"] >= 2
+        assert stats["skipped_runs"] >= stats["overruns"]
+        # Missed slots are dropped, not run back to back
+        gaps = [b - a for a, b in zip(slow.started, slow.started[1:])]
+        assert all(gap >= 0.12 for gap in gaps)
+
+    @pytest.mark.asyncio
+    async def test_timeouts_and_failures_are_counted(self):
+        hanging = RecordingCollector("hanging", interval=0.05, delay=1.0, timeout=0.02)
+        failing = RecordingCollector("failing", interval=0.05, fail=True)
+        sched = scheduler.CollectionScheduler([hanging, failing])
+
+        await _run_for(sched, 0.2)
+
+        stats = sched.get_stats()
+        assert stats["hanging"]["timeouts"] >= 3
+        assert stats["hanging"]["max_cycle_seconds"] < 0.1
+        assert stats["failing"]["failures"] >= 3
+        assert "hanging" not in sched.latest
+        exported = sched.export_metrics()
+        assert exported["collector_hanging_timeouts"] == float(stats["hanging"]["timeouts"])
+
+    @pytest.mark.asyncio
+    async def test_result_callback_errors_do_not_stop_the_loop(self):
+        collector = RecordingCollector("c", interval=0.05)
+
+        async def on_result(name, metrics):
+            raise ValueError("storage down")
+
+        sched = scheduler.CollectionScheduler([collector], on_result=on_result)
+        await _run_for(sched, 0.17)
+
+        assert len(collector.started) >= 3
+        assert sched.get_stats()["c"]["failures"] == 0
+
+
+class TestSnapshotSharing:
+    @pytest.mark.asyncio
+    async def test_same_tick_collectors_share_snapshot(self):
+        a = RecordingCollector("a", interval=0.1)
+        b = RecordingCollector("b", interval=0.1)
+        sched = scheduler.CollectionScheduler([a, b], snapshot_ttl=0.05)
+
+        await _run_for(sched, 0.25)
+
+        for first, second in zip(a.snapshots, b.snapshots):
+            assert first is second
+        # A new tick gets a fresh snapshot
+        assert a.snapshots[0] is not a.snapshots[1]
+
+    def test_reading_taken_once_per_snapshot(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            scheduler.psutil, "cpu_count", lambda: calls.append(1) or 4
+        )
+        snapshot = scheduler.SystemSnapshot()
+
+        assert snapshot.cpu_count == 4
+        assert snapshot.cpu_count == 4
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_slow_reading_does_not_block_other_readings(self, monkeypatch):
+        release = threading.Event()
+
+        def slow_connections(kind):
+            release.wait(2)
+            return []
+
+        monkeypatch.setattr(scheduler.psutil, "net_connections", slow_connections)
+        snapshot = scheduler.SystemSnapshot()
+        loading = asyncio.create_task(snapshot.load("listening_ports"))
+        await asyncio.sleep(0.05)
+
+        # Another reading on the loop thread while listening_ports is in progress
+        started = time.monotonic()
+        assert snapshot.cpu_count >= 1
+        assert time.monotonic() - started < 0.5
+
+        release.set()
+        await loading
+        assert snapshot.listening_ports == set()
+
+    @pytest.mark.asyncio
+    async def test_local_service_checks_use_snapshot(self, monkeypatch):
+        class Proc:
+            def __init__(self, name, pid):
+                self.info = {"name": name}
+                self.pid = pid
+
+        class Conn:
+            status = scheduler.psutil.CONN_LISTEN
+
+            class laddr:
+                port = 8080
+
+        process_calls = []
+
+        def process_iter(attrs):
+            process_calls.append(attrs)
+            return [Proc("nginx", 10)]
+
+        monkeypatch.setattr(scheduler.psutil, "process_iter", process_iter)
+        monkeypatch.setattr(scheduler.psutil, "net_connections", lambda kind: [Conn()])
+        collector = scheduler.LocalServiceCollector(
+            [
+                {"name": "web", "type": "port", "port": 8080},
+                {"name": "db", "type": "port", "port": 5432},
+                {"name": "nginx", "type": "process"},
+                {"name": "redis", "type": "process", "process_name": "redis-server"},
+            ]
+        )
+        snapshot = scheduler.SystemSnapshot()
+
+        metrics = await collector.collect(snapshot)
+        await collector.collect(snapshot)
+
+        assert metrics == {
+            "service_web_healthy": 1.0,
+            "service_db_healthy": 0.0,
+            "service_nginx_healthy": 1.0,
+            "service_redis_healthy": 0.0,
+        }
+        assert len(process_calls) == 1
+
+
+def test_from_config_builds_enabled_collectors():
+    sched = scheduler.CollectionScheduler.from_config(
+        {
+            "scheduler": {"enabled": True},
+            "system": {"enabled": True, "interval": 15},
+            "service": {
+                "enabled": True,
+                "services": [{"name": "api", "health_url": "http://localhost/health"}],
+            },
+            "local_services": {"enabled": False, "services": [{"name": "x"}]},
+        },
+        default_interval=30,
+    )
+
+    assert [(c.name, c.interval) for c in sched.collectors] == [("system", 15), ("service", 30)]
+
+
+def test_from_config_passes_timeouts():
+    sched = scheduler.CollectionScheduler.from_config(
+        {
+            "system": {"interval": 15, "timeout": 3},
+            "service": {
+                "interval": 20,
+                "timeout": 12,
+                "request_timeout": 2,
+                "services": [{"name": "api", "health_url": "http://localhost/health"}],
+            },
+            "local_services": {"timeout": 4, "services": [{"name": "x", "port": 1}]},
+        },
+        default_interval=30,
+    )
+
+    assert [(c.name, c.interval, c.timeout) for c in sched.collectors] == [
+        ("system", 15, 3),
+        ("service", 20, 12),
+        ("local_service", 30, 4),
+    ]
+    assert sched.collectors[1].request_timeout == 2
+
+    # Without a timeout a run may take up to its interval; requests default to 5s
+    defaults = scheduler.CollectionScheduler.from_config(
+        {"service": {"services": [{"name": "api", "health_url": "http://localhost/health"}]}},
+        default_interval=30,
+    )
+    assert (defaults.collectors[0].timeout, defaults.collectors[0].request_timeout) == (30, 5)
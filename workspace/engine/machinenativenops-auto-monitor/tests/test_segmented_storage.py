@@ -0,0 +1,263 @@
+"""
+Tests for the append-only SegmentedFileStorage in 儲存.py
+"""
+
+import importlib.util
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+MODULE_DIR = Path(__file__).resolve().parents[1] / "src" / "machinenativenops_auto_monitor"
+
+
+def _load(name):
+    # Loaded by path so the storage tests do not pull in the collector stack
+    spec = importlib.util.spec_from_file_location(f"auto_monitor_{name}", MODULE_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+segmented = _load("儲存")
+
+BASE = datetime(2025, 1, 1, 0, 0, 0)
+BLOCK_BYTES = segmented.SEGMENT_BLOCK_HEADER.size + segmented.SEGMENT_RECORD.size
+
+
+def _open(path, **kwargs):
+    # One record per block and one block per segment unless overridden
+    options = {"segment_bytes": BLOCK_BYTES, "block_records": 1, "compact_after": 4}
+    options.update(kwargs)
+    return segmented.SegmentedFileStorage(path, **options)
+
+
+def _store(storage, count, start=0, name="cpu"):
+    for i in range(start, start + count):
+        storage.store_metric(name, float(i), BASE + timedelta(seconds=i))
+
+
+def _values(storage, name="cpu", **kwargs):
+    return [point["value"] for point in storage.retrieve_metrics(name, **kwargs)]
+
+
+def _segment_files(path):
+    return sorted(p.name for p in Path(path).glob("*.seg"))
+
+
+def test_round_trip_and_range_query(tmp_path):
+    storage = _open(tmp_path, segment_bytes=1 << 20, block_records=4)
+    _store(storage, 10)
+    _store(storage, 3, name="mem")
+
+    assert _values(storage) == [float(i) for i in range(10)]
+    assert _values(
+        storage, start_time=BASE + timedelta(seconds=3), end_time=BASE + timedelta(seconds=5)
+    ) == [3.0, 4.0, 5.0]
+    assert _values(storage, name="mem") == [0.0, 1.0, 2.0]
+    assert storage.retrieve_metrics("missing") == []
+    storage.close()
+
+    reopened = _open(tmp_path, segment_bytes=1 << 20, block_records=4)
+    assert _values(reopened) == [float(i) for i in range(10)]
+    reopened.close()
+
+
+def test_segments_roll_over_at_size(tmp_path):
+    storage = _open(tmp_path, compact_after=100)
+    _store(storage, 3)
+
+    # Each one-block segment is sealed as soon as it is written
+    assert _segment_files(tmp_path) == [
+        "00000000-00000000.seg",
+        "00000001-00000001.seg",
+        "00000002-00000002.seg",
+        "00000003-00000003.seg",
+    ]
+    assert _values(storage) == [0.0, 1.0, 2.0]
+    storage.close()
+
+
+def test_compaction_merges_only_same_tier_segments(tmp_path):
+    storage = _open(tmp_path)
+    _store(storage, 4)
+
+    # Four tier-0 segments merged into one tier-1 segment
+    assert _segment_files(tmp_path) == ["00000000-00000003.seg", "00000004-00000004.seg"]
+    merged = tmp_path / "00000000-00000003.seg"
+    inode = merged.stat().st_ino
+
+    _store(storage, 3, start=4)
+
+    # Newer small segments do not rewrite the tier-1 segment
+    assert merged.stat().st_ino == inode
+    assert _segment_files(tmp_path)[0] == "00000000-00000003.seg"
+    assert len(_segment_files(tmp_path)) == 5
+
+    _store(storage, 9, start=7)
+
+    # 16 sealed records cascade into a single tier-2 segment
+    assert "00000000-00000015.seg" in _segment_files(tmp_path)
+    assert _values(storage) == [float(i) for i in range(16)]
+    storage.close()
+
+
+def test_full_compaction_and_reopen(tmp_path):
+    storage = _open(tmp_path, compact_after=100)
+    _store(storage, 5)
+    storage.compact()
+
+    assert _segment_files(tmp_path) == ["00000000-00000004.seg", "00000005-00000005.seg"]
+    storage.close()
+
+    reopened = _open(tmp_path, compact_after=100)
+    assert _values(reopened) == [float(i) for i in range(5)]
+    reopened.close()
+
+
+def test_reopen_removes_compaction_leftovers(tmp_path):
+    storage = _open(tmp_path, compact_after=100)
+    _store(storage, 2)
+    storage.close()
+    # A crash after writing the merged segment but before removing its sources
+    merged = (tmp_path / "00000000-00000000.seg").read_bytes()
+    merged += (tmp_path / "00000001-00000001.seg").read_bytes()
+    (tmp_path / "00000000-00000001.seg").write_bytes(merged)
+    (tmp_path / "00000002-00000002.seg.tmp").write_bytes(b"partial")
+
+    reopened = _open(tmp_path, compact_after=100)
+
+    assert _values(reopened) == [0.0, 1.0]
+    assert not list(tmp_path.glob("*.tmp"))
+    assert "00000000-00000000.seg" not in _segment_files(tmp_path)
+    reopened.close()
+
+
+def test_corrupt_block_is_skipped(tmp_path):
+    block = segmented.SEGMENT_BLOCK_HEADER.size + 2 * segmented.SEGMENT_RECORD.size
+    storage = _open(tmp_path, segment_bytes=3 * block, block_records=2)
+    _store(storage, 6)
+    assert _segment_files(tmp_path)[0] == "00000000-00000000.seg"
+
+    path = tmp_path / "00000000-00000000.seg"
+    data = bytearray(path.read_bytes())
+    # Flip a byte of the first value in the second block
+    data[block + segmented.SEGMENT_BLOCK_HEADER.size + 12] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    assert _values(storage) == [0.0, 1.0, 4.0, 5.0]
+    storage.close()
+
+
+def test_torn_tail_is_truncated_on_reopen(tmp_path):
+    storage = _open(tmp_path, segment_bytes=1 << 20, block_records=2)
+    _store(storage, 4)
+    storage.close()
+
+    path = tmp_path / "00000000-00000000.seg"
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(segmented.SEGMENT_BLOCK_HEADER.pack(segmented.SEGMENT_MAGIC, 0, 2, 0, 0, 0))
+        f.write(b"\x00" * 5)
+
+    reopened = _open(tmp_path, segment_bytes=1 << 20, block_records=2)
+    assert path.stat().st_size == intact
+
+    # New blocks start at the block boundary and stay readable
+    _store(reopened, 2, start=4)
+    reopened.close()
+    reopened = _open(tmp_path, segment_bytes=1 << 20, block_records=2)
+    assert _values(reopened) == [float(i) for i in range(6)]
+    reopened.close()
+
+
+def test_non_numeric_values_are_skipped(tmp_path):
+    storage = _open(tmp_path, segment_bytes=1 << 20, block_records=8, flush_interval=0)
+
+    storage.store_metrics({"cpu": 1.5, "status": "ok", "mem": "2", "extra": None}, BASE)
+
+    assert _values(storage) == [1.5]
+    assert _values(storage, name="mem") == [2.0]
+    assert storage.retrieve_metrics("status") == []
+    storage.close()
+
+    # Rejected metrics never reach the series catalog
+    series = (tmp_path / "series.jsonl").read_text()
+    assert "status" not in series and "extra" not in series
+    reopened = _open(tmp_path, segment_bytes=1 << 20, block_records=8)
+    assert _values(reopened, name="mem") == [2.0]
+    reopened.close()
+
+
+class FailingFile:
+    """Active-segment wrapper whose next write lands partially, then fails"""
+
+    def __init__(self, inner, partial):
+        self.inner = inner
+        self.partial = partial
+
+    def write(self, data):
+        self.inner.write(bytes(data[:self.partial]))
+        raise OSError("disk full")
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+def test_failed_flush_truncates_partial_write(tmp_path):
+    storage = _open(tmp_path, segment_bytes=1 << 20, block_records=2, flush_interval=3600)
+    _store(storage, 2)
+    path = tmp_path / "00000000-00000000.seg"
+    good = path.stat().st_size
+
+    storage._active = FailingFile(storage._active, partial=7)
+    storage.store_metric("cpu", 2.0, BASE + timedelta(seconds=2))
+    with pytest.raises(OSError):
+        storage.store_metric("cpu", 3.0, BASE + timedelta(seconds=3))
+
+    assert path.stat().st_size == good
+    assert len(storage._buffer) == 2
+
+    # The records stay buffered and are written by the next flush
+    storage._active = storage._active.inner
+    storage.flush()
+    storage.close()
+    reopened = _open(tmp_path, segment_bytes=1 << 20, block_records=2)
+    assert _values(reopened) == [0.0, 1.0, 2.0, 3.0]
+    reopened.close()
+
+
+def test_retention_rewrites_only_straddling_segments(tmp_path):
+    storage = _open(tmp_path, segment_bytes=3 * BLOCK_BYTES, compact_after=100)
+    _store(storage, 9)
+
+    assert _segment_files(tmp_path) == [
+        "00000000-00000000.seg",
+        "00000001-00000001.seg",
+        "00000002-00000002.seg",
+        "00000003-00000003.seg",
+    ]
+    kept = tmp_path / "00000002-00000002.seg"
+    inode = kept.stat().st_ino
+
+    deleted = storage.delete_old_metrics(BASE + timedelta(seconds=4))
+
+    assert deleted == 4
+    assert _values(storage) == [float(i) for i in range(4, 9)]
+    # Segment 0 expired whole, segment 1 was rewritten, segment 2 was untouched
+    assert "00000000-00000000.seg" not in _segment_files(tmp_path)
+    assert kept.stat().st_ino == inode
+    storage.close()
+
+    reopened = _open(tmp_path, segment_bytes=3 * BLOCK_BYTES, compact_after=100)
+    assert _values(reopened) == [float(i) for i in range(4, 9)]
+    reopened.close()
+
+
+def test_compact_with_cutoff_drops_expired_records(tmp_path):
+    storage = _open(tmp_path, compact_after=100)
+    _store(storage, 6)
+
+    assert storage.compact(older_than=BASE + timedelta(seconds=2)) == 2
+    assert _values(storage) == [2.0, 3.0, 4.0, 5.0]
+    storage.close()
@@ -0,0 +1,134 @@
+"""
+Tests for the SQLite time-series schema in storage.DatabaseManager
+"""
+
+import importlib.util
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+MODULE_DIR = Path(__file__).resolve().parents[1] / "src" / "machinenativenops_auto_monitor"
+
+
+def _load(name):
+    # Loaded by path so the storage tests do not pull in the collector stack
+    spec = importlib.util.spec_from_file_location(f"auto_monitor_{name}", MODULE_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+storage = _load("storage")
+
+BASE = datetime(2025, 1, 1, 0, 0, 0)
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = storage.DatabaseManager(str(tmp_path / "metrics.db"))
+    yield manager
+    manager.close()
+
+
+def test_flatten_metrics_skips_non_numeric_values():
+    flat = storage.flatten_metrics(
+        {
+            "cpu": {"percent": 12, "per_core": {"0": 1.5}},
+            "healthy": True,
+            "host": "node-1",
+            "load": float("nan"),
+            "disk": {"mounted": False, "used": 3},
+        }
+    )
+    assert flat == {"cpu.percent": 12.0, "cpu.per_core.0": 1.5, "disk.used": 3.0}
+
+
+def test_store_metrics_writes_series(db):
+    db.store_metrics(
+        {"timestamp": BASE.isoformat(), "cpu": {"percent": 40.0}, "up": True}
+    )
+
+    assert db.list_series() == ["cpu.percent"]
+    assert db.query_series("cpu.percent") == [
+        {"timestamp": BASE.isoformat(), "value": 40.0}
+    ]
+    assert db.get_latest_values("cpu") == {"cpu.percent": 40.0}
+
+
+def test_rollups_aggregate_by_bucket(db):
+    samples = [("cpu", BASE + timedelta(seconds=15 * i), float(i)) for i in range(12)]
+    assert db.store_samples(samples) == 12
+
+    minutes = db.query_series("cpu", resolution="1m")
+    assert [point["count"] for point in minutes] == [4, 4, 4]
+    assert minutes[1] == {
+        "timestamp": (BASE + timedelta(minutes=1)).isoformat(),
+        "count": 4,
+        "avg": 5.5,
+        "min": 4.0,
+        "max": 7.0,
+    }
+    hours = db.query_series("cpu", resolution="1h")
+    assert hours == [
+        {"timestamp": BASE.isoformat(), "count": 12, "avg": 5.5, "min": 0.0, "max": 11.0}
+    ]
+    # A range starting mid-bucket still includes that bucket
+    start = BASE + timedelta(seconds=90)
+    assert len(db.query_series("cpu", start_time=start, resolution="1m")) == 2
+    assert db.query_series("cpu", limit=2)[-1]["value"] == 11.0
+    with pytest.raises(ValueError):
+        db.query_series("cpu", resolution="5m")
+
+
+def test_duplicate_samples_are_counted_once(db):
+    assert db.store_samples([("cpu", BASE, 1.0), ("cpu", BASE, 2.0), ("mem", BASE, 5.0)]) == 2
+    # Already stored samples are ignored; a new series at the same time is not
+    assert db.store_samples([("cpu", BASE, 3.0), ("disk", BASE, 7.0)]) == 1
+
+    assert db.query_series("cpu") == [{"timestamp": BASE.isoformat(), "value": 1.0}]
+    assert db.query_series("cpu", resolution="1m")[0]["count"] == 1
+    assert db.query_series("disk", resolution="1d")[0]["count"] == 1
+
+
+def test_retention_keeps_coarse_rollups_longer(db):
+    now = datetime.utcnow().replace(microsecond=0)
+    old = now - timedelta(days=40)
+    db.store_samples([("cpu", old, 1.0), ("cpu", now, 2.0)])
+
+    db.cleanup_old_data(retention_days=30, rollup_retention_days=365)
+
+    assert [p["value"] for p in db.query_series("cpu")] == [2.0]
+    assert len(db.query_series("cpu", resolution="1m")) == 1
+    assert len(db.query_series("cpu", resolution="1h")) == 2
+
+    db.cleanup_old_data(retention_days=30, rollup_retention_days=30)
+    assert len(db.query_series("cpu", resolution="1d")) == 1
+
+
+def test_concurrent_writers(db):
+    errors = []
+
+    def writer(worker):
+        try:
+            for i in range(50):
+                db.store_samples(
+                    [(f"w{worker}", BASE + timedelta(seconds=i), float(i)),
+                     ("shared", BASE + timedelta(seconds=i), float(worker))]
+                )
+        except Exception as exc:  # noqa: BLE001
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    stats = db.get_stats()
+    assert stats["series_count"] == 5
+    assert stats["samples_count"] == 4 * 50 + 50
+    shared = db.query_series("shared", resolution="1h")
+    assert shared[0]["count"] == 50
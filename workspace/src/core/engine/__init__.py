@@ -21,6 +21,7 @@ from typing import Any, Dict
 
 # Import core components
 from .dag_engine import DAGEngine, DAGNode, NodeStatus
+from .execution_history import ExecutionHistory, LatencyStats
 from .partial_rollback import (
     Checkpoint,
     PartialRollbackManager,
@@ -34,6 +35,7 @@ from .state_machine import (
     StateMachine,
     StateTransition,
 )
+from .task_executor import ExecutionMode, TaskExecutor, get_default_executor
 
 # Plugin metadata for service discovery
 PLUGIN_METADATA: Dict[str, Any] = {
@@ -89,4 +91,11 @@ __all__ = [
     "RollbackStatus",
     "Checkpoint",
     "RollbackOperation",
+    # Task Executor
+    "TaskExecutor",
+    "ExecutionMode",
+    "get_default_executor",
+    # Execution History
+    "ExecutionHistory",
+    "LatencyStats",
 ]
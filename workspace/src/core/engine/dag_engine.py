@@ -3,13 +3,20 @@ DAG Engine - Directed Acyclic Graph Orchestration Engine
 
 This module implements the core DAG orchestration logic with topological sorting,
 dependency resolution, and parallel execution capabilities.
+
+Execution is dependency-driven rather than level-by-level: each node is
+launched as soon as all of its own dependencies have completed, so a slow
+node only delays the nodes that actually depend on it.
 """
 
 import asyncio
+import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional
+
+from .task_executor import ExecutionMode, TaskExecutor, get_default_executor
 
 
 class NodeStatus(Enum):
@@ -35,6 +42,10 @@ class DAGNode:
         result: Execution result
         error: Error if execution failed
         metadata: Additional metadata
+        timeout: Per-node timeout in seconds (overrides the engine default)
+        execution_mode: Where a synchronous task runs (defaults to the executor's mode)
+        started_at: Monotonic time the task started running
+        finished_at: Monotonic time the task finished
     """
 
     node_id: str
@@ -44,6 +55,17 @@ class DAGNode:
     result: Any = None
     error: Optional[Exception] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    timeout: Optional[float] = None
+    execution_mode: Optional[ExecutionMode] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Execution time in seconds, if the node has run"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
 
 
 class DAGEngine:
@@ -54,10 +76,31 @@ class DAGEngine:
     of directed acyclic graph workflows.
     """
 
-    def __init__(self):
-        """Initialize the DAG engine"""
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        default_timeout: Optional[float] = None,
+        task_executor: Optional[TaskExecutor] = None,
+    ):
+        """
+        Initialize the DAG engine
+
+        Args:
+            max_concurrency: Maximum number of nodes running at once (None = unbounded)
+            default_timeout: Timeout in seconds for nodes without their own timeout
+            task_executor: Executor for synchronous tasks (defaults to the shared executor)
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
         self.nodes: Dict[str, DAGNode] = {}
         self.execution_order: List[List[str]] = []
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.task_executor = task_executor or get_default_executor()
+        # Reverse adjacency: node_id -> node_ids that depend on it
+        self.dependents: Dict[str, List[str]] = defaultdict(list)
+        self.execution_started_at: Optional[float] = None
+        self.execution_finished_at: Optional[float] = None
 
     def add_node(self, node: DAGNode) -> None:
         """
@@ -72,83 +115,50 @@ class DAGEngine:
         if node.node_id in self.nodes:
             raise ValueError(f"Node {node.node_id} already exists")
         self.nodes[node.node_id] = node
+        for dep in node.dependencies:
+            self.dependents[dep].append(node.node_id)
 
-    def _detect_cycle(self) -> bool:
-        """
-        Detect if there are cycles in the DAG
-
-        Returns:
-            bool: True if cycle detected, False otherwise
-        """
-        visited = set()
-        rec_stack = set()
-
-        def visit(node_id: str) -> bool:
-            visited.add(node_id)
-            rec_stack.add(node_id)
-
-            node = self.nodes.get(node_id)
-            if node:
-                for dep in node.dependencies:
-                    if dep not in visited:
-                        if visit(dep):
-                            return True
-                    elif dep in rec_stack:
-                        return True
-
-            rec_stack.remove(node_id)
-            return False
-
-        for node_id in self.nodes:
-            if node_id not in visited:
-                if visit(node_id):
-                    return True
-        return False
+    def _in_degrees(self) -> Dict[str, int]:
+        """Number of dependencies of each node that are part of the DAG"""
+        return {
+            node_id: sum(1 for dep in node.dependencies if dep in self.nodes)
+            for node_id, node in self.nodes.items()
+        }
 
     def topological_sort(self) -> List[List[str]]:
         """
         Perform topological sort with level-based grouping for parallel execution
 
+        Uses Kahn's algorithm over the reverse-adjacency index, O(N + E).
+
         Returns:
             List of levels, where each level contains node_ids that can run in parallel
 
         Raises:
             ValueError: If cycle is detected
         """
-        if self._detect_cycle():
-            raise ValueError("Cycle detected in DAG")
-
-        # Calculate in-degree for each node
-        in_degree = {node_id: 0 for node_id in self.nodes}
-        for node in self.nodes.values():
-            for dep in node.dependencies:
-                if dep in in_degree:
-                    in_degree[dep] += 1
+        in_degree = self._in_degrees()
 
         # Find all nodes with in-degree 0
-        queue = deque([node_id for node_id, degree in in_degree.items() if degree == 0])
+        current_level = [node_id for node_id, degree in in_degree.items() if degree == 0]
         levels = []
+        sorted_count = 0
 
-        while queue:
-            # Current level - all nodes that can run in parallel
-            current_level = list(queue)
+        while current_level:
             levels.append(current_level)
+            sorted_count += len(current_level)
 
-            # Process current level
-            next_queue = []
+            # Decrease in-degree for dependent nodes
+            next_level = []
             for node_id in current_level:
-                queue.popleft()
-                node = self.nodes[node_id]
-
-                # Decrease in-degree for dependent nodes
-                for dependent_id in self.nodes:
-                    dependent = self.nodes[dependent_id]
-                    if node_id in dependent.dependencies:
-                        in_degree[dependent_id] -= 1
-                        if in_degree[dependent_id] == 0:
-                            next_queue.append(dependent_id)
+                for dependent_id in self.dependents.get(node_id, ()):
+                    in_degree[dependent_id] -= 1
+                    if in_degree[dependent_id] == 0:
+                        next_level.append(dependent_id)
+            current_level = next_level
 
-            queue.extend(next_queue)
+        if sorted_count < len(self.nodes):
+            raise ValueError("Cycle detected in DAG")
 
         self.execution_order = levels
         return levels
@@ -157,20 +167,34 @@ class DAGEngine:
         """
         Execute a single node
 
+        Synchronous tasks run inline on the event loop, blocking other nodes,
+        unless the node or the task executor selects a worker pool. When a
+        timeout applies, synchronous tasks without a mode run on the thread
+        pool so the timeout can fire. A node that exceeds its timeout is
+        failed; coroutine tasks are cancelled, while a synchronous task already
+        running on a worker finishes in the background and its result is
+        discarded.
+
         Args:
             node: Node to execute
 
         Returns:
             Execution result
         """
+        timeout = node.timeout if node.timeout is not None else self.default_timeout
         try:
             node.status = NodeStatus.RUNNING
+            node.started_at = time.monotonic()
 
             # Execute the task
-            if asyncio.iscoroutinefunction(node.task):
-                result = await node.task()
-            else:
-                result = node.task()
+            try:
+                result = await self.task_executor.run_with_timeout(
+                    node.task, timeout=timeout, mode=node.execution_mode
+                )
+            except asyncio.TimeoutError:
+                raise asyncio.TimeoutError(
+                    f"Node {node.node_id} timed out after {timeout}s"
+                ) from None
 
             node.status = NodeStatus.COMPLETED
             node.result = result
@@ -181,60 +205,108 @@ class DAGEngine:
             node.error = e
             raise
 
+        finally:
+            node.finished_at = time.monotonic()
+
+    async def _run_node(self, node: DAGNode, semaphore: Optional[asyncio.Semaphore]) -> Any:
+        """Execute a node once a concurrency slot is available"""
+        if semaphore is None:
+            return await self._execute_node(node)
+        async with semaphore:
+            return await self._execute_node(node)
+
+    def _dependencies_completed(self, node: DAGNode) -> bool:
+        return all(
+            dep in self.nodes and self.nodes[dep].status == NodeStatus.COMPLETED
+            for dep in node.dependencies
+        )
+
     async def execute(self) -> Dict[str, Any]:
         """
-        Execute the DAG with parallel execution where possible
+        Execute the DAG, launching each node as soon as its dependencies complete
+
+        Nodes whose dependencies failed, were skipped or do not exist are
+        marked SKIPPED. At most ``max_concurrency`` nodes run at once.
 
         Returns:
-            Dict mapping node_id to execution result
+            Dict mapping node_id to execution result (or the raised exception)
 
         Raises:
             ValueError: If DAG has cycles or dependencies are invalid
         """
-        # Perform topological sort
-        levels = self.topological_sort()
+        # Validate the graph and record the level structure for reporting
+        self.topological_sort()
 
+        remaining = self._in_degrees()
+        ready = deque(node_id for node_id, degree in remaining.items() if degree == 0)
+        semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        running: Dict[asyncio.Task, str] = {}
         results = {}
 
-        # Execute level by level
-        for level in levels:
-            # Execute all nodes in this level in parallel
-            tasks = []
-            for node_id in level:
+        def release(node_id: str) -> None:
+            """Mark node_id as settled and queue dependents that became ready"""
+            for dependent_id in self.dependents.get(node_id, ()):
+                remaining[dependent_id] -= 1
+                if remaining[dependent_id] == 0:
+                    ready.append(dependent_id)
+
+        self.execution_started_at = time.monotonic()
+        while ready or running:
+            while ready:
+                node_id = ready.popleft()
                 node = self.nodes[node_id]
-
-                # Check if all dependencies completed successfully
-                dependencies_ok = True
-                for dep_id in node.dependencies:
-                    dep_node = self.nodes.get(dep_id)
-                    if not dep_node or dep_node.status != NodeStatus.COMPLETED:
-                        dependencies_ok = False
-                        break
-
-                if dependencies_ok:
-                    tasks.append(self._execute_node(node))
+                if self._dependencies_completed(node):
+                    task = asyncio.ensure_future(self._run_node(node, semaphore))
+                    running[task] = node_id
                 else:
                     node.status = NodeStatus.SKIPPED
+                    release(node_id)
 
-            # Wait for all tasks in this level to complete
-            if tasks:
-                level_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-                # Store results
-                for i, node_id in enumerate(
-                    [
-                        nid
-                        for nid in level
-                        if self.nodes[nid].status == NodeStatus.RUNNING
-                        or self.nodes[nid].status == NodeStatus.COMPLETED
-                    ]
-                ):
-                    results[node_id] = (
-                        level_results[i] if i < len(level_results) else None
-                    )
+            if not running:
+                break
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node_id = running.pop(task)
+                error = task.exception()
+                results[node_id] = error if error is not None else task.result()
+                release(node_id)
+        self.execution_finished_at = time.monotonic()
 
         return results
 
+    def get_critical_path(self) -> List[str]:
+        """
+        Longest chain of dependent nodes by execution time
+
+        Returns:
+            node_ids on the critical path, from first to last
+        """
+        finish_cost: Dict[str, float] = {}
+        predecessor: Dict[str, Optional[str]] = {}
+        for level in self.execution_order:
+            for node_id in level:
+                node = self.nodes[node_id]
+                if node.duration is None:
+                    continue
+                best_dep = max(
+                    (dep for dep in node.dependencies if dep in finish_cost),
+                    key=finish_cost.get,
+                    default=None,
+                )
+                finish_cost[node_id] = node.duration + (finish_cost[best_dep] if best_dep else 0.0)
+                predecessor[node_id] = best_dep
+
+        if not finish_cost:
+            return []
+
+        path = []
+        node_id = max(finish_cost, key=finish_cost.get)
+        while node_id is not None:
+            path.append(node_id)
+            node_id = predecessor[node_id]
+        return list(reversed(path))
+
     def get_execution_summary(self) -> Dict[str, Any]:
         """
         Get summary of DAG execution
@@ -246,9 +318,19 @@ class DAGEngine:
         for node in self.nodes.values():
             status_counts[node.status.value] += 1
 
+        critical_path = self.get_critical_path()
+        execution_time = None
+        if self.execution_started_at is not None and self.execution_finished_at is not None:
+            execution_time = self.execution_finished_at - self.execution_started_at
+
         return {
             "total_nodes": len(self.nodes),
             "status_counts": dict(status_counts),
             "execution_levels": len(self.execution_order),
             "nodes_by_level": [len(level) for level in self.execution_order],
+            "max_concurrency": self.max_concurrency,
+            "execution_time": execution_time,
+            "critical_path": critical_path,
+            "critical_path_duration": sum(self.nodes[n].duration for n in critical_path),
+            "executor_metrics": self.task_executor.get_metrics(),
         }
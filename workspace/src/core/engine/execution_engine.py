@@ -20,6 +20,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Awaitable, Callable, Dict, List, Optional
 
+from .execution_history import DEFAULT_HISTORY_CAPACITY, ExecutionHistory
+from .task_executor import ExecutionMode, TaskExecutor, get_default_executor
+
 
 class ExecutionStatus(Enum):
     """執行狀態"""
@@ -121,17 +124,35 @@ class ExecutionEngine:
     3. 代碼 ≠ 執行：代碼只是指令，需要執行層來實現
     """
 
-    def __init__(self):
-        """初始化執行引擎"""
+    def __init__(
+        self,
+        task_executor: Optional[TaskExecutor] = None,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_spill_path: Optional[str] = None,
+    ):
+        """
+        初始化執行引擎
+
+        Args:
+            task_executor: 同步處理函數的執行池（預設使用共用執行池）
+            history_capacity: 記憶體中保留的執行歷史筆數
+            history_spill_path: 超出容量的歷史摘要寫入的 JSON Lines 檔案
+        """
 
         # 執行器註冊表
         self._executors: Dict[ActionType, Callable] = {}
+        self._executor_modes: Dict[ActionType, Optional[ExecutionMode]] = {}
+
+        # 指定執行方式的同步函數移至執行池運行，避免阻塞事件循環
+        self.task_executor = task_executor or get_default_executor()
 
         # 連接器管理
         self._connectors: Dict[str, Any] = {}
 
-        # 執行歷史
-        self._execution_history: List[ExecutionResult] = []
+        # 執行歷史（固定容量環形緩衝，依行動類型/狀態/時間索引）
+        self._execution_history = ExecutionHistory(
+            history_capacity, history_spill_path
+        )
 
         # 能力驗證器
         self._capability_validators: Dict[ActionType, Callable] = {}
@@ -298,7 +319,17 @@ class ExecutionEngine:
             self._update_stats(result)
 
             # 保存執行歷史
-            self._execution_history.append(result)
+            self._execution_history.append(
+                result,
+                kind=action_type.value,
+                status=result.status.value,
+                duration_ms=result.duration_ms,
+                summary={
+                    "execution_id": result.execution_id,
+                    "error": result.error,
+                    "rollback_performed": result.rollback_performed,
+                },
+            )
 
         return result
 
@@ -613,7 +644,13 @@ class ExecutionEngine:
         if executor is None:
             raise ValueError(f"No executor for action type: {action_type}")
 
-        return await executor(action_params, context, execution_plan)
+        return await self.task_executor.run(
+            executor,
+            action_params,
+            context,
+            execution_plan,
+            mode=self._executor_modes.get(action_type),
+        )
 
     async def _simulate_execution(
         self,
@@ -791,10 +828,7 @@ class ExecutionEngine:
     async def _safe_call(self, func: Callable, *args, **kwargs) -> Any:
         """安全調用函數"""
         try:
-            if asyncio.iscoroutinefunction(func):
-                return await func(*args, **kwargs)
-            else:
-                return func(*args, **kwargs)
+            return await self.task_executor.run(func, *args, **kwargs)
         except Exception:
             return None
 
@@ -917,9 +951,22 @@ class ExecutionEngine:
 
     # ============ 公開 API ============
 
-    def register_executor(self, action_type: ActionType, executor: Callable):
-        """註冊自定義執行器"""
+    def register_executor(
+        self,
+        action_type: ActionType,
+        executor: Callable,
+        execution_mode: Optional[ExecutionMode] = None,
+    ):
+        """
+        註冊自定義執行器
+
+        Args:
+            action_type: 行動類型
+            executor: 執行函數（同步或異步）
+            execution_mode: 同步執行函數的執行方式（執行緒池/程序池/直接執行）
+        """
         self._executors[action_type] = executor
+        self._executor_modes[action_type] = execution_mode
 
     def register_connector(self, name: str, connector: Any):
         """註冊連接器"""
@@ -941,8 +988,40 @@ class ExecutionEngine:
 
     def get_stats(self) -> Dict[str, Any]:
         """獲取執行統計"""
-        return self._stats.copy()
+        stats = self._stats.copy()
+        stats["latency_ms"] = self._execution_history.latency.summary()
+        stats["executor_metrics"] = self.task_executor.get_metrics()
+        return stats
 
     def get_execution_history(self, limit: int = 100) -> List[ExecutionResult]:
         """獲取執行歷史"""
-        return self._execution_history[-limit:]
+        return self._execution_history.recent(limit)
+
+    def query_execution_history(
+        self,
+        action_type: Optional[ActionType] = None,
+        status: Optional[ExecutionStatus] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+    ) -> List[ExecutionResult]:
+        """
+        依行動類型、狀態與完成時間查詢執行歷史（只走訪索引中符合的項目）
+
+        Args:
+            action_type: 行動類型
+            status: 執行狀態
+            since: 最早完成時間
+            until: 最晚完成時間
+            limit: 最多返回筆數
+
+        Returns:
+            List[ExecutionResult]: 符合條件的最近執行結果（由舊到新）
+        """
+        return self._execution_history.query(
+            kind=action_type.value if action_type else None,
+            status=status.value if status else None,
+            since=since.timestamp() if since else None,
+            until=until.timestamp() if until else None,
+            limit=limit,
+        )
@@ -0,0 +1,285 @@
+"""
+Execution History - Bounded, indexed history of execution results
+
+Engines keep their most recent results in a fixed-size ring buffer instead
+of an ever-growing list. Entries are indexed by kind (action type, tool or
+function name) and status so filtered queries do not scan the whole
+history, and latency percentiles are tracked with streaming P² estimators.
+
+The ring holds the engines' result objects themselves, not compact copies,
+so memory is bounded by ``capacity`` times the size of a result. Only
+entries evicted from the ring are reduced to summaries, which can be
+spilled to an append-only JSON Lines log.
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from ..stats import P2Quantile
+
+DEFAULT_HISTORY_CAPACITY = 1000
+
+
+class LatencyStats:
+    """Streaming latency summary: count, mean, max and p50/p95/p99"""
+
+    QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._estimators = {name: P2Quantile(q) for name, q in self.QUANTILES.items()}
+
+    def add(self, value: float) -> None:
+        """Add a latency observation"""
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        for estimator in self._estimators.values():
+            estimator.add(value)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Get the latency summary
+
+        Returns:
+            Dict with count, mean, max and each percentile estimate
+        """
+        summary = {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+        }
+        for name, estimator in self._estimators.items():
+            summary[name] = estimator.value()
+        return summary
+
+
+class _Entry:
+    __slots__ = ("seq", "item", "kind", "status", "timestamp", "duration_ms", "summary")
+
+    def __init__(self, seq, item, kind, status, timestamp, duration_ms, summary):
+        self.seq = seq
+        self.item = item
+        self.kind = kind
+        self.status = status
+        self.timestamp = timestamp
+        self.duration_ms = duration_ms
+        self.summary = summary
+
+
+class ExecutionHistory:
+    """
+    Fixed-capacity execution history with kind/status/time indexes
+
+    Items are kept in append order and returned as-is by queries; the
+    timestamp of an entry is the time it was recorded, so time-range queries
+    can binary search the ring.
+    """
+
+    def __init__(
+        self, capacity: int = DEFAULT_HISTORY_CAPACITY, spill_path: Optional[str] = None
+    ):
+        """
+        Initialize the history
+
+        Args:
+            capacity: Number of most recent items kept in memory
+            spill_path: JSON Lines file receiving summaries of evicted items
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.latency = LatencyStats()
+        self.evicted = 0
+        self.spilled = 0
+
+        self._slots: List[Optional[_Entry]] = [None] * capacity
+        self._next_seq = 0
+        self._first_seq = 0  # Items before this seq were cleared
+        self._by_kind: Dict[str, Deque[int]] = defaultdict(deque)
+        self._by_status: Dict[str, Deque[int]] = defaultdict(deque)
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._next_seq - self._oldest_seq()
+
+    def _oldest_seq(self) -> int:
+        return max(self._first_seq, self._next_seq - self.capacity)
+
+    def _entry(self, seq: int) -> _Entry:
+        return self._slots[seq % self.capacity]
+
+    def append(
+        self,
+        item: Any,
+        kind: str,
+        status: str,
+        duration_ms: Optional[float] = None,
+        summary: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Record an item
+
+        Args:
+            item: The result object returned by queries
+            kind: Index key such as an action type or tool name
+            status: Index key for the outcome
+            duration_ms: Latency fed to the percentile estimators
+            summary: Extra JSON-serializable fields written when the item is spilled
+        """
+        with self._lock:
+            seq = self._next_seq
+            slot = seq % self.capacity
+            evicted = self._slots[slot]
+            if evicted is not None:
+                self._evict(evicted)
+
+            self._slots[slot] = _Entry(
+                seq, item, kind, status, time.time(), duration_ms, summary
+            )
+            self._by_kind[kind].append(seq)
+            self._by_status[status].append(seq)
+            self._next_seq += 1
+
+            if duration_ms is not None:
+                self.latency.add(duration_ms)
+
+    def _evict(self, entry: _Entry) -> None:
+        # The evicted entry is the oldest, so it is at the front of its index deques
+        for index, key in ((self._by_kind, entry.kind), (self._by_status, entry.status)):
+            seqs = index[key]
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+        self.evicted += 1
+
+        if self.spill_path:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+            record = {
+                "seq": entry.seq,
+                "kind": entry.kind,
+                "status": entry.status,
+                "timestamp": entry.timestamp,
+                "duration_ms": entry.duration_ms,
+            }
+            if entry.summary:
+                record.update(entry.summary)
+            self._spill_file.write(json.dumps(record, default=str) + "\n")
+            self._spill_file.flush()
+            self.spilled += 1
+
+    def recent(self, limit: Optional[int] = None) -> List[Any]:
+        """
+        Get the most recent items, oldest first
+
+        Args:
+            limit: Maximum number of items (None = everything in memory)
+        """
+        with self._lock:
+            start = self._oldest_seq()
+            if limit is not None:
+                start = max(start, self._next_seq - limit)
+            return [self._entry(seq).item for seq in range(start, self._next_seq)]
+
+    def query(
+        self,
+        kind: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: Optional[int] = 100,
+    ) -> List[Any]:
+        """
+        Get the most recent items matching all given filters, oldest first
+
+        Args:
+            kind: Only items recorded with this kind
+            status: Only items recorded with this status
+            since: Only items recorded at or after this epoch time
+            until: Only items recorded at or before this epoch time
+            limit: Maximum number of items (None = no limit)
+        """
+        with self._lock:
+            lo, hi = self._oldest_seq(), self._next_seq
+            if since is not None:
+                lo = self._bisect_time(since, lo, hi, inclusive=False)
+            if until is not None:
+                hi = self._bisect_time(until, lo, hi, inclusive=True)
+
+            candidates = [
+                index.get(key, ())
+                for index, key in ((self._by_kind, kind), (self._by_status, status))
+                if key is not None
+            ]
+            seqs = min(candidates, key=len) if candidates else range(lo, hi)
+
+            matches = []
+            for seq in reversed(seqs):
+                if seq >= hi:
+                    continue
+                if seq < lo or (limit is not None and len(matches) >= limit):
+                    break
+                entry = self._entry(seq)
+                if (kind is None or entry.kind == kind) and (
+                    status is None or entry.status == status
+                ):
+                    matches.append(entry.item)
+            matches.reverse()
+            return matches
+
+    def _bisect_time(self, timestamp: float, lo: int, hi: int, inclusive: bool) -> int:
+        """First seq in [lo, hi) recorded after timestamp (or at it, unless inclusive)"""
+        while lo < hi:
+            mid = (lo + hi) // 2
+            recorded = self._entry(mid).timestamp
+            if recorded < timestamp or (inclusive and recorded == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Number of in-memory items per kind and per status"""
+        with self._lock:
+            return {
+                "by_kind": {key: len(seqs) for key, seqs in self._by_kind.items()},
+                "by_status": {key: len(seqs) for key, seqs in self._by_status.items()},
+            }
+
+    def read_spilled(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the summaries written to the spill log"""
+        if not self.spill_path:
+            return
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.flush()
+        try:
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def clear(self) -> None:
+        """Drop the in-memory items (the spill log and latency stats are kept)"""
+        with self._lock:
+            self._slots = [None] * self.capacity
+            self._first_seq = self._next_seq
+            self._by_kind.clear()
+            self._by_status.clear()
+
+    def close(self) -> None:
+        """Close the spill log"""
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
@@ -174,7 +174,7 @@ Version: 1.0.0
 Last Updated: 2025-12-12
 """
 
-import asyncio
+import functools
 import json
 import uuid
 from dataclasses import dataclass, field
@@ -182,6 +182,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Union
 
+from .execution_history import DEFAULT_HISTORY_CAPACITY, ExecutionHistory
+from .task_executor import ExecutionMode, TaskExecutor, get_default_executor
+
 
 class FunctionCallStatus(Enum):
     """
@@ -243,6 +246,10 @@ class FunctionDefinition:
         parameters (Dict[str, Any]): JSON Schema object defining function parameters.
                                      Follows JSON Schema Draft 7 specification.
                                      JSON Schema 參數定義
+        execution_mode (Optional[ExecutionMode]): Where a synchronous handler runs
+                                     (thread pool, process pool or inline).
+                                     Defaults to the handler's TaskExecutor mode.
+                                     同步處理函數的執行方式
 
     Parameter Schema Format:
         The parameters dictionary should follow this structure:
@@ -308,6 +315,7 @@ class FunctionDefinition:
     parameters: Dict[str, Any] = field(
         default_factory=lambda: {"type": "object", "properties": {}, "required": []}
     )
+    execution_mode: Optional[ExecutionMode] = None
 
     def to_openai_format(self) -> Dict[str, Any]:
         """
@@ -630,7 +638,9 @@ class FunctionCallHandler:
     Attributes:
         _functions (Dict[str, FunctionDefinition]): Registry of function definitions
         _handlers (Dict[str, Callable]): Registry of function handlers (sync or async)
-        _call_history (List[FunctionCallResult]): Complete execution history
+        _call_history (ExecutionHistory): Bounded call history indexed by
+                                          function name and status
+        task_executor (TaskExecutor): Runs synchronous handlers off the event loop
 
     Thread Safety:
         This class is NOT thread-safe. Use separate instances per thread or
@@ -710,18 +720,31 @@ class FunctionCallHandler:
         - ToolCallRouter: Route calls to different handlers
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        task_executor: Optional[TaskExecutor] = None,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_spill_path: Optional[str] = None,
+    ):
         """
         Initialize an empty function call handler.
 
         Creates empty registries for functions and handlers, and initializes
-        an empty call history list.
+        an empty call history.
 
         初始化函數調用處理器。
+
+        Args:
+            task_executor (Optional[TaskExecutor]): Executor for synchronous
+                handlers. Defaults to the shared executor.
+            history_capacity (int): Number of most recent calls kept in memory.
+            history_spill_path (Optional[str]): JSON Lines file receiving
+                summaries of calls evicted from memory.
         """
         self._functions: Dict[str, FunctionDefinition] = {}
         self._handlers: Dict[str, Callable] = {}
-        self._call_history: List[FunctionCallResult] = []
+        self._call_history = ExecutionHistory(history_capacity, history_spill_path)
+        self.task_executor = task_executor or get_default_executor()
 
     def register(self, function_def: FunctionDefinition, handler: Callable) -> None:
         """
@@ -839,7 +862,7 @@ class FunctionCallHandler:
             1. Check if function exists → INVALID if not found
             2. Validate arguments against schema → INVALID if validation fails
             3. Check if handler exists → FAILED if missing
-            4. Execute handler (sync or async) → SUCCESS or FAILED
+            4. Execute handler (async, or sync on the task executor) → SUCCESS or FAILED
             5. Capture timing and result/error
             6. Add to call history
             7. Return result
@@ -874,7 +897,7 @@ class FunctionCallHandler:
         Performance:
             - Validation: O(n) where n = number of parameters
             - Execution: Depends on handler implementation
-            - History storage: O(1) append
+            - History storage: O(1) append into a bounded ring buffer
 
         Thread Safety:
             Not thread-safe. Use separate instances for concurrent calls.
@@ -894,7 +917,7 @@ class FunctionCallHandler:
                 arguments=arguments,
                 error=f"Function not found: {function_name}",
             )
-            self._call_history.append(result)
+            self._record(result)
             return result
 
         function_def = self._functions[function_name]
@@ -909,7 +932,7 @@ class FunctionCallHandler:
                 validation_errors=validation_errors,
                 error=f"Validation failed: {'; '.join(validation_errors)}",
             )
-            self._call_history.append(result)
+            self._record(result)
             return result
 
         # Execute handler
@@ -921,14 +944,14 @@ class FunctionCallHandler:
                 arguments=arguments,
                 error=f"No handler for function: {function_name}",
             )
-            self._call_history.append(result)
+            self._record(result)
             return result
 
         try:
-            if asyncio.iscoroutinefunction(handler):
-                output = await handler(**arguments)
-            else:
-                output = handler(**arguments)
+            output = await self.task_executor.run(
+                functools.partial(handler, **arguments),
+                mode=function_def.execution_mode,
+            )
 
             execution_time = (datetime.now() - start_time).total_seconds() * 1000
 
@@ -950,7 +973,7 @@ class FunctionCallHandler:
                 execution_time_ms=execution_time,
             )
 
-        self._call_history.append(result)
+        self._record(result)
         return result
 
     def parse_openai_tool_call(
@@ -967,9 +990,32 @@ class FunctionCallHandler:
 
         return function_name, arguments
 
-    def get_history(self) -> List[FunctionCallResult]:
-        """Get call history"""
-        return self._call_history.copy()
+    def _record(self, result: FunctionCallResult) -> None:
+        """Add a call result to the history"""
+        self._call_history.append(
+            result,
+            kind=result.function_name,
+            status=result.status.value,
+            duration_ms=result.execution_time_ms,
+            summary={"call_id": result.call_id, "error": result.error},
+        )
+
+    def get_history(
+        self,
+        function_name: Optional[str] = None,
+        status: Optional[FunctionCallStatus] = None,
+        limit: Optional[int] = None,
+    ) -> List[FunctionCallResult]:
+        """Get call history, optionally filtered by function name and status"""
+        if function_name is None and status is None:
+            return self._call_history.recent(limit)
+        return self._call_history.query(
+            kind=function_name, status=status.value if status else None, limit=limit
+        )
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """Get handler latency percentiles (p50/p95/p99) in milliseconds"""
+        return self._call_history.latency.summary()
 
     def clear_history(self) -> None:
         """Clear call history"""
@@ -1085,6 +1131,9 @@ class ToolCallRouter:
         _executors (Dict[str, Any]): Registry of executor instances by ID
         _rules (List[RoutingRule]): Ordered list of routing rules (by priority)
         _default_executor (Optional[str]): Fallback executor ID if no rules match
+        _execution_modes (Dict[str, Optional[ExecutionMode]]): Execution mode per
+                                                             synchronous executor
+        task_executor (TaskExecutor): Runs synchronous executors off the event loop
 
     Rule Matching:
         Rules are evaluated in priority order (highest first).
@@ -1160,26 +1209,39 @@ class ToolCallRouter:
         - FunctionCallHandler: Basic executor without routing
     """
 
-    def __init__(self):
+    def __init__(self, task_executor: Optional[TaskExecutor] = None):
         """
         Initialize an empty tool call router.
 
         Creates empty registries for executors and rules, with no default executor.
 
         初始化工具調用路由器。
+
+        Args:
+            task_executor (Optional[TaskExecutor]): Executor for synchronous
+                executors. Defaults to the shared executor.
         """
         self._executors: Dict[str, Any] = {}
         self._rules: List[RoutingRule] = []
         self._default_executor: Optional[str] = None
-
-    def register_executor(self, executor_id: str, executor: Any) -> None:
-        """Register an executor"""
+        self._execution_modes: Dict[str, Optional[ExecutionMode]] = {}
+        self.task_executor = task_executor or get_default_executor()
+
+    def register_executor(
+        self,
+        executor_id: str,
+        executor: Any,
+        execution_mode: Optional[ExecutionMode] = None,
+    ) -> None:
+        """Register an executor, optionally choosing where a synchronous one runs"""
         self._executors[executor_id] = executor
+        self._execution_modes[executor_id] = execution_mode
 
     def unregister_executor(self, executor_id: str) -> None:
         """Unregister an executor"""
         if executor_id in self._executors:
             del self._executors[executor_id]
+        self._execution_modes.pop(executor_id, None)
 
     def add_rule(self, rule: RoutingRule) -> None:
         """Add a routing rule"""
@@ -1197,36 +1259,40 @@ class ToolCallRouter:
 
     def route(self, tool_name: str, params: Dict[str, Any]) -> Optional[Any]:
         """Route a tool call to the appropriate executor"""
+        executor_id = self._route_id(tool_name, params)
+        return self._executors[executor_id] if executor_id is not None else None
+
+    def _route_id(self, tool_name: str, params: Dict[str, Any]) -> Optional[str]:
+        """Find the ID of the executor for a tool call"""
         # Check rules in priority order
         for rule in self._rules:
             if rule.condition(tool_name, params):
                 if rule.executor_id in self._executors:
-                    return self._executors[rule.executor_id]
+                    return rule.executor_id
 
         # Use default executor
         if self._default_executor and self._default_executor in self._executors:
-            return self._executors[self._default_executor]
+            return self._default_executor
 
         return None
 
     async def execute(self, tool_name: str, params: Dict[str, Any]) -> Any:
         """Route and execute a tool call"""
-        executor = self.route(tool_name, params)
+        executor_id = self._route_id(tool_name, params)
 
-        if executor is None:
+        if executor_id is None:
             raise ValueError(f"No executor found for tool: {tool_name}")
 
+        executor = self._executors[executor_id]
+        mode = self._execution_modes.get(executor_id)
+
         # Execute based on executor type
         if hasattr(executor, "execute"):
-            if asyncio.iscoroutinefunction(executor.execute):
-                return await executor.execute(tool_name, params)
-            else:
-                return executor.execute(tool_name, params)
+            return await self.task_executor.run(
+                executor.execute, tool_name, params, mode=mode
+            )
         elif callable(executor):
-            if asyncio.iscoroutinefunction(executor):
-                return await executor(tool_name, params)
-            else:
-                return executor(tool_name, params)
+            return await self.task_executor.run(executor, tool_name, params, mode=mode)
         else:
             raise ValueError(f"Executor is not callable: {type(executor)}")
 
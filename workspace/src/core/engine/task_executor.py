@@ -0,0 +1,307 @@
+"""
+Task Executor - Offload synchronous work from the event loop
+
+Synchronous handlers (DAG tasks, action executors, function-call handlers,
+tools) would otherwise run directly on the event loop, so a single blocking
+or CPU-heavy call stalls every concurrent execution. TaskExecutor runs them
+on a thread pool (blocking I/O) or a process pool (CPU-bound work), selected
+per call, and applies back-pressure by bounding how many calls may be queued
+on each pool. Offloading is opt-in: handlers that are not thread-safe or that
+touch the event loop keep running inline unless a mode is chosen for them.
+The exception is run_with_timeout, which moves synchronous calls without a
+mode to the thread pool, since an inline call cannot be timed out.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import warnings
+import weakref
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+
+class ExecutionMode(Enum):
+    """Where a synchronous callable runs"""
+
+    INLINE = "inline"  # Directly on the event loop (the default)
+    THREAD = "thread"  # Thread pool, for blocking I/O
+    PROCESS = "process"  # Process pool, for CPU-bound work (callable must be picklable)
+
+
+class TaskExecutor:
+    """
+    Runs synchronous callables on thread or process pools
+
+    Async callables are always awaited on the event loop. Each pool admits
+    at most ``max_pending`` calls (running plus queued) and a call holds its
+    slot until the worker finishes, even if the caller timed out; further
+    calls wait for a slot, which keeps a burst of submissions from growing
+    the pool queue without bound.
+    """
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = None,
+        max_processes: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        default_mode: ExecutionMode = ExecutionMode.INLINE,
+    ):
+        """
+        Initialize the task executor
+
+        Args:
+            max_threads: Thread pool size (defaults to ThreadPoolExecutor's default)
+            max_processes: Process pool size (defaults to the CPU count)
+            max_pending: Calls admitted per pool before callers wait (defaults to 4x pool size)
+            default_mode: Mode used when a call does not specify one
+        """
+        cpu_count = os.cpu_count() or 1
+        self.max_workers = {
+            ExecutionMode.THREAD: max_threads or min(32, cpu_count + 4),
+            ExecutionMode.PROCESS: max_processes or cpu_count,
+        }
+        self.max_pending = {
+            mode: max_pending or workers * 4 for mode, workers in self.max_workers.items()
+        }
+        self.default_mode = default_mode
+
+        self._pools: Dict[ExecutionMode, Executor] = {}
+        # Admission semaphores are bound to the running event loop, so they
+        # are created lazily per loop: loop -> {mode: semaphore}
+        self._slots = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._metrics = {
+            mode: {
+                "submitted": 0,
+                "completed": 0,
+                "failed": 0,
+                "cancelled": 0,
+                "waiting": 0,
+                "in_flight": 0,
+                "peak_queue_depth": 0,
+                "backpressure_waits": 0,
+            }
+            for mode in ExecutionMode
+        }
+
+    async def run(
+        self, func: Callable, *args, mode: Optional[ExecutionMode] = None, **kwargs
+    ) -> Any:
+        """
+        Call func with the given arguments without blocking the event loop
+
+        Async callables (coroutine functions, objects with an async
+        ``__call__``, and partials of either) run on the event loop. Other
+        callables run according to mode; if they return an awaitable (e.g. a
+        lambda wrapping a coroutine function) it is awaited on the loop.
+
+        Args:
+            func: Function or async callable to call
+            mode: Execution mode for synchronous functions (defaults to default_mode)
+
+        Returns:
+            The function's return value
+
+        Raises:
+            Any exception raised by func
+        """
+        mode = mode or self.default_mode
+        if mode == ExecutionMode.INLINE or _is_async_callable(func):
+            metrics = self._metrics[ExecutionMode.INLINE]
+            metrics["submitted"] += 1
+            try:
+                result = func(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception:
+                metrics["failed"] += 1
+                raise
+            metrics["completed"] += 1
+            return result
+
+        metrics = self._metrics[mode]
+        metrics["submitted"] += 1
+        slots = self._get_slots(mode)
+        if slots.locked():
+            metrics["backpressure_waits"] += 1
+        metrics["waiting"] += 1
+        try:
+            await slots.acquire()
+        finally:
+            metrics["waiting"] -= 1
+
+        metrics["in_flight"] += 1
+        metrics["peak_queue_depth"] = max(
+            metrics["peak_queue_depth"], self._queue_depth(mode)
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            future = self._get_pool(mode).submit(func, *args, **kwargs)
+        except BaseException:
+            metrics["in_flight"] -= 1
+            slots.release()
+            raise
+        # The slot is held until the worker finishes, not until the caller
+        # stops waiting: a timed-out or cancelled call keeps its thread busy,
+        # so releasing early would let submissions outrun the pool.
+        future.add_done_callback(
+            functools.partial(self._release_slot, loop, mode, slots)
+        )
+        result = await asyncio.wrap_future(future)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run_with_timeout(
+        self,
+        func: Callable,
+        *args,
+        timeout: Optional[float],
+        mode: Optional[ExecutionMode] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Call func like run(), failing with asyncio.TimeoutError after timeout seconds
+
+        A synchronous call that runs inline blocks the event loop, so the
+        timeout could never fire. When a timeout applies, no mode is given and
+        the default mode is INLINE, synchronous functions run on the thread
+        pool instead; an explicit INLINE mode is honoured with a warning. A
+        call that times out on a worker finishes in the background and its
+        result is discarded.
+
+        Args:
+            func: Function or async callable to call
+            timeout: Timeout in seconds, or None to wait indefinitely
+            mode: Execution mode for synchronous functions (defaults to default_mode)
+
+        Returns:
+            The function's return value
+
+        Raises:
+            asyncio.TimeoutError: The call did not finish in time
+            Any exception raised by func
+        """
+        if timeout is not None and not _is_async_callable(func):
+            if mode is None and self.default_mode == ExecutionMode.INLINE:
+                mode = ExecutionMode.THREAD
+            elif (mode or self.default_mode) == ExecutionMode.INLINE:
+                warnings.warn(
+                    f"Timeout of {timeout}s cannot interrupt {func!r}: synchronous "
+                    "callables running inline block the event loop",
+                    RuntimeWarning,
+                    stacklevel=2,
+                )
+        return await asyncio.wait_for(self.run(func, *args, mode=mode, **kwargs), timeout)
+
+    def _release_slot(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        mode: ExecutionMode,
+        slots: asyncio.Semaphore,
+        future: Future,
+    ) -> None:
+        """Done callback for pool futures; runs on whichever thread finished them"""
+
+        def release() -> None:
+            metrics = self._metrics[mode]
+            metrics["in_flight"] -= 1
+            if future.cancelled():
+                metrics["cancelled"] += 1
+            elif future.exception() is not None:
+                metrics["failed"] += 1
+            else:
+                metrics["completed"] += 1
+            slots.release()
+
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            # Event loop already closed; its semaphores are gone with it
+            pass
+
+    def _get_pool(self, mode: ExecutionMode) -> Executor:
+        with self._lock:
+            pool = self._pools.get(mode)
+            if pool is None:
+                workers = self.max_workers[mode]
+                if mode == ExecutionMode.PROCESS:
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    pool = ThreadPoolExecutor(
+                        max_workers=workers, thread_name_prefix="task-executor"
+                    )
+                self._pools[mode] = pool
+            return pool
+
+    def _get_slots(self, mode: ExecutionMode) -> asyncio.Semaphore:
+        loop_slots = self._slots.setdefault(asyncio.get_running_loop(), {})
+        slots = loop_slots.get(mode)
+        if slots is None:
+            slots = loop_slots[mode] = asyncio.Semaphore(self.max_pending[mode])
+        return slots
+
+    def _queue_depth(self, mode: ExecutionMode) -> int:
+        """Calls submitted to the pool that are not yet running on a worker"""
+        return max(0, self._metrics[mode]["in_flight"] - self.max_workers[mode])
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-mode execution metrics
+
+        Returns:
+            Dict mapping mode name to counters, current queue depth and pool limits
+        """
+        metrics = {}
+        for mode, counters in self._metrics.items():
+            entry = dict(counters)
+            if mode != ExecutionMode.INLINE:
+                entry["queue_depth"] = self._queue_depth(mode)
+                entry["max_workers"] = self.max_workers[mode]
+                entry["max_pending"] = self.max_pending[mode]
+            metrics[mode.value] = entry
+        return metrics
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the worker pools
+
+        Args:
+            wait: Wait for running calls to finish
+        """
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+def _is_async_callable(func: Callable) -> bool:
+    """Whether calling func returns a coroutine that must run on the event loop"""
+    while isinstance(func, functools.partial):
+        func = func.func
+    if inspect.iscoroutinefunction(func):
+        return True
+    # Instances with an async __call__
+    return callable(func) and inspect.iscoroutinefunction(func.__call__)
+
+
+_default_executor: Optional[TaskExecutor] = None
+_default_lock = threading.Lock()
+
+
+def get_default_executor() -> TaskExecutor:
+    """Get the shared TaskExecutor used when none is configured"""
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = TaskExecutor()
+        return _default_executor
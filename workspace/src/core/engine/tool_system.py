@@ -13,6 +13,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Union
 
+from .execution_history import DEFAULT_HISTORY_CAPACITY, ExecutionHistory
+from .task_executor import ExecutionMode, TaskExecutor, get_default_executor
+
 
 class ToolCategory(Enum):
     """Tool categories for organization and routing"""
@@ -76,6 +79,9 @@ class Tool:
 
     # Execution function
     execute_fn: Optional[Callable] = None
+    # Where a synchronous execute_fn runs (thread pool, process pool or inline)
+    execution_mode: Optional[ExecutionMode] = None
+    task_executor: Optional[TaskExecutor] = field(default=None, repr=False, compare=False)
 
     # Metadata
     tool_id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -94,12 +100,15 @@ class Tool:
             if self.execute_fn is None:
                 raise ValueError(f"Tool {self.name} has no execution function")
 
-            if asyncio.iscoroutinefunction(self.execute_fn):
-                result = await asyncio.wait_for(
-                    self.execute_fn(params), timeout=self.timeout_seconds
-                )
-            else:
-                result = self.execute_fn(params)
+            # Synchronous functions without an explicit mode run on the thread
+            # pool, so the timeout still applies to a blocking call
+            task_executor = self.task_executor or get_default_executor()
+            result = await task_executor.run_with_timeout(
+                self.execute_fn,
+                params,
+                timeout=self.timeout_seconds,
+                mode=self.execution_mode,
+            )
 
             execution_time = (datetime.now() - start_time).total_seconds() * 1000
 
@@ -261,9 +270,15 @@ class ToolExecutor:
     Executes tools with retry logic, timeout handling, and error recovery
     """
 
-    def __init__(self, registry: Optional[ToolRegistry] = None):
+    def __init__(
+        self,
+        registry: Optional[ToolRegistry] = None,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_spill_path: Optional[str] = None,
+    ):
         self.registry = registry or ToolRegistry()
-        self._execution_history: List[ToolResult] = []
+        # Bounded history indexed by tool name and status
+        self._execution_history = ExecutionHistory(history_capacity, history_spill_path)
 
     async def execute(
         self, tool_name: str, params: Dict[str, Any], retry_on_failure: bool = True
@@ -291,7 +306,13 @@ class ToolExecutor:
                 result.status = ToolStatus.RETRY
                 await asyncio.sleep(0.5 * (attempt + 1))  # Exponential backoff
 
-        self._execution_history.append(last_result)
+        self._execution_history.append(
+            last_result,
+            kind=tool_name,
+            status=last_result.status.value,
+            duration_ms=last_result.execution_time_ms,
+            summary={"error": last_result.error},
+        )
         return last_result
 
     async def execute_many(
@@ -311,9 +332,22 @@ class ToolExecutor:
                 results.append(result)
             return results
 
-    def get_history(self) -> List[ToolResult]:
-        """Get execution history"""
-        return self._execution_history.copy()
+    def get_history(
+        self,
+        tool_name: Optional[str] = None,
+        status: Optional[ToolStatus] = None,
+        limit: Optional[int] = None,
+    ) -> List[ToolResult]:
+        """Get execution history, optionally filtered by tool name and status"""
+        if tool_name is None and status is None:
+            return self._execution_history.recent(limit)
+        return self._execution_history.query(
+            kind=tool_name, status=status.value if status else None, limit=limit
+        )
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """Get tool latency percentiles (p50/p95/p99) in milliseconds"""
+        return self._execution_history.latency.summary()
 
     def clear_history(self) -> None:
         """Clear execution history"""
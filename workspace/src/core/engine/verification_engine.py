@@ -17,6 +17,8 @@ from datetime import datetime
 from enum import Enum
 from typing import Any, Callable, Dict, List, Optional
 
+from .execution_history import DEFAULT_HISTORY_CAPACITY, ExecutionHistory
+
 
 class VerificationStrategy(Enum):
     """驗證策略"""
@@ -104,14 +106,26 @@ class VerificationEngine:
     4. 支持自定義驗證規則
     """
 
-    def __init__(self):
-        """初始化驗證引擎"""
+    def __init__(
+        self,
+        history_capacity: int = DEFAULT_HISTORY_CAPACITY,
+        history_spill_path: Optional[str] = None,
+    ):
+        """
+        初始化驗證引擎
+
+        Args:
+            history_capacity: 記憶體中保留的驗證歷史筆數
+            history_spill_path: 超出容量的歷史摘要寫入的 JSON Lines 檔案
+        """
 
         # 自定義驗證器
         self._validators: Dict[str, Callable] = {}
 
-        # 驗證歷史
-        self._verification_history: List[VerificationResult] = []
+        # 驗證歷史（固定容量環形緩衝）
+        self._verification_history = ExecutionHistory(
+            history_capacity, history_spill_path
+        )
 
         # 統計
         self._stats = {
@@ -227,7 +241,17 @@ class VerificationEngine:
             self._stats["failed_verifications"] += 1
 
         # 保存歷史
-        self._verification_history.append(result)
+        self._verification_history.append(
+            result,
+            kind="verification",
+            status="passed" if result.passed else "failed",
+            duration_ms=result.duration_ms,
+            summary={
+                "id": result.id,
+                "total_checks": result.total_checks,
+                "failed_checks": result.failed_checks,
+            },
+        )
 
         return result
 
@@ -448,11 +472,17 @@ class VerificationEngine:
 
     def get_stats(self) -> Dict[str, Any]:
         """獲取統計信息"""
-        return self._stats.copy()
+        stats = self._stats.copy()
+        stats["latency_ms"] = self._verification_history.latency.summary()
+        return stats
 
     def get_history(self, limit: int = 100) -> List[VerificationResult]:
         """獲取驗證歷史"""
-        return self._verification_history[-limit:]
+        return self._verification_history.recent(limit)
+
+    def get_failed_verifications(self, limit: int = 100) -> List[VerificationResult]:
+        """獲取最近未通過的驗證（使用狀態索引）"""
+        return self._verification_history.query(status="failed", limit=limit)
 
     # ============ 默認驗證器實現 ============
 
@@ -6,11 +6,18 @@ Repository Graph, Embeddings, and Vector Search
 提供代碼庫理解和語義搜索能力
 """
 
+import asyncio
 import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any
 
+from .vector_index import VectorIndex
+
 
 class NodeType(Enum):
     """節點類型"""
@@ -22,6 +29,7 @@ class NodeType(Enum):
     VARIABLE = "variable"
     IMPORT = "import"
     COMMENT = "comment"
+    CHUNK = "chunk"
 
 
 class EdgeType(Enum):
@@ -67,6 +75,65 @@ class SearchResult:
     context: str = ""
 
 
+@dataclass
+class IndexingStats:
+    """倉庫索引統計"""
+
+    files_scanned: int = 0
+    files_indexed: int = 0
+    files_unchanged: int = 0
+    files_skipped: int = 0
+    files_removed: int = 0
+    chunks: int = 0
+    chunks_embedded: int = 0
+    chunks_cached: int = 0
+    bytes_indexed: int = 0
+    duration: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_indexed / self.duration if self.duration else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.duration if self.duration else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """轉換為字典"""
+        return {
+            "files_scanned": self.files_scanned,
+            "files_indexed": self.files_indexed,
+            "files_unchanged": self.files_unchanged,
+            "files_skipped": self.files_skipped,
+            "files_removed": self.files_removed,
+            "chunks": self.chunks,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_cached": self.chunks_cached,
+            "bytes_indexed": self.bytes_indexed,
+            "duration": round(self.duration, 3),
+            "files_per_second": round(self.files_per_second, 2),
+            "chunks_per_second": round(self.chunks_per_second, 2),
+        }
+
+
+def _chunk_bytes(data: bytes, chunk_size: int) -> list[tuple[int, int]]:
+    """按行切分為約 chunk_size 字節的塊，返回 (offset, length)；超長行按大小截斷"""
+    chunks = []
+    start = offset = 0
+    for line in data.splitlines(keepends=True):
+        end = offset + len(line)
+        if end - start > chunk_size and offset > start:
+            chunks.append((start, offset - start))
+            start = offset
+        while end - start > chunk_size:
+            chunks.append((start, chunk_size))
+            start += chunk_size
+        offset = end
+    if offset > start:
+        chunks.append((start, offset - start))
+    return chunks
+
+
 class RepoGraph:
     """
     倉庫圖
@@ -86,6 +153,18 @@ class RepoGraph:
         """添加邊"""
         self.edges.append(edge)
 
+    def remove_nodes(self, node_ids: set[str]) -> None:
+        """批量刪除節點及其相關邊"""
+        if not node_ids:
+            return
+        for node_id in node_ids:
+            self.nodes.pop(node_id, None)
+        self.edges = [
+            e
+            for e in self.edges
+            if e.source_id not in node_ids and e.target_id not in node_ids
+        ]
+
     def get_node(self, node_id: str) -> GraphNode | None:
         """獲取節點"""
         return self.nodes.get(node_id)
@@ -166,52 +245,80 @@ class VectorStore:
     """
     向量存儲
 
-    存儲和搜索向量嵌入。
+    存儲和搜索向量嵌入，向量由 VectorIndex 以正規化矩陣保存。
     """
 
-    def __init__(self):
-        self.vectors: dict[str, list[float]] = {}
+    def __init__(self, config: dict[str, Any] | None = None):
+        config = config or {}
+        self.index = VectorIndex(
+            dimension=config.get("dimension"),
+            mode=config.get("mode", "auto"),
+            nlist=config.get("nlist"),
+            nprobe=config.get("nprobe", 16),
+            ann_threshold=config.get("ann_threshold", 100_000),
+        )
         self.metadata: dict[str, dict[str, Any]] = {}
 
+    @property
+    def vectors(self) -> dict[str, list[float]]:
+        """所有（正規化後的）向量副本"""
+        return {id: self.index.get(id) for id in self.index.ids}
+
     def upsert(
         self, id: str, vector: list[float], metadata: dict[str, Any] | None = None
     ) -> None:
         """插入或更新向量"""
-        self.vectors[id] = vector
+        self.index.upsert(id, vector)
         self.metadata[id] = metadata or {}
 
+    def upsert_many(
+        self,
+        ids: list[str],
+        vectors: list[list[float]],
+        metadata: list[dict[str, Any]] | None = None,
+    ) -> None:
+        """批量插入或更新向量"""
+        self.index.upsert_many(ids, vectors)
+        for i, id in enumerate(ids):
+            self.metadata[id] = metadata[i] if metadata else {}
+
     def delete(self, id: str) -> None:
         """刪除向量"""
-        self.vectors.pop(id, None)
+        self.index.delete(id)
         self.metadata.pop(id, None)
 
     def search(
         self, query_vector: list[float], top_k: int = 10
     ) -> list[tuple[str, float]]:
         """搜索最相似的向量"""
-        scores = []
-        for id, vector in self.vectors.items():
-            score = self._cosine_similarity(query_vector, vector)
-            scores.append((id, score))
-
-        # 按分數排序
-        scores.sort(key=lambda x: x[1], reverse=True)
-        return scores[:top_k]
-
-    @staticmethod
-    def _cosine_similarity(a: list[float], b: list[float]) -> float:
-        """計算餘弦相似度"""
-        if len(a) != len(b):
-            return 0.0
-
-        dot_product = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
+        return self.index.search(query_vector, top_k)
+
+    def search_batch(
+        self, query_vectors: list[list[float]], top_k: int = 10
+    ) -> list[list[tuple[str, float]]]:
+        """批量搜索"""
+        return self.index.search_batch(query_vectors, top_k)
+
+    def save(self, directory: str) -> None:
+        """保存索引與元數據"""
+        self.index.save(directory)
+        with open(os.path.join(directory, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(self.metadata, f)
+
+    def load(self, directory: str) -> None:
+        """載入索引與元數據（向量以 memory-map 映射）"""
+        self.index = VectorIndex.load(
+            directory,
+            mode=self.index.mode,
+            nlist=self.index.nlist,
+            nprobe=self.index.nprobe,
+            ann_threshold=self.index.ann_threshold,
+        )
+        with open(os.path.join(directory, "metadata.json"), encoding="utf-8") as f:
+            self.metadata = json.load(f)
 
-        return dot_product / (norm_a * norm_b)
+    def __len__(self) -> int:
+        return len(self.index)
 
 
 class KnowledgeEngine:
@@ -233,15 +340,37 @@ class KnowledgeEngine:
         self.embedding_provider = EmbeddingProvider(
             model=self.config.get("embedding_model", "text-embedding-3-small")
         )
-        self.vector_store = VectorStore()
+        self.vector_store = VectorStore(self.config.get("vector_index"))
+
+        indexing = self.config.get("indexing", {})
+        self.chunk_size = indexing.get("chunk_size", 2048)
+        self.batch_size = indexing.get("batch_size", 64)
+        self.concurrency = indexing.get("concurrency", 4)
+        self.max_file_bytes = indexing.get("max_file_bytes", 1024 * 1024)
+        self.files_per_window = indexing.get("files_per_window", 256)
+        self.extensions: set[str] | None = (
+            set(indexing["extensions"]) if indexing.get("extensions") else None
+        )
+        self.exclude_dirs: set[str] = set(
+            indexing.get(
+                "exclude_dirs",
+                ["node_modules", "__pycache__", "venv", "dist", "build"],
+            )
+        )
+
+        # 內容哈希 -> 嵌入（LRU）
+        self._embedding_cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._embedding_cache_size = indexing.get("embedding_cache_size", 100_000)
+        # 絕對路徑 -> (size, mtime_ns, 塊節點 ID)
+        self._file_state: dict[str, tuple[int, int, list[str]]] = {}
 
     async def index_file(self, path: str, content: str) -> None:
         """索引文件"""
         # 創建節點
         node_id = self._generate_id(path)
 
-        # 生成嵌入
-        embedding = await self.embedding_provider.embed(content)
+        # 生成嵌入（相同內容復用快取）
+        embedding = (await self._embed_texts([content]))[0][0]
 
         # 創建圖節點
         node = GraphNode(
@@ -261,6 +390,260 @@ class KnowledgeEngine:
             id=node_id, vector=embedding, metadata={"path": path, "type": "file"}
         )
 
+    async def index_repository(
+        self, root: str, extensions: set[str] | None = None
+    ) -> IndexingStats:
+        """
+        批量索引倉庫
+
+        文件按行切塊，塊內容以 (path, offset, length) 引用而不保存在記憶體中；
+        嵌入按內容哈希去重並快取，未變更的文件 (size, mtime) 直接跳過，
+        其餘以 embed_batch 分批、限制併發地生成。
+        """
+        started = time.perf_counter()
+        stats = IndexingStats()
+        root = os.path.abspath(root)
+        extensions = extensions or self.extensions
+
+        files = await asyncio.to_thread(self._scan_repository, root, extensions)
+
+        changed = []
+        seen = set()
+        stale: set[str] = set()
+        for abs_path, stat_result in files:
+            seen.add(abs_path)
+            stats.files_scanned += 1
+            state = self._file_state.get(abs_path)
+            if state and state[:2] == (stat_result.st_size, stat_result.st_mtime_ns):
+                stats.files_unchanged += 1
+            elif stat_result.st_size > self.max_file_bytes:
+                # 變得過大的文件不再保留舊索引
+                stats.files_skipped += 1
+                stale.update(self._forget_file(abs_path))
+            else:
+                changed.append((abs_path, stat_result))
+
+        # 已刪除的文件
+        prefix = root + os.sep
+        removed = [p for p in self._file_state if p.startswith(prefix) and p not in seen]
+        for abs_path in removed:
+            stale.update(self._forget_file(abs_path))
+        stats.files_removed = len(removed)
+        self._remove_indexed(stale)
+
+        read_semaphore = asyncio.Semaphore(self.concurrency)
+        for start in range(0, len(changed), self.files_per_window):
+            window = changed[start : start + self.files_per_window]
+            chunked = await asyncio.gather(
+                *(self._read_chunks(read_semaphore, abs_path) for abs_path, _ in window)
+            )
+            await self._index_window(root, window, chunked, stats)
+
+        stats.duration = time.perf_counter() - started
+        return stats
+
+    async def _index_window(
+        self,
+        root: str,
+        window: list[tuple[str, os.stat_result]],
+        chunked: list[list[tuple[int, int, str]] | None],
+        stats: IndexingStats,
+    ) -> None:
+        """嵌入並寫入一批文件的塊"""
+        texts = [
+            text for chunks in chunked if chunks is not None for _, _, text in chunks
+        ]
+        embeddings, embedded = await self._embed_texts(texts)
+        stats.chunks_embedded += embedded
+        stats.chunks_cached += len(texts) - embedded
+        stats.chunks += len(texts)
+
+        # 先移除舊塊（連同其 CONTAINS 邊與向量），重新索引時不會留下重複的邊；
+        # 變為二進位或不可讀的文件整個移除
+        stale: set[str] = set()
+        for (abs_path, _), chunks in zip(window, chunked, strict=True):
+            if chunks is None:
+                stale.update(self._forget_file(abs_path))
+            elif abs_path in self._file_state:
+                stale.update(self._file_state[abs_path][2])
+        self._remove_indexed(stale)
+
+        ids: list[str] = []
+        metadata: list[dict[str, Any]] = []
+        for (abs_path, stat_result), chunks in zip(window, chunked, strict=True):
+            if chunks is None:
+                stats.files_skipped += 1
+                continue
+
+            # 節點 ID 以絕對路徑生成，多個根目錄下的同名相對路徑互不覆蓋
+            rel_path = self._relative_path(root, abs_path)
+            file_id = self._generate_id(abs_path)
+            name = rel_path.split("/")[-1]
+            self.repo_graph.add_node(
+                GraphNode(
+                    id=file_id,
+                    name=name,
+                    node_type=NodeType.FILE,
+                    path=rel_path,
+                    metadata={
+                        "file": abs_path,
+                        "size": stat_result.st_size,
+                        "chunks": len(chunks),
+                    },
+                )
+            )
+
+            chunk_ids = []
+            for offset, length, _ in chunks:
+                chunk_id = self._generate_id(f"{abs_path}#{offset}")
+                chunk_ids.append(chunk_id)
+                self.repo_graph.add_node(
+                    GraphNode(
+                        id=chunk_id,
+                        name=f"{name}#{offset}",
+                        node_type=NodeType.CHUNK,
+                        path=rel_path,
+                        metadata={"file": abs_path, "offset": offset, "length": length},
+                    )
+                )
+                self.repo_graph.add_edge(
+                    GraphEdge(source_id=file_id, target_id=chunk_id, edge_type=EdgeType.CONTAINS)
+                )
+                metadata.append(
+                    {"path": rel_path, "type": "chunk", "offset": offset, "length": length}
+                )
+            ids.extend(chunk_ids)
+
+            self._file_state[abs_path] = (
+                stat_result.st_size,
+                stat_result.st_mtime_ns,
+                chunk_ids,
+            )
+            stats.files_indexed += 1
+            stats.bytes_indexed += stat_result.st_size
+
+        self.vector_store.upsert_many(ids, embeddings, metadata)
+
+    def _forget_file(self, abs_path: str) -> set[str]:
+        """移除文件的索引狀態，返回其文件節點與塊節點 ID（未索引時為空）"""
+        state = self._file_state.pop(abs_path, None)
+        if state is None:
+            return set()
+        return {self._generate_id(abs_path), *state[2]}
+
+    def _remove_indexed(self, node_ids: set[str]) -> None:
+        for node_id in node_ids:
+            self.vector_store.delete(node_id)
+        self.repo_graph.remove_nodes(node_ids)
+
+    def _scan_repository(
+        self, root: str, extensions: set[str] | None
+    ) -> list[tuple[str, os.stat_result]]:
+        """遍歷倉庫文件（跳過隱藏與排除目錄）"""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(
+                d for d in dirnames if not d.startswith(".") and d not in self.exclude_dirs
+            )
+            for filename in sorted(filenames):
+                if extensions and os.path.splitext(filename)[1] not in extensions:
+                    continue
+                abs_path = os.path.join(dirpath, filename)
+                try:
+                    stat_result = os.stat(abs_path)
+                except OSError:
+                    continue
+                files.append((abs_path, stat_result))
+        return files
+
+    async def _read_chunks(
+        self, semaphore: asyncio.Semaphore, abs_path: str
+    ) -> list[tuple[int, int, str]] | None:
+        """讀取並切塊；二進位或不可讀文件返回 None"""
+        async with semaphore:
+            try:
+                data = await asyncio.to_thread(self._read_bytes, abs_path)
+            except OSError:
+                return None
+        if b"\0" in data[:8192]:
+            return None
+        return [
+            (offset, length, data[offset : offset + length].decode("utf-8", "replace"))
+            for offset, length in _chunk_bytes(data, self.chunk_size)
+        ]
+
+    @staticmethod
+    def _read_bytes(path: str, offset: int = 0, length: int = -1) -> bytes:
+        with open(path, "rb") as f:
+            if offset:
+                f.seek(offset)
+            return f.read(length)
+
+    async def _embed_texts(self, texts: list[str]) -> tuple[list[list[float]], int]:
+        """
+        按內容哈希去重後分批嵌入
+
+        Returns:
+            (與 texts 對齊的嵌入, 實際嵌入的唯一文本數)
+        """
+        hashes = [hashlib.sha256(text.encode()).hexdigest() for text in texts]
+        resolved: dict[str, list[float]] = {}
+        missing: dict[str, str] = {}
+        for content_hash, text in zip(hashes, texts, strict=True):
+            if content_hash in resolved or content_hash in missing:
+                continue
+            cached = self._embedding_cache.get(content_hash)
+            if cached is not None:
+                self._embedding_cache.move_to_end(content_hash)
+                resolved[content_hash] = cached
+            else:
+                missing[content_hash] = text
+
+        if missing:
+            pending = list(missing.items())
+            batches = [
+                pending[i : i + self.batch_size]
+                for i in range(0, len(pending), self.batch_size)
+            ]
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def embed(batch: list[tuple[str, str]]) -> None:
+                async with semaphore:
+                    vectors = await self.embedding_provider.embed_batch(
+                        [text for _, text in batch]
+                    )
+                for (content_hash, _), vector in zip(batch, vectors, strict=True):
+                    resolved[content_hash] = vector
+
+            await asyncio.gather(*(embed(batch) for batch in batches))
+
+            for content_hash in missing:
+                self._embedding_cache[content_hash] = resolved[content_hash]
+            while len(self._embedding_cache) > self._embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
+
+        return [resolved[content_hash] for content_hash in hashes], len(missing)
+
+    def read_content(self, node: GraphNode, max_bytes: int = -1) -> str:
+        """讀取節點內容（內存內容或按 path/offset 引用的文件片段）"""
+        if node.content:
+            return node.content if max_bytes < 0 else node.content[:max_bytes]
+        abs_path = node.metadata.get("file")
+        if not abs_path:
+            return ""
+        length = node.metadata.get("length", -1)
+        if max_bytes >= 0:
+            length = max_bytes if length < 0 else min(length, max_bytes)
+        try:
+            data = self._read_bytes(abs_path, node.metadata.get("offset", 0), length)
+        except OSError:
+            return ""
+        return data.decode("utf-8", "replace")
+
+    @staticmethod
+    def _relative_path(root: str, abs_path: str) -> str:
+        return os.path.relpath(abs_path, root).replace(os.sep, "/")
+
     async def search(self, query: str, top_k: int = 10) -> list[SearchResult]:
         """語義搜索"""
         # 生成查詢嵌入
@@ -269,7 +652,18 @@ class KnowledgeEngine:
         # 搜索向量存儲
         results = self.vector_store.search(query_embedding, top_k)
 
-        # 構建搜索結果
+        return self._build_results(results)
+
+    async def search_batch(
+        self, queries: list[str], top_k: int = 10
+    ) -> list[list[SearchResult]]:
+        """批量語義搜索"""
+        query_embeddings = await self.embedding_provider.embed_batch(queries)
+        batch = self.vector_store.search_batch(query_embeddings, top_k)
+        return [self._build_results(results) for results in batch]
+
+    def _build_results(self, results: list[tuple[str, float]]) -> list[SearchResult]:
+        """構建搜索結果"""
         search_results = []
         for node_id, score in results:
             node = self.repo_graph.get_node(node_id)
@@ -278,7 +672,7 @@ class KnowledgeEngine:
                     SearchResult(
                         node=node,
                         score=score,
-                        context=node.content[:500] if node.content else "",
+                        context=self.read_content(node, 500),
                     )
                 )
 
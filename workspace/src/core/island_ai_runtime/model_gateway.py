@@ -4,15 +4,33 @@ Model Gateway - 模型閘道
 LLM Provider Selection and Routing
 
 支援多種 LLM 提供者：OpenAI, Anthropic, Local, BYOM
+
+請求經過中介層：
+- ResponseCache: 確定性請求（temperature <= 門檻）的回應快取，LRU + TTL，
+  可選 SQLite 磁碟層
+- 單飛合併：相同且進行中的確定性請求只送出一次
+- ProviderLimiter: 每個提供者的併發信號量與令牌桶速率限制
+- 延遲感知路由：按 EWMA 延遲與失敗率選擇提供者，失敗時轉移到下一個
 """
 
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
 import os
+import sqlite3
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from collections.abc import AsyncIterator
-from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, replace
 from enum import Enum
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
 
 class ModelProvider(Enum):
     """模型提供者枚舉"""
@@ -63,6 +81,244 @@ class CompletionResponse:
     finish_reason: str
 
 
+def request_key(request: CompletionRequest, provider: "ModelProvider | None" = None) -> str:
+    """請求的確定性哈希（訊息 + 參數）"""
+    payload = {
+        "provider": provider.value if provider else None,
+        "messages": request.messages,
+        "model": request.model,
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+@dataclass
+class _Flight:
+    """進行中的合併請求與其等待者數"""
+
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class ResponseCache:
+    """
+    回應快取
+
+    記憶體層為 LRU + TTL；disk_path 指定時回寫到 SQLite 磁碟層，
+    磁碟命中會回填記憶體層。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        disk_path: str | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CompletionResponse]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self._db_lock = asyncio.Lock()
+
+    async def get(self, key: str) -> CompletionResponse | None:
+        """讀取快取（過期視為未命中）"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        if self._db is not None:
+            async with self._db_lock:
+                row = await asyncio.to_thread(self._disk_get, key, now)
+            if row is not None:
+                expires_at, response = row
+                self._remember(key, expires_at, response)
+                self.disk_hits += 1
+                return response
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, response: CompletionResponse) -> None:
+        """寫入快取"""
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, expires_at, response)
+        if self._db is not None:
+            async with self._db_lock:
+                await asyncio.to_thread(self._disk_set, key, expires_at, response)
+
+    def _remember(self, key: str, expires_at: float, response: CompletionResponse) -> None:
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> tuple[float, CompletionResponse] | None:
+        row = self._db.execute(
+            "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[1], CompletionResponse(**json.loads(row[0]))
+
+    def _disk_set(self, key: str, expires_at: float, response: CompletionResponse) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(asdict(response)), expires_at),
+        )
+        self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        self._db.commit()
+
+    def clear(self) -> None:
+        """清空快取（含磁碟層）"""
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TokenBucket:
+    """令牌桶：平均 rate 次/秒，突發上限 capacity"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """取得令牌，不足時等待補充（先到先得）"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class ProviderLimiter:
+    """
+    提供者限流與延遲統計
+
+    max_concurrency 限制同時進行的請求數，requests_per_second 以令牌桶
+    限制速率；延遲與失敗率以 EWMA 記錄供路由使用，每次失敗的代價按
+    error_penalty 秒計。
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        requests_per_second: float | None = None,
+        burst: float | None = None,
+        latency_alpha: float = 0.2,
+        error_penalty: float = 5.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = (
+            TokenBucket(requests_per_second, burst) if requests_per_second else None
+        )
+        self.latency_alpha = latency_alpha
+        self.latency_ewma: float | None = None
+        self.error_penalty = error_penalty
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator["ProviderLimiter"]:
+        """佔用一個請求名額；每次呼叫各自計時"""
+        if self._bucket is not None:
+            await self._bucket.acquire()
+        await self._semaphore.acquire()
+        self.in_flight += 1
+        started = time.perf_counter()
+        scored = True
+        try:
+            yield self
+        except Exception:
+            self.errors += 1
+            self.record_result(error=True)
+            raise
+        except BaseException:
+            # 呼叫方取消或串流提前關閉（GeneratorExit）不是提供者的失敗，
+            # 只釋放名額而不計入統計
+            scored = False
+            raise
+        else:
+            self.record_latency(time.perf_counter() - started)
+            self.record_result(error=False)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            if scored:
+                self.requests += 1
+
+    def record_latency(self, seconds: float) -> None:
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += self.latency_alpha * (seconds - self.latency_ewma)
+
+    def record_result(self, error: bool) -> None:
+        self.error_rate += self.latency_alpha * (float(error) - self.error_rate)
+
+    @property
+    def routing_score(self) -> float | None:
+        """路由分數（秒，越小越好）；尚未完成任何請求時為 None"""
+        if self.requests == 0:
+            return None
+        return (self.latency_ewma or 0.0) + self.error_rate * self.error_penalty
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate, 4),
+            "latency_ewma_ms": (
+                round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None
+            ),
+        }
+
+
 class BaseModelClient(ABC):
     """模型客戶端基類"""
 
@@ -136,7 +392,29 @@ class ModelGateway:
         self.config = config or {}
         self.clients: dict[ModelProvider, BaseModelClient] = {}
         self.models: dict[str, ModelConfig] = {}
+        self.limiters: dict[ModelProvider, ProviderLimiter] = {}
+        self._model_providers: dict[str, list[ModelProvider]] = {}
+
+        routing = self.config.get("routing", {})
+        self.strategy = RoutingStrategy(routing.get("strategy", "cost-optimized"))
+        self.fallback_enabled = routing.get("fallback_enabled", True)
+        self._round_robin = itertools.count()
+
+        cache_config = self.config.get("cache", {})
+        self.cache: ResponseCache | None = None
+        if cache_config.get("enabled", True):
+            self.cache = ResponseCache(
+                max_entries=cache_config.get("max_entries", 1024),
+                ttl_seconds=cache_config.get("ttl_seconds", 3600),
+                disk_path=cache_config.get("disk_path"),
+            )
+        # 僅快取/合併 temperature 不高於此值的請求
+        self.cache_max_temperature = cache_config.get("max_temperature", 0.0)
+        self._in_flight: dict[str, _Flight] = {}
+        self.coalesced = 0
+
         self._initialize_clients()
+        self._load_models()
 
     def _initialize_clients(self) -> None:
         """初始化模型客戶端"""
@@ -148,6 +426,51 @@ class ModelGateway:
         if providers.get("anthropic", {}).get("enabled", True):
             self.clients[ModelProvider.ANTHROPIC] = AnthropicClient()
 
+        for provider in list(self.clients):
+            self.limiters[provider] = self._create_limiter(provider)
+
+    def _create_limiter(self, provider: ModelProvider) -> ProviderLimiter:
+        limits = (
+            self.config.get("providers", {}).get(provider.value, {}).get("limits", {})
+        )
+        return ProviderLimiter(
+            max_concurrency=limits.get("max_concurrency", 8),
+            requests_per_second=limits.get("requests_per_second"),
+            burst=limits.get("burst"),
+            error_penalty=limits.get("error_penalty", 5.0),
+        )
+
+    def _load_models(self) -> None:
+        """由配置建立模型 -> 提供者映射"""
+        for name, provider_config in self.config.get("providers", {}).items():
+            try:
+                provider = ModelProvider(name)
+            except ValueError:
+                continue
+            for model in provider_config.get("models", []):
+                if not model.get("id"):
+                    continue
+                model_config = ModelConfig(
+                    id=model["id"],
+                    provider=provider,
+                    type=model.get("type", "chat"),
+                    max_tokens=model.get("max_tokens", 0),
+                    default=model.get("default", False),
+                )
+                # 同一模型可由多個提供者服務
+                self.models.setdefault(model_config.id, model_config)
+                self._model_providers.setdefault(model_config.id, []).append(provider)
+
+    def register_client(
+        self,
+        provider: ModelProvider,
+        client: BaseModelClient,
+        limiter: ProviderLimiter | None = None,
+    ) -> None:
+        """註冊（或替換）提供者客戶端"""
+        self.clients[provider] = client
+        self.limiters[provider] = limiter or self._create_limiter(provider)
+
     def get_default_model(self) -> str:
         """獲取預設模型"""
         return self.config.get("default_provider", "openai")
@@ -168,14 +491,81 @@ class ModelGateway:
         """
         request = CompletionRequest(messages=messages, model=model, **kwargs)
 
-        # 根據模型選擇客戶端
-        provider = self._get_provider_for_model(model)
-        client = self.clients.get(provider)
+        if not self._is_deterministic(request):
+            return await self._dispatch(request)
 
-        if not client:
-            raise ValueError(f"Provider not available: {provider}")
+        key = request_key(request)
 
-        return await client.complete(request)
+        # 1. 回應快取
+        if self.cache is not None:
+            cached = await self.cache.get(key)
+            if cached is not None:
+                return self._copy_response(cached)
+
+        # 2. 單飛合併：請求在獨立任務中執行，每個呼叫方各自等待；
+        # 某個呼叫方被取消不影響其他等待者，最後一個等待者離開時才取消請求
+        flight = self._in_flight.get(key)
+        if flight is None:
+            task = asyncio.create_task(self._dispatch_shared(key, request))
+            flight = self._in_flight[key] = _Flight(task)
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            response = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                if self._in_flight.get(key) is flight:
+                    del self._in_flight[key]
+            raise
+        finally:
+            flight.waiters -= 1
+
+        return self._copy_response(response)
+
+    async def _dispatch_shared(self, key: str, request: CompletionRequest) -> CompletionResponse:
+        """合併請求的實際執行：成功後寫入快取"""
+        try:
+            response = await self._dispatch(request)
+            # 先寫入快取再移除進行中標記，避免間隙內重複請求；
+            # 快取寫入失敗不影響已成功的回應
+            if self.cache is not None:
+                try:
+                    await self.cache.set(key, response)
+                except Exception as e:
+                    logger.warning(f"Failed to cache model response: {e}")
+            return response
+        finally:
+            flight = self._in_flight.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._in_flight[key]
+
+    @staticmethod
+    def _copy_response(response: CompletionResponse) -> CompletionResponse:
+        """共享的回應以副本返回，避免呼叫方互相修改"""
+        return replace(response, usage=dict(response.usage))
+
+    def _is_deterministic(self, request: CompletionRequest) -> bool:
+        return not request.stream and request.temperature <= self.cache_max_temperature
+
+    async def _dispatch(self, request: CompletionRequest) -> CompletionResponse:
+        """3. 路由 + 限流，失敗時轉移到下一個提供者"""
+        candidates = self._route(request.model)
+        if not candidates:
+            raise ValueError(f"Provider not available for model: {request.model}")
+        if not self.fallback_enabled:
+            candidates = candidates[:1]
+
+        last_error: Exception | None = None
+        for provider in candidates:
+            try:
+                async with self.limiters[provider].slot():
+                    return await self.clients[provider].complete(request)
+            except Exception as e:
+                last_error = e
+        raise last_error
 
     async def stream(
         self, messages: list[dict[str, str]], model: str | None = None, **kwargs: Any
@@ -185,17 +575,55 @@ class ModelGateway:
             messages=messages, model=model, stream=True, **kwargs
         )
 
-        provider = self._get_provider_for_model(model)
-        client = self.clients.get(provider)
+        candidates = self._route(model)
+        if not candidates:
+            raise ValueError(f"Provider not available for model: {model}")
+
+        provider = candidates[0]
+        async with self.limiters[provider].slot():
+            async for chunk in self.clients[provider].stream(request):
+                yield chunk
+
+    def _route(self, model: str | None) -> list[ModelProvider]:
+        """可用提供者按路由策略排序"""
+        candidates = [p for p in self._providers_for_model(model) if p in self.clients]
+        if len(candidates) <= 1:
+            return candidates
+
+        if self.strategy == RoutingStrategy.PERFORMANCE:
+            # 從未請求過的提供者優先探測，其餘按延遲加失敗懲罰排序
+            position = {p: i for i, p in enumerate(candidates)}
+
+            def score(p: ModelProvider) -> tuple[bool, float, int]:
+                value = self.limiters[p].routing_score
+                return value is not None, value or 0.0, position[p]
+
+            candidates.sort(key=score)
+        elif self.strategy == RoutingStrategy.ROUND_ROBIN:
+            offset = next(self._round_robin) % len(candidates)
+            candidates = candidates[offset:] + candidates[:offset]
+        return candidates
+
+    def _providers_for_model(self, model: str | None) -> list[ModelProvider]:
+        """模型的候選提供者（配置優先，其次按前綴）"""
+        if not model:
+            default = self._provider_from_name(self.get_default_model())
+            others = [p for p in self.clients if p != default]
+            return ([default] if default else []) + others
 
-        if not client:
-            raise ValueError(f"Provider not available: {provider}")
+        if model in self._model_providers:
+            return list(self._model_providers[model])
+        return [self._get_provider_for_model(model)]
 
-        async for chunk in client.stream(request):
-            yield chunk
+    @staticmethod
+    def _provider_from_name(name: str) -> ModelProvider | None:
+        try:
+            return ModelProvider(name)
+        except ValueError:
+            return None
 
     def _get_provider_for_model(self, model: str | None) -> ModelProvider:
-        """根據模型 ID 獲取提供者"""
+        """根據模型 ID 前綴獲取提供者"""
         if not model:
             return ModelProvider.OPENAI
 
@@ -214,3 +642,25 @@ class ModelGateway:
                 for model in provider_config.get("models", []):
                     models.append(model.get("id", ""))
         return models
+
+    def get_stats(self) -> dict[str, Any]:
+        """閘道統計"""
+        stats: dict[str, Any] = {
+            "strategy": self.strategy.value,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "providers": {p.value: l.to_dict() for p, l in self.limiters.items()},
+        }
+        if self.cache is not None:
+            stats["cache"] = {
+                "entries": len(self.cache),
+                "hits": self.cache.hits,
+                "disk_hits": self.cache.disk_hits,
+                "misses": self.cache.misses,
+            }
+        return stats
+
+    def close(self) -> None:
+        """釋放快取資源"""
+        if self.cache is not None:
+            self.cache.close()
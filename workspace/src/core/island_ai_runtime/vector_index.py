@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Vector Index - 向量索引
+Normalized embedding matrix with exact and IVF approximate search
+
+- 向量寫入時即正規化，餘弦相似度化為內積
+- NumPy 可用時以連續 float32 矩陣存儲，top-k 由一次矩陣乘法加
+  argpartition 完成，支援批量查詢
+- IVF 近似模式：球面 k-means 分桶，查詢只掃描最近的 nprobe 個桶，
+  適用於百萬級向量
+- save/load 使用原始 float32 檔案，載入時以 memory-map 映射
+
+NumPy 不可用時退回純 Python 精確搜索（仍使用預先正規化的向量）。
+"""
+
+import heapq
+import json
+import logging
+import math
+import operator
+import os
+from array import array
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager, suppress
+from typing import IO, Any
+
+try:
+    import numpy as np
+except ImportError:  # 退回純 Python 精確搜索
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 批量查詢時每塊分數矩陣的元素上限（約 64 MiB float32）
+_SCORE_BLOCK = 16 * 1024 * 1024
+
+
+def _normalize(vector: Sequence[float]) -> list[float]:
+    """正規化為單位向量（零向量保持為零）"""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return [0.0] * len(vector)
+    return [x / norm for x in vector]
+
+
+@contextmanager
+def _atomic_writer(path: str, mode: str = "wb") -> Iterator[IO[Any]]:
+    """寫入 path.tmp，成功後原子替換為 path"""
+    tmp_path = f"{path}.tmp"
+    encoding = None if "b" in mode else "utf-8"
+    try:
+        with open(tmp_path, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+class VectorIndex:
+    """
+    向量索引
+
+    存儲正規化嵌入並回答 top-k 餘弦相似度查詢。
+
+    mode:
+    - "exact": 全量掃描
+    - "ivf": 近似搜索（需 NumPy，需 train() 或自動訓練）
+    - "auto": 向量數達到 ann_threshold 後自動切換為 IVF
+    """
+
+    MODES = ("exact", "ivf", "auto")
+
+    def __init__(
+        self,
+        dimension: int | None = None,
+        mode: str = "auto",
+        nlist: int | None = None,
+        nprobe: int = 16,
+        ann_threshold: int = 100_000,
+        seed: int = 0,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown vector index mode: {mode}")
+        self.dimension = dimension
+        self.mode = mode
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.ann_threshold = ann_threshold
+        self.seed = seed
+
+        self.ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._count = 0
+
+        # NumPy 存儲：容量倍增的連續矩陣；純 Python 存儲：列表
+        self._matrix: Any = None
+        self._vectors: list[list[float]] = []
+
+        # IVF 狀態
+        self._centroids: Any = None
+        self._assign: Any = None
+        self._list_order: Any = None
+        self._list_bounds: Any = None
+        self._lists_dirty = True
+        self._trained_count = 0
+
+    # ------------------------------------------------------------------
+    # 寫入
+    # ------------------------------------------------------------------
+
+    def _check_dimension(self, dimension: int) -> None:
+        if self.dimension is None:
+            self.dimension = dimension
+        elif dimension != self.dimension:
+            raise ValueError(
+                f"Vector dimension {dimension} does not match index dimension {self.dimension}"
+            )
+
+    def _reserve(self, count: int) -> None:
+        """確保矩陣容量（倍增）"""
+        capacity = 0 if self._matrix is None else self._matrix.shape[0]
+        if count <= capacity:
+            return
+        new_capacity = max(count, capacity * 2, 64)
+        matrix = np.empty((new_capacity, self.dimension), dtype=np.float32)
+        assign = np.full(new_capacity, -1, dtype=np.int32)
+        if self._count:
+            matrix[: self._count] = self._matrix[: self._count]
+            assign[: self._count] = self._assign[: self._count]
+        self._matrix = matrix
+        self._assign = assign
+
+    def upsert(self, id: str, vector: Sequence[float]) -> None:
+        """插入或更新向量"""
+        self.upsert_many([id], [vector])
+
+    def upsert_many(self, ids: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """批量插入或更新向量"""
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if not ids:
+            return
+
+        if np is None:
+            for id, vector in zip(ids, vectors, strict=True):
+                self._check_dimension(len(vector))
+                normalized = _normalize(vector)
+                row = self._rows.get(id)
+                if row is None:
+                    self._rows[id] = self._count
+                    self.ids.append(id)
+                    self._vectors.append(normalized)
+                    self._count += 1
+                else:
+                    self._vectors[row] = normalized
+            return
+
+        # 複製後再就地正規化，不修改呼叫者的陣列
+        block = np.array(vectors, dtype=np.float32, copy=True)
+        if block.ndim != 2:
+            raise ValueError("vectors must be a sequence of equal-length vectors")
+        self._check_dimension(block.shape[1])
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        np.divide(block, norms, out=block, where=norms > 0)
+        block[(norms == 0).ravel()] = 0.0
+
+        rows = np.empty(len(ids), dtype=np.int64)
+        new_ids = []
+        for i, id in enumerate(ids):
+            row = self._rows.get(id)
+            if row is None:
+                row = self._count + len(new_ids)
+                self._rows[id] = row
+                new_ids.append(id)
+            rows[i] = row
+
+        self._reserve(self._count + len(new_ids))
+        self.ids.extend(new_ids)
+        self._count += len(new_ids)
+        # 同一批內重複的 id 以最後一次為準
+        self._matrix[rows] = block
+        if self._centroids is not None:
+            self._assign[rows] = self._nearest_centroids(block, 1)[:, 0]
+            self._lists_dirty = True
+
+    def delete(self, id: str) -> bool:
+        """刪除向量（與末行交換後移除）"""
+        row = self._rows.pop(id, None)
+        if row is None:
+            return False
+        last = self._count - 1
+        if row != last:
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self._rows[moved] = row
+            if np is None:
+                self._vectors[row] = self._vectors[last]
+            else:
+                self._matrix[row] = self._matrix[last]
+                self._assign[row] = self._assign[last]
+        self.ids.pop()
+        if np is None:
+            self._vectors.pop()
+        self._count = last
+        self._lists_dirty = True
+        return True
+
+    def get(self, id: str) -> list[float] | None:
+        """獲取（正規化後的）向量"""
+        row = self._rows.get(id)
+        if row is None:
+            return None
+        if np is None:
+            return list(self._vectors[row])
+        return self._matrix[row].tolist()
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._rows
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # IVF 訓練
+    # ------------------------------------------------------------------
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def train(
+        self, nlist: int | None = None, iterations: int = 10, sample_size: int | None = None
+    ) -> None:
+        """以球面 k-means 訓練 IVF 分桶並重新分配所有向量"""
+        if np is None:
+            logger.warning("NumPy unavailable; vector index stays in exact mode")
+            return
+        if self._count == 0:
+            return
+
+        n = self._count
+        nlist = nlist or self.nlist or max(1, int(4 * math.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(n, sample_size or max(nlist * 40, 10_000))
+        sample_rows = rng.choice(n, size=sample_size, replace=False)
+        sample = self._matrix[np.sort(sample_rows)]
+
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self._argmax_blocks(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # 空桶以隨機樣本重新播種
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+
+        self._centroids = centroids.astype(np.float32)
+        self._assign[:n] = self._argmax_blocks(self._matrix[:n], self._centroids)
+        self._lists_dirty = True
+        self._trained_count = n
+        logger.info(f"Trained IVF vector index: {n} vectors, {nlist} lists")
+
+    def _argmax_blocks(self, vectors: Any, centroids: Any) -> Any:
+        """分塊計算每個向量最近的中心"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        step = max(1, _SCORE_BLOCK // max(1, len(centroids)))
+        for start in range(0, len(vectors), step):
+            block = vectors[start : start + step] @ centroids.T
+            labels[start : start + step] = block.argmax(axis=1)
+        return labels
+
+    def _nearest_centroids(self, queries: Any, nprobe: int) -> Any:
+        scores = queries @ self._centroids.T
+        nprobe = min(nprobe, scores.shape[1])
+        if nprobe == scores.shape[1]:
+            return np.argsort(-scores, axis=1)
+        top = np.argpartition(-scores, nprobe - 1, axis=1)[:, :nprobe]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        return np.take_along_axis(top, order, axis=1)
+
+    def _rebuild_lists(self) -> None:
+        """由分配陣列重建倒排表（按桶排序的行號）"""
+        assign = self._assign[: self._count]
+        self._list_order = np.argsort(assign, kind="stable")
+        self._list_bounds = np.searchsorted(
+            assign[self._list_order], np.arange(len(self._centroids) + 1)
+        )
+        self._lists_dirty = False
+
+    def _use_ivf(self) -> bool:
+        if np is None or self.mode == "exact" or self._count == 0:
+            return False
+        if self.mode == "auto":
+            if self._count < self.ann_threshold:
+                return False
+            # 首次達到門檻或規模增長 4 倍後重新訓練
+            if not self.is_trained or self._count > 4 * self._trained_count:
+                self.train()
+        elif not self.is_trained:
+            self.train()
+        return self.is_trained
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def search(self, query: Sequence[float], top_k: int = 10) -> list[tuple[str, float]]:
+        """搜索最相似的向量"""
+        return self.search_batch([query], top_k)[0]
+
+    def search_batch(
+        self, queries: Sequence[Sequence[float]], top_k: int = 10, nprobe: int | None = None
+    ) -> list[list[tuple[str, float]]]:
+        """批量搜索，返回每個查詢的 (id, score) 列表"""
+        if len(queries) == 0:
+            return []
+        if self._count == 0 or top_k <= 0:
+            return [[] for _ in queries]
+        for query in queries:
+            if len(query) != self.dimension:
+                raise ValueError(
+                    f"Query dimension {len(query)} does not match index dimension {self.dimension}"
+                )
+
+        if np is None:
+            return [self._search_python(query, top_k) for query in queries]
+
+        block = np.asarray(queries, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block = np.divide(block, norms, out=np.zeros_like(block), where=norms > 0)
+
+        if self._use_ivf():
+            return self._search_ivf(block, top_k, nprobe or self.nprobe)
+        return self._search_exact(block, top_k)
+
+    def _search_python(self, query: Sequence[float], top_k: int) -> list[tuple[str, float]]:
+        q = _normalize(query)
+        scores = (sum(map(operator.mul, q, row)) for row in self._vectors)
+        best = heapq.nlargest(top_k, zip(scores, range(self._count), strict=True))
+        return [(self.ids[row], score) for score, row in best]
+
+    def _search_exact(self, queries: Any, top_k: int) -> list[list[tuple[str, float]]]:
+        matrix = self._matrix[: self._count]
+        k = min(top_k, self._count)
+        results: list[list[tuple[str, float]]] = []
+        step = max(1, _SCORE_BLOCK // self._count)
+        for start in range(0, len(queries), step):
+            scores = queries[start : start + step] @ matrix.T
+            if k < self._count:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.broadcast_to(np.arange(self._count), scores.shape)
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for rows, row_scores in zip(top.tolist(), top_scores.tolist(), strict=True):
+                results.append([(self.ids[r], s) for r, s in zip(rows, row_scores, strict=True)])
+        return results
+
+    def _search_ivf(self, queries: Any, top_k: int, nprobe: int) -> list[list[tuple[str, float]]]:
+        if self._lists_dirty:
+            self._rebuild_lists()
+        probes = self._nearest_centroids(queries, nprobe)
+        results: list[list[tuple[str, float]]] = []
+        for query, lists in zip(queries, probes, strict=True):
+            candidates = np.concatenate(
+                [self._list_order[self._list_bounds[c] : self._list_bounds[c + 1]] for c in lists]
+            )
+            if len(candidates) == 0:
+                results.append([])
+                continue
+            scores = self._matrix[candidates] @ query
+            k = min(top_k, len(candidates))
+            if k < len(candidates):
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(len(candidates))
+            top = top[np.argsort(-scores[top])]
+            rows, row_scores = candidates[top].tolist(), scores[top].tolist()
+            results.append([(self.ids[r], s) for r, s in zip(rows, row_scores, strict=True)])
+        return results
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self, directory: str) -> None:
+        """保存為 index.json + 原始 float32/int32 檔案"""
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            "version": 2,
+            "dimension": self.dimension,
+            "count": self._count,
+            "ids": self.ids,
+            "mode": self.mode,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "centroids": None if self._centroids is None else len(self._centroids),
+            "trained_count": self._trained_count,
+        }
+
+        # 資料檔先寫入臨時檔再原子替換：load() 映射的 vectors.f32 可能正是
+        # 要覆蓋的檔案，直接 tofile() 會先截斷它
+        if np is None:
+            with _atomic_writer(os.path.join(directory, "vectors.f32")) as f:
+                for row in self._vectors:
+                    array("f", row).tofile(f)
+        else:
+            with _atomic_writer(os.path.join(directory, "vectors.f32")) as f:
+                self._matrix[: self._count].astype("<f4", copy=False).tofile(f)
+            if self._centroids is not None:
+                with _atomic_writer(os.path.join(directory, "centroids.f32")) as f:
+                    self._centroids.astype("<f4", copy=False).tofile(f)
+                with _atomic_writer(os.path.join(directory, "assign.i32")) as f:
+                    self._assign[: self._count].astype("<i4", copy=False).tofile(f)
+
+        # 元數據最後寫入並原子替換，避免讀到不完整的索引
+        with _atomic_writer(os.path.join(directory, "index.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, **kwargs: Any) -> "VectorIndex":
+        """載入索引；NumPy 可用時以 copy-on-write memory-map 映射向量檔
+
+        mode / nlist / nprobe 預設沿用保存時的設定，可由 kwargs 覆蓋。
+        """
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version", 1) >= 2:
+            centroid_count = meta.get("centroids")
+            kwargs.setdefault("nlist", meta.get("nlist"))
+            kwargs.setdefault("nprobe", meta.get("nprobe", 16))
+        else:
+            # 版本 1 的 nlist 記錄的是已訓練的中心數
+            centroid_count = meta.get("nlist")
+        kwargs.setdefault("mode", meta.get("mode", "auto"))
+        index = cls(dimension=meta["dimension"], **kwargs)
+        count = meta["count"]
+        index.ids = list(meta["ids"])
+        index._rows = {id: row for row, id in enumerate(index.ids)}
+        index._count = count
+        if count == 0:
+            return index
+
+        vectors_path = os.path.join(directory, "vectors.f32")
+        if np is None:
+            data = array("f")
+            with open(vectors_path, "rb") as f:
+                data.fromfile(f, count * index.dimension)
+            d = index.dimension
+            index._vectors = [data[i * d : (i + 1) * d].tolist() for i in range(count)]
+            return index
+
+        index._matrix = np.memmap(
+            vectors_path, dtype="<f4", mode="c", shape=(count, index.dimension)
+        )
+        index._assign = np.full(count, -1, dtype=np.int32)
+        if centroid_count:
+            index._centroids = np.fromfile(
+                os.path.join(directory, "centroids.f32"), dtype="<f4"
+            ).reshape(centroid_count, index.dimension)
+            index._assign[:] = np.fromfile(os.path.join(directory, "assign.i32"), dtype="<i4")
+            index._trained_count = meta.get("trained_count", count)
+        return index
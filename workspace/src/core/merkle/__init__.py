@@ -4,6 +4,7 @@ L0: Immutable Foundation - Merkle
 AXIOM Layer 0 Components
 """
 
+from .merkle_accumulator import MerkleAccumulator
 from .merkle_foundation import (
     MerkleNode,
     MerkleTree,
@@ -11,6 +12,7 @@ from .merkle_foundation import (
 )
 
 __all__ = [
+    "MerkleAccumulator",
     "MerkleTree",
     "MerkleNode",
     "StateVerifier",
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+L0: Immutable Foundation - Merkle Accumulator
+AXIOM Layer 0: 追加式 Merkle 累加器
+
+Append-only Merkle tree in the RFC 6962 / RFC 9162 (Certificate
+Transparency) format:
+
+- Leaves are hashed as H(0x00 || data), internal nodes as H(0x01 || l || r)
+- Node digests live in one flat array in Merkle-mountain-range (post-order)
+  layout; appending a leaf writes the leaf plus the subtrees it completes
+  (amortized two nodes, at most log n)
+- Root, inclusion proofs and consistency proofs take O(log n) hashes
+- With a path, the node array is an append-only file, so roots and proofs
+  survive process restarts
+
+Reference: RFC 9162 §2.1 (Merkle Tree Hash, inclusion and consistency proofs)
+"""
+
+import hashlib
+import os
+from typing import List, Optional, Sequence
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def _node_count(leaves: int) -> int:
+    """Stored nodes for a tree of ``leaves`` leaves (2n - popcount(n))"""
+    return 2 * leaves - bin(leaves).count("1")
+
+
+def _subtree_position(start: int, height: int) -> int:
+    """Array position of the perfect subtree of 2**height leaves starting at ``start``"""
+    last = start + (1 << height) - 1
+    return _node_count(last) + height
+
+
+def _split(size: int) -> int:
+    """Largest power of two smaller than ``size`` (size >= 2)"""
+    return 1 << ((size - 1).bit_length() - 1)
+
+
+class MerkleAccumulator:
+    """
+    Append-only Merkle accumulator.
+
+    Part of L0 Immutable Foundation layer.
+    """
+
+    VERSION = "1.0.0"
+    LAYER = "L0_immutable_foundation"
+
+    def __init__(
+        self, path: Optional[str] = None, algorithm: str = "sha256", fsync: bool = False
+    ):
+        """
+        Args:
+            path: Append-only node file; None keeps the accumulator in memory
+            algorithm: hashlib algorithm name
+            fsync: fsync the node file after every append
+        """
+        self.algorithm = algorithm
+        self.digest_size = hashlib.new(algorithm).digest_size
+        self.path = path
+        self.fsync = fsync
+        self._nodes = bytearray()
+        self.size = 0
+        self._file = None
+
+        if path is not None:
+            self._open(path)
+
+    def _open(self, path: str) -> None:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            count = len(data) // self.digest_size
+            # Largest leaf count whose nodes are all present (drops a torn append)
+            low, high = 0, count
+            while low < high:
+                mid = (low + high + 1) // 2
+                if _node_count(mid) <= count:
+                    low = mid
+                else:
+                    high = mid - 1
+            leaves = low
+            self.size = leaves
+            self._nodes = bytearray(data[: _node_count(leaves) * self.digest_size])
+            if len(self._nodes) != len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(len(self._nodes))
+        self._file = open(path, "ab")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ------------------------------------------------------------------
+    # Hashing
+    # ------------------------------------------------------------------
+
+    def leaf_hash(self, data: bytes) -> bytes:
+        return hashlib.new(self.algorithm, LEAF_PREFIX + data).digest()
+
+    def _node_hash(self, left: bytes, right: bytes) -> bytes:
+        return hashlib.new(self.algorithm, NODE_PREFIX + left + right).digest()
+
+    def _node(self, position: int) -> bytes:
+        offset = position * self.digest_size
+        return bytes(self._nodes[offset : offset + self.digest_size])
+
+    def _subtree(self, start: int, end: int) -> bytes:
+        """Merkle Tree Hash of leaves [start, end); ``start`` is aligned to the left split"""
+        size = end - start
+        if size & (size - 1) == 0:
+            return self._node(_subtree_position(start, size.bit_length() - 1))
+        k = _split(size)
+        return self._node_hash(self._subtree(start, start + k), self._subtree(start + k, end))
+
+    # ------------------------------------------------------------------
+    # Append / root
+    # ------------------------------------------------------------------
+
+    def append(self, data: bytes) -> int:
+        """Append a leaf; returns its index"""
+        return self.append_leaf_hash(self.leaf_hash(data))
+
+    def append_leaf_hash(self, leaf_hash: bytes) -> int:
+        """Append an already hashed leaf (H(0x00 || data)); returns its index"""
+        index = self.size
+        new = bytearray(leaf_hash)
+        current = leaf_hash
+        height = 0
+        # Each trailing 1 bit of the index completes a subtree with the peak to the left
+        while (index >> height) & 1:
+            left = self._node(_subtree_position(index + 1 - (2 << height), height))
+            current = self._node_hash(left, current)
+            new += current
+            height += 1
+
+        self._nodes += new
+        self.size += 1
+        if self._file is not None:
+            self._file.write(new)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+        return index
+
+    def extend(self, items: Sequence[bytes]) -> int:
+        """Append many leaves; returns the index of the first"""
+        first = self.size
+        for data in items:
+            self.append(data)
+        return first
+
+    def root(self, size: Optional[int] = None) -> Optional[bytes]:
+        """Root of the first ``size`` leaves (default: all); None when empty"""
+        size = self.size if size is None else size
+        if not 0 < size <= self.size:
+            return None
+        return self._subtree(0, size)
+
+    def root_hash(self, size: Optional[int] = None) -> Optional[str]:
+        root = self.root(size)
+        return root.hex() if root is not None else None
+
+    def get_leaf_hash(self, index: int) -> bytes:
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return self._node(_subtree_position(index, 0))
+
+    # ------------------------------------------------------------------
+    # Proofs
+    # ------------------------------------------------------------------
+
+    def inclusion_proof(self, index: int, size: Optional[int] = None) -> List[bytes]:
+        """Audit path for leaf ``index`` in the tree of the first ``size`` leaves"""
+        size = self.size if size is None else size
+        if not 0 <= index < size <= self.size:
+            raise IndexError(f"leaf {index} not in tree of size {size}")
+
+        path: List[bytes] = []
+        start, end = 0, size
+        while end - start > 1:
+            k = _split(end - start)
+            if index < start + k:
+                path.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                path.append(self._subtree(start, start + k))
+                start += k
+        path.reverse()
+        return path
+
+    def consistency_proof(self, old_size: int, new_size: Optional[int] = None) -> List[bytes]:
+        """Proof that the tree of ``old_size`` leaves is a prefix of ``new_size``"""
+        new_size = self.size if new_size is None else new_size
+        if not 0 < old_size <= new_size <= self.size:
+            raise IndexError(f"invalid sizes {old_size}, {new_size}")
+
+        proof: List[bytes] = []
+        start, end, m, complete = 0, new_size, old_size, True
+        while m != end - start:
+            k = _split(end - start)
+            if m <= k:
+                proof.append(self._subtree(start + k, end))
+                end = start + k
+            else:
+                proof.append(self._subtree(start, start + k))
+                start += k
+                m -= k
+                complete = False
+        if not complete:
+            proof.append(self._subtree(start, end))
+        proof.reverse()
+        return proof
+
+    def verify_inclusion(
+        self, leaf_hash: bytes, index: int, size: int, proof: Sequence[bytes], root: bytes
+    ) -> bool:
+        """Check an inclusion proof (RFC 9162 §2.1.3.2)"""
+        if not 0 <= index < size:
+            return False
+        fn, sn, r = index, size - 1, leaf_hash
+        for p in proof:
+            if sn == 0:
+                return False
+            if fn & 1 or fn == sn:
+                r = self._node_hash(p, r)
+                if not fn & 1:
+                    while not fn & 1 and fn != 0:
+                        fn >>= 1
+                        sn >>= 1
+            else:
+                r = self._node_hash(r, p)
+            fn >>= 1
+            sn >>= 1
+        return sn == 0 and r == root
+
+    def verify_consistency(
+        self,
+        old_size: int,
+        new_size: int,
+        old_root: bytes,
+        new_root: bytes,
+        proof: Sequence[bytes],
+    ) -> bool:
+        """Check a consistency proof (RFC 9162 §2.1.4.2)"""
+        if not 0 < old_size <= new_size:
+            return False
+        if old_size == new_size:
+            return not proof and old_root == new_root
+
+        path = list(proof)
+        if old_size & (old_size - 1) == 0:
+            path.insert(0, old_root)
+        if not path:
+            return False
+
+        fn, sn = old_size - 1, new_size - 1
+        while fn & 1:
+            fn >>= 1
+            sn >>= 1
+        fr = sr = path[0]
+        for c in path[1:]:
+            if sn == 0:
+                return False
+            if fn & 1 or fn == sn:
+                fr = self._node_hash(c, fr)
+                sr = self._node_hash(c, sr)
+                if not fn & 1:
+                    while not fn & 1 and fn != 0:
+                        fn >>= 1
+                        sn >>= 1
+            else:
+                sr = self._node_hash(sr, c)
+            fn >>= 1
+            sn >>= 1
+        return sn == 0 and fr == old_root and sr == new_root
+
+    def __len__(self) -> int:
+        return self.size
+
+
+# Module exports
+__all__ = ["MerkleAccumulator"]
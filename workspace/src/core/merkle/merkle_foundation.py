@@ -6,7 +6,7 @@ AXIOM Layer 0: Merkle 樹驗證基礎
 Responsibilities:
 - Merkle tree construction and verification
 - State integrity proofs
-- Tamper-evident logging
+- Tamper-evident logging (append-only MerkleAccumulator)
 """
 
 import hashlib
@@ -14,6 +14,8 @@ import json
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
+from .merkle_accumulator import MerkleAccumulator
+
 
 @dataclass
 class MerkleNode:
@@ -39,6 +41,9 @@ class MerkleTree:
         self.hash_func = hash_func or self._default_hash
         self.root: Optional[MerkleNode] = None
         self.leaves: List[MerkleNode] = []
+        # Level hashes, leaves first; kept between builds so only the
+        # right edge touched by new leaves is rehashed
+        self.levels: List[List[str]] = []
 
     def _default_hash(self, data: bytes) -> str:
         """Default SHA-256 hash function."""
@@ -57,31 +62,51 @@ class MerkleTree:
         if not self.leaves:
             return None
 
-        nodes = self.leaves.copy()
-
-        while len(nodes) > 1:
-            next_level = []
-            for i in range(0, len(nodes), 2):
-                left = nodes[i]
-                right = nodes[i + 1] if i + 1 < len(nodes) else left
-
-                combined = (left.hash + right.hash).encode()
-                parent_hash = self.hash_func(combined)
-                parent = MerkleNode(hash=parent_hash, left=left, right=right)
-                next_level.append(parent)
-            nodes = next_level
-
-        self.root = nodes[0]
+        if not self.levels:
+            self.levels.append([])
+        level = self.levels[0]
+        dirty = len(level)
+        level.extend(node.hash for node in self.leaves[dirty:])
+
+        # Rehash parents from the first changed position; an odd last node
+        # is paired with itself, so its parent changes when a sibling arrives
+        depth = 0
+        while len(self.levels[depth]) > 1:
+            nodes = self.levels[depth]
+            if depth + 1 == len(self.levels):
+                self.levels.append([])
+            parents = self.levels[depth + 1]
+            dirty //= 2
+            del parents[dirty:]
+            for i in range(dirty * 2, len(nodes), 2):
+                right = nodes[i + 1] if i + 1 < len(nodes) else nodes[i]
+                parents.append(self.hash_func((nodes[i] + right).encode()))
+            depth += 1
+        del self.levels[depth + 1 :]
+
+        self.root = MerkleNode(hash=self.levels[-1][0])
         return self.root.hash
 
     def get_proof(self, leaf_index: int) -> List[Dict[str, str]]:
         """Get Merkle proof for a leaf."""
-        if not self.root or leaf_index >= len(self.leaves):
+        if self.root is None or len(self.levels[0]) != len(self.leaves):
+            self.build()
+        if not self.root or not 0 <= leaf_index < len(self.leaves):
             return []
 
         proof = []
-        # Simplified proof generation
-        # Full implementation would traverse tree
+        index = leaf_index
+        for nodes in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling >= len(nodes):
+                sibling = index
+            proof.append(
+                {
+                    "hash": nodes[sibling],
+                    "position": "left" if sibling < index else "right",
+                }
+            )
+            index //= 2
         return proof
 
     def verify_proof(
@@ -105,11 +130,13 @@ class StateVerifier:
     """
     State verification using Merkle proofs.
 
-    Ensures state integrity across system components.
+    Ensures state integrity across system components. States are appended to
+    a MerkleAccumulator, so recording is O(log n), any recorded state has an
+    inclusion proof, and with a path the roots survive process restarts.
     """
 
-    def __init__(self):
-        self.tree = MerkleTree()
+    def __init__(self, path: Optional[str] = None):
+        self.accumulator = MerkleAccumulator(path)
         self.state_log: List[Dict[str, Any]] = []
 
     def record_state(self, component: str, state: Dict[str, Any]) -> str:
@@ -119,13 +146,35 @@ class StateVerifier:
             "state": state,
             "timestamp": self._get_timestamp(),
         }
-        leaf_hash = self.tree.add_leaf(entry)
-        self.state_log.append({"hash": leaf_hash, **entry})
+        serialized = json.dumps(entry, sort_keys=True).encode()
+        index = self.accumulator.append(serialized)
+        leaf_hash = self.accumulator.get_leaf_hash(index).hex()
+        self.state_log.append({"hash": leaf_hash, "index": index, **entry})
         return leaf_hash
 
-    def finalize(self) -> str:
+    def finalize(self) -> Optional[str]:
         """Finalize and get root hash."""
-        return self.tree.build()
+        return self.accumulator.root_hash()
+
+    def get_proof(self, index: int, size: Optional[int] = None) -> List[str]:
+        """Inclusion proof (hex) for the state recorded at ``index``."""
+        return [h.hex() for h in self.accumulator.inclusion_proof(index, size)]
+
+    def verify_state(
+        self, leaf_hash: str, index: int, size: int, proof: List[str], root_hash: str
+    ) -> bool:
+        """Verify that a recorded state is included under ``root_hash``."""
+        return self.accumulator.verify_inclusion(
+            bytes.fromhex(leaf_hash),
+            index,
+            size,
+            [bytes.fromhex(h) for h in proof],
+            bytes.fromhex(root_hash),
+        )
+
+    def get_consistency_proof(self, old_size: int, new_size: Optional[int] = None) -> List[str]:
+        """Proof (hex) that an earlier root is a prefix of the current log."""
+        return [h.hex() for h in self.accumulator.consistency_proof(old_size, new_size)]
 
     def _get_timestamp(self) -> str:
         """Get current timestamp."""
@@ -136,6 +185,7 @@ class StateVerifier:
 
 # Module exports
 __all__ = [
+    "MerkleAccumulator",
     "MerkleTree",
     "MerkleNode",
     "StateVerifier",
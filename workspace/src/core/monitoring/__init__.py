@@ -4,6 +4,7 @@ SynergyMesh Intelligent Monitoring and Auto-Remediation System (Phase 11)
 Core modules:
 - intelligent_monitoring: 24/7 intelligent monitoring system
 - smart_anomaly_detector: AI-driven anomaly detection
+- streaming_detectors: Constant-time online statistics for anomaly detection
 - auto_diagnosis: Automatic root cause analysis
 - auto_remediation: Self-healing capabilities
 - self_learning: Continuous improvement from incidents
@@ -30,6 +31,7 @@ from .intelligent_monitoring import (
     IntelligentMonitoringSystem,
     Metric,
     MetricsCollector,
+    MetricSeries,
     MetricType,
 )
 from .observability_platform import (
@@ -37,6 +39,7 @@ from .observability_platform import (
     CorrelationEngine,
     LogEntry,
     ObservabilityPlatform,
+    TelemetryStore,
     TraceSpan,
 )
 from .self_learning import (
@@ -53,12 +56,24 @@ from .smart_anomaly_detector import (
     DetectedAnomaly,
     SmartAnomalyDetector,
 )
+from .streaming_detectors import (
+    DetectorBank,
+    EWMAStats,
+    SeasonalBaseline,
+    StreamingQuantiles,
+)
+
+try:
+    from ..stats import P2Quantile, RollingStats, RunningStats
+except ImportError:  # imported as a top-level package
+    from stats import P2Quantile, RollingStats, RunningStats
 
 __all__ = [
     # Intelligent Monitoring
     "MetricType",
     "Metric",
     "MetricsCollector",
+    "MetricSeries",
     "Alert",
     "AlertSeverity",
     "IntelligentMonitoringSystem",
@@ -68,6 +83,14 @@ __all__ = [
     "DetectedAnomaly",
     "SmartAnomalyDetector",
     "AnomalyClassifier",
+    # Streaming Detectors
+    "RunningStats",
+    "RollingStats",
+    "P2Quantile",
+    "EWMAStats",
+    "StreamingQuantiles",
+    "SeasonalBaseline",
+    "DetectorBank",
     # Auto Diagnosis
     "DiagnosisResult",
     "RootCause",
@@ -91,5 +114,6 @@ __all__ = [
     "TraceSpan",
     "CorrelatedEvent",
     "ObservabilityPlatform",
+    "TelemetryStore",
     "CorrelationEngine",
 ]
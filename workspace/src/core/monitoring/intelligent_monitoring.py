@@ -10,10 +10,16 @@ import asyncio
 import logging
 import statistics
 import uuid
+from array import array
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Statistics fall back to the statistics module
+    np = None
 
 logger = logging.getLogger(__name__)
 
@@ -86,17 +92,134 @@ class Alert:
         self.resolved = True
 
 
+class MetricSeries:
+    """
+    Ring buffer of (timestamp, value) samples for one metric and label set
+
+    Values and timestamps live in preallocated ``array('d')`` columns that
+    grow by doubling up to ``max_samples``; once full, the oldest sample is
+    overwritten. Samples are appended in time order, so time ranges are
+    located by binary search.
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, labels: Dict[str, str], max_samples: int):
+        self.labels = labels
+        self.max_samples = max_samples
+        capacity = min(self.INITIAL_CAPACITY, max_samples)
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _index(self, i: int) -> int:
+        return (self._start + i) % len(self._values)
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample, overwriting the oldest one when the buffer is full"""
+        capacity = len(self._values)
+        if self._size == capacity:
+            if capacity < self.max_samples:
+                self._grow(min(capacity * 2, self.max_samples))
+                capacity = len(self._values)
+            else:
+                self._start = (self._start + 1) % capacity
+                self._size -= 1
+        slot = (self._start + self._size) % capacity
+        self._timestamps[slot] = timestamp
+        self._values[slot] = value
+        self._size += 1
+
+    def _grow(self, capacity: int) -> None:
+        timestamps, values = self._linear(0, self._size)
+        padding = bytes(8 * (capacity - self._size))
+        self._timestamps = array("d", timestamps) + array("d", padding)
+        self._values = array("d", values) + array("d", padding)
+        self._start = 0
+
+    def evict_before(self, cutoff: float) -> None:
+        """Drop samples recorded at or before cutoff"""
+        drop = self._bisect(cutoff, inclusive=True)
+        if drop:
+            self._start = self._index(drop)
+            self._size -= drop
+
+    def _bisect(self, timestamp: float, inclusive: bool) -> int:
+        """Number of samples recorded before timestamp (or at it, if inclusive)"""
+        lo, hi = 0, self._size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            recorded = self._timestamps[self._index(mid)]
+            if recorded < timestamp or (inclusive and recorded == timestamp):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _linear(self, lo: int, hi: int):
+        """Copies of the columns for logical samples [lo, hi) as contiguous arrays"""
+        if lo >= hi:
+            return array("d"), array("d")
+        first, last = self._index(lo), self._index(hi - 1) + 1
+        if first < last:
+            return self._timestamps[first:last], self._values[first:last]
+        return (
+            self._timestamps[first:] + self._timestamps[:last],
+            self._values[first:] + self._values[:last],
+        )
+
+    def window(self, since: Optional[float] = None, until: Optional[float] = None):
+        """
+        Samples in the time range [since, until]
+
+        Returns:
+            (timestamps, values) as new ``array('d')`` columns copied out of
+            the ring, so later appends do not change them
+        """
+        lo = self._bisect(since, inclusive=False) if since is not None else 0
+        hi = self._bisect(until, inclusive=True) if until is not None else self._size
+        return self._linear(lo, hi)
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """Most recent (timestamp, value) sample"""
+        if not self._size:
+            return None
+        slot = self._index(self._size - 1)
+        return self._timestamps[slot], self._values[slot]
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """Percentile of sorted values with linear interpolation (NumPy's default)"""
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
 class MetricsCollector:
     """
     Continuous metrics collection system
 
-    Collects metrics from various sources and stores them for analysis
+    Collects metrics from various sources and stores them for analysis.
+    Each metric name and label set is stored as a columnar ring buffer
+    (MetricSeries); label dicts are interned so identical label sets share
+    one object, and type/unit/description are kept once per metric name.
     """
 
-    def __init__(self, retention_seconds: int = 3600):
-        self._metrics: Dict[str, List[Metric]] = {}
+    DEFAULT_PERCENTILES = (90, 95, 99)
+
+    def __init__(self, retention_seconds: int = 3600, max_samples_per_series: int = 10000):
+        # name -> label key -> series
+        self._series: Dict[str, Dict[Tuple[Tuple[str, str], ...], MetricSeries]] = {}
+        self._latest_series: Dict[str, MetricSeries] = {}
+        self._label_sets: Dict[Tuple[Tuple[str, str], ...], Dict[str, str]] = {}
         self._collectors: Dict[str, Callable[[], float]] = {}
         self._retention_seconds = retention_seconds
+        self._max_samples = max_samples_per_series
         self._running = False
 
     def register_collector(
@@ -116,36 +239,50 @@ class MetricsCollector:
             "unit": unit,
             "description": description,
         }
-        if name not in self._metrics:
-            self._metrics[name] = []
+        if name not in self._series:
+            self._series[name] = {}
+
+    def _config(self, name: str) -> Dict[str, Any]:
+        return self._collectors.get(
+            name,
+            {"type": MetricType.GAUGE, "labels": {}, "unit": "", "description": ""},
+        )
+
+    def _intern_labels(self, labels: Dict[str, str]):
+        key = tuple(sorted(labels.items()))
+        interned = self._label_sets.get(key)
+        if interned is None:
+            interned = self._label_sets[key] = dict(key)
+        return key, interned
 
     def collect(
         self, name: str, value: float, labels: Optional[Dict[str, str]] = None
     ) -> Metric:
         """Manually collect a metric value"""
-        config = self._collectors.get(
-            name,
-            {"type": MetricType.GAUGE, "labels": {}, "unit": "", "description": ""},
-        )
+        config = self._config(name)
+        key, interned = self._intern_labels({**config.get("labels", {}), **(labels or {})})
+
+        series_by_labels = self._series.setdefault(name, {})
+        series = series_by_labels.get(key)
+        if series is None:
+            series = series_by_labels[key] = MetricSeries(interned, self._max_samples)
 
-        metric = Metric(
+        timestamp = datetime.now()
+        ts = timestamp.timestamp()
+        series.append(ts, value)
+        series.evict_before(ts - self._retention_seconds)
+        self._latest_series[name] = series
+
+        return Metric(
             name=name,
             value=value,
             metric_type=config.get("type", MetricType.GAUGE),
-            labels={**config.get("labels", {}), **(labels or {})},
+            timestamp=timestamp,
+            labels=dict(interned),
             unit=config.get("unit", ""),
             description=config.get("description", ""),
         )
 
-        if name not in self._metrics:
-            self._metrics[name] = []
-        self._metrics[name].append(metric)
-
-        # Cleanup old metrics
-        self._cleanup_old_metrics(name)
-
-        return metric
-
     def collect_all(self) -> List[Metric]:
         """Collect all registered metrics"""
         collected = []
@@ -158,40 +295,129 @@ class MetricsCollector:
                 logger.warning(f"Metric collector '{name}' failed: {e}")
         return collected
 
-    def get_metrics(self, name: str, since: Optional[datetime] = None) -> List[Metric]:
-        """Get metrics by name, optionally filtered by time"""
-        metrics = self._metrics.get(name, [])
-        if since:
-            metrics = [m for m in metrics if m.timestamp >= since]
+    def _matching_series(
+        self, name: str, labels: Optional[Dict[str, str]] = None
+    ) -> List[MetricSeries]:
+        """Series of a metric whose labels include all of the given labels"""
+        cutoff = datetime.now().timestamp() - self._retention_seconds
+        matching = []
+        for series in self._series.get(name, {}).values():
+            if labels and any(series.labels.get(k) != v for k, v in labels.items()):
+                continue
+            series.evict_before(cutoff)
+            matching.append(series)
+        return matching
+
+    @staticmethod
+    def _bounds(since: Optional[datetime], until: Optional[datetime]):
+        return (since.timestamp() if since else None, until.timestamp() if until else None)
+
+    def get_metrics(
+        self,
+        name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> List[Metric]:
+        """Get metrics by name, optionally filtered by time range and labels"""
+        config = self._config(name)
+        lower, upper = self._bounds(since, until)
+        metrics = []
+        for series in self._matching_series(name, labels):
+            timestamps, values = series.window(lower, upper)
+            metrics.extend(
+                Metric(
+                    name=name,
+                    value=value,
+                    metric_type=config.get("type", MetricType.GAUGE),
+                    timestamp=datetime.fromtimestamp(ts),
+                    labels=dict(series.labels),
+                    unit=config.get("unit", ""),
+                    description=config.get("description", ""),
+                )
+                for ts, value in zip(timestamps, values, strict=True)
+            )
+        metrics.sort(key=lambda m: m.timestamp)
         return metrics
 
     def get_latest(self, name: str) -> Optional[Metric]:
         """Get the latest metric value"""
-        metrics = self._metrics.get(name, [])
-        return metrics[-1] if metrics else None
+        series = self._latest_series.get(name)
+        sample = series.latest() if series is not None else None
+        if sample is None:
+            return None
+        config = self._config(name)
+        return Metric(
+            name=name,
+            value=sample[1],
+            metric_type=config.get("type", MetricType.GAUGE),
+            timestamp=datetime.fromtimestamp(sample[0]),
+            labels=dict(series.labels),
+            unit=config.get("unit", ""),
+            description=config.get("description", ""),
+        )
 
-    def get_statistics(self, name: str) -> Dict[str, float]:
-        """Get statistical summary of a metric"""
-        metrics = self._metrics.get(name, [])
-        if not metrics:
+    def get_values(
+        self,
+        name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> array:
+        """Raw sample values of a metric, copied into an ``array('d')`` column"""
+        lower, upper = self._bounds(since, until)
+        columns = [series.window(lower, upper)[1] for series in self._matching_series(name, labels)]
+        if len(columns) == 1:
+            return columns[0]
+        values = array("d")
+        for column in columns:
+            values.extend(column)
+        return values
+
+    def get_statistics(
+        self,
+        name: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        labels: Optional[Dict[str, str]] = None,
+        percentiles: Tuple[float, ...] = DEFAULT_PERCENTILES,
+    ) -> Dict[str, float]:
+        """
+        Get statistical summary of a metric, optionally over a time range
+
+        The window's values are copied out of the ring once; with NumPy the
+        statistics then run over that buffer without boxing each value.
+        """
+        values = self.get_values(name, since, until, labels)
+        if not values:
             return {}
 
-        values = [m.value for m in metrics]
-        return {
+        if np is not None:
+            column = np.frombuffer(values, dtype=np.float64)
+            stats = {
+                "count": len(values),
+                "min": float(column.min()),
+                "max": float(column.max()),
+                "mean": float(column.mean()),
+                "median": float(np.median(column)),
+                "stdev": float(column.std(ddof=1)) if len(values) > 1 else 0.0,
+            }
+            for q, value in zip(percentiles, np.percentile(column, percentiles), strict=True):
+                stats[f"p{q:g}"] = float(value)
+            return stats
+
+        ordered = sorted(values)
+        stats = {
             "count": len(values),
-            "min": min(values),
-            "max": max(values),
-            "mean": statistics.mean(values),
-            "median": statistics.median(values),
+            "min": ordered[0],
+            "max": ordered[-1],
+            "mean": statistics.fmean(values),
+            "median": statistics.median(ordered),
             "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
         }
-
-    def _cleanup_old_metrics(self, name: str) -> None:
-        """Remove metrics older than retention period"""
-        cutoff = datetime.now().timestamp() - self._retention_seconds
-        self._metrics[name] = [
-            m for m in self._metrics.get(name, []) if m.timestamp.timestamp() > cutoff
-        ]
+        for q in percentiles:
+            stats[f"p{q:g}"] = _percentile(ordered, q)
+        return stats
 
     async def start_collection(self, interval_seconds: float = 10.0) -> None:
         """Start continuous metric collection"""
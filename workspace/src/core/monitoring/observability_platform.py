@@ -6,11 +6,13 @@ Unified observability with metrics, logs, and traces
 Reference: Uber's uMonitor - AI anomaly detection pinpoints faulty services in real-time [10]
 """
 
+import bisect
 import uuid
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 class LogLevel(Enum):
@@ -165,9 +167,13 @@ class CorrelationEngine:
     Correlates events across metrics, logs, and traces
     """
 
-    def __init__(self, time_window_seconds: int = 300):
+    def __init__(self, time_window_seconds: int = 300, max_events: int = 1000):
         self._time_window = time_window_seconds
-        self._events: List[CorrelatedEvent] = []
+        self._events: Deque[CorrelatedEvent] = deque(maxlen=max_events)
+
+    @property
+    def time_window(self) -> int:
+        return self._time_window
 
     def correlate_by_time(
         self,
@@ -176,29 +182,38 @@ class CorrelationEngine:
         metric_names: List[str],
         reference_time: datetime,
     ) -> CorrelatedEvent:
-        """Correlate events by time proximity"""
+        """
+        Correlate events by time proximity
+
+        Runs in O(len(logs) + len(traces)); ObservabilityPlatform passes only
+        the candidates its time index selected.
+        """
         event = CorrelatedEvent(
             event_type=EventType.INCIDENT,
             title="Time-correlated event",
             timestamp=reference_time,
         )
+        services: Dict[str, None] = {}
+        trace_ids: Dict[str, None] = {}
 
         # Find logs within time window
         for log in logs:
             time_diff = abs((log.timestamp - reference_time).total_seconds())
             if time_diff <= self._time_window:
                 event.related_logs.append(log.log_id)
-                if log.service and log.service not in event.related_services:
-                    event.related_services.append(log.service)
+                if log.service:
+                    services[log.service] = None
 
         # Find traces within time window
         for trace in traces:
             time_diff = abs((trace.start_time - reference_time).total_seconds())
             if time_diff <= self._time_window:
-                event.related_traces.append(trace.trace_id)
-                if trace.service and trace.service not in event.related_services:
-                    event.related_services.append(trace.service)
+                trace_ids[trace.trace_id] = None
+                if trace.service:
+                    services[trace.service] = None
 
+        event.related_traces = list(trace_ids)
+        event.related_services = list(services)
         event.related_metrics = metric_names
 
         self._events.append(event)
@@ -212,25 +227,378 @@ class CorrelationEngine:
             event_type=EventType.INCIDENT, title=f"Trace-correlated event: {trace_id}"
         )
 
+        span_ids: Dict[str, None] = {}
+        services: Dict[str, None] = {}
+
         # Find all spans in trace
-        trace_spans = [t for t in traces if t.trace_id == trace_id]
-        for span in trace_spans:
-            if span.span_id not in event.related_traces:
-                event.related_traces.append(span.span_id)
-            if span.service and span.service not in event.related_services:
-                event.related_services.append(span.service)
+        for span in traces:
+            if span.trace_id == trace_id:
+                span_ids[span.span_id] = None
+                if span.service:
+                    services[span.service] = None
 
         # Find logs with matching trace ID
         for log in logs:
             if log.trace_id == trace_id:
                 event.related_logs.append(log.log_id)
 
+        event.related_traces = list(span_ids)
+        event.related_services = list(services)
         self._events.append(event)
         return event
 
     def get_correlated_events(self) -> List[CorrelatedEvent]:
-        """Get all correlated events"""
-        return self._events.copy()
+        """Get the most recent correlated events"""
+        return list(self._events)
+
+
+class _TimeBuckets:
+    """Item ids grouped by fixed-width time bucket, with sorted bucket keys"""
+
+    def __init__(self, bucket_seconds: float):
+        self.bucket_seconds = bucket_seconds
+        self._buckets: Dict[int, Dict[int, None]] = {}
+        self._keys: List[int] = []  # Sorted
+
+    def _key(self, timestamp: datetime) -> int:
+        return int(timestamp.timestamp() // self.bucket_seconds)
+
+    def add(self, item_id: int, timestamp: datetime) -> int:
+        """Add an item; returns the bucket key to pass to remove()"""
+        key = self._key(timestamp)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {}
+            if not self._keys or key > self._keys[-1]:
+                self._keys.append(key)
+            else:
+                bisect.insort(self._keys, key)
+        bucket[item_id] = None
+        return key
+
+    def remove(self, item_id: int, key: int) -> None:
+        bucket = self._buckets[key]
+        del bucket[item_id]
+        if not bucket:
+            del self._buckets[key]
+            del self._keys[bisect.bisect_left(self._keys, key)]
+
+    def _range(self, since: Optional[datetime], until: Optional[datetime]) -> List[int]:
+        lo = bisect.bisect_left(self._keys, self._key(since)) if since else 0
+        hi = bisect.bisect_right(self._keys, self._key(until)) if until else len(self._keys)
+        return self._keys[lo:hi]
+
+    def count(self, since: Optional[datetime], until: Optional[datetime]) -> int:
+        """Number of items in the buckets overlapping the range (an upper bound)"""
+        return sum(len(self._buckets[key]) for key in self._range(since, until))
+
+    def candidates(self, since: Optional[datetime], until: Optional[datetime]) -> Iterator[int]:
+        """Ids of items in the buckets overlapping the range (callers check exact times)"""
+        for key in self._range(since, until):
+            yield from self._buckets[key]
+
+
+def _in_range(timestamp: datetime, since: Optional[datetime], until: Optional[datetime]) -> bool:
+    return (since is None or timestamp >= since) and (until is None or timestamp <= until)
+
+
+# Logs at these levels (and traces with an error span) are evicted last
+PRIORITY_LOG_LEVELS = frozenset({LogLevel.WARNING, LogLevel.ERROR, LogLevel.CRITICAL})
+
+
+class TelemetryStore:
+    """
+    Indexed, bounded in-memory store for logs and trace spans
+
+    Logs are indexed by service, level, service+level, trace ID and time
+    bucket; spans by trace ID, service and start-time bucket, and ended root
+    spans are kept sorted by duration. Queries walk the smallest applicable
+    index, so their cost follows the number of matches rather than the
+    number of stored entries.
+
+    Memory is bounded with two eviction tiers per kind: DEBUG/INFO logs and
+    traces without errors are evicted first (oldest first), while
+    WARNING+ logs and failed traces are only evicted once they exceed
+    ``priority_share`` of the capacity or nothing else is left.
+    """
+
+    def __init__(
+        self,
+        max_logs: int = 10000,
+        max_traces: int = 10000,
+        bucket_seconds: float = 60,
+        priority_share: float = 0.5,
+    ):
+        """
+        Initialize the store
+
+        Args:
+            max_logs: Maximum number of log entries retained
+            max_traces: Maximum number of traces retained
+            bucket_seconds: Width of the time buckets used for range queries
+            priority_share: Capacity fraction guaranteed to the priority tier
+        """
+        self.max_logs = max_logs
+        self.max_traces = max_traces
+        self.priority_share = priority_share
+        self.evicted_logs = 0
+        self.evicted_traces = 0
+
+        # Logs: seq -> (entry, index keys, time bucket); seq order is insertion order.
+        # Keys are kept so eviction does not depend on the entry staying unchanged.
+        self._log_seq = 0
+        self._logs: Dict[int, Tuple[LogEntry, Tuple[Tuple[str, Any], ...], int]] = {}
+        self._log_tiers = (OrderedDict(), OrderedDict())  # seq -> None
+        self._log_index: Dict[Tuple[str, Any], Dict[int, None]] = {}
+        self._log_times = _TimeBuckets(bucket_seconds)
+
+        # Traces: trace_id -> spans, and (span seq, service, time bucket) per span
+        self._span_seq = 0
+        self._traces: Dict[str, List[TraceSpan]] = {}
+        self._trace_span_keys: Dict[str, List[Tuple[int, str, int]]] = {}
+        self._trace_tiers = (OrderedDict(), OrderedDict())  # trace_id -> None
+        self._spans: Dict[int, TraceSpan] = {}
+        self._span_times = _TimeBuckets(bucket_seconds)
+        self._service_traces: Dict[str, Dict[str, TraceSpan]] = {}  # First span per trace
+        self._roots: Dict[str, TraceSpan] = {}
+        self._open_roots: Dict[str, TraceSpan] = {}
+        self._durations: List[Tuple[float, str]] = []  # Sorted (root duration_ms, trace_id)
+        self._root_durations: Dict[str, float] = {}
+
+    # === Logs ===
+
+    @staticmethod
+    def _log_keys(entry: LogEntry) -> Tuple[Tuple[str, Any], ...]:
+        keys = [("level", entry.level)]
+        if entry.service:
+            keys.append(("service", entry.service))
+            keys.append(("service_level", (entry.service, entry.level)))
+        if entry.trace_id:
+            keys.append(("trace", entry.trace_id))
+        return tuple(keys)
+
+    def add_log(self, entry: LogEntry) -> None:
+        """Store and index a log entry, evicting if over capacity"""
+        seq = self._log_seq
+        self._log_seq += 1
+        keys = self._log_keys(entry)
+        for key in keys:
+            self._log_index.setdefault(key, {})[seq] = None
+        self._logs[seq] = (entry, keys, self._log_times.add(seq, entry.timestamp))
+        self._log_tiers[entry.level in PRIORITY_LOG_LEVELS][seq] = None
+
+        while len(self._logs) > self.max_logs:
+            seq, _ = self._eviction_tier(self._log_tiers, self.max_logs).popitem(last=False)
+            self._remove_log(seq)
+
+    def _remove_log(self, seq: int) -> None:
+        _, keys, bucket = self._logs.pop(seq)
+        for key in keys:
+            postings = self._log_index[key]
+            del postings[seq]
+            if not postings:
+                del self._log_index[key]
+        self._log_times.remove(seq, bucket)
+        self.evicted_logs += 1
+
+    def _eviction_tier(self, tiers: Tuple[OrderedDict, OrderedDict], capacity: int) -> OrderedDict:
+        normal, priority = tiers
+        if normal and (not priority or len(priority) <= capacity * self.priority_share):
+            return normal
+        return priority
+
+    def get_logs(
+        self,
+        service: Optional[str] = None,
+        level: Optional[LogLevel] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        trace_id: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[LogEntry]:
+        """
+        Get logs matching all given filters, oldest first
+
+        Args:
+            service: Only logs from this service
+            level: Only logs at this level
+            since: Only logs at or after this time
+            until: Only logs at or before this time
+            trace_id: Only logs attached to this trace
+            limit: Return only the most recent N matches
+        """
+        candidates: Optional[Iterable[int]] = None
+        if service and level:
+            candidates = self._log_index.get(("service_level", (service, level)), {})
+        elif service:
+            candidates = self._log_index.get(("service", service), {})
+        elif level:
+            candidates = self._log_index.get(("level", level), {})
+        if trace_id:
+            by_trace = self._log_index.get(("trace", trace_id), {})
+            if candidates is None or len(by_trace) < len(candidates):
+                candidates = by_trace
+
+        time_filtered = since is not None or until is not None
+        if time_filtered and (
+            candidates is None or self._log_times.count(since, until) < len(candidates)
+        ):
+            candidates = sorted(self._log_times.candidates(since, until))
+        elif candidates is None:
+            candidates = self._logs
+
+        matches = []
+        for seq in reversed(candidates):
+            entry = self._logs[seq][0]
+            if (
+                (not service or entry.service == service)
+                and (not level or entry.level == level)
+                and (not trace_id or entry.trace_id == trace_id)
+                and (not time_filtered or _in_range(entry.timestamp, since, until))
+            ):
+                matches.append(entry)
+                if limit is not None and len(matches) >= limit:
+                    break
+        matches.reverse()
+        return matches
+
+    def count_logs(self, service: Optional[str] = None, level: Optional[LogLevel] = None) -> int:
+        """Number of stored logs for a service and/or level, from the indexes"""
+        if service and level:
+            key = ("service_level", (service, level))
+        elif service:
+            key = ("service", service)
+        elif level:
+            key = ("level", level)
+        else:
+            return len(self._logs)
+        return len(self._log_index.get(key, ()))
+
+    @property
+    def log_count(self) -> int:
+        return len(self._logs)
+
+    # === Traces ===
+
+    def add_span(self, span: TraceSpan) -> None:
+        """Store and index a span, evicting the oldest traces if over capacity"""
+        trace_id = span.trace_id
+        spans = self._traces.get(trace_id)
+        if spans is None:
+            spans = self._traces[trace_id] = []
+            self._trace_span_keys[trace_id] = []
+            self._trace_tiers[0][trace_id] = None
+
+        seq = self._span_seq
+        self._span_seq += 1
+        spans.append(span)
+        self._spans[seq] = span
+        bucket = self._span_times.add(seq, span.start_time)
+        self._trace_span_keys[trace_id].append((seq, span.service, bucket))
+        if span.service:
+            self._service_traces.setdefault(span.service, {}).setdefault(trace_id, span)
+        if span.parent_span_id is None and trace_id not in self._roots:
+            self._roots[trace_id] = span
+            self._open_roots[trace_id] = span
+            self._index_root(trace_id)
+
+        while len(self._traces) > self.max_traces:
+            trace_id, _ = self._eviction_tier(self._trace_tiers, self.max_traces).popitem(
+                last=False
+            )
+            self._remove_trace(trace_id)
+
+    def span_ended(self, span: TraceSpan) -> None:
+        """Update the indexes after a span ended (duration and error tier)"""
+        trace_id = span.trace_id
+        if trace_id not in self._traces:
+            return
+        if self._open_roots.get(trace_id) is span:
+            self._index_root(trace_id)
+        if span.status == TraceStatus.ERROR and trace_id in self._trace_tiers[0]:
+            del self._trace_tiers[0][trace_id]
+            self._trace_tiers[1][trace_id] = None
+
+    def _index_root(self, trace_id: str) -> None:
+        duration = self._open_roots[trace_id].duration_ms()
+        if duration is not None:
+            del self._open_roots[trace_id]
+            self._root_durations[trace_id] = duration
+            bisect.insort(self._durations, (duration, trace_id))
+
+    def _remove_trace(self, trace_id: str) -> None:
+        del self._traces[trace_id]
+        for seq, service, bucket in self._trace_span_keys.pop(trace_id):
+            del self._spans[seq]
+            self._span_times.remove(seq, bucket)
+            service_traces = self._service_traces.get(service)
+            if service_traces is not None and service_traces.pop(trace_id, None) is not None:
+                if not service_traces:
+                    del self._service_traces[service]
+        self._roots.pop(trace_id, None)
+        self._open_roots.pop(trace_id, None)
+        duration = self._root_durations.pop(trace_id, None)
+        if duration is not None:
+            del self._durations[bisect.bisect_left(self._durations, (duration, trace_id))]
+        self.evicted_traces += 1
+
+    def get_trace(self, trace_id: str) -> List[TraceSpan]:
+        """Get all spans in a trace"""
+        return list(self._traces.get(trace_id, ()))
+
+    def get_slow_traces(self, threshold_ms: float) -> List[TraceSpan]:
+        """Get ended root spans longer than threshold_ms, slowest first"""
+        # Roots ended with span.end() instead of end_span() are indexed lazily
+        for trace_id in [t for t, root in self._open_roots.items() if root.end_time]:
+            self._index_root(trace_id)
+        start = bisect.bisect_right(self._durations, (threshold_ms, chr(0x10FFFF)))
+        return [self._roots[trace_id] for _, trace_id in reversed(self._durations[start:])]
+
+    def get_spans(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        service: Optional[str] = None,
+    ) -> List[TraceSpan]:
+        """Get spans that started within a time range, in start order"""
+        spans = [
+            span
+            for span in map(self._spans.__getitem__, self._span_times.candidates(since, until))
+            if _in_range(span.start_time, since, until)
+            and (not service or span.service == service)
+        ]
+        spans.sort(key=lambda span: span.start_time)
+        return spans
+
+    def get_service_spans(self, service: str) -> List[TraceSpan]:
+        """First span of the service in each trace that involves it"""
+        return list(self._service_traces.get(service, {}).values())
+
+    @property
+    def trace_count(self) -> int:
+        return len(self._traces)
+
+    def services(self) -> List[str]:
+        """Services seen in stored logs or spans"""
+        services = dict.fromkeys(
+            key[1] for key in self._log_index if key[0] == "service"
+        )
+        services.update(dict.fromkeys(self._service_traces))
+        return list(services)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Sizes, capacities and eviction counters"""
+        return {
+            "logs": len(self._logs),
+            "max_logs": self.max_logs,
+            "priority_logs": len(self._log_tiers[1]),
+            "evicted_logs": self.evicted_logs,
+            "traces": len(self._traces),
+            "max_traces": self.max_traces,
+            "priority_traces": len(self._trace_tiers[1]),
+            "evicted_traces": self.evicted_traces,
+            "spans": len(self._spans),
+        }
 
 
 class ObservabilityPlatform:
@@ -242,17 +610,34 @@ class ObservabilityPlatform:
     Reference: Uber's uMonitor for real-time AI anomaly detection [10]
     """
 
-    def __init__(self):
-        self._logs: List[LogEntry] = []
-        self._traces: Dict[str, List[TraceSpan]] = {}  # trace_id -> spans
+    def __init__(
+        self,
+        max_logs: int = 10000,
+        max_traces: int = 10000,
+        bucket_seconds: float = 60,
+    ):
+        """
+        Initialize the platform
+
+        Args:
+            max_logs: Maximum number of log entries retained
+            max_traces: Maximum number of traces retained
+            bucket_seconds: Width of the telemetry time index buckets
+        """
+        self._store = TelemetryStore(
+            max_logs=max_logs, max_traces=max_traces, bucket_seconds=bucket_seconds
+        )
         self._events: List[CorrelatedEvent] = []
         self._correlation_engine = CorrelationEngine()
-        self._max_retention = 10000  # Max entries to retain
 
     @property
     def correlation_engine(self) -> CorrelationEngine:
         return self._correlation_engine
 
+    @property
+    def store(self) -> TelemetryStore:
+        return self._store
+
     # === Logging ===
 
     def log(
@@ -275,8 +660,7 @@ class ObservabilityPlatform:
             span_id=span_id,
             attributes=attributes or {},
         )
-        self._logs.append(entry)
-        self._cleanup_logs()
+        self._store.add_log(entry)
         return entry
 
     def log_info(self, message: str, **kwargs) -> LogEntry:
@@ -293,23 +677,14 @@ class ObservabilityPlatform:
         service: Optional[str] = None,
         level: Optional[LogLevel] = None,
         since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        trace_id: Optional[str] = None,
+        limit: Optional[int] = None,
     ) -> List[LogEntry]:
-        """Get logs with optional filters"""
-        logs = self._logs
-
-        if service:
-            logs = [l for l in logs if l.service == service]
-        if level:
-            logs = [l for l in logs if l.level == level]
-        if since:
-            logs = [l for l in logs if l.timestamp >= since]
-
-        return logs
-
-    def _cleanup_logs(self) -> None:
-        """Clean up old logs"""
-        if len(self._logs) > self._max_retention:
-            self._logs = self._logs[-self._max_retention:]
+        """Get logs with optional filters (see TelemetryStore.get_logs)"""
+        return self._store.get_logs(
+            service=service, level=level, since=since, until=until, trace_id=trace_id, limit=limit
+        )
 
     # === Tracing ===
 
@@ -324,11 +699,7 @@ class ObservabilityPlatform:
         span = TraceSpan(
             name=name, service=service, operation=operation, attributes=attributes or {}
         )
-
-        if span.trace_id not in self._traces:
-            self._traces[span.trace_id] = []
-        self._traces[span.trace_id].append(span)
-
+        self._store.add_span(span)
         return span
 
     def start_span(
@@ -350,29 +721,42 @@ class ObservabilityPlatform:
             attributes=attributes or {},
         )
 
-        if trace_id not in self._traces:
-            self._traces[trace_id] = []
-        self._traces[trace_id].append(span)
-
+        self._store.add_span(span)
         return span
 
     def end_span(self, span: TraceSpan, status: TraceStatus = TraceStatus.OK) -> None:
         """End a span"""
         span.end(status)
+        self._store.span_ended(span)
 
     def get_trace(self, trace_id: str) -> List[TraceSpan]:
         """Get all spans in a trace"""
-        return self._traces.get(trace_id, [])
+        return self._store.get_trace(trace_id)
 
     def get_slow_traces(self, threshold_ms: float = 1000) -> List[TraceSpan]:
-        """Get traces slower than threshold"""
-        slow = []
-        for trace_id, spans in self._traces.items():
-            # Find root span
-            root = next((s for s in spans if s.parent_span_id is None), None)
-            if root and root.duration_ms() and root.duration_ms() > threshold_ms:
-                slow.append(root)
-        return slow
+        """Get root spans of traces slower than threshold, slowest first"""
+        return self._store.get_slow_traces(threshold_ms)
+
+    # === Correlation ===
+
+    def correlate_by_time(
+        self, reference_time: datetime, metric_names: Optional[List[str]] = None
+    ) -> CorrelatedEvent:
+        """Correlate logs and spans within the correlation window of a time"""
+        window = timedelta(seconds=self._correlation_engine.time_window)
+        since, until = reference_time - window, reference_time + window
+        return self._correlation_engine.correlate_by_time(
+            self._store.get_logs(since=since, until=until),
+            self._store.get_spans(since=since, until=until),
+            metric_names or [],
+            reference_time,
+        )
+
+    def correlate_by_trace(self, trace_id: str) -> CorrelatedEvent:
+        """Correlate the spans and logs of a trace"""
+        return self._correlation_engine.correlate_by_trace(
+            self._store.get_logs(trace_id=trace_id), self._store.get_trace(trace_id), trace_id
+        )
 
     # === Events ===
 
@@ -417,16 +801,11 @@ class ObservabilityPlatform:
     def get_service_health(self, service: str) -> Dict[str, Any]:
         """Get health summary for a service"""
         # Count error logs
-        error_logs = self.get_logs(service=service, level=LogLevel.ERROR)
-        warning_logs = self.get_logs(service=service, level=LogLevel.WARNING)
+        error_logs = self._store.count_logs(service=service, level=LogLevel.ERROR)
+        warning_logs = self._store.count_logs(service=service, level=LogLevel.WARNING)
 
         # Get traces for service
-        service_traces = []
-        for trace_id, spans in self._traces.items():
-            for span in spans:
-                if span.service == service:
-                    service_traces.append(span)
-                    break
+        service_traces = self._store.get_service_spans(service)
 
         error_traces = [t for t in service_traces if t.status == TraceStatus.ERROR]
 
@@ -434,9 +813,9 @@ class ObservabilityPlatform:
         total_traces = len(service_traces)
         error_rate = len(error_traces) / total_traces if total_traces > 0 else 0
 
-        if error_rate > 0.1 or len(error_logs) > 10:
+        if error_rate > 0.1 or error_logs > 10:
             status = "UNHEALTHY"
-        elif error_rate > 0.05 or len(warning_logs) > 10:
+        elif error_rate > 0.05 or warning_logs > 10:
             status = "DEGRADED"
         else:
             status = "HEALTHY"
@@ -444,8 +823,8 @@ class ObservabilityPlatform:
         return {
             "service": service,
             "status": status,
-            "error_logs": len(error_logs),
-            "warning_logs": len(warning_logs),
+            "error_logs": error_logs,
+            "warning_logs": warning_logs,
             "total_traces": total_traces,
             "error_traces": len(error_traces),
             "error_rate": error_rate,
@@ -454,19 +833,11 @@ class ObservabilityPlatform:
 
     def get_platform_summary(self) -> Dict[str, Any]:
         """Get overall platform summary"""
-        services = set()
-        for spans in self._traces.values():
-            for span in spans:
-                if span.service:
-                    services.add(span.service)
-        for log in self._logs:
-            if log.service:
-                services.add(log.service)
-
         return {
-            "total_logs": len(self._logs),
-            "total_traces": len(self._traces),
+            "total_logs": self._store.log_count,
+            "total_traces": self._store.trace_count,
             "total_events": len(self._events),
-            "services": list(services),
+            "services": self._store.services(),
+            "storage": self._store.get_stats(),
             "timestamp": datetime.now().isoformat(),
         }
@@ -7,12 +7,24 @@ Reference: AI-enhanced observability with automatic anomaly detection [4]
 """
 
 import math
-import statistics
+import time
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional
+
+from .streaming_detectors import (
+    DetectorBank,
+    EWMAStats,
+    SeasonalBaseline,
+    StreamingQuantiles,
+)
+
+try:
+    from ..stats import RollingStats, RunningStats
+except ImportError:  # imported as a top-level package
+    from stats import RollingStats, RunningStats
 
 
 class AnomalyDetectionStrategy(Enum):
@@ -23,6 +35,8 @@ class AnomalyDetectionStrategy(Enum):
     RATE_LIMIT = "rate_limit"  # Rate of change based
     PATTERN = "pattern"  # Pattern matching based
     ML = "ml"  # Machine learning based
+    EWMA = "ewma"  # Deviation from exponentially weighted moving average
+    SEASONAL = "seasonal"  # Deviation from the same time-of-period baseline
     HYBRID = "hybrid"  # Combination of strategies
 
 
@@ -89,6 +103,11 @@ class SmartAnomalyDetector:
 
     AI-driven anomaly detection without manual thresholds
 
+    Every sample updates per-metric streaming statistics in constant time
+    (sliding-window Welford mean/variance and min/max, EWMA, P² quantiles and
+    optional seasonal buckets); baselines are read from them instead of being
+    recomputed from the sample history.
+
     Reference: AI-enhanced observability with automatic anomaly detection [4]
     """
 
@@ -97,15 +116,43 @@ class SmartAnomalyDetector:
         default_strategy: AnomalyDetectionStrategy = AnomalyDetectionStrategy.STATISTICAL,
         sensitivity: float = 2.0,  # Z-score threshold
         min_samples: int = 10,
+        window_size: int = 1000,
+        ewma_alpha: float = 0.1,
+        seasonal_period: Optional[float] = None,  # Seconds, e.g. 86400 for daily
+        seasonal_buckets: int = 24,
     ):
         self._default_strategy = default_strategy
         self._sensitivity = sensitivity
         self._min_samples = min_samples
+        self._window_size = window_size
+        self._ewma_alpha = ewma_alpha
+        self._seasonal_period = seasonal_period
+        self._seasonal_buckets = seasonal_buckets
         self._baselines: Dict[str, Dict[str, float]] = {}
-        self._history: Dict[str, List[float]] = {}
+        self._history: Dict[str, Deque[float]] = {}
+        self._stats: Dict[str, RollingStats] = {}
+        self._ewma: Dict[str, EWMAStats] = {}
+        self._quantiles: Dict[str, StreamingQuantiles] = {}
+        self._seasonal: Dict[str, SeasonalBaseline] = {}
+        self._bank = DetectorBank(
+            alpha=ewma_alpha, threshold=sensitivity, min_samples=min_samples
+        )
         self._anomalies: List[DetectedAnomaly] = []
         self._category_rules: Dict[str, AnomalyCategory] = {}
 
+    def _rolling(self, metric_name: str) -> RollingStats:
+        stats = self._stats.get(metric_name)
+        if stats is None:
+            stats = self._stats[metric_name] = RollingStats(self._window_size)
+            self._history[metric_name] = stats.values
+            self._ewma[metric_name] = EWMAStats(self._ewma_alpha)
+            self._quantiles[metric_name] = StreamingQuantiles()
+            if self._seasonal_period:
+                self._seasonal[metric_name] = SeasonalBaseline(
+                    self._seasonal_period, self._seasonal_buckets
+                )
+        return stats
+
     def set_baseline(
         self,
         metric_name: str,
@@ -127,30 +174,51 @@ class SmartAnomalyDetector:
         if not values:
             return {}
 
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
         baseline = {
-            "mean": statistics.mean(values),
-            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "mean": stats.mean,
+            "stdev": stats.stdev,
             "min": min(values),
             "max": max(values),
         }
         self._baselines[metric_name] = baseline
-        self._history[metric_name] = values.copy()
-        return baseline
 
-    def add_sample(self, metric_name: str, value: float) -> None:
-        """Add a sample to the history"""
-        if metric_name not in self._history:
-            self._history[metric_name] = []
-        self._history[metric_name].append(value)
+        # Seed the streaming statistics with the most recent window
+        self._rolling(metric_name).reset(values[-self._window_size:])
+        ewma = self._ewma[metric_name] = EWMAStats(self._ewma_alpha)
+        quantiles = self._quantiles[metric_name] = StreamingQuantiles()
+        for value in values:
+            ewma.add(value)
+            quantiles.add(value)
+        return baseline
 
-        # Keep only recent samples
-        max_samples = 1000
-        if len(self._history[metric_name]) > max_samples:
-            self._history[metric_name] = self._history[metric_name][-max_samples:]
+    def add_sample(
+        self, metric_name: str, value: float, timestamp: Optional[float] = None
+    ) -> None:
+        """Add a sample to the history (constant time)"""
+        stats = self._rolling(metric_name)
+        stats.add(value)
+        self._ewma[metric_name].add(value)
+        self._quantiles[metric_name].add(value)
+        seasonal = self._seasonal.get(metric_name)
+        if seasonal is not None:
+            seasonal.add(value, timestamp if timestamp is not None else time.time())
 
         # Update baseline if enough samples
-        if len(self._history[metric_name]) >= self._min_samples:
-            self.learn_baseline(metric_name, self._history[metric_name])
+        if stats.count >= self._min_samples:
+            self._baselines[metric_name] = {
+                "mean": stats.mean,
+                "stdev": stats.stdev,
+                "min": stats.min,
+                "max": stats.max,
+            }
+
+    def get_quantiles(self, metric_name: str) -> Dict[float, Optional[float]]:
+        """Streaming p1/p50/p99 estimates for a metric"""
+        quantiles = self._quantiles.get(metric_name)
+        return quantiles.snapshot() if quantiles else {}
 
     def set_category_rule(self, metric_pattern: str, category: AnomalyCategory) -> None:
         """Set category rule for metric patterns"""
@@ -226,6 +294,74 @@ class SmartAnomalyDetector:
 
         return None
 
+    def _deviation_anomaly(
+        self,
+        metric_name: str,
+        value: float,
+        expected: float,
+        z_score: float,
+        strategy: AnomalyDetectionStrategy,
+        label: str,
+    ) -> Optional[DetectedAnomaly]:
+        deviation = abs(z_score)
+        if deviation <= self._sensitivity:
+            return None
+        confidence = min(1.0, deviation / 5.0)
+        return DetectedAnomaly(
+            metric_name=metric_name,
+            category=self._get_category(metric_name),
+            severity=self._calculate_severity(deviation, confidence),
+            strategy_used=strategy,
+            current_value=value,
+            expected_value=expected,
+            deviation=deviation,
+            confidence=confidence,
+            description=f"{label} anomaly: {metric_name} = {value:.2f} (expected {expected:.2f}, z-score {deviation:.2f})",
+        )
+
+    def detect_ewma(self, metric_name: str, value: float) -> Optional[DetectedAnomaly]:
+        """Detect anomaly as deviation from the metric's EWMA baseline"""
+        ewma = self._ewma.get(metric_name)
+        if ewma is None or ewma.count < self._min_samples:
+            return None
+        return self._deviation_anomaly(
+            metric_name, value, ewma.mean, ewma.zscore(value),
+            AnomalyDetectionStrategy.EWMA, "EWMA",
+        )
+
+    def detect_seasonal(
+        self, metric_name: str, value: float, timestamp: Optional[float] = None
+    ) -> Optional[DetectedAnomaly]:
+        """Detect anomaly against the baseline for the same time of period"""
+        seasonal = self._seasonal.get(metric_name)
+        if seasonal is None:
+            return None
+        timestamp = timestamp if timestamp is not None else time.time()
+        expected = seasonal.expected(timestamp)
+        if expected is None:
+            return None
+        return self._deviation_anomaly(
+            metric_name, value, expected.mean, expected.zscore(value),
+            AnomalyDetectionStrategy.SEASONAL, "Seasonal",
+        )
+
+    def detect_batch(self, samples: Dict[str, float]) -> List[DetectedAnomaly]:
+        """
+        Score one tick of many metrics at once with vectorized EWMA baselines
+
+        Batch scoring keeps its own per-metric state, independent of detect().
+        """
+        names = list(samples)
+        anomalies = []
+        scored = self._bank.anomalies(names, [samples[n] for n in names])
+        for name, (z_score, expected) in scored.items():
+            anomaly = self._deviation_anomaly(
+                name, samples[name], expected, z_score, AnomalyDetectionStrategy.EWMA, "EWMA"
+            )
+            if anomaly:
+                anomalies.append(anomaly)
+        return anomalies
+
     def detect_threshold(
         self,
         metric_name: str,
@@ -308,11 +444,23 @@ class SmartAnomalyDetector:
         For HYBRID strategy, uses all available methods and returns most confident result
         """
         strategy = strategy or self._default_strategy
+        timestamp = time.time()
+
+        # EWMA and seasonal baselines are scored before the sample is folded in
+        ewma_result = seasonal_result = None
+        if strategy in (AnomalyDetectionStrategy.EWMA, AnomalyDetectionStrategy.HYBRID):
+            ewma_result = self.detect_ewma(metric_name, value)
+        if strategy in (AnomalyDetectionStrategy.SEASONAL, AnomalyDetectionStrategy.HYBRID):
+            seasonal_result = self.detect_seasonal(metric_name, value, timestamp)
 
         # Add sample to history
-        self.add_sample(metric_name, value)
+        self.add_sample(metric_name, value, timestamp)
 
-        if strategy == AnomalyDetectionStrategy.STATISTICAL:
+        if strategy == AnomalyDetectionStrategy.EWMA:
+            return ewma_result
+        elif strategy == AnomalyDetectionStrategy.SEASONAL:
+            return seasonal_result
+        elif strategy == AnomalyDetectionStrategy.STATISTICAL:
             return self.detect_statistical(metric_name, value)
         elif strategy == AnomalyDetectionStrategy.THRESHOLD:
             return self.detect_threshold(metric_name, value)
@@ -334,6 +482,8 @@ class SmartAnomalyDetector:
             if result:
                 anomalies.append(result)
 
+            anomalies.extend(r for r in (ewma_result, seasonal_result) if r)
+
             if anomalies:
                 # Return most confident
                 return max(anomalies, key=lambda a: a.confidence)
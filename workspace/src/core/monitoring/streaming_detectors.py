@@ -0,0 +1,228 @@
+"""
+Streaming Detectors (串流異常檢測)
+
+Constant-time-per-sample statistics for online anomaly detection:
+
+- RunningStats / RollingStats (core.stats): Welford mean and variance,
+  cumulative or over a sliding window
+- EWMAStats: exponentially weighted mean and variance
+- Streaming quantiles (P² estimators) for median / tail baselines
+- SeasonalBaseline: per-bucket statistics over a repeating period
+  (e.g. hour of day)
+- DetectorBank: vectorized EWMA scoring of many series per tick
+
+Reference: Welford (1962); Jain & Chlamtac, "The P² algorithm" (1985)
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    from ..stats import P2Quantile, RunningStats
+except ImportError:  # imported as a top-level package
+    from stats import P2Quantile, RunningStats
+
+try:
+    import numpy as np
+except ImportError:  # DetectorBank falls back to a per-series loop
+    np = None
+
+
+class EWMAStats:
+    """Exponentially weighted moving mean and variance"""
+
+    def __init__(self, alpha: float = 0.1):
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.count = 0
+        self.mean = 0.0
+        self.variance = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.mean = value
+            return
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def zscore(self, value: float) -> float:
+        stdev = self.stdev
+        return (value - self.mean) / stdev if stdev > 0 else 0.0
+
+
+class StreamingQuantiles:
+    """P² estimates for a fixed set of quantiles"""
+
+    def __init__(self, quantiles: Sequence[float] = (0.01, 0.5, 0.99)):
+        self._estimators = {q: P2Quantile(q) for q in quantiles}
+
+    def add(self, value: float) -> None:
+        for estimator in self._estimators.values():
+            estimator.add(value)
+
+    def get(self, quantile: float) -> Optional[float]:
+        return self._estimators[quantile].value()
+
+    def snapshot(self) -> Dict[float, Optional[float]]:
+        return {q: e.value() for q, e in self._estimators.items()}
+
+
+class SeasonalBaseline:
+    """
+    Statistics per time-of-period bucket
+
+    With period=86400 and buckets=24, each hour of the day has its own
+    mean/variance, so a value is compared with what is normal at that hour.
+    """
+
+    def __init__(self, period_seconds: float = 86400, buckets: int = 24, min_samples: int = 5):
+        self.period_seconds = period_seconds
+        self.buckets = buckets
+        self.min_samples = min_samples
+        self._stats = [RunningStats() for _ in range(buckets)]
+
+    def bucket(self, timestamp: float) -> int:
+        position = (timestamp % self.period_seconds) / self.period_seconds
+        return min(int(position * self.buckets), self.buckets - 1)
+
+    def add(self, value: float, timestamp: float) -> None:
+        self._stats[self.bucket(timestamp)].add(value)
+
+    def expected(self, timestamp: float) -> Optional[RunningStats]:
+        """Bucket statistics for a timestamp, once the bucket has enough samples"""
+        stats = self._stats[self.bucket(timestamp)]
+        return stats if stats.count >= self.min_samples else None
+
+    def zscore(self, value: float, timestamp: float) -> Optional[float]:
+        stats = self.expected(timestamp)
+        return stats.zscore(value) if stats is not None else None
+
+
+class DetectorBank:
+    """
+    EWMA z-score scoring for many series at once
+
+    State for every series is held in parallel columns; ``update`` scores a
+    tick of values against each series' current EWMA baseline and then
+    folds the values in, using NumPy vector operations when available.
+    """
+
+    def __init__(self, alpha: float = 0.1, threshold: float = 3.0, min_samples: int = 10):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+        self._size = 0
+        self._allocate(64)
+
+    def _allocate(self, capacity: int) -> None:
+        if np is not None:
+            def grow(column):
+                new = np.zeros(capacity, dtype=column.dtype if column is not None else np.float64)
+                if column is not None:
+                    new[: len(column)] = column
+                return new
+            self._count = grow(getattr(self, "_count", None))
+            self._mean = grow(getattr(self, "_mean", None))
+            self._var = grow(getattr(self, "_var", None))
+        else:
+            for column in ("_count", "_mean", "_var"):
+                values = getattr(self, column, [])
+                setattr(self, column, values + [0.0] * (capacity - len(values)))
+        self._capacity = capacity
+
+    def series_index(self, name: str) -> int:
+        """Index of a series, registering it if new"""
+        index = self._ids.get(name)
+        if index is None:
+            if self._size == self._capacity:
+                self._allocate(self._capacity * 2)
+            index = self._ids[name] = self._size
+            self.names.append(name)
+            self._size += 1
+        return index
+
+    def update(
+        self, names: Sequence[str], values: Sequence[float]
+    ) -> Tuple[List[float], List[float]]:
+        """
+        Score one tick of samples and fold them into the baselines
+
+        Args:
+            names: Series names (each at most once per tick)
+            values: Sample values, aligned with names
+
+        Returns:
+            (z-scores, expected values): each value's z-score against its
+            series baseline before the update (0.0 while the series has fewer
+            than min_samples samples) and that baseline's mean
+        """
+        indexes = [self.series_index(name) for name in names]
+        if len(set(indexes)) != len(indexes):
+            raise ValueError("Each series may appear at most once per update")
+
+        if np is not None:
+            idx = np.asarray(indexes, dtype=np.intp)
+            x = np.asarray(values, dtype=np.float64)
+            count, mean, var = self._count[idx], self._mean[idx], self._var[idx]
+
+            stdev = np.sqrt(var)
+            ready = (count >= self.min_samples) & (stdev > 0)
+            scores = np.zeros_like(x)
+            np.divide(x - mean, stdev, out=scores, where=ready)
+
+            first = count == 0
+            delta = x - mean
+            increment = self.alpha * delta
+            self._mean[idx] = np.where(first, x, mean + increment)
+            self._var[idx] = np.where(first, 0.0, (1 - self.alpha) * (var + delta * increment))
+            self._count[idx] = count + 1
+            return scores.tolist(), np.where(first, x, mean).tolist()
+
+        scores, expected = [], []
+        for i, x in zip(indexes, values, strict=True):
+            count, mean, var = self._count[i], self._mean[i], self._var[i]
+            stdev = math.sqrt(var)
+            ready = count >= self.min_samples and stdev > 0
+            scores.append((x - mean) / stdev if ready else 0.0)
+            expected.append(mean if count else x)
+            if count == 0:
+                self._mean[i] = x
+            else:
+                delta = x - mean
+                increment = self.alpha * delta
+                self._mean[i] = mean + increment
+                self._var[i] = (1 - self.alpha) * (var + delta * increment)
+            self._count[i] = count + 1
+        return scores, expected
+
+    def anomalies(
+        self, names: Sequence[str], values: Sequence[float]
+    ) -> Dict[str, Tuple[float, float]]:
+        """Update and return {series name: (z-score, expected)} beyond the threshold"""
+        scores, expected = self.update(names, values)
+        return {
+            name: (score, mean)
+            for name, score, mean in zip(names, scores, expected, strict=True)
+            if abs(score) > self.threshold
+        }
+
+    def baseline(self, name: str) -> Optional[Dict[str, float]]:
+        """Current EWMA baseline of a series"""
+        index = self._ids.get(name)
+        if index is None:
+            return None
+        return {
+            "count": int(self._count[index]),
+            "mean": float(self._mean[index]),
+            "stdev": math.sqrt(float(self._var[index])),
+        }
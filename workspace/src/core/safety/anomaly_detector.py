@@ -8,11 +8,16 @@ detect anomalies, neutralize risks, and learn from each incident [5]
 """
 
 import asyncio
-import statistics
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum, auto
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    from ..stats import RollingStats
+except ImportError:  # imported as a top-level package
+    from stats import RollingStats
 
 
 class AnomalyType(Enum):
@@ -65,36 +70,61 @@ class AnomalyAlert:
 
 @dataclass
 class MetricWindow:
-    """Sliding window of metric values"""
+    """
+    Sliding window of metric values
+
+    Mean, standard deviation, min and max are maintained incrementally
+    (Welford), so adding a value and reading the statistics are O(1).
+    """
 
-    values: List[float] = field(default_factory=list)
-    timestamps: List[datetime] = field(default_factory=list)
+    values: Deque[float] = field(default_factory=deque)
+    timestamps: Deque[datetime] = field(default_factory=deque)
     max_size: int = 1000
+    _stats: RollingStats = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._stats = RollingStats(self.max_size)
+        self._stats.reset(list(self.values)[-self.max_size:])
+        self.values = self._stats.values
+        self.timestamps = deque(list(self.timestamps)[-self.max_size:], maxlen=self.max_size)
 
     def add(self, value: float, timestamp: Optional[datetime] = None) -> None:
         """Add a value to the window"""
-        self.values.append(value)
+        self._stats.add(value)
         self.timestamps.append(timestamp or datetime.now())
 
-        # Trim if needed
-        if len(self.values) > self.max_size:
-            self.values = self.values[-self.max_size:]
-            self.timestamps = self.timestamps[-self.max_size:]
+    def count_recent(self, seconds: float) -> int:
+        """Count values from the last N seconds (scans only those values)"""
+        cutoff = datetime.now() - timedelta(seconds=seconds)
+        count = 0
+        for t in reversed(self.timestamps):
+            if t < cutoff:
+                break
+            count += 1
+        return count
 
     def get_recent(self, seconds: float) -> List[float]:
         """Get values from the last N seconds"""
-        cutoff = datetime.now() - timedelta(seconds=seconds)
-        return [v for v, t in zip(self.values, self.timestamps) if t >= cutoff]
+        count = self.count_recent(seconds)
+        return list(self.values)[len(self.values) - count:] if count else []
 
     @property
     def mean(self) -> float:
-        """Calculate mean of values"""
-        return statistics.mean(self.values) if self.values else 0.0
+        """Mean of values"""
+        return self._stats.mean
 
     @property
     def std_dev(self) -> float:
-        """Calculate standard deviation"""
-        return statistics.stdev(self.values) if len(self.values) > 1 else 0.0
+        """Sample standard deviation"""
+        return self._stats.stdev
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._stats.min
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._stats.max
 
 
 class AnomalyDetector:
@@ -270,12 +300,12 @@ class AnomalyDetector:
         rate_limit = config.get("rate_limit")
         if rate_limit:
             count, seconds = rate_limit
-            recent = window.get_recent(seconds)
-            if len(recent) > count:
+            recent = window.count_recent(seconds)
+            if recent > count:
                 is_anomaly = True
                 anomaly_type = AnomalyType.RATE_ANOMALY
-                description = f"Rate limit exceeded: {len(recent)} events in {seconds}s (limit: {count})"
-                details["rate_count"] = len(recent)
+                description = f"Rate limit exceeded: {recent} events in {seconds}s (limit: {count})"
+                details["rate_count"] = recent
                 details["rate_limit"] = count
                 details["rate_window"] = seconds
 
@@ -416,8 +446,8 @@ class AnomalyDetector:
                     "count": len(window.values),
                     "mean": window.mean,
                     "std_dev": window.std_dev,
-                    "min": min(window.values),
-                    "max": max(window.values),
+                    "min": window.min,
+                    "max": window.max,
                     "latest": window.values[-1] if window.values else None,
                 }
         return summary
@@ -13,9 +13,15 @@ Key Components:
 - SignatureVerifier: Verify signatures using Sigstore
 - AttestationManager: Manage build attestations
 - ArtifactVerifier: Verify artifact integrity
+- DigestCache: Persistent artifact digest cache
 """
 
-from .artifact_verifier import ArtifactMetadata, ArtifactVerifier, VerificationResult
+from .artifact_verifier import (
+    ArtifactMetadata,
+    ArtifactVerifier,
+    DigestCache,
+    VerificationResult,
+)
 from .attestation_manager import Attestation, AttestationManager, AttestationType
 from .provenance_generator import (
     BuildDefinition,
@@ -45,6 +51,7 @@ __all__ = [
     "ArtifactVerifier",
     "VerificationResult",
     "ArtifactMetadata",
+    "DigestCache",
 ]
 
 __version__ = "1.0.0"
@@ -3,20 +3,207 @@ Artifact Verifier - Verify artifact integrity
 
 This module provides functionality to verify the integrity and provenance
 of build artifacts using SLSA framework requirements.
+
+Files are hashed in fixed-size chunks (memory-mapped when large), so memory
+use does not grow with artifact size. Digests can be kept in a persistent
+DigestCache keyed by (path, size, mtime, ctime, inode), and batches hash
+their files in a process pool. Files checked against an expected digest are
+always rehashed.
 """
 
 import hashlib
 import json
 import logging
+import mmap
 import os
+import tempfile
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Below this size a plain read is cheaper than setting up a mapping
+MMAP_THRESHOLD = 4 * DEFAULT_CHUNK_SIZE
+
+
+def hash_file(
+    file_path: str,
+    algorithms: Iterable[str] = ("sha256",),
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, str]:
+    """
+    Hash a file with one or more algorithms in a single pass
+
+    Args:
+        file_path: Path to the file
+        algorithms: hashlib algorithm names
+        chunk_size: Bytes fed to the hashers per update
+
+    Returns:
+        Mapping of algorithm name to hex digest
+    """
+    hashers = {alg: hashlib.new(alg) for alg in algorithms}
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, len(view), chunk_size):
+                        chunk = view[offset : offset + chunk_size]
+                        for hasher in hashers.values():
+                            hasher.update(chunk)
+                        chunk.release()
+                finally:
+                    view.release()
+        else:
+            buffer = bytearray(chunk_size)
+            view = memoryview(buffer)
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                for hasher in hashers.values():
+                    hasher.update(view[:read])
+    return {alg: hasher.hexdigest() for alg, hasher in hashers.items()}
+
+
+def _hash_file_task(task: Tuple[str, Tuple[str, ...], int]) -> Dict[str, str]:
+    """Process pool entry point for hash_file"""
+    file_path, algorithms, chunk_size = task
+    return hash_file(file_path, algorithms, chunk_size)
+
+
+def _file_identity(stat_result: os.stat_result) -> List[int]:
+    # ctime cannot be set from user space, so an in-place rewrite followed by
+    # os.utime() to restore mtime still changes the identity
+    return [
+        stat_result.st_size,
+        stat_result.st_mtime_ns,
+        stat_result.st_ctime_ns,
+        stat_result.st_ino,
+    ]
+
+
+class DigestCache:
+    """
+    Persistent artifact digest cache
+
+    Entries are keyed by absolute path and are only reused while the file's
+    size, mtime, ctime and inode are unchanged. The cache is stored as a JSON
+    file and written atomically on save(). It speeds up digest lookups; it is
+    not consulted when a file is checked against an expected digest.
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            path: JSON file to persist digests in; None keeps them in memory
+        """
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable digest cache {path}: {e}")
+            return
+        if data.get("version") == self.VERSION:
+            self._entries = data.get("entries", {})
+
+    def get(
+        self, file_path: str, stat_result: os.stat_result, algorithms: Iterable[str]
+    ) -> Optional[Dict[str, str]]:
+        """Cached digests for an unchanged file, if all algorithms are present"""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(file_path))
+            if entry and entry["stat"] == _file_identity(stat_result):
+                digests = entry["digest"]
+                if all(alg in digests for alg in algorithms):
+                    self.hits += 1
+                    return {alg: digests[alg] for alg in algorithms}
+            self.misses += 1
+            return None
+
+    def put(
+        self, file_path: str, stat_result: os.stat_result, digest: Dict[str, str]
+    ) -> None:
+        """Record digests for a file at its current identity"""
+        identity = _file_identity(stat_result)
+        key = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["stat"] == identity:
+                entry["digest"].update(digest)
+            else:
+                self._entries[key] = {"stat": identity, "digest": dict(digest)}
+            self._dirty = True
+
+    def prune(self) -> int:
+        """Drop entries whose file is gone or has changed; returns the count"""
+        with self._lock:
+            stale = []
+            for key, entry in self._entries.items():
+                try:
+                    if _file_identity(os.stat(key)) != entry["stat"]:
+                        stale.append(key)
+                except OSError:
+                    stale.append(key)
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._dirty = True
+            return len(stale)
+
+    def save(self) -> None:
+        """Write the cache to disk if it changed"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": self.VERSION, "entries": self._entries}
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(payload, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            self._dirty = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class IntegrityStatus(Enum):
     """Artifact integrity status"""
@@ -144,15 +331,27 @@ class ArtifactVerifier:
     - Policy compliance checking
     """
 
-    def __init__(self, default_policy: Optional[VerificationPolicy] = None):
+    def __init__(
+        self,
+        default_policy: Optional[VerificationPolicy] = None,
+        digest_cache_path: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_workers: Optional[int] = None,
+    ):
         """
         Initialize the verifier
 
         Args:
             default_policy: Default verification policy
+            digest_cache_path: JSON file for the persistent digest cache
+            chunk_size: Bytes hashed per update when reading files
+            max_workers: Hashing processes for batch verification (default: CPU count)
         """
         self.default_policy = default_policy or self._create_default_policy()
         self._verification_cache: Dict[str, VerificationResult] = {}
+        self.digest_cache = DigestCache(digest_cache_path)
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or os.cpu_count() or 1
 
     def verify_artifact(
         self,
@@ -181,7 +380,12 @@ class ArtifactVerifier:
 
         # Get artifact metadata
         if artifact_path:
-            metadata = self._get_file_metadata(artifact_path)
+            metadata = self._get_file_metadata(
+                artifact_path,
+                self._digest_algorithms(expected_digest, active_policy),
+                use_cache=not expected_digest,
+            )
+            self.digest_cache.save()
         elif artifact_content:
             metadata = self._get_content_metadata(
                 artifact_content, artifact_name or "unknown"
@@ -193,6 +397,16 @@ class ArtifactVerifier:
                 "Must provide artifact_path, artifact_content, or expected_digest"
             )
 
+        return self._verify_metadata(metadata, expected_digest, provenance, active_policy)
+
+    def _verify_metadata(
+        self,
+        metadata: ArtifactMetadata,
+        expected_digest: Optional[Dict[str, str]],
+        provenance: Optional[Dict[str, Any]],
+        active_policy: VerificationPolicy,
+    ) -> VerificationResult:
+        """Run integrity, provenance and policy checks on resolved metadata"""
         result = VerificationResult(
             artifact=metadata,
             integrity_status=IntegrityStatus.UNKNOWN,
@@ -247,6 +461,10 @@ class ArtifactVerifier:
         """
         Verify multiple artifacts
 
+        File artifacts that are not in the digest cache, or that carry an
+        expected digest, are hashed in parallel first; the remaining checks
+        are cheap and run in order.
+
         Args:
             artifacts: List of artifact specifications
             policy: Verification policy
@@ -254,19 +472,83 @@ class ArtifactVerifier:
         Returns:
             List of verification results
         """
+        active_policy = policy or self.default_policy
+        file_metadata = self._get_batch_file_metadata(artifacts, active_policy)
+
         results = []
-        for artifact in artifacts:
-            result = self.verify_artifact(
-                artifact_path=artifact.get("path"),
-                artifact_content=artifact.get("content"),
-                artifact_name=artifact.get("name"),
-                expected_digest=artifact.get("digest"),
-                provenance=artifact.get("provenance"),
-                policy=policy,
-            )
+        for index, artifact in enumerate(artifacts):
+            if index in file_metadata:
+                result = self._verify_metadata(
+                    file_metadata[index],
+                    artifact.get("digest"),
+                    artifact.get("provenance"),
+                    active_policy,
+                )
+            else:
+                result = self.verify_artifact(
+                    artifact_content=artifact.get("content"),
+                    artifact_name=artifact.get("name"),
+                    expected_digest=artifact.get("digest"),
+                    provenance=artifact.get("provenance"),
+                    policy=active_policy,
+                )
             results.append(result)
         return results
 
+    def _get_batch_file_metadata(
+        self, artifacts: List[Dict[str, Any]], policy: VerificationPolicy
+    ) -> Dict[int, ArtifactMetadata]:
+        """Resolve metadata for every file artifact, hashing cache misses in parallel"""
+        metadata: Dict[int, ArtifactMetadata] = {}
+        pending: List[Tuple[int, str, os.stat_result, Tuple[str, ...]]] = []
+
+        for index, artifact in enumerate(artifacts):
+            path = artifact.get("path")
+            if not path:
+                continue
+            algorithms = self._digest_algorithms(artifact.get("digest"), policy)
+            stat_result = self._stat_file(path)
+            digest = None
+            if not artifact.get("digest"):
+                digest = self.digest_cache.get(path, stat_result, algorithms)
+            if digest is not None:
+                metadata[index] = self._file_metadata(path, stat_result, digest)
+            else:
+                pending.append((index, path, stat_result, algorithms))
+
+        if pending:
+            tasks = [(path, algorithms, self.chunk_size) for _, path, _, algorithms in pending]
+            for (index, path, stat_result, _), digest in zip(
+                pending, self._hash_files(tasks), strict=True
+            ):
+                self.digest_cache.put(path, stat_result, digest)
+                metadata[index] = self._file_metadata(path, stat_result, digest)
+            self.digest_cache.save()
+
+        return metadata
+
+    def _hash_files(
+        self, tasks: List[Tuple[str, Tuple[str, ...], int]]
+    ) -> List[Dict[str, str]]:
+        """Hash files across worker processes, in task order"""
+        workers = min(self.max_workers, len(tasks))
+        if workers <= 1:
+            return [_hash_file_task(task) for task in tasks]
+
+        executor: Executor
+        try:
+            executor = ProcessPoolExecutor(max_workers=workers)
+        except (OSError, NotImplementedError) as e:
+            # No process support (e.g. restricted sandboxes); hashlib releases
+            # the GIL on large buffers, so threads still parallelize
+            logger.warning(f"Process pool unavailable, hashing in threads: {e}")
+            executor = ThreadPoolExecutor(max_workers=workers)
+        with executor:
+            chunksize = max(1, len(tasks) // (workers * 4))
+            if isinstance(executor, ProcessPoolExecutor):
+                return list(executor.map(_hash_file_task, tasks, chunksize=chunksize))
+            return list(executor.map(_hash_file_task, tasks))
+
     def verify_provenance_chain(
         self,
         artifact_metadata: ArtifactMetadata,
@@ -400,23 +682,49 @@ class ArtifactVerifier:
             digest_algorithms=["sha256"],
         )
 
-    def _get_file_metadata(self, file_path: str) -> ArtifactMetadata:
-        """Get metadata for a file"""
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
-
-        with open(file_path, "rb") as f:
-            content = f.read()
-
-        digest = {"sha256": hashlib.sha256(content).hexdigest()}
-
+    def _digest_algorithms(
+        self, expected_digest: Optional[Dict[str, str]], policy: VerificationPolicy
+    ) -> Tuple[str, ...]:
+        """Algorithms to hash files with: sha256 plus any the policy or caller expects"""
+        algorithms = ["sha256"]
+        for alg in list(policy.digest_algorithms) + list(expected_digest or {}):
+            if alg not in algorithms and alg in hashlib.algorithms_available:
+                algorithms.append(alg)
+        return tuple(algorithms)
+
+    def _stat_file(self, file_path: str) -> os.stat_result:
+        try:
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+        return stat_result
+
+    def _file_metadata(
+        self, file_path: str, stat_result: os.stat_result, digest: Dict[str, str]
+    ) -> ArtifactMetadata:
         return ArtifactMetadata(
             name=os.path.basename(file_path),
             digest=digest,
-            size=len(content),
+            size=stat_result.st_size,
             uri=f"file://{os.path.abspath(file_path)}",
         )
 
+    def _get_file_metadata(
+        self,
+        file_path: str,
+        algorithms: Tuple[str, ...] = ("sha256",),
+        use_cache: bool = True,
+    ) -> ArtifactMetadata:
+        """Get metadata for a file (use_cache=False always rehashes)"""
+        stat_result = self._stat_file(file_path)
+
+        digest = self.digest_cache.get(file_path, stat_result, algorithms) if use_cache else None
+        if digest is None:
+            digest = hash_file(file_path, algorithms, self.chunk_size)
+            self.digest_cache.put(file_path, stat_result, digest)
+
+        return self._file_metadata(file_path, stat_result, digest)
+
     def _get_content_metadata(self, content: bytes, name: str) -> ArtifactMetadata:
         """Get metadata for content bytes"""
         digest = {"sha256": hashlib.sha256(content).hexdigest()}
@@ -624,9 +932,10 @@ class ArtifactVerifier:
 # Factory functions
 def create_artifact_verifier(
     policy: Optional[VerificationPolicy] = None,
+    digest_cache_path: Optional[str] = None,
 ) -> ArtifactVerifier:
     """Create a new ArtifactVerifier instance"""
-    return ArtifactVerifier(policy)
+    return ArtifactVerifier(policy, digest_cache_path=digest_cache_path)
 
 
 def create_verification_policy(name: str, **kwargs) -> VerificationPolicy:
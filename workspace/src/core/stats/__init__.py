@@ -0,0 +1,20 @@
+"""
+Core Statistics
+核心統計
+
+Dependency-free streaming estimators:
+- RunningStats / RollingStats - Welford mean/variance, cumulative or windowed
+- P2Quantile - P² streaming quantile estimate
+
+The package imports nothing from other core packages, so it can also be
+imported as a top-level ``stats`` package next to ``monitoring`` and
+``safety``.
+"""
+
+from .streaming import P2Quantile, RollingStats, RunningStats
+
+__all__ = [
+    "P2Quantile",
+    "RollingStats",
+    "RunningStats",
+]
@@ -0,0 +1,184 @@
+"""
+Streaming Stats (串流統計)
+
+Dependency-free streaming estimators shared by the monitoring detectors,
+the safety anomaly detector and the engine execution history:
+
+- RunningStats / RollingStats: Welford mean and variance, cumulative or over
+  a sliding window (with O(1) amortized sliding min/max)
+- P2Quantile: P² streaming quantile estimate
+
+Reference: Welford (1962); Jain & Chlamtac, "The P² algorithm" (1985)
+"""
+
+import math
+from collections import deque
+from typing import Deque, List, Optional, Sequence, Tuple
+
+
+class RunningStats:
+    """Cumulative Welford mean/variance"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        """Reverse a previous add (used by sliding windows)"""
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            return
+        delta = value - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self._m2 = max(0.0, self._m2 - delta * (value - self.mean))
+
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        """Sample standard deviation"""
+        return math.sqrt(self.variance)
+
+    def zscore(self, value: float) -> float:
+        stdev = self.stdev
+        return (value - self.mean) / stdev if stdev > 0 else 0.0
+
+
+class RollingStats(RunningStats):
+    """Welford statistics and min/max over the last ``window`` samples"""
+
+    def __init__(self, window: int = 1000):
+        super().__init__()
+        self.window = window
+        self.values: Deque[float] = deque()
+        # Monotonic deques of (index, value) for sliding min/max
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._index = 0
+
+    def add(self, value: float) -> None:
+        self.values.append(value)
+        super().add(value)
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((self._index, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._index, value))
+        self._index += 1
+
+        if len(self.values) > self.window:
+            self.remove(self.values.popleft())
+            oldest = self._index - self.window
+            if self._min[0][0] < oldest:
+                self._min.popleft()
+            if self._max[0][0] < oldest:
+                self._max.popleft()
+
+    def reset(self, values: Sequence[float] = ()) -> None:
+        """Replace the window contents"""
+        self.count, self.mean, self._m2 = 0, 0.0, 0.0
+        self.values.clear()
+        self._min.clear()
+        self._max.clear()
+        for value in values:
+            self.add(value)
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P² algorithm (Jain & Chlamtac)
+
+    Keeps five markers regardless of how many observations are added.
+    """
+
+    def __init__(self, quantile: float):
+        """
+        Initialize the estimator
+
+        Args:
+            quantile: Quantile to estimate, between 0 and 1
+        """
+        self.quantile = quantile
+        self._initial: List[float] = []
+        self._heights: Optional[List[float]] = None
+        self._positions: List[int] = []
+        self._desired: List[float] = []
+        self._increments = [0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        """Add an observation"""
+        if self._heights is None:
+            self._initial.append(value)
+            if len(self._initial) == 5:
+                p = self.quantile
+                self._heights = sorted(self._initial)
+                self._positions = [0, 1, 2, 3, 4]
+                self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+            return
+
+        q, n = self._heights, self._positions
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= q[k + 1]:
+                k += 1
+
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            delta = self._desired[i] - n[i]
+            if (delta >= 1 and n[i + 1] - n[i] > 1) or (delta <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if delta > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self) -> Optional[float]:
+        """Current estimate, or None before any observation"""
+        if self._heights is not None:
+            return self._heights[2]
+        if not self._initial:
+            return None
+        ordered = sorted(self._initial)
+        return ordered[round(self.quantile * (len(ordered) - 1))]
+
+
+__all__ = ["P2Quantile", "RollingStats", "RunningStats"]
@@ -272,6 +272,91 @@ class TestArtifactVerifier:
 
         assert summary["total_artifacts"] == 2
 
+    def test_verify_artifact_batch_files(self, tmp_path):
+        """Test batch verification of files with the digest cache"""
+        import hashlib
+
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"artifact{i}.bin"
+            path.write_bytes(os.urandom(1000 * (i + 1)))
+            paths.append(str(path))
+
+        cache_path = str(tmp_path / "digests.json")
+        verifier = ArtifactVerifier(digest_cache_path=cache_path, max_workers=2)
+        expected = hashlib.sha256(open(paths[1], "rb").read()).hexdigest()
+        results = verifier.verify_artifact_batch(
+            [{"path": p} for p in paths[:1]]
+            + [{"path": paths[1], "digest": {"sha256": expected}}, {"path": paths[2]}]
+        )
+
+        assert all(r.integrity_status.value == "verified" for r in results)
+        assert results[1].artifact.size == 2000
+        assert os.path.exists(cache_path)
+
+        # A fresh verifier reuses the persisted digests for lookups
+        verifier = ArtifactVerifier(digest_cache_path=cache_path)
+        result = verifier.verify_artifact(artifact_path=paths[1])
+        assert result.artifact.digest["sha256"] == expected
+        assert verifier.digest_cache.hits == 1
+
+        # but rehashes when checking against an expected digest
+        verifier.verify_artifact(artifact_path=paths[1], expected_digest={"sha256": expected})
+        assert verifier.digest_cache.hits == 1
+
+    def test_digest_cache_detects_changes(self, tmp_path):
+        """Test that modified files are rehashed"""
+        path = tmp_path / "artifact.bin"
+        path.write_bytes(b"original")
+
+        verifier = ArtifactVerifier(digest_cache_path=str(tmp_path / "digests.json"))
+        original = verifier.verify_artifact(artifact_path=str(path))
+
+        path.write_bytes(b"modified content")
+        result = verifier.verify_artifact(
+            artifact_path=str(path), expected_digest=original.artifact.digest
+        )
+
+        assert result.integrity_status.value == "tampered"
+
+    def test_in_place_tamper_with_restored_mtime(self, tmp_path):
+        """Test that a same-size rewrite with its mtime restored is caught"""
+        path = tmp_path / "artifact.bin"
+        path.write_bytes(b"original")
+        cache_path = str(tmp_path / "digests.json")
+
+        verifier = ArtifactVerifier(digest_cache_path=cache_path)
+        original = verifier.verify_artifact(artifact_path=str(path))
+        before = os.stat(path)
+
+        with open(path, "r+b") as f:
+            f.write(b"tampered")
+        os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+        after = os.stat(path)
+        assert (after.st_size, after.st_mtime_ns, after.st_ino) == (
+            before.st_size,
+            before.st_mtime_ns,
+            before.st_ino,
+        )
+
+        # Checking against the expected digest never trusts the cache
+        result = ArtifactVerifier(digest_cache_path=cache_path).verify_artifact(
+            artifact_path=str(path), expected_digest=original.artifact.digest
+        )
+        assert result.integrity_status.value == "tampered"
+
+        batch = ArtifactVerifier(digest_cache_path=cache_path).verify_artifact_batch(
+            [{"path": str(path), "digest": original.artifact.digest}]
+        )
+        assert batch[0].integrity_status.value == "tampered"
+
+        # and the changed ctime keeps plain lookups from returning the old digest
+        rehashed = ArtifactVerifier().verify_artifact(artifact_path=str(path))
+        lookup = ArtifactVerifier(digest_cache_path=cache_path)
+        assert lookup.verify_artifact(artifact_path=str(path)).artifact.digest == (
+            rehashed.artifact.digest
+        )
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,214 @@
+"""
+Unit Tests for DAG Engine
+DAG 引擎單元測試
+
+Tests for ready-queue scheduling, concurrency limits, per-node timeouts and
+skip propagation in core/engine/dag_engine.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from core.engine.dag_engine import DAGEngine, DAGNode, NodeStatus
+from core.engine.task_executor import ExecutionMode, TaskExecutor
+
+
+def sleeper(delay: float, value: str, log: list | None = None):
+    """Coroutine task that sleeps and records start/finish order."""
+
+    async def task():
+        if log is not None:
+            log.append(("start", value))
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(("end", value))
+        return value
+
+    return task
+
+
+@pytest.fixture
+def executor() -> TaskExecutor:
+    executor = TaskExecutor(max_threads=4)
+    yield executor
+    executor.shutdown()
+
+
+class TestTopologicalSort:
+    """Tests for level grouping and cycle detection."""
+
+    def test_levels(self, executor):
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("a", sleeper(0, "a")))
+        engine.add_node(DAGNode("b", sleeper(0, "b"), dependencies=["a"]))
+        engine.add_node(DAGNode("c", sleeper(0, "c"), dependencies=["a"]))
+        engine.add_node(DAGNode("d", sleeper(0, "d"), dependencies=["b", "c"]))
+
+        assert engine.topological_sort() == [["a"], ["b", "c"], ["d"]]
+
+    def test_cycle_detected(self, executor):
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("a", sleeper(0, "a"), dependencies=["c"]))
+        engine.add_node(DAGNode("b", sleeper(0, "b"), dependencies=["a"]))
+        engine.add_node(DAGNode("c", sleeper(0, "c"), dependencies=["b"]))
+
+        with pytest.raises(ValueError, match="Cycle"):
+            engine.topological_sort()
+
+    def test_duplicate_node_rejected(self, executor):
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("a", sleeper(0, "a")))
+        with pytest.raises(ValueError):
+            engine.add_node(DAGNode("a", sleeper(0, "a")))
+
+
+class TestReadyQueueScheduling:
+    """Nodes start as soon as their own dependencies complete."""
+
+    @pytest.mark.asyncio
+    async def test_fast_branch_not_blocked_by_slow_sibling(self, executor):
+        log: list = []
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("slow", sleeper(0.2, "slow", log)))
+        engine.add_node(DAGNode("fast", sleeper(0.01, "fast", log)))
+        engine.add_node(
+            DAGNode("after_fast", sleeper(0.01, "after_fast", log), dependencies=["fast"])
+        )
+
+        results = await engine.execute()
+
+        assert results == {"slow": "slow", "fast": "fast", "after_fast": "after_fast"}
+        # Level-by-level execution would start after_fast only after slow ends
+        assert log.index(("start", "after_fast")) < log.index(("end", "slow"))
+        assert engine.get_critical_path() == ["slow"]
+
+    @pytest.mark.asyncio
+    async def test_thread_tasks_run_off_the_event_loop(self, executor):
+        engine = DAGEngine(task_executor=executor)
+        for i in range(4):
+            engine.add_node(
+                DAGNode(
+                    f"n{i}",
+                    lambda i=i: time.sleep(0.1) or i,
+                    execution_mode=ExecutionMode.THREAD,
+                )
+            )
+
+        started = time.monotonic()
+        results = await engine.execute()
+
+        assert results == {f"n{i}": i for i in range(4)}
+        assert time.monotonic() - started < 0.3
+
+
+class TestConcurrencyLimit:
+    """Tests for max_concurrency."""
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency(self, executor):
+        active = 0
+        peak = 0
+
+        def tracked(name):
+            async def task():
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.02)
+                active -= 1
+                return name
+
+            return task
+
+        engine = DAGEngine(max_concurrency=2, task_executor=executor)
+        for i in range(6):
+            engine.add_node(DAGNode(f"n{i}", tracked(f"n{i}")))
+
+        results = await engine.execute()
+
+        assert len(results) == 6
+        assert peak == 2
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            DAGEngine(max_concurrency=0)
+
+
+class TestTimeouts:
+    """Tests for per-node and default timeouts."""
+
+    @pytest.mark.asyncio
+    async def test_node_timeout_fails_node(self, executor):
+        engine = DAGEngine(default_timeout=5, task_executor=executor)
+        engine.add_node(DAGNode("slow", sleeper(1.0, "slow"), timeout=0.05))
+        engine.add_node(DAGNode("ok", sleeper(0.01, "ok")))
+
+        started = time.monotonic()
+        results = await engine.execute()
+
+        assert time.monotonic() - started < 0.5
+        assert isinstance(results["slow"], asyncio.TimeoutError)
+        assert engine.nodes["slow"].status == NodeStatus.FAILED
+        assert results["ok"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_default_timeout_applies(self, executor):
+        engine = DAGEngine(default_timeout=0.05, task_executor=executor)
+        engine.add_node(DAGNode("slow", sleeper(1.0, "slow")))
+
+        results = await engine.execute()
+
+        assert isinstance(results["slow"], asyncio.TimeoutError)
+
+    @pytest.mark.asyncio
+    async def test_blocking_sync_task_times_out(self, executor):
+        engine = DAGEngine(default_timeout=0.2, task_executor=executor)
+        engine.add_node(DAGNode("blocking", lambda: time.sleep(1) or "late"))
+        engine.add_node(DAGNode("ok", sleeper(0.01, "ok")))
+
+        started = time.monotonic()
+        results = await engine.execute()
+
+        # The sleep runs on a worker, so the loop stays free to fail the node
+        assert time.monotonic() - started < 0.8
+        assert isinstance(results["blocking"], asyncio.TimeoutError)
+        assert engine.nodes["blocking"].status == NodeStatus.FAILED
+        assert results["ok"] == "ok"
+
+
+class TestSkipPropagation:
+    """Failed or missing dependencies skip all downstream nodes."""
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_descendants_only(self, executor):
+        def boom():
+            raise RuntimeError("boom")
+
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("bad", boom, execution_mode=ExecutionMode.INLINE))
+        engine.add_node(DAGNode("child", sleeper(0, "child"), dependencies=["bad"]))
+        engine.add_node(DAGNode("grandchild", sleeper(0, "gc"), dependencies=["child"]))
+        engine.add_node(DAGNode("independent", sleeper(0, "independent")))
+
+        results = await engine.execute()
+
+        assert isinstance(results["bad"], RuntimeError)
+        assert engine.nodes["child"].status == NodeStatus.SKIPPED
+        assert engine.nodes["grandchild"].status == NodeStatus.SKIPPED
+        assert "child" not in results
+        assert results["independent"] == "independent"
+        summary = engine.get_execution_summary()
+        assert summary["status_counts"] == {"failed": 1, "skipped": 2, "completed": 1}
+
+    @pytest.mark.asyncio
+    async def test_missing_dependency_skips_node(self, executor):
+        engine = DAGEngine(task_executor=executor)
+        engine.add_node(DAGNode("orphan", sleeper(0, "orphan"), dependencies=["missing"]))
+
+        results = await engine.execute()
+
+        assert results == {}
+        assert engine.nodes["orphan"].status == NodeStatus.SKIPPED
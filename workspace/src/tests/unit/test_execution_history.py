@@ -0,0 +1,115 @@
+"""
+Unit Tests for Execution History
+執行歷史單元測試
+
+Tests for the latency stats and the ring-buffered ExecutionHistory in
+core/engine/execution_history.py
+"""
+
+import time
+
+import pytest
+from core.engine.execution_history import ExecutionHistory, LatencyStats
+
+
+class TestLatencyStats:
+    """Tests for the latency summary."""
+
+    def test_summary(self):
+        stats = LatencyStats()
+        assert stats.summary()["mean"] == 0.0
+        for value in range(1, 101):
+            stats.add(float(value))
+
+        summary = stats.summary()
+        assert summary["count"] == 100
+        assert summary["mean"] == 50.5
+        assert summary["max"] == 100.0
+        assert summary["p50"] == pytest.approx(50.5, abs=2)
+        assert summary["p99"] == pytest.approx(99, abs=2)
+
+
+class TestExecutionHistory:
+    """Tests for the ring buffer, indexes and spill log."""
+
+    def test_ring_keeps_most_recent_items(self):
+        history = ExecutionHistory(capacity=3)
+        items = [{"n": i} for i in range(5)]
+        for item in items:
+            history.append(item, kind="a", status="ok")
+
+        assert len(history) == 3
+        assert history.evicted == 2
+        # Queries return the stored objects themselves
+        assert history.recent()[0] is items[2]
+        assert history.recent(limit=2) == items[3:]
+
+    def test_indexes_follow_eviction(self):
+        history = ExecutionHistory(capacity=4)
+        for i in range(6):
+            history.append(i, kind="even" if i % 2 == 0 else "odd",
+                           status="failed" if i == 5 else "ok")
+
+        assert history.counts() == {
+            "by_kind": {"even": 2, "odd": 2},
+            "by_status": {"ok": 3, "failed": 1},
+        }
+        assert history.query(kind="even") == [2, 4]
+        assert history.query(kind="odd", status="ok") == [3]
+        assert history.query(status="failed") == [5]
+        assert history.query(kind="missing") == []
+        assert history.query(limit=2) == [4, 5]
+
+    def test_time_range_query(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(time, "time", lambda: now[0])
+        history = ExecutionHistory(capacity=10)
+        for i in range(5):
+            history.append(i, kind="a", status="ok")
+            now[0] += 10
+
+        assert history.query(since=1010, until=1030) == [1, 2, 3]
+        assert history.query(since=1041) == []
+        assert history.query(until=1000) == [0]
+
+    def test_latency_is_tracked_for_all_items(self):
+        history = ExecutionHistory(capacity=2)
+        for value in (10.0, 20.0, 30.0):
+            history.append(value, kind="a", status="ok", duration_ms=value)
+        history.append(None, kind="a", status="ok")
+
+        summary = history.latency.summary()
+        assert summary["count"] == 3
+        assert summary["max"] == 30.0
+
+    def test_spill_log(self, tmp_path):
+        path = tmp_path / "history.jsonl"
+        history = ExecutionHistory(capacity=2, spill_path=str(path))
+        for i in range(4):
+            history.append(object(), kind="tool", status="ok", duration_ms=float(i),
+                           summary={"index": i})
+
+        spilled = list(history.read_spilled())
+        history.close()
+
+        assert history.spilled == 2
+        assert [record["index"] for record in spilled] == [0, 1]
+        assert spilled[0]["kind"] == "tool"
+        assert spilled[1]["seq"] == 1
+
+    def test_clear_keeps_latency(self):
+        history = ExecutionHistory(capacity=5)
+        history.append(1, kind="a", status="ok", duration_ms=5.0)
+        history.clear()
+
+        assert len(history) == 0
+        assert history.recent() == []
+        assert history.query(kind="a") == []
+        assert history.latency.count == 1
+
+        history.append(2, kind="a", status="ok")
+        assert history.recent() == [2]
+
+    def test_invalid_capacity(self):
+        with pytest.raises(ValueError):
+            ExecutionHistory(capacity=0)
@@ -0,0 +1,125 @@
+"""
+Unit Tests for Intelligent Monitoring Metric Storage
+智能監控指標儲存單元測試
+
+Tests for the columnar MetricSeries ring buffer and MetricsCollector
+queries in core/monitoring/intelligent_monitoring.py
+"""
+
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+from core.monitoring import intelligent_monitoring
+from core.monitoring.intelligent_monitoring import MetricsCollector, MetricSeries
+
+
+class TestMetricSeries:
+    """Tests for the per-series ring buffer."""
+
+    def test_grows_then_overwrites_oldest(self):
+        series = MetricSeries({}, max_samples=100)
+        for i in range(250):
+            series.append(float(i), float(i) * 10)
+
+        assert len(series) == 100
+        timestamps, values = series.window()
+        assert list(timestamps) == [float(i) for i in range(150, 250)]
+        assert values[0] == 1500.0
+        assert series.latest() == (249.0, 2490.0)
+
+    def test_window_across_wraparound(self):
+        series = MetricSeries({}, max_samples=8)
+        for i in range(13):
+            series.append(float(i), float(i))
+
+        timestamps, values = series.window(since=6, until=10)
+        assert list(timestamps) == [6.0, 7.0, 8.0, 9.0, 10.0]
+        assert list(values) == [6.0, 7.0, 8.0, 9.0, 10.0]
+
+    def test_window_is_a_copy(self):
+        series = MetricSeries({}, max_samples=4)
+        for i in range(4):
+            series.append(float(i), float(i))
+        _, values = series.window()
+        series.append(4.0, 40.0)
+
+        assert list(values) == [0.0, 1.0, 2.0, 3.0]
+
+    def test_evict_before(self):
+        series = MetricSeries({}, max_samples=16)
+        for i in range(10):
+            series.append(float(i), float(i))
+
+        series.evict_before(4.0)
+        assert len(series) == 5
+        assert series.window()[0][0] == 5.0
+
+        series.evict_before(100.0)
+        assert len(series) == 0
+        assert series.latest() is None
+        series.append(101.0, 1.0)
+        assert list(series.window()[1]) == [1.0]
+
+
+class TestMetricsCollector:
+    """Tests for collection, label filtering and statistics."""
+
+    @pytest.fixture
+    def collector(self):
+        collector = MetricsCollector(max_samples_per_series=50)
+        for i in range(60):
+            collector.collect("latency", float(i), labels={"host": "a"})
+            collector.collect("latency", float(i) * 2, labels={"host": "b"})
+        return collector
+
+    def test_label_sets_are_interned(self, collector):
+        series = list(collector._series["latency"].values())
+        assert len(series) == 2
+        collector.collect("errors", 1.0, labels={"host": "a"})
+        errors = next(iter(collector._series["errors"].values()))
+        assert errors.labels is series[0].labels
+
+    def test_label_filter_and_retention_cap(self, collector):
+        metrics = collector.get_metrics("latency", labels={"host": "a"})
+        assert len(metrics) == 50
+        assert metrics[0].value == 10.0
+        assert metrics[-1].labels == {"host": "a"}
+        assert len(collector.get_metrics("latency")) == 100
+        assert collector.get_latest("latency").value == 118.0
+
+    def test_time_range_filter(self):
+        collector = MetricsCollector()
+        collector.collect("cpu", 1.0)
+        later = datetime.now() + timedelta(seconds=60)
+
+        assert collector.get_metrics("cpu", since=later) == []
+        assert len(collector.get_metrics("cpu", until=later)) == 1
+
+    def test_expired_samples_are_dropped(self):
+        collector = MetricsCollector(retention_seconds=0)
+        collector.collect("cpu", 1.0)
+        collector.collect("cpu", 2.0)
+        assert list(collector.get_values("cpu")) == []
+
+    @pytest.mark.parametrize("use_numpy", [True, False])
+    def test_statistics(self, collector, monkeypatch, use_numpy):
+        if use_numpy and intelligent_monitoring.np is None:
+            pytest.skip("numpy not installed")
+        if not use_numpy:
+            monkeypatch.setattr(intelligent_monitoring, "np", None)
+
+        values = [float(i) for i in range(10, 60)]
+        stats = collector.get_statistics("latency", labels={"host": "a"})
+
+        assert stats["count"] == 50
+        assert stats["min"] == 10.0
+        assert stats["max"] == 59.0
+        assert stats["mean"] == pytest.approx(statistics.fmean(values))
+        assert stats["median"] == pytest.approx(statistics.median(values))
+        assert stats["stdev"] == pytest.approx(statistics.stdev(values))
+        assert stats["p90"] == pytest.approx(54.1)
+        assert stats["p99"] == pytest.approx(58.51)
+
+    def test_statistics_empty(self, collector):
+        assert collector.get_statistics("missing") == {}
@@ -0,0 +1,194 @@
+"""
+Unit Tests for Merkle Accumulator
+Merkle 累加器單元測試
+
+Checks MerkleAccumulator roots and proofs against a recursive RFC 6962
+reference, and the append-only node file across reopen and torn writes.
+"""
+
+import hashlib
+
+import pytest
+from core.merkle import MerkleAccumulator, MerkleTree, StateVerifier
+
+
+def _leaf(data: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + data).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def reference_root(leaves):
+    """Merkle Tree Hash from RFC 6962 §2.1, computed recursively."""
+    if len(leaves) == 1:
+        return _leaf(leaves[0])
+    k = 1 << ((len(leaves) - 1).bit_length() - 1)
+    return _node(reference_root(leaves[:k]), reference_root(leaves[k:]))
+
+
+LEAVES = [f"leaf-{i}".encode() for i in range(40)]
+
+
+@pytest.fixture
+def accumulator():
+    acc = MerkleAccumulator()
+    acc.extend(LEAVES)
+    return acc
+
+
+class TestRoots:
+    """Tests for tree hashes."""
+
+    def test_rfc_empty_leaf_vector(self):
+        acc = MerkleAccumulator()
+        acc.append(b"")
+        assert acc.root_hash() == (
+            "6e340b9cffb37a989ca544e6bb780a2c78901d3fb33738768511a30617afa01d"
+        )
+
+    def test_roots_match_reference_for_every_size(self, accumulator):
+        for size in range(1, len(LEAVES) + 1):
+            assert accumulator.root(size) == reference_root(LEAVES[:size])
+
+    def test_empty_and_out_of_range(self, accumulator):
+        assert MerkleAccumulator().root() is None
+        assert accumulator.root(0) is None
+        assert accumulator.root(len(LEAVES) + 1) is None
+        with pytest.raises(IndexError):
+            accumulator.get_leaf_hash(len(LEAVES))
+
+    def test_leaf_hashes(self, accumulator):
+        assert accumulator.get_leaf_hash(7) == _leaf(LEAVES[7])
+        other = MerkleAccumulator()
+        other.append_leaf_hash(_leaf(b"x"))
+        assert other.root() == _leaf(b"x")
+
+
+class TestProofs:
+    """Inclusion and consistency proofs verify, and tampered ones do not."""
+
+    def test_inclusion_proofs(self, accumulator):
+        for size in (1, 2, 3, 7, 8, 13, 40):
+            root = accumulator.root(size)
+            for index in range(size):
+                proof = accumulator.inclusion_proof(index, size)
+                leaf = accumulator.get_leaf_hash(index)
+                assert accumulator.verify_inclusion(leaf, index, size, proof, root)
+
+    def test_inclusion_proof_rejects_tampering(self, accumulator):
+        root = accumulator.root()
+        proof = accumulator.inclusion_proof(5)
+        leaf = accumulator.get_leaf_hash(5)
+
+        assert not accumulator.verify_inclusion(_leaf(b"forged"), 5, 40, proof, root)
+        assert not accumulator.verify_inclusion(leaf, 6, 40, proof, root)
+        assert not accumulator.verify_inclusion(leaf, 5, 40, proof[:-1], root)
+        bad = list(proof)
+        bad[0] = _leaf(b"forged")
+        assert not accumulator.verify_inclusion(leaf, 5, 40, bad, root)
+        with pytest.raises(IndexError):
+            accumulator.inclusion_proof(40)
+
+    def test_consistency_proofs(self, accumulator):
+        for new_size in (1, 2, 5, 8, 17, 40):
+            for old_size in range(1, new_size + 1):
+                proof = accumulator.consistency_proof(old_size, new_size)
+                assert accumulator.verify_consistency(
+                    old_size,
+                    new_size,
+                    accumulator.root(old_size),
+                    accumulator.root(new_size),
+                    proof,
+                )
+
+    def test_consistency_proof_rejects_forked_history(self, accumulator):
+        forked = MerkleAccumulator()
+        forked.extend(LEAVES[:6] + [b"rewritten"])
+        proof = accumulator.consistency_proof(7, 40)
+
+        assert not accumulator.verify_consistency(
+            7, 40, forked.root(), accumulator.root(), proof
+        )
+        assert not accumulator.verify_consistency(
+            7, 40, accumulator.root(7), accumulator.root(39), proof
+        )
+
+
+class TestPersistence:
+    """Tests for the append-only node file."""
+
+    def test_reopen_restores_roots(self, tmp_path):
+        path = str(tmp_path / "nodes.bin")
+        acc = MerkleAccumulator(path)
+        acc.extend(LEAVES[:21])
+        root = acc.root()
+        acc.close()
+
+        reopened = MerkleAccumulator(path)
+        assert len(reopened) == 21
+        assert reopened.root() == root
+        reopened.extend(LEAVES[21:])
+        assert reopened.root() == reference_root(LEAVES)
+        reopened.close()
+
+    def test_torn_append_is_truncated(self, tmp_path):
+        path = tmp_path / "nodes.bin"
+        acc = MerkleAccumulator(str(path))
+        acc.extend(LEAVES[:11])
+        acc.close()
+        intact = path.stat().st_size
+
+        # Leaf 11 completes two subtrees (three nodes); keep only part of it
+        with open(path, "ab") as f:
+            f.write(_leaf(LEAVES[11]) + b"\x00" * 10)
+
+        reopened = MerkleAccumulator(str(path))
+        assert len(reopened) == 11
+        assert path.stat().st_size == intact
+        assert reopened.root() == reference_root(LEAVES[:11])
+        reopened.append(LEAVES[11])
+        assert reopened.root() == reference_root(LEAVES[:12])
+        reopened.close()
+
+
+class TestStateVerifier:
+    """StateVerifier records states into the accumulator."""
+
+    def test_state_proofs(self, tmp_path):
+        verifier = StateVerifier(str(tmp_path / "states.bin"))
+        hashes = [verifier.record_state("svc", {"version": i}) for i in range(5)]
+        root = verifier.finalize()
+
+        proof = verifier.get_proof(2)
+        assert verifier.verify_state(hashes[2], 2, 5, proof, root)
+        assert not verifier.verify_state(hashes[3], 2, 5, proof, root)
+        assert verifier.state_log[4]["index"] == 4
+        assert len(verifier.get_consistency_proof(3)) > 0
+
+
+class TestMerkleTree:
+    """MerkleTree incremental builds match a full rebuild."""
+
+    @staticmethod
+    def full_rebuild(hashes):
+        """The original level-by-level build; an odd last node pairs with itself."""
+        while len(hashes) > 1:
+            hashes = [
+                hashlib.sha256((left + right).encode()).hexdigest()
+                for left, right in zip(hashes[::2], hashes[1::2] + hashes[-1:], strict=False)
+            ]
+        return hashes[0]
+
+    def test_incremental_build_and_proofs(self):
+        tree = MerkleTree()
+        for i in range(13):
+            tree.add_leaf({"n": i})
+            root = tree.build()
+            assert root == self.full_rebuild([leaf.hash for leaf in tree.leaves])
+
+        for index in range(13):
+            proof = tree.get_proof(index)
+            assert tree.verify_proof(tree.leaves[index].hash, proof, tree.get_root_hash())
+        assert tree.get_proof(13) == []
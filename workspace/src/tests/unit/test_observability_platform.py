@@ -0,0 +1,221 @@
+"""
+Unit Tests for Observability Telemetry Store
+可觀測性遙測儲存單元測試
+
+Tests for the indexed TelemetryStore and the correlation queries of
+core/monitoring/observability_platform.py
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from core.monitoring.observability_platform import (
+    LogEntry,
+    LogLevel,
+    ObservabilityPlatform,
+    TelemetryStore,
+    TraceSpan,
+    TraceStatus,
+)
+
+BASE = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def log(offset: float, level=LogLevel.INFO, service="api", trace_id=None, message=""):
+    return LogEntry(
+        level=level,
+        service=service,
+        trace_id=trace_id,
+        message=message,
+        timestamp=BASE + timedelta(seconds=offset),
+    )
+
+
+def span(trace_id, offset, duration=None, parent=None, service="api", status=TraceStatus.OK):
+    start = BASE + timedelta(seconds=offset)
+    result = TraceSpan(trace_id=trace_id, parent_span_id=parent, service=service,
+                       start_time=start)
+    if duration is not None:
+        result.end_time = start + timedelta(milliseconds=duration)
+        result.status = status
+    return result
+
+
+def naive_logs(entries, service=None, level=None, since=None, until=None, trace_id=None):
+    return [
+        e for e in entries
+        if (not service or e.service == service)
+        and (not level or e.level == level)
+        and (not trace_id or e.trace_id == trace_id)
+        and (since is None or e.timestamp >= since)
+        and (until is None or e.timestamp <= until)
+    ]
+
+
+class TestLogQueries:
+    """Index-driven get_logs returns what a full scan would."""
+
+    @pytest.fixture
+    def entries(self):
+        levels = [LogLevel.DEBUG, LogLevel.INFO, LogLevel.WARNING, LogLevel.ERROR]
+        return [
+            log(i * 7.5, level=levels[i % 4], service=("api", "db", "")[i % 3],
+                trace_id=f"t{i % 5}" if i % 2 else None, message=str(i))
+            for i in range(200)
+        ]
+
+    @pytest.fixture
+    def store(self, entries):
+        store = TelemetryStore(bucket_seconds=30)
+        for entry in entries:
+            store.add_log(entry)
+        return store
+
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"service": "api"},
+        {"level": LogLevel.ERROR},
+        {"service": "db", "level": LogLevel.WARNING},
+        {"trace_id": "t3"},
+        {"service": "api", "trace_id": "t1"},
+        {"since": BASE + timedelta(seconds=100)},
+        {"until": BASE + timedelta(seconds=95)},
+        {"since": BASE + timedelta(seconds=301), "until": BASE + timedelta(seconds=599)},
+        {"since": BASE + timedelta(seconds=300), "until": BASE + timedelta(seconds=300)},
+        {"service": "api", "since": BASE + timedelta(seconds=500), "trace_id": "t1"},
+        {"since": BASE + timedelta(days=1)},
+    ])
+    def test_matches_full_scan(self, store, entries, filters):
+        assert store.get_logs(**filters) == naive_logs(entries, **filters)
+
+    def test_limit_returns_most_recent(self, store, entries):
+        expected = naive_logs(entries, level=LogLevel.ERROR)[-3:]
+        assert store.get_logs(level=LogLevel.ERROR, limit=3) == expected
+
+        since = BASE + timedelta(seconds=1000)
+        assert store.get_logs(since=since, limit=2) == naive_logs(entries, since=since)[-2:]
+
+    def test_counts(self, store, entries):
+        assert store.count_logs() == 200
+        assert store.count_logs(service="db") == len(naive_logs(entries, service="db"))
+        assert store.count_logs(service="api", level=LogLevel.ERROR) == len(
+            naive_logs(entries, service="api", level=LogLevel.ERROR)
+        )
+        assert sorted(store.services()) == ["api", "db"]
+
+
+class TestEviction:
+    """Low-priority entries are evicted before WARNING+ logs and failed traces."""
+
+    def test_info_logs_evicted_first(self):
+        store = TelemetryStore(max_logs=10, priority_share=0.5)
+        errors = [log(i, level=LogLevel.ERROR, message=f"e{i}") for i in range(3)]
+        for entry in errors:
+            store.add_log(entry)
+        for i in range(20):
+            store.add_log(log(10 + i, message=f"i{i}"))
+
+        logs = store.get_logs()
+        assert len(logs) == 10
+        assert logs[:3] == errors
+        assert [e.message for e in logs[3:]] == [f"i{i}" for i in range(13, 20)]
+        assert store.get_stats()["evicted_logs"] == 13
+        early = BASE + timedelta(seconds=20)
+        assert store.get_logs(level=LogLevel.INFO, since=BASE, until=early) == []
+
+    def test_priority_tier_capped_by_share(self):
+        store = TelemetryStore(max_logs=10, priority_share=0.5)
+        for i in range(20):
+            store.add_log(log(i, level=LogLevel.ERROR, message=f"e{i}"))
+            store.add_log(log(i + 0.5, message=f"i{i}"))
+
+        stats = store.get_stats()
+        assert stats["logs"] == 10
+        assert stats["priority_logs"] <= 6
+        # Evicted entries are gone from every index
+        assert store.count_logs(level=LogLevel.ERROR) == stats["priority_logs"]
+        assert sum(store.count_logs(level=level) for level in LogLevel) == 10
+
+    def test_failed_traces_outlive_healthy_ones(self):
+        store = TelemetryStore(max_traces=4, priority_share=0.5)
+        failed = span("failed", 0, duration=5)
+        store.add_span(failed)
+        failed.status = TraceStatus.ERROR
+        store.span_ended(failed)
+        for i in range(6):
+            store.add_span(span(f"ok{i}", 1 + i, duration=5))
+
+        assert store.get_trace("failed") == [failed]
+        assert store.get_trace("ok0") == []
+        assert store.trace_count == 4
+        assert store.get_stats()["evicted_traces"] == 3
+        assert len(store.get_spans()) == 4
+
+
+class TestTraces:
+    """Tests for span indexes and slow-trace ordering."""
+
+    def test_slow_traces_sorted_slowest_first(self):
+        store = TelemetryStore()
+        for trace_id, duration in (("a", 50), ("b", 400), ("c", 1200), ("d", 900)):
+            root = span(trace_id, 0, duration=duration)
+            store.add_span(root)
+            store.add_span(span(trace_id, 0.01, duration=5000, parent=root.span_id))
+            store.span_ended(root)
+        # A root ended directly with span.end() is indexed on the next query
+        late = span("late", 0)
+        store.add_span(late)
+        late.end_time = late.start_time + timedelta(milliseconds=700)
+
+        slow = store.get_slow_traces(300)
+        assert [s.trace_id for s in slow] == ["c", "d", "late", "b"]
+        assert store.get_slow_traces(5000) == []
+
+    def test_span_queries(self):
+        store = TelemetryStore(bucket_seconds=10)
+        for i in range(30):
+            store.add_span(span(f"t{i % 3}", i * 4, service="api" if i % 2 else "db"))
+
+        since, until = BASE + timedelta(seconds=20), BASE + timedelta(seconds=60)
+        spans = store.get_spans(since=since, until=until, service="db")
+        assert [s.start_time for s in spans] == [
+            BASE + timedelta(seconds=s) for s in (24, 32, 40, 48, 56)
+        ]
+        assert len(store.get_trace("t1")) == 10
+        assert {s.trace_id for s in store.get_service_spans("api")} == {"t0", "t1", "t2"}
+
+
+class TestCorrelation:
+    """Platform correlation uses the indexes to select candidates."""
+
+    @pytest.fixture
+    def platform(self):
+        platform = ObservabilityPlatform(bucket_seconds=60)
+        for i in range(100):
+            platform.store.add_log(log(i * 60, service=f"svc{i % 4}", trace_id=f"t{i}"))
+            platform.store.add_span(span(f"t{i}", i * 60, duration=10, service=f"svc{i % 4}"))
+        return platform
+
+    def test_correlate_by_time(self, platform):
+        reference = BASE + timedelta(seconds=50 * 60)
+        event = platform.correlate_by_time(reference, metric_names=["cpu"])
+
+        # Default window is 300s either side: entries 45..55
+        assert len(event.related_logs) == 11
+        assert event.related_traces == [f"t{i}" for i in range(45, 56)]
+        assert sorted(event.related_services) == ["svc0", "svc1", "svc2", "svc3"]
+        assert event.related_metrics == ["cpu"]
+        assert platform.correlation_engine.get_correlated_events() == [event]
+
+    def test_correlate_by_trace(self, platform):
+        trace = platform.start_trace("checkout", service="web")
+        child = platform.start_span(trace.trace_id, trace.span_id, "charge", service="billing")
+        entry = platform.log_error("declined", service="billing", trace_id=trace.trace_id)
+        platform.end_span(child, TraceStatus.ERROR)
+        platform.end_span(trace)
+
+        event = platform.correlate_by_trace(trace.trace_id)
+        assert event.related_logs == [entry.log_id]
+        assert event.related_traces == [trace.span_id, child.span_id]
+        assert event.related_services == ["web", "billing"]
+        assert platform.get_service_health("billing")["error_traces"] == 1
@@ -0,0 +1,212 @@
+"""
+Unit Tests for Streaming Detectors
+串流異常檢測單元測試
+
+Tests for the shared streaming statistics in core/stats and the detectors
+in core/monitoring/streaming_detectors.py
+"""
+
+import random
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from core.monitoring import streaming_detectors
+from core.monitoring.streaming_detectors import (
+    DetectorBank,
+    EWMAStats,
+    SeasonalBaseline,
+    StreamingQuantiles,
+)
+from core.safety.anomaly_detector import MetricWindow
+from core.stats import P2Quantile, RollingStats, RunningStats
+
+CORE_DIR = Path(__file__).resolve().parents[2] / "core"
+
+
+class TestP2Quantile:
+    """P² estimates stay close to the exact quantiles."""
+
+    @pytest.mark.parametrize("quantile", [0.01, 0.5, 0.99])
+    def test_accuracy(self, quantile):
+        rng = random.Random(3)
+        values = [rng.gauss(100, 15) for _ in range(20000)]
+        estimator = P2Quantile(quantile)
+        for value in values:
+            estimator.add(value)
+
+        exact = sorted(values)[int(quantile * (len(values) - 1))]
+        assert estimator.value() == pytest.approx(exact, abs=1.0)
+
+    def test_accuracy_on_skewed_data(self):
+        rng = random.Random(7)
+        values = [rng.expovariate(1 / 50) for _ in range(20000)]
+        estimator = P2Quantile(0.95)
+        for value in values:
+            estimator.add(value)
+
+        exact = sorted(values)[int(0.95 * len(values))]
+        assert estimator.value() == pytest.approx(exact, rel=0.05)
+
+    def test_small_samples(self):
+        estimator = P2Quantile(0.5)
+        assert estimator.value() is None
+        for value in (5.0, 1.0, 3.0):
+            estimator.add(value)
+        assert estimator.value() == 3.0
+
+    def test_constant_stream(self):
+        estimator = P2Quantile(0.99)
+        for _ in range(100):
+            estimator.add(7.0)
+        assert estimator.value() == 7.0
+
+    def test_streaming_quantiles_snapshot(self):
+        quantiles = StreamingQuantiles((0.5, 0.9))
+        for value in range(1, 1001):
+            quantiles.add(float(value))
+
+        snapshot = quantiles.snapshot()
+        assert snapshot[0.5] == pytest.approx(500, rel=0.02)
+        assert quantiles.get(0.9) == pytest.approx(900, rel=0.02)
+
+
+class TestRollingStats:
+    """Sliding-window Welford statistics and min/max."""
+
+    def test_window_statistics(self):
+        rng = random.Random(11)
+        values = [rng.uniform(-50, 50) for _ in range(500)]
+        rolling = RollingStats(window=37)
+
+        for i, value in enumerate(values):
+            rolling.add(value)
+            window = values[max(0, i - 36): i + 1]
+            assert rolling.count == len(window)
+            assert rolling.min == min(window)
+            assert rolling.max == max(window)
+            assert rolling.mean == pytest.approx(statistics.fmean(window))
+            if len(window) > 1:
+                assert rolling.stdev == pytest.approx(statistics.stdev(window))
+
+    def test_monotonic_sequences(self):
+        rolling = RollingStats(window=3)
+        for value in (1.0, 2.0, 3.0, 4.0, 5.0):
+            rolling.add(value)
+        assert (rolling.min, rolling.max) == (3.0, 5.0)
+        for value in (4.0, 3.0, 2.0, 1.0):
+            rolling.add(value)
+        assert (rolling.min, rolling.max) == (1.0, 3.0)
+
+    def test_reset(self):
+        rolling = RollingStats(window=4)
+        assert rolling.min is None
+        rolling.reset([5.0, 1.0, 9.0, 2.0, 7.0, 3.0])
+
+        assert list(rolling.values) == [9.0, 2.0, 7.0, 3.0]
+        assert rolling.min == 2.0
+        assert rolling.max == 9.0
+        assert rolling.mean == pytest.approx(5.25)
+
+    def test_running_stats_zscore(self):
+        running = RunningStats()
+        for value in (2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0):
+            running.add(value)
+        assert running.mean == 5.0
+        assert running.zscore(5.0 + running.stdev) == pytest.approx(1.0)
+        assert RunningStats().zscore(3.0) == 0.0
+
+    def test_metric_window_uses_rolling_stats(self):
+        window = MetricWindow(values=[1.0, 2.0, 3.0, 4.0], max_size=3)
+        window.add(10.0)
+
+        assert list(window.values) == [3.0, 4.0, 10.0]
+        assert (window.min, window.max) == (3.0, 10.0)
+        assert window.mean == pytest.approx(17 / 3)
+
+
+class TestBaselines:
+    """EWMA and seasonal baselines."""
+
+    def test_ewma(self):
+        ewma = EWMAStats(alpha=0.5)
+        for value in (10.0, 20.0):
+            ewma.add(value)
+        assert ewma.mean == 15.0
+        assert ewma.variance == pytest.approx(25.0)
+        with pytest.raises(ValueError):
+            EWMAStats(alpha=0)
+
+    def test_seasonal_buckets(self):
+        baseline = SeasonalBaseline(period_seconds=100, buckets=4, min_samples=2)
+        for day in range(3):
+            baseline.add(10.0 + day, timestamp=day * 100 + 10)
+            baseline.add(50.0 + day, timestamp=day * 100 + 60)
+
+        assert baseline.expected(10).mean == 11.0
+        assert baseline.expected(260).mean == 51.0
+        assert baseline.expected(30) is None
+        assert baseline.zscore(11.0, 310) == 0.0
+
+
+class TestDetectorBank:
+    """Vectorized and fallback scoring agree."""
+
+    @pytest.fixture(params=["numpy", "python"])
+    def bank_factory(self, request, monkeypatch):
+        if request.param == "numpy" and streaming_detectors.np is None:
+            pytest.skip("numpy not installed")
+        if request.param == "python":
+            monkeypatch.setattr(streaming_detectors, "np", None)
+        return DetectorBank
+
+    def test_scores_match_scalar_ewma(self, bank_factory):
+        bank = bank_factory(alpha=0.2, min_samples=5)
+        rng = random.Random(5)
+        names = [f"series-{i}" for i in range(100)]
+        reference = {name: EWMAStats(alpha=0.2) for name in names}
+
+        for _ in range(20):
+            values = [rng.gauss(0, 1) for _ in names]
+            scores, expected = bank.update(names, values)
+            for name, value, score, mean in zip(names, values, scores, expected, strict=True):
+                stats = reference[name]
+                if stats.count >= 5 and stats.stdev > 0:
+                    assert score == pytest.approx(stats.zscore(value))
+                else:
+                    assert score == 0.0
+                assert mean == pytest.approx(stats.mean if stats.count else value)
+                stats.add(value)
+
+        baseline = bank.baseline("series-7")
+        assert baseline["count"] == 20
+        assert baseline["mean"] == pytest.approx(reference["series-7"].mean)
+        assert bank.baseline("unknown") is None
+
+    def test_anomalies_and_partial_ticks(self, bank_factory):
+        bank = bank_factory(alpha=0.3, threshold=3.0, min_samples=5)
+        for i in range(10):
+            bank.update(["a", "b"], [10.0 + (i % 2), 5.0 + (i % 2)])
+        bank.update(["b"], [5.5])
+
+        anomalies = bank.anomalies(["a", "b"], [40.0, 5.5])
+        assert list(anomalies) == ["a"]
+        assert bank.baseline("b")["count"] == 12
+
+    def test_duplicate_series_rejected(self, bank_factory):
+        bank = bank_factory()
+        with pytest.raises(ValueError):
+            bank.update(["a", "a"], [1.0, 2.0])
+
+
+@pytest.mark.parametrize("statement", ["import monitoring", "import safety.anomaly_detector"])
+def test_packages_import_as_top_level(statement):
+    result = subprocess.run(
+        [sys.executable, "-c", statement],
+        cwd=CORE_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
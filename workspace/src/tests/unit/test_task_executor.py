@@ -0,0 +1,228 @@
+"""
+Unit Tests for Task Executor
+任務執行器單元測試
+
+Tests for async-callable detection, execution modes, timeouts and back-pressure in
+core/engine/task_executor.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+
+import pytest
+from core.engine.execution_engine import ActionType, ExecutionEngine
+from core.engine.task_executor import ExecutionMode, TaskExecutor
+from core.engine.tool_system import Tool, ToolCategory, ToolStatus
+
+
+async def add(a, b):
+    await asyncio.sleep(0)
+    return a + b
+
+
+class AsyncCallable:
+    """Object whose __call__ is a coroutine function."""
+
+    async def __call__(self, value):
+        await asyncio.sleep(0)
+        return value * 2
+
+
+@pytest.fixture
+def executor() -> TaskExecutor:
+    executor = TaskExecutor(max_threads=2)
+    yield executor
+    executor.shutdown()
+
+
+class TestAsyncCallables:
+    """Anything that returns an awaitable is awaited, whatever its type."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("mode", [None, ExecutionMode.THREAD])
+    async def test_async_callables(self, executor, mode):
+        assert await executor.run(add, 1, 2, mode=mode) == 3
+        assert await executor.run(AsyncCallable(), 4, mode=mode) == 8
+        assert await executor.run(functools.partial(add, 1), 2, mode=mode) == 3
+        assert await executor.run(lambda: add(2, 3), mode=mode) == 5
+
+    @pytest.mark.asyncio
+    async def test_async_callable_object_runs_on_loop(self, executor):
+        class LoopBound:
+            async def __call__(self):
+                return threading.get_ident()
+
+        ident = await executor.run(LoopBound(), mode=ExecutionMode.THREAD)
+        assert ident == threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_execution_engine_accepts_async_callable_executor(self, executor):
+        engine = ExecutionEngine(task_executor=executor)
+
+        class Deployer:
+            async def __call__(self, params, context, plan):
+                return {"deployed": params["service"]}
+
+        engine.register_executor(ActionType.DEPLOYMENT, Deployer())
+        result = await engine._execute_action(
+            ActionType.DEPLOYMENT, {"service": "api"}, None, {}
+        )
+
+        assert result == {"deployed": "api"}
+
+
+class TestExecutionModes:
+    """Synchronous callables leave the loop only when a mode asks for it."""
+
+    @pytest.mark.asyncio
+    async def test_default_mode_is_inline(self, executor):
+        assert executor.default_mode == ExecutionMode.INLINE
+        assert await executor.run(threading.get_ident) == threading.get_ident()
+        assert executor.get_metrics()["inline"]["completed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_thread_mode(self, executor):
+        ident = await executor.run(threading.get_ident, mode=ExecutionMode.THREAD)
+
+        assert ident != threading.get_ident()
+        await asyncio.sleep(0)
+        metrics = executor.get_metrics()["thread"]
+        assert metrics["completed"] == 1
+        assert metrics["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate(self, executor):
+        def boom():
+            raise KeyError("boom")
+
+        for mode in (ExecutionMode.INLINE, ExecutionMode.THREAD):
+            with pytest.raises(KeyError):
+                await executor.run(boom, mode=mode)
+
+        await asyncio.sleep(0)
+        metrics = executor.get_metrics()
+        assert metrics["inline"]["failed"] == 1
+        assert metrics["thread"]["failed"] == 1
+
+
+class TestBackpressure:
+    """Pool admission is bounded by max_pending."""
+
+    @pytest.mark.asyncio
+    async def test_waits_for_slot(self):
+        executor = TaskExecutor(max_threads=1, max_pending=2)
+        release = threading.Event()
+        try:
+            calls = [
+                asyncio.create_task(
+                    executor.run(release.wait, mode=ExecutionMode.THREAD)
+                )
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.05)
+
+            metrics = executor.get_metrics()["thread"]
+            assert metrics["in_flight"] == 2
+            assert metrics["waiting"] == 1
+            assert metrics["queue_depth"] == 1
+            assert metrics["backpressure_waits"] == 1
+
+            release.set()
+            assert await asyncio.gather(*calls) == [True, True, True]
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timed_out_call_keeps_its_slot(self):
+        executor = TaskExecutor(max_threads=1, max_pending=1)
+        release = threading.Event()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    executor.run(release.wait, mode=ExecutionMode.THREAD), 0.05
+                )
+
+            # The worker thread is still blocked, so the next call must wait
+            follower = asyncio.create_task(
+                executor.run(lambda: "next", mode=ExecutionMode.THREAD)
+            )
+            await asyncio.sleep(0.05)
+            assert not follower.done()
+            assert executor.get_metrics()["thread"]["waiting"] == 1
+
+            release.set()
+            assert await asyncio.wait_for(follower, 1) == "next"
+            await asyncio.sleep(0)
+            metrics = executor.get_metrics()["thread"]
+            assert metrics["in_flight"] == 0
+            assert metrics["completed"] == 2
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_queued_call_frees_slot(self):
+        executor = TaskExecutor(max_threads=1, max_pending=2)
+        release = threading.Event()
+        try:
+            running = asyncio.create_task(
+                executor.run(release.wait, mode=ExecutionMode.THREAD)
+            )
+            queued = asyncio.create_task(
+                executor.run(release.wait, mode=ExecutionMode.THREAD)
+            )
+            await asyncio.sleep(0.05)
+
+            # Still queued behind the running call, so the pool can drop it
+            queued.cancel()
+            await asyncio.sleep(0.05)
+            metrics = executor.get_metrics()["thread"]
+            assert metrics["cancelled"] == 1
+            assert metrics["in_flight"] == 1
+
+            release.set()
+            assert await running is True
+        finally:
+            release.set()
+            executor.shutdown()
+
+
+class TestTimeouts:
+    """A timeout must interrupt blocking synchronous calls."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_times_out(self, executor):
+        start = time.monotonic()
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run_with_timeout(time.sleep, 0.5, timeout=0.05)
+        assert time.monotonic() - start < 0.4
+
+    @pytest.mark.asyncio
+    async def test_explicit_inline_mode_warns(self, executor):
+        with pytest.warns(RuntimeWarning, match="block the event loop"):
+            result = await executor.run_with_timeout(
+                lambda: "done", timeout=1, mode=ExecutionMode.INLINE
+            )
+        assert result == "done"
+
+    @pytest.mark.asyncio
+    async def test_blocking_tool_times_out(self, executor):
+        tool = Tool(
+            name="slow",
+            description="Blocks its caller",
+            category=ToolCategory.CODE,
+            timeout_seconds=0.05,
+            execute_fn=lambda params: time.sleep(params["seconds"]),
+            task_executor=executor,
+        )
+
+        start = time.monotonic()
+        result = await tool.execute({"seconds": 0.5})
+
+        assert result.status == ToolStatus.TIMEOUT
+        assert time.monotonic() - start < 0.4
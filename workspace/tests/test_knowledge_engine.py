@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for KnowledgeEngine repository indexing - incremental re-indexing,
+skipped files and graph/vector consistency
+"""
+
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+from core.island_ai_runtime.knowledge_engine import EdgeType, KnowledgeEngine, NodeType
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def write(path: Path, data: bytes) -> None:
+    """Write a file and move its mtime forward so the change is always seen"""
+    previous = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_bytes(data)
+    mtime = max(path.stat().st_mtime_ns, previous + 1_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def lines(prefix: str, count: int) -> bytes:
+    return "".join(f"{prefix} line {i}\n" for i in range(count)).encode()
+
+
+def make_engine(**indexing) -> KnowledgeEngine:
+    return KnowledgeEngine({"indexing": {"chunk_size": 64, **indexing}})
+
+
+def assert_consistent(engine: KnowledgeEngine) -> None:
+    """Graph edges, chunk nodes, vectors and file state describe the same chunks"""
+    graph = engine.repo_graph
+    edges = [(e.source_id, e.target_id) for e in graph.edges]
+    assert not [edge for edge, n in Counter(edges).items() if n > 1]
+    assert all(s in graph.nodes and t in graph.nodes for s, t in edges)
+
+    chunk_ids = {n.id for n in graph.nodes.values() if n.node_type == NodeType.CHUNK}
+    state_ids = {cid for _, _, ids in engine._file_state.values() for cid in ids}
+    assert chunk_ids == state_ids
+    assert set(engine.vector_store.index.ids) == chunk_ids
+    assert {t for _, t in edges} == chunk_ids
+
+
+def chunk_nodes(engine: KnowledgeEngine, rel_path: str) -> list:
+    return [
+        n
+        for n in engine.repo_graph.nodes.values()
+        if n.node_type == NodeType.CHUNK and n.path == rel_path
+    ]
+
+
+class TestIncrementalIndexing:
+    """Test re-indexing changed, unchanged and removed files"""
+
+    @pytest.mark.asyncio
+    async def test_reindex_does_not_duplicate_edges(self, tmp_path):
+        engine = make_engine()
+        write(tmp_path / "a.py", lines("a", 20))
+        write(tmp_path / "b.py", lines("b", 5))
+
+        first = await engine.index_repository(str(tmp_path))
+        assert first.files_indexed == 2
+        assert_consistent(engine)
+
+        # Same chunk offsets, different content
+        write(tmp_path / "a.py", lines("A", 20))
+        second = await engine.index_repository(str(tmp_path))
+
+        assert (second.files_indexed, second.files_unchanged) == (1, 1)
+        assert_consistent(engine)
+        file_id = engine._generate_id(str(tmp_path / "a.py"))
+        contains = engine.repo_graph.get_neighbors(file_id, EdgeType.CONTAINS)
+        assert len(contains) == len(chunk_nodes(engine, "a.py"))
+        assert all(engine.read_content(n).startswith("A") for n in contains)
+
+    @pytest.mark.asyncio
+    async def test_shrinking_file_drops_trailing_chunks(self, tmp_path):
+        engine = make_engine()
+        write(tmp_path / "a.py", lines("a", 40))
+        await engine.index_repository(str(tmp_path))
+        before = len(chunk_nodes(engine, "a.py"))
+
+        write(tmp_path / "a.py", lines("a", 4))
+        await engine.index_repository(str(tmp_path))
+
+        assert len(chunk_nodes(engine, "a.py")) < before
+        assert_consistent(engine)
+
+    @pytest.mark.asyncio
+    async def test_removed_file(self, tmp_path):
+        engine = make_engine()
+        write(tmp_path / "a.py", lines("a", 10))
+        write(tmp_path / "b.py", lines("b", 10))
+        await engine.index_repository(str(tmp_path))
+
+        (tmp_path / "a.py").unlink()
+        stats = await engine.index_repository(str(tmp_path))
+
+        assert stats.files_removed == 1
+        assert engine.repo_graph.get_node(engine._generate_id(str(tmp_path / "a.py"))) is None
+        assert not chunk_nodes(engine, "a.py")
+        assert_consistent(engine)
+
+    @pytest.mark.asyncio
+    async def test_roots_sharing_relative_paths(self, tmp_path):
+        engine = make_engine()
+        repo_a, repo_b = tmp_path / "repoA", tmp_path / "repoB"
+        for repo, prefix in ((repo_a, "a"), (repo_b, "b")):
+            repo.mkdir()
+            write(repo / "README.md", lines(prefix, 10))
+
+        await engine.index_repository(str(repo_a))
+        await engine.index_repository(str(repo_b))
+
+        readmes = chunk_nodes(engine, "README.md")
+        assert {n.metadata["file"] for n in readmes} == {
+            str(repo_a / "README.md"),
+            str(repo_b / "README.md"),
+        }
+        assert len(engine.vector_store) == len(readmes)
+        assert_consistent(engine)
+
+        # Re-indexing one root leaves the other's nodes alone
+        write(repo_a / "README.md", lines("A", 10))
+        await engine.index_repository(str(repo_a))
+
+        file_b = engine._generate_id(str(repo_b / "README.md"))
+        contains = engine.repo_graph.get_neighbors(file_b, EdgeType.CONTAINS)
+        assert contains
+        assert all(engine.read_content(n).startswith("b") for n in contains)
+        assert_consistent(engine)
+
+
+class TestSkippedFiles:
+    """Test files that stop being indexable"""
+
+    @pytest.mark.asyncio
+    async def test_file_growing_past_limit_is_unindexed(self, tmp_path):
+        engine = make_engine(max_file_bytes=1024)
+        write(tmp_path / "a.py", lines("a", 10))
+        write(tmp_path / "b.py", lines("b", 10))
+        await engine.index_repository(str(tmp_path))
+
+        write(tmp_path / "a.py", lines("a", 200))
+        stats = await engine.index_repository(str(tmp_path))
+
+        assert stats.files_skipped == 1
+        assert engine.repo_graph.get_node(engine._generate_id(str(tmp_path / "a.py"))) is None
+        assert not chunk_nodes(engine, "a.py")
+        assert chunk_nodes(engine, "b.py")
+        assert_consistent(engine)
+
+        # Shrinking back below the limit indexes it again
+        write(tmp_path / "a.py", lines("a", 10))
+        stats = await engine.index_repository(str(tmp_path))
+        assert stats.files_indexed == 1
+        assert chunk_nodes(engine, "a.py")
+        assert_consistent(engine)
+
+    @pytest.mark.asyncio
+    async def test_file_becoming_binary_is_unindexed(self, tmp_path):
+        engine = make_engine()
+        write(tmp_path / "a.py", lines("a", 10))
+        await engine.index_repository(str(tmp_path))
+
+        write(tmp_path / "a.py", b"\x00\x01binary" * 10)
+        stats = await engine.index_repository(str(tmp_path))
+
+        assert stats.files_skipped == 1
+        assert len(engine.vector_store) == 0
+        assert engine.repo_graph.nodes == {}
+        assert engine.repo_graph.edges == []
+        assert_consistent(engine)
+
+    @pytest.mark.asyncio
+    async def test_search_only_returns_current_chunks(self, tmp_path):
+        engine = make_engine(max_file_bytes=1024)
+        write(tmp_path / "a.py", lines("alpha", 5))
+        write(tmp_path / "b.py", lines("beta", 5))
+        await engine.index_repository(str(tmp_path))
+
+        write(tmp_path / "a.py", lines("alpha", 200))
+        await engine.index_repository(str(tmp_path))
+
+        results = await engine.search("alpha line 0", top_k=10)
+        assert results
+        assert {r.node.path for r in results} == {"b.py"}
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Tests for ModelGateway middleware - response cache, request coalescing,
+provider limits and latency-aware routing
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from core.island_ai_runtime.model_gateway import (
+    BaseModelClient,
+    CompletionRequest,
+    CompletionResponse,
+    ModelGateway,
+    ModelProvider,
+    ProviderLimiter,
+    TokenBucket,
+)
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+class StubClient(BaseModelClient):
+    """Local stub client that records calls"""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def complete(self, request: CompletionRequest) -> CompletionResponse:
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError(f"{self.name} unavailable")
+            return CompletionResponse(
+                content=f"{self.name}:{request.messages[-1]['content']}",
+                model=request.model or self.name,
+                usage={"prompt_tokens": 1, "completion_tokens": 1},
+                finish_reason="stop",
+            )
+        finally:
+            self.active -= 1
+
+    async def stream(self, request: CompletionRequest):
+        yield self.name
+
+
+def create_gateway(**config) -> tuple[ModelGateway, StubClient]:
+    gateway = ModelGateway(config)
+    stub = StubClient("openai", delay=0.01)
+    gateway.register_client(ModelProvider.OPENAI, stub)
+    gateway.clients.pop(ModelProvider.ANTHROPIC)
+    return gateway, stub
+
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class TestResponseCache:
+    """Test deterministic response caching"""
+
+    @pytest.mark.asyncio
+    async def test_deterministic_requests_are_cached(self):
+        gateway, stub = create_gateway()
+
+        first = await gateway.complete(MESSAGES, model="gpt-4o", temperature=0)
+        second = await gateway.complete(MESSAGES, model="gpt-4o", temperature=0)
+
+        assert first.content == second.content == "openai:hello"
+        assert stub.calls == 1
+        assert gateway.get_stats()["cache"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sampled_requests_bypass_cache(self):
+        gateway, stub = create_gateway()
+
+        await gateway.complete(MESSAGES, model="gpt-4o", temperature=0.7)
+        await gateway.complete(MESSAGES, model="gpt-4o", temperature=0.7)
+
+        assert stub.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_tier_survives_restart(self, tmp_path):
+        config = {"cache": {"disk_path": str(tmp_path / "responses.db")}}
+        gateway, stub = create_gateway(**config)
+        await gateway.complete(MESSAGES, temperature=0)
+        gateway.close()
+
+        gateway, stub = create_gateway(**config)
+        response = await gateway.complete(MESSAGES, temperature=0)
+
+        assert response.content == "openai:hello"
+        assert stub.calls == 0
+        assert gateway.cache.disk_hits == 1
+        gateway.close()
+
+    @pytest.mark.asyncio
+    async def test_cache_write_failure_keeps_response(self, caplog):
+        gateway, stub = create_gateway()
+
+        async def broken_set(key, response):
+            raise OSError("disk full")
+
+        gateway.cache.set = broken_set
+        with caplog.at_level(logging.WARNING):
+            response = await gateway.complete(MESSAGES, temperature=0)
+
+        assert response.content == "openai:hello"
+        assert "disk full" in caplog.text
+        assert gateway.get_stats()["in_flight"] == 0
+
+
+class TestCoalescing:
+    """Test single-flight coalescing"""
+
+    @pytest.mark.asyncio
+    async def test_identical_in_flight_requests_are_coalesced(self):
+        gateway, stub = create_gateway(cache={"enabled": False})
+
+        responses = await asyncio.gather(
+            *(gateway.complete(MESSAGES, temperature=0) for _ in range(10))
+        )
+
+        assert stub.calls == 1
+        assert gateway.coalesced == 9
+        assert {r.content for r in responses} == {"openai:hello"}
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_waiters(self):
+        gateway = ModelGateway({"routing": {"fallback_enabled": False}})
+        gateway.register_client(ModelProvider.OPENAI, StubClient("openai", 0.01, True))
+
+        results = await asyncio.gather(
+            *(gateway.complete(MESSAGES, temperature=0) for _ in range(3)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_fail_followers(self):
+        gateway, stub = create_gateway(cache={"enabled": False})
+        stub.delay = 0.05
+
+        leader = asyncio.create_task(gateway.complete(MESSAGES, temperature=0))
+        await asyncio.sleep(0)
+        followers = [
+            asyncio.create_task(gateway.complete(MESSAGES, temperature=0)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        responses = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        assert stub.calls == 1
+        assert {r.content for r in responses} == {"openai:hello"}
+        assert gateway.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_request_cancelled_once_no_caller_waits(self):
+        gateway, stub = create_gateway(cache={"enabled": False})
+        stub.delay = 1.0
+
+        callers = [
+            asyncio.create_task(gateway.complete(MESSAGES, temperature=0)) for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert stub.active == 0
+        assert gateway.get_stats()["in_flight"] == 0
+        # A new request starts a fresh dispatch instead of joining the cancelled one
+        stub.delay = 0.0
+        response = await gateway.complete(MESSAGES, temperature=0)
+        assert response.content == "openai:hello"
+
+
+class TestProviderLimits:
+    """Test per-provider concurrency and rate limits"""
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        gateway, stub = create_gateway()
+        gateway.limiters[ModelProvider.OPENAI] = ProviderLimiter(max_concurrency=2)
+
+        await asyncio.gather(
+            *(
+                gateway.complete([{"role": "user", "content": str(i)}], temperature=0)
+                for i in range(8)
+            )
+        )
+
+        assert stub.calls == 8
+        assert stub.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_rate(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+
+        assert time.monotonic() - started >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_overlapping_calls_are_timed_separately(self):
+        limiter = ProviderLimiter()
+        samples = []
+        limiter.record_latency = samples.append
+
+        async def call(start: float, duration: float) -> None:
+            await asyncio.sleep(start)
+            async with limiter.slot():
+                await asyncio.sleep(duration)
+
+        await asyncio.gather(call(0.0, 0.1), call(0.05, 0.01))
+
+        assert sorted(samples)[0] < 0.05
+        assert sorted(samples)[1] >= 0.09
+        assert (limiter.requests, limiter.in_flight) == (2, 0)
+
+    @pytest.mark.asyncio
+    async def test_cancellation_is_not_a_provider_error(self):
+        limiter = ProviderLimiter(max_concurrency=1)
+
+        async def call() -> None:
+            async with limiter.slot():
+                await asyncio.sleep(1)
+
+        task = asyncio.create_task(call())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert (limiter.errors, limiter.error_rate, limiter.in_flight) == (0, 0.0, 0)
+        assert limiter.routing_score is None
+        # The slot was released
+        async with limiter.slot():
+            pass
+
+    @pytest.mark.asyncio
+    async def test_stream_closed_early_is_not_a_provider_error(self):
+        gateway, _ = create_gateway()
+
+        stream = gateway.stream(MESSAGES)
+        async for _ in stream:
+            break
+        await stream.aclose()
+
+        limiter = gateway.limiters[ModelProvider.OPENAI]
+        assert (limiter.errors, limiter.error_rate, limiter.in_flight) == (0, 0.0, 0)
+
+
+class TestRouting:
+    """Test latency-aware routing and failover"""
+
+    @pytest.mark.asyncio
+    async def test_performance_routing_prefers_faster_provider(self):
+        gateway = ModelGateway(
+            {"routing": {"strategy": "performance"}, "cache": {"enabled": False}}
+        )
+        slow = StubClient("openai", delay=0.03)
+        fast = StubClient("anthropic", delay=0.0)
+        gateway.register_client(ModelProvider.OPENAI, slow)
+        gateway.register_client(ModelProvider.ANTHROPIC, fast)
+
+        for i in range(6):
+            await gateway.complete([{"role": "user", "content": str(i)}])
+
+        assert fast.calls > slow.calls
+
+    @pytest.mark.asyncio
+    async def test_performance_routing_avoids_failing_provider(self):
+        gateway = ModelGateway(
+            {"routing": {"strategy": "performance"}, "cache": {"enabled": False}}
+        )
+        failing = StubClient("openai", fail=True)
+        slow = StubClient("anthropic", delay=0.02)
+        gateway.register_client(ModelProvider.OPENAI, failing)
+        gateway.register_client(ModelProvider.ANTHROPIC, slow)
+
+        for i in range(6):
+            response = await gateway.complete([{"role": "user", "content": str(i)}])
+            assert response.content.startswith("anthropic:")
+
+        # Only the first request probes the failing provider
+        assert failing.calls == 1
+        assert gateway.get_stats()["providers"]["openai"]["error_rate"] > 0
+
+    @pytest.mark.asyncio
+    async def test_performance_routing_probes_untried_provider(self):
+        gateway = ModelGateway({"routing": {"strategy": "performance"}})
+        async with gateway.limiters[ModelProvider.OPENAI].slot():
+            pass
+
+        assert gateway._route(None) == [ModelProvider.ANTHROPIC, ModelProvider.OPENAI]
+
+    @pytest.mark.asyncio
+    async def test_failover_to_next_provider(self):
+        gateway = ModelGateway()
+        gateway.register_client(ModelProvider.OPENAI, StubClient("openai", fail=True))
+        gateway.register_client(ModelProvider.ANTHROPIC, StubClient("anthropic"))
+
+        response = await gateway.complete(MESSAGES)
+
+        assert response.content == "anthropic:hello"
+        assert gateway.get_stats()["providers"]["openai"]["errors"] == 1
+
+    def test_configured_models_route_to_their_provider(self):
+        gateway = ModelGateway(
+            {
+                "providers": {
+                    "openai": {"enabled": True, "models": [{"id": "shared"}]},
+                    "anthropic": {"enabled": True, "models": [{"id": "shared"}]},
+                }
+            }
+        )
+
+        assert gateway._route("shared") == [
+            ModelProvider.OPENAI,
+            ModelProvider.ANTHROPIC,
+        ]
+        assert gateway._route("claude-sonnet-4-20250514") == [ModelProvider.ANTHROPIC]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
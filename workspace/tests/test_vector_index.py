@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Tests for VectorIndex - exact and IVF search, input handling and persistence
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.island_ai_runtime.vector_index import VectorIndex  # noqa: E402
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def clustered(count: int, dimension: int = 16, clusters: int = 8, seed: int = 1):
+    """Unit-norm vectors spread around a few random directions"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension))
+    vectors = centers[rng.integers(clusters, size=count)] + 0.1 * rng.normal(
+        size=(count, dimension)
+    )
+    return vectors.astype(np.float32)
+
+
+class TestUpsert:
+    """Test writes"""
+
+    def test_upsert_many_does_not_modify_caller_array(self):
+        vectors = np.array([[3.0, 4.0], [0.0, 2.0]], dtype=np.float32)
+        original = vectors.copy()
+        index = VectorIndex()
+
+        index.upsert_many(["a", "b"], vectors)
+
+        np.testing.assert_array_equal(vectors, original)
+        assert index.get("a") == pytest.approx([0.6, 0.8])
+        assert index.get("b") == pytest.approx([0.0, 1.0])
+
+    def test_read_only_input(self):
+        vectors = np.ones((2, 3), dtype=np.float32)
+        vectors.setflags(write=False)
+        index = VectorIndex()
+
+        index.upsert_many(["a", "b"], vectors)
+
+        assert len(index) == 2
+
+    def test_update_and_delete(self):
+        index = VectorIndex(mode="exact")
+        index.upsert_many(["a", "b", "c"], [[1, 0], [0, 1], [1, 1]])
+        index.upsert("a", [0, -1])
+        assert index.delete("b")
+        assert not index.delete("b")
+
+        assert index.ids == ["a", "c"]
+        assert index.search([0, -1], top_k=1) == [("a", pytest.approx(1.0))]
+
+    def test_dimension_mismatch(self):
+        index = VectorIndex()
+        index.upsert("a", [1.0, 0.0])
+
+        with pytest.raises(ValueError):
+            index.upsert("b", [1.0, 0.0, 0.0])
+        with pytest.raises(ValueError):
+            index.search([1.0])
+
+
+class TestSearch:
+    """Test exact and IVF search"""
+
+    def test_exact_matches_brute_force(self):
+        vectors = clustered(500)
+        queries = clustered(20, seed=2)
+        index = VectorIndex(mode="exact")
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+
+        results = index.search_batch(queries, top_k=5)
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        scores = (queries / np.linalg.norm(queries, axis=1, keepdims=True)) @ unit.T
+        for query_scores, found in zip(scores, results, strict=True):
+            expected = np.argsort(-query_scores)[:5]
+            assert [id for id, _ in found] == [f"v{i}" for i in expected]
+
+    def test_ivf_with_all_lists_probed_is_exact(self):
+        vectors = clustered(1000)
+        queries = clustered(10, seed=3)
+        ids = [f"v{i}" for i in range(len(vectors))]
+        exact = VectorIndex(mode="exact")
+        exact.upsert_many(ids, vectors)
+        ivf = VectorIndex(mode="ivf", nlist=8, nprobe=8)
+        ivf.upsert_many(ids, vectors)
+
+        expected = exact.search_batch(queries, top_k=10)
+        found = ivf.search_batch(queries, top_k=10)
+
+        assert ivf.is_trained
+        assert [[id for id, _ in r] for r in found] == [[id for id, _ in r] for r in expected]
+
+    def test_auto_mode_switches_at_threshold(self):
+        index = VectorIndex(mode="auto", ann_threshold=200, nlist=4)
+        index.upsert_many([f"v{i}" for i in range(100)], clustered(100))
+        index.search(clustered(1, seed=4)[0])
+        assert not index.is_trained
+
+        index.upsert_many([f"w{i}" for i in range(150)], clustered(150, seed=5))
+        index.search(clustered(1, seed=4)[0])
+        assert index.is_trained
+
+
+class TestPersistence:
+    """Test save/load"""
+
+    def test_round_trip_keeps_ivf_settings(self, tmp_path):
+        vectors = clustered(400)
+        query = clustered(1, seed=6)[0]
+        index = VectorIndex(mode="ivf", nlist=6, nprobe=2)
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+        expected = index.search(query, top_k=5)
+
+        index.save(str(tmp_path))
+        loaded = VectorIndex.load(str(tmp_path))
+
+        assert (loaded.mode, loaded.nlist, loaded.nprobe) == ("ivf", 6, 2)
+        assert loaded.is_trained
+        assert loaded.search(query, top_k=5) == expected
+        # Explicit arguments override the saved settings
+        assert VectorIndex.load(str(tmp_path), nprobe=6).nprobe == 6
+
+    def test_loaded_index_accepts_writes(self, tmp_path):
+        index = VectorIndex(mode="exact")
+        index.upsert_many(["a", "b"], [[1, 0], [0, 1]])
+        index.save(str(tmp_path))
+
+        loaded = VectorIndex.load(str(tmp_path))
+        loaded.upsert_many(["a", "c"], [[0, 1], [-1, 0]])
+
+        assert loaded.ids == ["a", "b", "c"]
+        assert loaded.get("a") == pytest.approx([0.0, 1.0])
+        assert VectorIndex.load(str(tmp_path)).get("a") == pytest.approx([1.0, 0.0])
+
+    def test_save_over_loaded_directory(self, tmp_path):
+        vectors = clustered(300)
+        index = VectorIndex(mode="ivf", nlist=4)
+        index.upsert_many([f"v{i}" for i in range(len(vectors))], vectors)
+        index.save(str(tmp_path))
+
+        # In-place updates keep the matrix memory-mapped from the file being overwritten
+        loaded = VectorIndex.load(str(tmp_path))
+        loaded.upsert("v0", [0.0, 1.0] + [0.0] * 14)
+        loaded.delete("v1")
+        assert isinstance(loaded._matrix, np.memmap)
+        loaded.save(str(tmp_path))
+
+        reloaded = VectorIndex.load(str(tmp_path))
+        assert reloaded.ids == loaded.ids
+        np.testing.assert_allclose(reloaded._matrix, loaded._matrix[: len(loaded)])
+        assert reloaded.get("v0") == pytest.approx([0.0, 1.0] + [0.0] * 14)
+        assert "v1" not in reloaded
+        assert reloaded.search(vectors[5], top_k=3) == loaded.search(vectors[5], top_k=3)
+        assert not list(tmp_path.glob("*.tmp"))
+
+    def test_loads_version_1_metadata(self, tmp_path):
+        index = VectorIndex(mode="ivf", nlist=4)
+        index.upsert_many([f"v{i}" for i in range(100)], clustered(100))
+        index.train()
+        index.save(str(tmp_path))
+
+        meta_path = tmp_path / "index.json"
+        meta = json.loads(meta_path.read_text())
+        meta = {key: meta[key] for key in ("dimension", "count", "ids", "mode", "trained_count")}
+        meta.update(version=1, nlist=4)
+        meta_path.write_text(json.dumps(meta))
+
+        loaded = VectorIndex.load(str(tmp_path))
+        assert loaded.is_trained
+        assert len(loaded._centroids) == 4
+        assert loaded.nprobe == 16
@@ -5,12 +5,13 @@
 """
 
 import os
-import json
 import time
 import subprocess
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, open_knowledge_store
+
 class LightweightAutoMaintenance:
     def __init__(self, check_interval=300):
         """
@@ -20,7 +21,7 @@ class LightweightAutoMaintenance:
             check_interval: 檢查間隔（秒），默認5分鐘
         """
         self.check_interval = check_interval
-        self.knowledge_base_path = 'knowledge_base.json'
+        self.knowledge_base_path = DEFAULT_KNOWLEDGE_BASE
         self.last_maintenance_time = None
         self.maintenance_log = []
         
@@ -49,10 +50,11 @@ class LightweightAutoMaintenance:
         """檢測檔案系統變化"""
         try:
             # 比較當前檔案數量與知識庫記錄
-            with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
-                kb = json.load(f)
-            
-            recorded_files = len(kb.get('files', {}))
+            store = open_knowledge_store(self.knowledge_base_path)
+            if store is None:
+                return False
+            recorded_files = store.count_files()
+            store.close()
             
             # 簡單檢查：掃描當前目錄的檔案數
             current_file_count = 0
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+檔案變化事件流：以 watchdog（Linux 上為 inotify）接收檔案系統事件，
+合併同一路徑的連續事件並去抖動，再以批次回呼變化的路徑
+"""
+
+import os
+import time
+import fnmatch
+import threading
+from typing import Callable, Dict, Iterable, Optional
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+from phase1_scanner import EXCLUDED_DIRS
+
+DEFAULT_DEBOUNCE = 1.0  # 最後一個事件後靜止多久才送出批次（秒）
+DEFAULT_MAX_DELAY = 10.0  # 持續有事件時，批次最多延遲多久（秒）
+
+
+def merge_change(previous: Optional[str], change: str) -> Optional[str]:
+    """合併同一路徑的兩個事件；返回 None 表示互相抵銷（建立後又刪除）"""
+    if previous is None:
+        return change
+    if previous == 'created':
+        return None if change == 'deleted' else 'created'
+    if previous == 'deleted':
+        return 'modified' if change == 'created' else change
+    return 'deleted' if change == 'deleted' else 'modified'
+
+
+class ChangeFeed:
+    """將檔案系統事件合併為批次：{相對路徑: 'created' | 'modified' | 'deleted'}"""
+
+    def __init__(self, root_path, on_batch: Callable[[Dict[str, str]], None],
+                 debounce: float = DEFAULT_DEBOUNCE, max_delay: float = DEFAULT_MAX_DELAY,
+                 ignore_patterns: Iterable[str] = ()):
+        self.root_path = os.path.abspath(root_path)
+        self.on_batch = on_batch
+        self.debounce = debounce
+        self.max_delay = max_delay
+        # 絕對路徑的 fnmatch 模式，用於排除工具自己產生的檔案（知識庫、報告等）
+        self.ignore_patterns = [os.path.abspath(p) for p in ignore_patterns]
+        self.running = False
+        self.stats = {
+            'events_received': 0,
+            'events_coalesced': 0,
+            'events_ignored': 0,
+            'batches_emitted': 0,
+            'paths_emitted': 0
+        }
+        self._pending: Dict[str, str] = {}
+        self._first_event = None
+        self._last_event = None
+        self._cond = threading.Condition()
+        self._observer = None
+        self._thread = None
+
+    def start(self):
+        """啟動 watchdog 監控與批次送出線程"""
+        if not WATCHDOG_AVAILABLE:
+            raise RuntimeError("需要安裝 watchdog 套件: pip install watchdog")
+
+        self.running = True
+        self._observer = Observer()
+        self._observer.schedule(_ChangeFeedHandler(self), self.root_path, recursive=True)
+        self._observer.start()
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止監控，尚未送出的變化立即送出"""
+        with self._cond:
+            self.running = False
+            self._cond.notify()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def record(self, path: str, change: str):
+        """記錄單一事件（由 watchdog 線程呼叫）"""
+        rel_path = self._relative(path)
+        now = time.monotonic()
+        with self._cond:
+            if rel_path is None:
+                self.stats['events_ignored'] += 1
+                return
+            self.stats['events_received'] += 1
+            previous = self._pending.get(rel_path)
+            if previous is not None:
+                self.stats['events_coalesced'] += 1
+            merged = merge_change(previous, change)
+            if merged is None:
+                self._pending.pop(rel_path)
+            else:
+                self._pending[rel_path] = merged
+            if not self._pending:
+                self._first_event = None
+            elif self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+            self._cond.notify()
+
+    def flush(self):
+        """立即送出累積的變化"""
+        with self._cond:
+            batch = self._take()
+        if batch:
+            self._emit(batch)
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _relative(self, path: str) -> Optional[str]:
+        """轉換為相對路徑；根目錄外、隱藏、被排除或被忽略的路徑返回 None"""
+        path = os.path.abspath(path)
+        if any(fnmatch.fnmatch(path, pattern) for pattern in self.ignore_patterns):
+            return None
+        rel_path = os.path.relpath(path, self.root_path)
+        parts = rel_path.split(os.sep)
+        if parts[0] in ('.', '..') or any(p.startswith('.') or p in EXCLUDED_DIRS for p in parts):
+            return None
+        return rel_path
+
+    def _due(self, now: float) -> bool:
+        if not self._pending:
+            return False
+        return now - self._last_event >= self.debounce or now - self._first_event >= self.max_delay
+
+    def _wait_time(self, now: float) -> Optional[float]:
+        if not self._pending:
+            return None
+        deadline = min(self._last_event + self.debounce, self._first_event + self.max_delay)
+        return max(0.0, deadline - now)
+
+    def _take(self) -> Dict[str, str]:
+        batch = self._pending
+        self._pending = {}
+        self._first_event = self._last_event = None
+        return batch
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                while self.running and not self._due(time.monotonic()):
+                    self._cond.wait(self._wait_time(time.monotonic()))
+                if not self.running:
+                    return
+                batch = self._take()
+            self._emit(batch)
+
+    def _emit(self, batch: Dict[str, str]):
+        self.stats['batches_emitted'] += 1
+        self.stats['paths_emitted'] += len(batch)
+        try:
+            self.on_batch(batch)
+        except Exception as e:
+            print(f"❌ 變化批次處理錯誤: {e}")
+
+
+class _ChangeFeedHandler(FileSystemEventHandler):
+    """將 watchdog 事件轉為 ChangeFeed 記錄；目錄的 modified 事件只代表內容列表變化，予以略過"""
+
+    def __init__(self, feed: ChangeFeed):
+        super().__init__()
+        self.feed = feed
+
+    def on_created(self, event):
+        self.feed.record(event.src_path, 'created')
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.feed.record(event.src_path, 'modified')
+
+    def on_deleted(self, event):
+        self.feed.record(event.src_path, 'deleted')
+
+    def on_moved(self, event):
+        self.feed.record(event.src_path, 'deleted')
+        self.feed.record(event.dest_path, 'created')
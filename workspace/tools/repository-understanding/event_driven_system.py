@@ -5,7 +5,6 @@
 """
 
 import os
-import json
 import time
 import subprocess
 import hashlib
@@ -16,6 +15,24 @@ from collections import defaultdict, deque
 from typing import Dict, List, Callable, Any
 import queue
 
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, open_knowledge_store
+from phase1_scanner import RepositoryScanner, default_root_path
+from change_feed import WATCHDOG_AVAILABLE, ChangeFeed
+
+# 工具自己產生的檔案，變化事件流忽略這些路徑以免形成回饋循環
+GENERATED_FILES = [
+    DEFAULT_KNOWLEDGE_BASE + '*',
+    'knowledge_base_backup_*',
+    'scan_manifest.json',
+    'phase*_report.md',
+    '*.log'
+]
+MAX_PATCH_PATHS = 500  # 單一批次超過此數量時改為增量掃描，而非逐路徑更新
+POLL_INTERVAL = timedelta(minutes=1)  # 沒有 watchdog 時的增量掃描間隔
+
+# 序列化所有寫入知識庫的操作（事件處理器在多個工作線程中執行）
+knowledge_base_lock = threading.Lock()
+
 class Event:
     """事件基類"""
     def __init__(self, event_type: str, data: Dict = None, priority: int = 5):
@@ -34,7 +51,8 @@ class Event:
 class EventDrivenAutomationSystem:
     """完全事件驅動的自動化系統"""
     
-    def __init__(self):
+    def __init__(self, watch_path=None):
+        self.watch_path = Path(watch_path) if watch_path else default_root_path()
         self.event_queue = queue.PriorityQueue()
         self.event_handlers = defaultdict(list)
         self.event_history = deque(maxlen=1000)
@@ -45,7 +63,10 @@ class EventDrivenAutomationSystem:
         # 系統狀態
         self.last_system_check = None
         self.last_maintenance = None
-        self.file_hashes = {}
+        self.last_poll = None
+        self.change_feed = None
+        # 知識庫更新失敗時標記為過期，由健康檢查觸發完整維護
+        self.knowledge_base_stale = False
         self.system_metrics = {
             'events_processed': 0,
             'events_generated': 0,
@@ -105,6 +126,9 @@ class EventDrivenAutomationSystem:
             self.worker_threads.append(worker)
             print(f"👷 工作線程 {i+1} 已啟動")
         
+        # 啟動檔案變化事件流
+        self._start_change_feed()
+        
         # 啟動事件生成器
         self.monitoring_active = True
         generator_thread = threading.Thread(target=self._event_generator_loop)
@@ -121,6 +145,9 @@ class EventDrivenAutomationSystem:
         print("\n🛑 停止事件驅動系統...")
         self.running = False
         self.monitoring_active = False
+        if self.change_feed is not None:
+            self.change_feed.stop()
+            self.change_feed = None
         print("✅ 系統已停止")
     
     def _worker_loop(self, worker_id: int):
@@ -146,8 +173,9 @@ class EventDrivenAutomationSystem:
                 # 定期生成系統檢查事件
                 self._generate_system_check_events()
                 
-                # 監控檔案變化
-                self._monitor_file_changes()
+                # 沒有 watchdog 時以增量掃描偵測檔案變化
+                if self.change_feed is None:
+                    self._poll_file_changes()
                 
                 # 監控系統健康
                 self._monitor_system_health()
@@ -171,54 +199,68 @@ class EventDrivenAutomationSystem:
             }))
             self.last_system_check = now
     
-    def _monitor_file_changes(self):
-        """監控檔案變化"""
-        try:
-            # 檢查關鍵檔案的變化
-            key_files = [
-                'knowledge_base.json',
-                'phase1_report.md',
-                'phase2_report.md',
-                'phase3_report.md',
-                'phase4_report.md'
-            ]
-            
-            for file_path in key_files:
-                if os.path.exists(file_path):
-                    current_hash = self._calculate_file_hash(file_path)
-                    
-                    if file_path in self.file_hashes:
-                        if self.file_hashes[file_path] != current_hash:
-                            self.emit_event(Event('file_changed', {
-                                'file_path': file_path,
-                                'old_hash': self.file_hashes[file_path],
-                                'new_hash': current_hash,
-                                'change_type': 'modified'
-                            }))
-                    else:
-                        self.emit_event(Event('file_detected', {
-                            'file_path': file_path,
-                            'file_hash': current_hash
-                        }))
-                    
-                    self.file_hashes[file_path] = current_hash
+    def _start_change_feed(self):
+        """以 watchdog 監控儲存庫，變化合併後以批次的 file_changed 事件發出"""
+        if not WATCHDOG_AVAILABLE:
+            print("⚠️  未安裝 watchdog，改為定期增量掃描 (pip install watchdog)")
+            return
+        
+        self.change_feed = ChangeFeed(self.watch_path, self._emit_file_changes, ignore_patterns=GENERATED_FILES)
+        self.change_feed.start()
+        print(f"👁️  檔案變化事件流已啟動: {self.watch_path}")
+    
+    def _emit_file_changes(self, changes: Dict[str, str], applied: bool = False):
+        """發出一個攜帶所有變化路徑的 file_changed 事件"""
+        self.emit_event(Event('file_changed', {
+            'paths': sorted(changes),
+            'changes': changes,
+            'change_type': 'batch',
+            'applied': applied
+        }, priority=4))
+    
+    def _poll_file_changes(self):
+        """沒有 watchdog 時的回退：定期執行增量掃描（比對 stat，不重新計算雜湊）"""
+        now = datetime.now()
+        if self.last_poll and now - self.last_poll < POLL_INTERVAL:
+            return
+        self.last_poll = now
         
+        if not os.path.exists(DEFAULT_KNOWLEDGE_BASE):
+            return
+        
+        try:
+            with knowledge_base_lock:
+                scanner = RepositoryScanner(self.watch_path, DEFAULT_KNOWLEDGE_BASE)
+                scanner.scan(incremental=True)
+                if not scanner.has_changes():
+                    return
+                scanner.save_knowledge_base()
         except Exception as e:
             print(f"❌ 檔案監控錯誤: {e}")
+            return
+        
+        changes = {p: 'created' for p in scanner.changes['added']}
+        changes.update({p: 'modified' for p in scanner.changes['modified']})
+        changes.update({p: 'deleted' for p in scanner.changes['removed']})
+        if changes:
+            self._emit_file_changes(changes, applied=True)
     
     def _monitor_system_health(self):
         """監控系統健康"""
         try:
             # 檢查知識庫是否存在和有效
-            if os.path.exists('knowledge_base.json'):
+            if os.path.exists(DEFAULT_KNOWLEDGE_BASE):
                 try:
-                    with open('knowledge_base.json', 'r') as f:
-                        kb = json.load(f)
+                    store = open_knowledge_store(DEFAULT_KNOWLEDGE_BASE)
+                    if store is None:
+                        raise ValueError(f"無法開啟知識庫: {DEFAULT_KNOWLEDGE_BASE}")
+                    store.count_files()
+                    store.close()
                     
                     # 檢查知識庫是否需要更新
-                    if self._knowledge_base_needs_update(kb):
+                    if self._knowledge_base_needs_update():
                         self.emit_event(Event('knowledge_base_outdated', {
-                            'reason': 'file_system_changes_detected',
+                            'reason': 'knowledge_base_update_failed',
                             'timestamp': datetime.now().isoformat()
                         }))
                 
@@ -232,31 +274,12 @@ class EventDrivenAutomationSystem:
         except Exception as e:
             print(f"❌ 系統健康檢查錯誤: {e}")
     
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """計算檔案哈希值"""
-        try:
-            with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read()).hexdigest()[:16]
-        except Exception:
-            return ""
-    
-    def _knowledge_base_needs_update(self, kb: Dict) -> bool:
-        """檢查知識庫是否需要更新"""
-        # 簡單檢查：比較檔案數量
-        recorded_files = len(kb.get('files', {}))
-        
-        # 掃描當前檔案數量
-        current_file_count = 0
-        try:
-            for root, dirs, files in os.walk('.'):
-                dirs[:] = [d for d in dirs if not d.startswith('.') and 
-                           d not in ['__pycache__', 'node_modules', '.git']]
-                current_file_count += len([f for f in files if not f.startswith('.')])
-        except Exception:
-            pass
-        
-        # 如果變化超過5%，認為需要更新
-        return abs(current_file_count - recorded_files) > recorded_files * 0.05
+    def _knowledge_base_needs_update(self) -> bool:
+        """檢查知識庫是否需要更新
+
+        檔案變化由事件流即時寫入知識庫，只有更新失敗時才需要完整維護。
+        """
+        return self.knowledge_base_stale
     
     def get_system_status(self) -> Dict:
         """獲取系統狀態"""
@@ -269,7 +292,8 @@ class EventDrivenAutomationSystem:
             'maintenance_runs': self.system_metrics['maintenance_runs'],
             'errors_detected': self.system_metrics['errors_detected'],
             'active_handlers': len(self.event_handlers),
-            'history_size': len(self.event_history)
+            'history_size': len(self.event_history),
+            'change_feed': dict(self.change_feed.stats) if self.change_feed else None
         }
 
 
@@ -286,15 +310,24 @@ def handle_system_check(data: Dict):
         print("✅ 系統正常，無需維護")
 
 def handle_file_changed(data: Dict):
-    """處理檔案變化事件"""
-    file_path = data.get('file_path')
-    change_type = data.get('change_type', 'unknown')
+    """處理檔案變化事件：依事件攜帶的路徑就地更新知識庫，而非重新執行所有階段"""
+    paths = data.get('paths') or ([data['file_path']] if data.get('file_path') else [])
+    
+    print(f"📄 檔案變化: {len(paths)} 個路徑")
     
-    print(f"📄 檔案變化: {file_path} ({change_type})")
+    # 回退的增量掃描已寫入知識庫
+    if data.get('applied'):
+        return
     
-    # 如果是關鍵檔案變化，觸發維護
-    if file_path in ['knowledge_base.json', 'phase4_report.md']:
-        emit_maintenance_event('file_change_triggered')
+    if not os.path.exists(DEFAULT_KNOWLEDGE_BASE):
+        emit_maintenance_event('knowledge_missing', priority=1)
+        return
+    
+    try:
+        patch_knowledge_base(paths)
+    except Exception:
+        system.knowledge_base_stale = True
+        raise
 
 def handle_knowledge_base_outdated(data: Dict):
     """處理知識庫過期事件"""
@@ -326,10 +359,12 @@ def handle_maintenance(data: Dict):
     
     try:
         # 執行四個階段
-        run_phase1()
-        run_phase2()
-        run_phase3()
-        run_phase4()
+        with knowledge_base_lock:
+            run_phase1()
+            run_phase2()
+            run_phase3()
+            run_phase4()
+        system.knowledge_base_stale = False
         
         print("✅ 維護完成")
         
@@ -356,10 +391,23 @@ def emit_error_event(source: str, error: str):
         'error_message': error
     }, priority=1))
 
+def patch_knowledge_base(paths: List[str]):
+    """只重新掃描變化路徑所在的目錄；路徑過多時改為增量掃描"""
+    with knowledge_base_lock:
+        scanner = RepositoryScanner(system.watch_path, DEFAULT_KNOWLEDGE_BASE)
+        if len(paths) > MAX_PATCH_PATHS:
+            completed = scanner.scan(incremental=True)
+        else:
+            completed = scanner.apply_changes(paths)
+        if not completed:
+            raise Exception("知識庫更新失敗")
+        if scanner.has_changes():
+            scanner.save_knowledge_base()
+
 def needs_maintenance() -> bool:
     """檢查是否需要維護"""
     # 檢查知識庫
-    if not os.path.exists('knowledge_base.json'):
+    if not os.path.exists(DEFAULT_KNOWLEDGE_BASE):
         return True
     
     # 檢查最近維護時間
@@ -412,7 +460,6 @@ def initialize_event_driven_system():
     # 註冊事件處理器
     system.register_handler('system_check', handle_system_check, priority=5)
     system.register_handler('file_changed', handle_file_changed, priority=4)
-    system.register_handler('file_detected', handle_file_changed, priority=4)
     system.register_handler('knowledge_base_outdated', handle_knowledge_base_outdated, priority=3)
     system.register_handler('knowledge_base_missing', handle_knowledge_base_missing, priority=1)
     system.register_handler('error', handle_error, priority=1)
@@ -457,6 +504,10 @@ def show_system_status():
     print(f"錯誤檢測: {status['errors_detected']}")
     print(f"活躍處理器: {status['active_handlers']}")
     print(f"歷史記錄: {status['history_size']}")
+    if status['change_feed']:
+        feed = status['change_feed']
+        print(f"檔案事件: {feed['events_received']} (合併 {feed['events_coalesced']}, "
+              f"批次 {feed['batches_emitted']})")
     print("="*60 + "\n")
 
 def main():
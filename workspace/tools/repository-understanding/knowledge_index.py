@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+知識庫二級索引：載入時建立一次，讓查詢變成雜湊查找而非全表掃描
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+
+class KnowledgeIndex:
+    """知識庫的二級索引
+
+    - directory -> 檔案 / 子目錄
+    - type -> 檔案
+    - purpose -> 目錄
+    - critical category -> 檔案集合
+    """
+
+    CRITICAL_CATEGORIES = ['bootstrap', 'security', 'build', 'entry_points']
+
+    def __init__(self, knowledge_base: Optional[Dict] = None):
+        self.directory_files: Dict[str, List[str]] = defaultdict(list)
+        self.directory_children: Dict[str, List[str]] = defaultdict(list)
+        self.type_files: Dict[str, List[str]] = defaultdict(list)
+        self.purpose_directories: Dict[str, List[str]] = defaultdict(list)
+        self.critical_by_category: Dict[str, Set[str]] = {}
+        self.critical_files: Set[str] = set()
+        # 包含關鍵檔案的目錄（刪除這些目錄等同刪除其中的關鍵檔案）
+        self.critical_ancestors: Set[str] = set()
+        self.category_ancestors: Dict[str, Set[str]] = {}
+        if knowledge_base:
+            self.build(knowledge_base)
+
+    def build(self, knowledge_base: Dict):
+        """以單次遍歷建立所有索引"""
+        self.directory_files.clear()
+        self.directory_children.clear()
+        self.type_files.clear()
+        self.purpose_directories.clear()
+
+        for file_path, file_info in knowledge_base.get('files', {}).items():
+            self.directory_files[file_info.get('directory')].append(file_path)
+            self.type_files[file_info.get('type')].append(file_path)
+
+        for dir_path, dir_info in knowledge_base.get('directories', {}).items():
+            parent = dir_info.get('parent')
+            self.directory_children['.' if parent == 'root' else parent].append(dir_path)
+            self.purpose_directories[dir_info.get('purpose')].append(dir_path)
+
+        self.critical_by_category = {
+            category: set(paths)
+            for category, paths in knowledge_base.get('critical_files_by_category', {}).items()
+        }
+        self.critical_files = set(knowledge_base.get('critical_files', []))
+        self.critical_ancestors = self._ancestors(self.critical_files)
+        self.category_ancestors = {
+            category: self._ancestors(paths) for category, paths in self.critical_by_category.items()
+        }
+
+    @staticmethod
+    def _ancestors(paths) -> Set[str]:
+        ancestors = set()
+        for path in paths:
+            parent = os.path.dirname(path)
+            while parent and parent not in ancestors:
+                ancestors.add(parent)
+                parent = os.path.dirname(parent)
+        return ancestors
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        """統一路徑格式，使 './a/b' 與 'a/b' 查找到同一項目"""
+        return os.path.normpath(str(path))
+
+    def files_in(self, directory: str) -> List[str]:
+        return self.directory_files.get(self.normalize(directory), [])
+
+    def subdirectories_of(self, directory: str) -> List[str]:
+        return self.directory_children.get(self.normalize(directory), [])
+
+    def files_of_type(self, file_type: str) -> List[str]:
+        return self.type_files.get(file_type, [])
+
+    def directories_with_purpose(self, purpose: str) -> List[str]:
+        return self.purpose_directories.get(purpose, [])
+
+    def is_critical(self, path: str) -> bool:
+        """檔案本身為關鍵檔案，或目錄中包含關鍵檔案"""
+        path = self.normalize(path)
+        return path in self.critical_files or path in self.critical_ancestors
+
+    def critical_category(self, path: str, categories: Optional[List[str]] = None) -> Optional[str]:
+        """返回檔案（或目錄內檔案）所屬的第一個關鍵類別（依 categories 順序）"""
+        path = self.normalize(path)
+        for category in categories or self.CRITICAL_CATEGORIES:
+            if (path in self.critical_by_category.get(category, ()) or
+                    path in self.category_ancestors.get(category, ())):
+                return category
+        return None
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+"""
+知識庫儲存後端：JSON（整檔）與 SQLite（WAL，逐列讀寫）
+
+各階段工具透過 open_knowledge_store() 取得後端，依副檔名選擇實作：
+- knowledge_base.json -> JSONKnowledgeStore（相容既有格式）
+- knowledge_base.db   -> SQLiteKnowledgeStore（查詢與更新不需載入整個知識庫）
+
+遷移既有 JSON 知識庫：
+    python3 knowledge_store.py migrate knowledge_base.json knowledge_base.db
+"""
+
+import os
+import json
+import shutil
+import sqlite3
+import argparse
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from knowledge_index import KnowledgeIndex
+from dependency_graph import DEFAULT_IMPACT_LIMIT, DEFAULT_MAX_DEPTH, build_reverse_index, impacted_files
+
+DEFAULT_KNOWLEDGE_BASE = os.environ.get('KNOWLEDGE_BASE_PATH', 'knowledge_base.json')
+
+# 以獨立資料表儲存的區段，其餘頂層鍵（metadata、statistics 等）以 JSON 存入 sections 表
+TABLE_SECTIONS = ['files', 'directories', 'configurations', 'critical_files',
+                  'critical_files_by_category', 'learning_log', 'dependencies']
+
+
+class KnowledgeStore(ABC):
+    """知識庫儲存後端介面"""
+
+    path: str
+
+    # ---- 查詢 ----
+    @abstractmethod
+    def get_file(self, path: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def get_directory(self, path: str) -> Optional[Dict]:
+        pass
+
+    def get_files(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        return {p: info for p in paths if (info := self.get_file(p)) is not None}
+
+    def get_directories(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        return {p: info for p in paths if (info := self.get_directory(p)) is not None}
+
+    @abstractmethod
+    def files_in(self, directory: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    def files_under(self, directory: str) -> List[str]:
+        """目錄（含所有子目錄）下的檔案"""
+
+    @abstractmethod
+    def files_of_type(self, file_type: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    def directories_with_purpose(self, purpose: str) -> List[str]:
+        pass
+
+    @abstractmethod
+    def has_dependencies(self) -> bool:
+        """知識庫是否包含依賴圖（舊版知識庫沒有）"""
+
+    @abstractmethod
+    def dependencies_of(self, path: str) -> List[str]:
+        """檔案直接依賴的檔案"""
+
+    @abstractmethod
+    def dependents_of_many(self, paths: Iterable[str]) -> Dict[str, List[str]]:
+        """批次查詢直接依賴各檔案的檔案"""
+
+    def dependents_of(self, path: str) -> List[str]:
+        return self.dependents_of_many([path]).get(path, [])
+
+    def impacted_by(self, paths: Iterable[str], max_depth: int = DEFAULT_MAX_DEPTH,
+                    limit: int = DEFAULT_IMPACT_LIMIT) -> List[str]:
+        """直接或間接依賴 paths 的檔案（有界 BFS，依距離排序）"""
+        return impacted_files(self.dependents_of_many, [KnowledgeIndex.normalize(p) for p in paths],
+                              max_depth, limit)
+
+    @abstractmethod
+    def search_names(self, pattern: str) -> Tuple[List[str], List[str]]:
+        """不分大小寫的子字串搜尋，返回 (符合檔名的檔案, 符合路徑的目錄)"""
+
+    @abstractmethod
+    def is_critical(self, path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def critical_category(self, path: str, categories: Optional[List[str]] = None) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def file_paths(self) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def directory_paths(self) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def count_files(self) -> int:
+        pass
+
+    @abstractmethod
+    def count_directories(self) -> int:
+        pass
+
+    @abstractmethod
+    def count_by_type(self) -> Dict[str, int]:
+        pass
+
+    @abstractmethod
+    def count_by_purpose(self) -> Dict[str, int]:
+        pass
+
+    @abstractmethod
+    def get_section(self, key: str, default=None):
+        pass
+
+    # ---- 更新 ----
+    @abstractmethod
+    def set_section(self, key: str, value):
+        pass
+
+    @abstractmethod
+    def upsert_files(self, files: Dict[str, Dict]):
+        pass
+
+    @abstractmethod
+    def upsert_directories(self, directories: Dict[str, Dict]):
+        pass
+
+    @abstractmethod
+    def delete_files(self, paths: Iterable[str]):
+        pass
+
+    @abstractmethod
+    def delete_directories(self, paths: Iterable[str]):
+        pass
+
+    @abstractmethod
+    def upsert_configurations(self, configurations: Dict[str, object]):
+        pass
+
+    @abstractmethod
+    def delete_configurations(self, paths: Iterable[str]):
+        pass
+
+    @abstractmethod
+    def get_critical_categories(self) -> Dict[str, List[str]]:
+        pass
+
+    @abstractmethod
+    def set_critical_categories(self, categories: Dict[str, List[str]]):
+        pass
+
+    @abstractmethod
+    def append_learning_log(self, entry: Dict):
+        pass
+
+    @abstractmethod
+    def set_dependencies(self, forward: Dict[str, List[str]], replace: bool = False):
+        """取代 forward 中各檔案的依賴（空列表表示移除）；replace=True 時取代整個依賴圖"""
+
+    def update(self, updates: Dict):
+        """套用 ContinuousLearningSystem 格式的更新（字典區段合併，其餘覆寫）"""
+        for key, value in updates.items():
+            if key == 'files' and isinstance(value, dict):
+                self.upsert_files(value)
+            elif key == 'directories' and isinstance(value, dict):
+                self.upsert_directories(value)
+            elif key == 'configurations' and isinstance(value, dict):
+                self.upsert_configurations(value)
+            elif key == 'critical_files_by_category' and isinstance(value, dict):
+                merged = self.get_critical_categories()
+                merged.update(value)
+                self.set_critical_categories(merged)
+            elif key == 'dependencies' and isinstance(value, dict):
+                self.set_dependencies(value.get('forward', {}))
+            else:
+                current = self.get_section(key)
+                if isinstance(current, dict) and isinstance(value, dict):
+                    current.update(value)
+                    value = current
+                self.set_section(key, value)
+
+    # ---- 整體讀寫 ----
+    @abstractmethod
+    def load_all(self) -> Dict:
+        pass
+
+    @abstractmethod
+    def save_all(self, knowledge_base: Dict):
+        pass
+
+    def transaction(self):
+        """將多個更新合併為一次提交"""
+        return nullcontext()
+
+    def save(self):
+        """將未保存的變更寫入儲存體；預設不做任何事（每次更新即已提交的後端不需覆寫）"""
+        return None
+
+    @abstractmethod
+    def backup(self, backup_path: str):
+        pass
+
+    def close(self):
+        """釋放資源；預設不做任何事（不持有連線等資源的後端不需覆寫）"""
+        return None
+
+
+class JSONKnowledgeStore(KnowledgeStore):
+    """整檔 JSON 後端：載入時建立索引，保存時重寫整個檔案"""
+
+    def __init__(self, path: str, create: bool = False):
+        self.path = str(path)
+        if create and not os.path.exists(self.path):
+            self.data = {}
+        else:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        self._index = None
+
+    @property
+    def index(self) -> KnowledgeIndex:
+        if self._index is None:
+            self._index = KnowledgeIndex(self.data)
+        return self._index
+
+    def _invalidate(self):
+        self._index = None
+
+    def get_file(self, path):
+        return self.data.get('files', {}).get(path)
+
+    def get_directory(self, path):
+        return self.data.get('directories', {}).get(path)
+
+    def files_in(self, directory):
+        return self.index.files_in(directory)
+
+    def files_under(self, directory):
+        directory = KnowledgeIndex.normalize(directory)
+        if directory == '.':
+            return list(self.data.get('files', {}))
+        prefix = directory + os.sep
+        return [f for d, paths in self.index.directory_files.items()
+                if d == directory or d.startswith(prefix) for f in paths]
+
+    def files_of_type(self, file_type):
+        return self.index.files_of_type(file_type)
+
+    def directories_with_purpose(self, purpose):
+        return self.index.directories_with_purpose(purpose)
+
+    def has_dependencies(self):
+        return 'dependencies' in self.data
+
+    def dependencies_of(self, path):
+        return self.data.get('dependencies', {}).get('forward', {}).get(KnowledgeIndex.normalize(path), [])
+
+    def dependents_of_many(self, paths):
+        reverse = self.data.get('dependencies', {}).get('reverse', {})
+        return {p: reverse[p] for p in paths if p in reverse}
+
+    def search_names(self, pattern):
+        pattern = pattern.lower()
+        files = [p for p, info in self.data.get('files', {}).items() if pattern in info.get('name', '').lower()]
+        directories = [p for p in self.data.get('directories', {}) if pattern in p.lower()]
+        return files, directories
+
+    def is_critical(self, path):
+        return self.index.is_critical(path)
+
+    def critical_category(self, path, categories=None):
+        return self.index.critical_category(path, categories)
+
+    def file_paths(self):
+        return set(self.data.get('files', {}))
+
+    def directory_paths(self):
+        return set(self.data.get('directories', {}))
+
+    def count_files(self):
+        return len(self.data.get('files', {}))
+
+    def count_directories(self):
+        return len(self.data.get('directories', {}))
+
+    def count_by_type(self):
+        return {t: len(paths) for t, paths in self.index.type_files.items()}
+
+    def count_by_purpose(self):
+        return {p: len(paths) for p, paths in self.index.purpose_directories.items()}
+
+    def get_section(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set_section(self, key, value):
+        self.data[key] = value
+        self._invalidate()
+
+    def upsert_files(self, files):
+        self.data.setdefault('files', {}).update(files)
+        critical = self.data.setdefault('critical_files', [])
+        critical_set = set(critical)
+        for path, info in files.items():
+            if info.get('is_critical') and path not in critical_set:
+                critical.append(path)
+            elif not info.get('is_critical') and path in critical_set:
+                critical.remove(path)
+        self._invalidate()
+
+    def upsert_directories(self, directories):
+        self.data.setdefault('directories', {}).update(directories)
+        self._invalidate()
+
+    def delete_files(self, paths):
+        paths = set(paths)
+        files = self.data.get('files', {})
+        for path in paths:
+            files.pop(path, None)
+        self.data['critical_files'] = [p for p in self.data.get('critical_files', []) if p not in paths]
+        self._invalidate()
+
+    def delete_directories(self, paths):
+        directories = self.data.get('directories', {})
+        for path in paths:
+            directories.pop(path, None)
+        self._invalidate()
+
+    def upsert_configurations(self, configurations):
+        self.data.setdefault('configurations', {}).update(configurations)
+
+    def delete_configurations(self, paths):
+        configurations = self.data.get('configurations', {})
+        for path in paths:
+            configurations.pop(path, None)
+
+    def get_critical_categories(self):
+        return {c: list(paths) for c, paths in self.data.get('critical_files_by_category', {}).items()}
+
+    def set_critical_categories(self, categories):
+        self.data['critical_files_by_category'] = categories
+        self._invalidate()
+
+    def append_learning_log(self, entry):
+        self.data.setdefault('learning_log', []).append(entry)
+
+    def set_dependencies(self, forward, replace=False):
+        current = {} if replace else dict(self.data.get('dependencies', {}).get('forward', {}))
+        for path, targets in forward.items():
+            if targets:
+                current[path] = list(targets)
+            else:
+                current.pop(path, None)
+        self.data['dependencies'] = {'forward': current, 'reverse': build_reverse_index(current)}
+
+    def load_all(self):
+        return self.data
+
+    def save_all(self, knowledge_base):
+        self.data = knowledge_base
+        self._invalidate()
+        self.save()
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+
+    def backup(self, backup_path):
+        shutil.copy2(self.path, backup_path)
+
+
+class SQLiteKnowledgeStore(KnowledgeStore):
+    """SQLite (WAL) 後端：每個檔案/目錄/配置為一列，查詢與更新皆為索引化的單列操作"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            directory TEXT,
+            name TEXT,
+            type TEXT,
+            size INTEGER,
+            is_critical INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_files_directory ON files(directory);
+        CREATE INDEX IF NOT EXISTS idx_files_type ON files(type);
+        CREATE INDEX IF NOT EXISTS idx_files_critical ON files(is_critical);
+
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            parent TEXT,
+            purpose TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_directories_parent ON directories(parent);
+        CREATE INDEX IF NOT EXISTS idx_directories_purpose ON directories(purpose);
+
+        CREATE TABLE IF NOT EXISTS configurations (
+            path TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS critical_files (
+            category TEXT NOT NULL,
+            path TEXT NOT NULL,
+            PRIMARY KEY (category, path)
+        );
+        CREATE INDEX IF NOT EXISTS idx_critical_files_path ON critical_files(path);
+
+        CREATE TABLE IF NOT EXISTS learning_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            type TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_learning_log_type ON learning_log(type, timestamp);
+
+        CREATE TABLE IF NOT EXISTS dependencies (
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            PRIMARY KEY (source, target)
+        );
+        CREATE INDEX IF NOT EXISTS idx_dependencies_target ON dependencies(target);
+
+        CREATE TABLE IF NOT EXISTS sections (
+            key TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, create: bool = False):
+        self.path = str(path)
+        if not create and not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+        self._lock = threading.RLock()
+        self._depth = 0
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, rows):
+        with self.transaction():
+            self.conn.executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self):
+        """交易區塊；巢狀使用時由最外層提交"""
+        with self._lock:
+            outermost = self._depth == 0
+            self._depth += 1
+            try:
+                if outermost:
+                    with self.conn:
+                        yield
+                else:
+                    yield
+            finally:
+                self._depth -= 1
+
+    @staticmethod
+    def _dumps(value) -> str:
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    def get_file(self, path):
+        rows = self._query('SELECT data FROM files WHERE path = ?', (path,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_directory(self, path):
+        rows = self._query('SELECT data FROM directories WHERE path = ?', (path,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_files(self, paths):
+        return self._get_many('files', paths)
+
+    def get_directories(self, paths):
+        return self._get_many('directories', paths)
+
+    def _get_many(self, table, paths, batch_size=500):
+        paths = list(paths)
+        found = {}
+        for i in range(0, len(paths), batch_size):
+            batch = paths[i:i + batch_size]
+            placeholders = ','.join('?' * len(batch))
+            for path, data in self._query(f'SELECT path, data FROM {table} WHERE path IN ({placeholders})', batch):
+                found[path] = json.loads(data)
+        return {p: found[p] for p in paths if p in found}
+
+    def files_in(self, directory):
+        directory = KnowledgeIndex.normalize(directory)
+        return [r[0] for r in self._query('SELECT path FROM files WHERE directory = ? ORDER BY rowid', (directory,))]
+
+    def files_under(self, directory):
+        directory = KnowledgeIndex.normalize(directory)
+        if directory == '.':
+            return [r[0] for r in self._query('SELECT path FROM files ORDER BY rowid')]
+        low, high = self._subtree_range(directory)
+        return [r[0] for r in self._query('SELECT path FROM files WHERE path >= ? AND path < ? ORDER BY rowid',
+                                          (low, high))]
+
+    def files_of_type(self, file_type):
+        return [r[0] for r in self._query('SELECT path FROM files WHERE type = ? ORDER BY rowid', (file_type,))]
+
+    def directories_with_purpose(self, purpose):
+        return [r[0] for r in self._query('SELECT path FROM directories WHERE purpose = ? ORDER BY rowid', (purpose,))]
+
+    def has_dependencies(self):
+        return bool(self._query("SELECT 1 FROM sections WHERE key = 'dependency_graph'"))
+
+    def dependencies_of(self, path):
+        return [r[0] for r in self._query('SELECT target FROM dependencies WHERE source = ? ORDER BY rowid',
+                                          (KnowledgeIndex.normalize(path),))]
+
+    def dependents_of_many(self, paths, batch_size=500):
+        paths = list(paths)
+        dependents = {}
+        for i in range(0, len(paths), batch_size):
+            batch = paths[i:i + batch_size]
+            placeholders = ','.join('?' * len(batch))
+            for target, source in self._query(
+                    f'SELECT target, source FROM dependencies WHERE target IN ({placeholders}) ORDER BY rowid', batch):
+                dependents.setdefault(target, []).append(source)
+        return dependents
+
+    def search_names(self, pattern):
+        pattern = pattern.lower()
+        files = [r[0] for r in self._query(
+            'SELECT path FROM files WHERE instr(lower(name), ?) > 0 ORDER BY rowid', (pattern,))]
+        directories = [r[0] for r in self._query(
+            'SELECT path FROM directories WHERE instr(lower(path), ?) > 0 ORDER BY rowid', (pattern,))]
+        return files, directories
+
+    @staticmethod
+    def _subtree_range(path):
+        """目錄下所有路徑的字典序範圍 [path/, path0)，可使用主鍵索引"""
+        return path + os.sep, path + chr(ord(os.sep) + 1)
+
+    def is_critical(self, path):
+        """檔案本身為關鍵檔案，或目錄中包含關鍵檔案"""
+        path = KnowledgeIndex.normalize(path)
+        low, high = self._subtree_range(path)
+        rows = self._query('SELECT 1 FROM files WHERE is_critical = 1 AND (path = ? OR (path >= ? AND path < ?)) '
+                           'LIMIT 1', (path, low, high))
+        return bool(rows)
+
+    def critical_category(self, path, categories=None):
+        categories = categories or KnowledgeIndex.CRITICAL_CATEGORIES
+        path = KnowledgeIndex.normalize(path)
+        low, high = self._subtree_range(path)
+        found = {r[0] for r in self._query(
+            'SELECT DISTINCT category FROM critical_files WHERE path = ? OR (path >= ? AND path < ?)',
+            (path, low, high))}
+        return next((c for c in categories if c in found), None)
+
+    def file_paths(self):
+        return {r[0] for r in self._query('SELECT path FROM files')}
+
+    def directory_paths(self):
+        return {r[0] for r in self._query('SELECT path FROM directories')}
+
+    def count_files(self):
+        return self._query('SELECT COUNT(*) FROM files')[0][0]
+
+    def count_directories(self):
+        return self._query('SELECT COUNT(*) FROM directories')[0][0]
+
+    def count_by_type(self):
+        return dict(self._query('SELECT type, COUNT(*) FROM files GROUP BY type'))
+
+    def count_by_purpose(self):
+        return dict(self._query('SELECT purpose, COUNT(*) FROM directories GROUP BY purpose'))
+
+    def get_section(self, key, default=None):
+        rows = self._query('SELECT data FROM sections WHERE key = ?', (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def set_section(self, key, value):
+        self._write('INSERT INTO sections(key, data) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET data = excluded.data',
+                    [(key, self._dumps(value))])
+
+    def upsert_files(self, files):
+        self._write(
+            'INSERT INTO files(path, directory, name, type, size, is_critical, data) VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(path) DO UPDATE SET directory = excluded.directory, name = excluded.name, '
+            'type = excluded.type, size = excluded.size, is_critical = excluded.is_critical, data = excluded.data',
+            [(path, info.get('directory'), info.get('name'), info.get('type'), info.get('size'),
+              int(bool(info.get('is_critical'))), self._dumps(info)) for path, info in files.items()])
+
+    def upsert_directories(self, directories):
+        self._write(
+            'INSERT INTO directories(path, parent, purpose, data) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT(path) DO UPDATE SET parent = excluded.parent, purpose = excluded.purpose, '
+            'data = excluded.data',
+            [(path, info.get('parent'), info.get('purpose'), self._dumps(info))
+             for path, info in directories.items()])
+
+    def delete_files(self, paths):
+        self._write('DELETE FROM files WHERE path = ?', [(p,) for p in paths])
+
+    def delete_directories(self, paths):
+        self._write('DELETE FROM directories WHERE path = ?', [(p,) for p in paths])
+
+    def upsert_configurations(self, configurations):
+        self._write('INSERT INTO configurations(path, data) VALUES (?, ?) '
+                    'ON CONFLICT(path) DO UPDATE SET data = excluded.data',
+                    [(path, self._dumps(data)) for path, data in configurations.items()])
+
+    def delete_configurations(self, paths):
+        self._write('DELETE FROM configurations WHERE path = ?', [(p,) for p in paths])
+
+    def get_critical_categories(self):
+        categories = {c: [] for c in self.get_section('critical_categories', [])}
+        for category, path in self._query('SELECT category, path FROM critical_files ORDER BY rowid'):
+            categories.setdefault(category, []).append(path)
+        return categories
+
+    def set_critical_categories(self, categories):
+        with self.transaction():
+            self.conn.execute('DELETE FROM critical_files')
+            self.conn.executemany('INSERT OR IGNORE INTO critical_files(category, path) VALUES (?, ?)',
+                                  [(category, path) for category, paths in categories.items() for path in paths])
+            # 保留空類別，讓 load_all 能還原完整結構
+            self.conn.execute('INSERT INTO sections(key, data) VALUES (?, ?) '
+                              'ON CONFLICT(key) DO UPDATE SET data = excluded.data',
+                              ('critical_categories', self._dumps(list(categories))))
+
+    def append_learning_log(self, entry):
+        self._write('INSERT INTO learning_log(timestamp, type, data) VALUES (?, ?, ?)',
+                    [(entry.get('timestamp', datetime.now().isoformat()), entry.get('type'), self._dumps(entry))])
+
+    def set_dependencies(self, forward, replace=False):
+        with self.transaction():
+            if replace:
+                self.conn.execute('DELETE FROM dependencies')
+            else:
+                self.conn.executemany('DELETE FROM dependencies WHERE source = ?', [(p,) for p in forward])
+            self.conn.executemany('INSERT OR IGNORE INTO dependencies(source, target) VALUES (?, ?)',
+                                  [(source, target) for source, targets in forward.items() for target in targets])
+            # 標記依賴圖已建立，與「沒有任何依賴」區分
+            self.conn.execute("INSERT OR IGNORE INTO sections(key, data) VALUES ('dependency_graph', 'true')")
+
+    def get_learning_log(self, entry_type: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """依時間倒序讀取學習日誌"""
+        if entry_type:
+            rows = self._query('SELECT data FROM learning_log WHERE type = ? ORDER BY id DESC LIMIT ?',
+                               (entry_type, limit))
+        else:
+            rows = self._query('SELECT data FROM learning_log ORDER BY id DESC LIMIT ?', (limit,))
+        return [json.loads(r[0]) for r in rows]
+
+    def load_all(self):
+        knowledge_base = {}
+        for key, data in self._query('SELECT key, data FROM sections WHERE key NOT IN (?, ?)',
+                                     ('critical_categories', 'dependency_graph')):
+            knowledge_base[key] = json.loads(data)
+        knowledge_base['directories'] = {
+            p: json.loads(d) for p, d in self._query('SELECT path, data FROM directories ORDER BY rowid')}
+        knowledge_base['files'] = {
+            p: json.loads(d) for p, d in self._query('SELECT path, data FROM files ORDER BY rowid')}
+        knowledge_base['critical_files'] = [
+            r[0] for r in self._query('SELECT path FROM files WHERE is_critical = 1 ORDER BY rowid')]
+        knowledge_base['configurations'] = {
+            p: json.loads(d) for p, d in self._query('SELECT path, data FROM configurations ORDER BY rowid')}
+        knowledge_base['critical_files_by_category'] = self.get_critical_categories()
+        if self.has_dependencies():
+            forward = {}
+            for source, target in self._query('SELECT source, target FROM dependencies ORDER BY rowid'):
+                forward.setdefault(source, []).append(target)
+            knowledge_base['dependencies'] = {'forward': forward, 'reverse': build_reverse_index(forward)}
+        learning_log = [json.loads(r[0]) for r in self._query('SELECT data FROM learning_log ORDER BY id')]
+        if learning_log:
+            knowledge_base['learning_log'] = learning_log
+        return knowledge_base
+
+    def save_all(self, knowledge_base):
+        """以單一交易取代整個知識庫內容"""
+        with self.transaction():
+            for table in ['files', 'directories', 'configurations', 'critical_files', 'dependencies', 'sections',
+                          'learning_log']:
+                self.conn.execute(f'DELETE FROM {table}')
+            for key, value in knowledge_base.items():
+                if key not in TABLE_SECTIONS:
+                    self.set_section(key, value)
+            self.upsert_directories(knowledge_base.get('directories', {}))
+            self.upsert_files(knowledge_base.get('files', {}))
+            self.upsert_configurations(knowledge_base.get('configurations', {}))
+            self.set_critical_categories(knowledge_base.get('critical_files_by_category', {}))
+            if 'dependencies' in knowledge_base:
+                self.set_dependencies(knowledge_base['dependencies'].get('forward', {}), replace=True)
+            for entry in knowledge_base.get('learning_log', []):
+                self.append_learning_log(entry)
+
+    def backup(self, backup_path):
+        with self._lock:
+            target = sqlite3.connect(backup_path)
+            try:
+                self.conn.backup(target)
+            finally:
+                target.close()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# 副檔名 -> 後端類別；可透過 register_store_backend 擴充
+STORE_BACKENDS = {
+    '.json': JSONKnowledgeStore,
+    '.db': SQLiteKnowledgeStore,
+    '.sqlite': SQLiteKnowledgeStore,
+    '.sqlite3': SQLiteKnowledgeStore,
+}
+
+
+def register_store_backend(suffix: str, backend_class):
+    """註冊新的儲存後端"""
+    STORE_BACKENDS[suffix.lower()] = backend_class
+
+
+def get_store_backend(path):
+    return STORE_BACKENDS.get(Path(path).suffix.lower(), JSONKnowledgeStore)
+
+
+def open_knowledge_store(path=DEFAULT_KNOWLEDGE_BASE, create=False) -> Optional[KnowledgeStore]:
+    """依副檔名開啟知識庫；無法開啟時返回 None"""
+    try:
+        return get_store_backend(path)(path, create=create)
+    except Exception as e:
+        print(f"❌ 無法載入知識庫: {e}")
+        return None
+
+
+def migrate_json_to_sqlite(json_path, db_path):
+    """將既有的 JSON 知識庫遷移到 SQLite"""
+    print(f"🔄 遷移知識庫: {json_path} -> {db_path}")
+    with open(json_path, 'r', encoding='utf-8') as f:
+        knowledge_base = json.load(f)
+
+    store = SQLiteKnowledgeStore(db_path, create=True)
+    try:
+        store.save_all(knowledge_base)
+        print(f"✅ 遷移完成: {store.count_files()} 個檔案, {store.count_directories()} 個目錄")
+    finally:
+        store.close()
+    return db_path
+
+
+def main():
+    """命令列工具"""
+    parser = argparse.ArgumentParser(description='知識庫儲存後端工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate = subparsers.add_parser('migrate', help='將 JSON 知識庫遷移到 SQLite')
+    migrate.add_argument('source', nargs='?', default='knowledge_base.json')
+    migrate.add_argument('target', nargs='?', default='knowledge_base.db')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        migrate_json_to_sqlite(args.source, args.target)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,34 +5,107 @@
 
 import os
 import json
+import stat
 import yaml
+import argparse
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from scan_manifest import ScanManifest
+from knowledge_index import KnowledgeIndex
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, JSONKnowledgeStore, get_store_backend
+from dependency_graph import SOURCE_TYPES, DependencyGraphBuilder, build_reverse_index
+from search_index import SearchIndex, search_signature
+
+EXCLUDED_DIRS = ['__pycache__', 'node_modules', '.git']
+CONFIG_TYPES = ['yaml', 'json', 'toml', 'config']
+MAX_CONFIG_SIZE = 100000  # 只分析小於100KB的檔案
+POOL_THRESHOLD = 64  # 待解析檔案少於此數量時不啟動程序池
+# 增量掃描時即使目錄未變也需重新 stat 的檔案類型（原地修改不會改變目錄 mtime）
+RESTAT_TYPES = set(CONFIG_TYPES) | set(SOURCE_TYPES)
+# 有 libyaml 時使用 C 實作的 SafeLoader
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def parse_config_content(content, file_type, size):
+    """解析配置檔案內容"""
+    try:
+        if file_type in ['yaml', 'yml']:
+            return yaml.load(content.decode('utf-8'), Loader=YAML_LOADER)
+        elif file_type == 'json':
+            return json.loads(content.decode('utf-8'))
+        else:
+            # 對於其他類型，只記錄基本資訊
+            return {
+                'type': file_type,
+                'size': size,
+                'note': 'Content not parsed for safety'
+            }
+    except Exception:
+        return {
+            'type': file_type,
+            'error': 'Parse error',
+            'note': 'File exists but could not be parsed'
+        }
+
+
+def load_config(job):
+    """讀取單一配置檔案並計算雜湊；內容未變時不解析（可在程序池中執行）
+
+    返回: (內容雜湊, 解析結果, 錯誤訊息)
+    """
+    file_path, file_type, previous_hash = job
+    try:
+        with open(file_path, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        return None, None, str(e)
+
+    content_hash = ScanManifest.hash_bytes(content)
+    if content_hash == previous_hash:
+        return content_hash, None, None
+    return content_hash, parse_config_content(content, file_type, len(content)), None
+
+
+def default_root_path():
+    """儲存庫根目錄（本腳本位置往上三層）"""
+    script_dir = Path(__file__).parent.absolute()
+    return script_dir.parent.parent.parent  # workspace/tools/repository-understanding -> workspace -> root
+
 
 class RepositoryScanner:
-    def __init__(self, root_path=None):
+    def __init__(self, root_path=None, knowledge_base_path=DEFAULT_KNOWLEDGE_BASE,
+                 manifest_path='scan_manifest.json', workers=None):
         # Default to repository root (3 levels up from this script's location)
         if root_path is None:
-            script_dir = Path(__file__).parent.absolute()
-            root_path = script_dir.parent.parent.parent  # workspace/tools/repository-understanding -> workspace -> root
+            root_path = default_root_path()
         self.root_path = Path(root_path)
+        self.knowledge_base_path = knowledge_base_path
+        self.manifest = ScanManifest(manifest_path)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.changes = None
+        self.previous_signature = None
         self.knowledge_base = {
             'metadata': {
                 'scan_date': datetime.now().isoformat(),
                 'phase': 'Phase 1 - Initial Scan',
-                'scanner_version': '1.0.0'
+                'scanner_version': '1.1.0',
+                'scan_mode': 'full'
             },
             'directories': {},
             'files': {},
             'relationships': {},
             'statistics': {},
             'critical_files': [],
-            'configurations': {}
+            'configurations': {},
+            'dependencies': {'forward': {}, 'reverse': {}}
         }
+        self.dependency_changes = {}
         
-    def scan(self):
-        """執行完整掃描"""
+    def scan(self, incremental=False):
+        """執行掃描；incremental=True 時若有先前的清單與知識庫則只處理變化"""
         print("🔍 開始掃描儲存庫...")
         print(f"📍 根目錄: {self.root_path.absolute()}")
         
@@ -41,15 +114,20 @@ class RepositoryScanner:
             print(f"❌ 錯誤：根目錄不存在: {self.root_path}")
             return False
         
-        # 掃描目錄結構
-        self.scan_directories()
+        if incremental and self.load_previous_scan():
+            return self.incremental_scan()
         
-        # 掃描檔案
-        self.scan_files()
+        self.manifest.reset(self.root_path)
+        
+        # 單次遍歷掃描目錄與檔案
+        self.scan_tree()
         
         # 分析配置檔案
         self.analyze_configurations()
         
+        # 建立依賴圖
+        self.build_dependency_graph()
+        
         # 建立關係圖
         self.build_relationships()
         
@@ -61,33 +139,355 @@ class RepositoryScanner:
         
         print("✅ 掃描完成！")
         return True
+
+    def load_previous_scan(self):
+        """載入先前的知識庫與掃描清單，兩者皆可用時才能進行增量掃描"""
+        if not self.manifest.load(self.root_path):
+            print("ℹ️  找不到可用的掃描清單，執行完整掃描")
+            return False
+
+        try:
+            store = get_store_backend(self.knowledge_base_path)(self.knowledge_base_path)
+            knowledge_base = store.load_all()
+            store.close()
+        except Exception:
+            print("ℹ️  找不到可用的知識庫，執行完整掃描")
+            return False
+
+        for key, default in self.knowledge_base.items():
+            knowledge_base.setdefault(key, default)
+        self.previous_signature = search_signature(knowledge_base)
+        self.knowledge_base = knowledge_base
+        return True
+
+    def incremental_scan(self):
+        """增量掃描：只重新列出 mtime 改變的目錄，只重新解析內容改變的配置檔案"""
+        print("⚡ 執行增量掃描...")
+
+        directories = self.knowledge_base['directories']
+        files = self.knowledge_base['files']
+        changes = {'added': [], 'modified': [], 'removed': [], 'directories': []}
+        previous_hashes = {}
+        seen_dirs = set()
+        seen_files = set()
+
+        stack = [self.root_path]
+        while stack:
+            dir_path = stack.pop()
+            rel_path = dir_path.relative_to(self.root_path)
+            rel_key = str(rel_path)
+
+            try:
+                dir_stat = os.stat(dir_path)
+            except OSError:
+                continue
+            seen_dirs.add(rel_key)
+
+            if self.manifest.directory_unchanged(rel_key, dir_stat):
+                entry = self.manifest.directories[rel_key]
+                seen_files.update(self._join(rel_key, f) for f in entry['files'] if not f.startswith('.'))
+                # 目錄 mtime 不反映檔案內容的原地修改，配置與原始碼檔案仍需逐一比對
+                for file_name in entry['files']:
+                    file_key = self._join(rel_key, file_name)
+                    if files.get(file_key, {}).get('type') not in RESTAT_TYPES:
+                        continue
+                    file_path = dir_path / file_name
+                    try:
+                        stat_result = file_path.stat()
+                    except OSError as e:
+                        print(f"⚠️  警告：無法讀取檔案 {file_path}: {e}")
+                        seen_files.discard(file_key)
+                        continue
+                    if self.manifest.file_changed(file_key, stat_result):
+                        self._apply_file_change(file_key, self.build_file_info(file_path, Path(file_key), stat_result),
+                                                stat_result, changes, previous_hashes)
+                stack.extend(dir_path / d for d in entry['subdirectories'])
+                continue
+
+            result = self._scan_directory(dir_path, dir_stat)
+            if result is None:
+                continue
+            self.manifest.record_directory(rel_key, dir_stat, [name for name, _ in result['walk_dirs']], result['files'])
+            if dir_path != self.root_path:
+                directories[rel_key] = self.build_directory_info(dir_path, rel_path, result['subdirectories'], result['files'])
+                changes['directories'].append(rel_key)
+            for file_key, file_info, stat_result in result['file_infos']:
+                seen_files.add(file_key)
+                if file_key not in files or self.manifest.file_changed(file_key, stat_result):
+                    self._apply_file_change(file_key, file_info, stat_result, changes, previous_hashes)
+            stack.extend(dir_path / name for name, _ in result['walk_dirs'])
+
+        # 移除已不存在的檔案與目錄
+        for file_key in [f for f in files if f not in seen_files]:
+            del files[file_key]
+            self.knowledge_base['configurations'].pop(file_key, None)
+            self.manifest.remove_file(file_key)
+            changes['removed'].append(file_key)
+        for file_key in [f for f in self.manifest.files if f not in seen_files]:
+            self.manifest.remove_file(file_key)
+        for dir_key in [d for d in self.manifest.directories if d not in seen_dirs]:
+            self.manifest.remove_directory(dir_key)
+            if directories.pop(dir_key, None) is not None:
+                changes['directories'].append(dir_key)
+
+        return self._finish_incremental(changes, previous_hashes)
+
+    def apply_changes(self, paths):
+        """依檔案系統事件回報的路徑就地更新知識庫，只重新列出受影響的目錄
+
+        paths 為相對於根目錄（或絕對）的路徑；沒有可用的清單或知識庫時退回完整掃描。
+        """
+        if not self.load_previous_scan():
+            return self.scan()
+
+        print(f"⚡ 套用 {len(paths)} 個路徑的變化...")
+        changes = {'added': [], 'modified': [], 'removed': [], 'directories': []}
+        previous_hashes = {}
+
+        # 重新列出每個路徑的父目錄（新增/刪除/修改），路徑本身若為目錄也一併列出
+        pending = set()
+        for path in paths:
+            rel_key = os.path.relpath(self.root_path / path, self.root_path)
+            parts = Path(rel_key).parts
+            if parts[:1] == ('..',) or any(p.startswith('.') or p in EXCLUDED_DIRS for p in parts):
+                continue
+            pending.add(os.path.dirname(rel_key) or '.')
+            pending.add(rel_key)
+
+        visited = set()
+        for rel_key in sorted(pending, key=lambda p: (p != '.', p.count(os.sep), p)):
+            self._refresh_directory(rel_key, changes, previous_hashes, visited)
+
+        return self._finish_incremental(changes, previous_hashes)
+
+    def _refresh_directory(self, rel_key, changes, previous_hashes, visited):
+        """重新列出單一目錄，與清單比較找出新增、修改與刪除；新的子目錄遞迴掃描"""
+        files = self.knowledge_base['files']
+        stack = [rel_key]
+        while stack:
+            rel_key = stack.pop()
+            if rel_key in visited:
+                continue
+            visited.add(rel_key)
+
+            entry = self.manifest.directories.get(rel_key)
+            if entry is None:
+                # 只處理父目錄清單中會遞迴的子目錄（排除檔案、符號連結與被排除的目錄）
+                parent = self.manifest.directories.get(os.path.dirname(rel_key) or '.', {})
+                if os.path.basename(rel_key) not in parent.get('subdirectories', []):
+                    continue
+
+            dir_path = self.root_path if rel_key == '.' else self.root_path / rel_key
+            try:
+                dir_stat = os.stat(dir_path)
+            except OSError:
+                continue  # 已刪除，由父目錄的重新列出處理
+            if not stat.S_ISDIR(dir_stat.st_mode):
+                continue
+
+            result = self._scan_directory(dir_path, dir_stat)
+            if result is None:
+                continue
+            walk_names = [name for name, _ in result['walk_dirs']]
+            previous_files = set(entry['files']) if entry else set()
+            previous_subdirs = set(entry['subdirectories']) if entry else set()
+
+            self.manifest.record_directory(rel_key, dir_stat, walk_names, result['files'])
+            if rel_key != '.':
+                self.knowledge_base['directories'][rel_key] = self.build_directory_info(
+                    dir_path, Path(rel_key), result['subdirectories'], result['files'])
+                changes['directories'].append(rel_key)
+            for file_key, file_info, stat_result in result['file_infos']:
+                if file_key not in files or self.manifest.file_changed(file_key, stat_result):
+                    self._apply_file_change(file_key, file_info, stat_result, changes, previous_hashes)
+
+            for name in previous_files - set(result['files']):
+                self._remove_file(self._join(rel_key, name), changes)
+            for name in previous_subdirs - set(walk_names):
+                self._remove_subtree(self._join(rel_key, name), changes)
+            stack.extend(self._join(rel_key, name) for name in walk_names if name not in previous_subdirs)
+
+    def _remove_file(self, file_key, changes):
+        if self.knowledge_base['files'].pop(file_key, None) is not None:
+            self.knowledge_base['configurations'].pop(file_key, None)
+            changes['removed'].append(file_key)
+        self.manifest.remove_file(file_key)
+
+    def _remove_subtree(self, rel_key, changes):
+        """移除已刪除目錄下的所有目錄與檔案"""
+        prefix = rel_key + os.sep
+        for dir_key in [d for d in self.manifest.directories if d == rel_key or d.startswith(prefix)]:
+            self.manifest.remove_directory(dir_key)
+        for dir_key in [d for d in self.knowledge_base['directories'] if d == rel_key or d.startswith(prefix)]:
+            del self.knowledge_base['directories'][dir_key]
+            changes['directories'].append(dir_key)
+        for file_key in [f for f in self.manifest.files if f.startswith(prefix)]:
+            self._remove_file(file_key, changes)
+        for file_key in [f for f in self.knowledge_base['files'] if f.startswith(prefix)]:
+            self._remove_file(file_key, changes)
+
+    def _finish_incremental(self, changes, previous_hashes):
+        """重新解析變化的檔案並重新計算衍生資料"""
+        self.changes = changes
+        if not self.has_changes():
+            print("✅ 沒有檢測到變化，知識庫保持不變")
+            return True
+
+        # 只重新解析變化的配置檔案
+        self.analyze_configurations(changes['added'] + changes['modified'], previous_hashes)
+        
+        # 只重新擷取變化檔案的引用，但所有引用都重新解析（新增的檔案可能讓舊的 import 可解析）
+        self.build_dependency_graph()
+
+        # 重新計算衍生資料
+        self.knowledge_base['metadata'].update({
+            'scan_date': datetime.now().isoformat(),
+            'scan_mode': 'incremental'
+        })
+        self.knowledge_base['critical_files'] = [
+            p for p, info in self.knowledge_base['files'].items() if info['is_critical']]
+        self.build_relationships()
+        self.generate_statistics()
+        self.identify_critical_files()
+
+        print(f"✅ 增量掃描完成: 新增 {len(changes['added'])}, 修改 {len(changes['modified'])}, "
+              f"刪除 {len(changes['removed'])} 個檔案, {len(changes['directories'])} 個目錄變化")
+        return True
+
+    def has_changes(self):
+        """上一次掃描是否改變了知識庫（完整掃描總是視為有變化）"""
+        if self.changes is None:
+            return True
+        return any(self.changes.values())
+
+    def _apply_file_change(self, file_key, file_info, stat_result, changes, previous_hashes):
+        """將新增或修改的檔案寫入知識庫與清單"""
+        changes['modified' if file_key in self.knowledge_base['files'] else 'added'].append(file_key)
+        previous_hashes[file_key] = self.manifest.get_hash(file_key)
+        self.knowledge_base['files'][file_key] = file_info
+        self.manifest.record_file(file_key, stat_result)
+
+    @staticmethod
+    def _join(rel_dir, name):
+        return name if rel_dir == '.' else os.path.join(rel_dir, name)
+
+    def scan_tree(self):
+        """單次遍歷掃描目錄與檔案，子目錄分派至執行緒池並行處理"""
+        print(f"📁 掃描目錄與檔案 ({self.workers} 個工作線程)...")
+        
+        try:
+            root_stat = os.stat(self.root_path)
+        except OSError as e:
+            print(f"⚠️  警告：無法讀取根目錄 {self.root_path}: {e}")
+            return
+        
+        results = []
+        if self.workers <= 1:
+            stack = [(self.root_path, root_stat)]
+            while stack:
+                dir_path, dir_stat = stack.pop()
+                result = self._scan_directory(dir_path, dir_stat)
+                if result is not None:
+                    results.append(result)
+                    stack.extend((dir_path / name, st) for name, st in result['walk_dirs'])
+        else:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending = {pool.submit(self._scan_directory, self.root_path, root_stat)}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        if result is None:
+                            continue
+                        results.append(result)
+                        dir_path = result['dir_path']
+                        pending.update(pool.submit(self._scan_directory, dir_path / name, st)
+                                       for name, st in result['walk_dirs'])
+        
+        # 依路徑排序合併，讓輸出與執行緒完成順序無關
+        for result in sorted(results, key=lambda r: r['rel_path']):
+            self.merge_directory_result(result)
+        
+        print(f"✅ 掃描完成: {len(self.knowledge_base['directories'])} 個目錄, "
+              f"{len(self.knowledge_base['files'])} 個檔案")
     
-    def scan_directories(self):
-        """掃描目錄結構"""
-        print("📁 掃描目錄結構...")
+    def _scan_directory(self, dir_path, dir_stat):
+        """以 os.scandir 掃描單一目錄，重用 DirEntry 的 stat 結果
+
+        目錄篩選規則與 os.walk 相同：符號連結目錄會列出但不遞迴。
+        """
+        rel_path = dir_path.relative_to(self.root_path)
+        rel_key = str(rel_path)
+        subdirs, walk_dirs, dir_files, file_infos = [], [], [], []
         
-        for root, dirs, files in os.walk(self.root_path):
-            root_path = Path(root)
-            
-            # 跳過隱藏目錄和某些系統目錄
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules', '.git']]
-            
-            if root_path != self.root_path:
-                rel_path = root_path.relative_to(self.root_path)
-                
-                dir_info = {
-                    'path': str(rel_path),
-                    'absolute_path': str(root_path),
-                    'parent': str(rel_path.parent) if rel_path.parent != Path('.') else 'root',
-                    'subdirectories': dirs.copy(),
-                    'file_count': len(files),
-                    'purpose': self.classify_directory_purpose(root_path, dirs, files),
-                    'depth': len(rel_path.parts)
-                }
-                
-                self.knowledge_base['directories'][str(rel_path)] = dir_info
-        
-        print(f"✅ 掃描完成: {len(self.knowledge_base['directories'])} 個目錄")
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    
+                    if is_dir:
+                        if entry.name.startswith('.') or entry.name in EXCLUDED_DIRS:
+                            continue
+                        subdirs.append(entry.name)
+                        if not entry.is_symlink():
+                            try:
+                                walk_dirs.append((entry.name, entry.stat()))
+                            except OSError:
+                                pass
+                        continue
+                    
+                    dir_files.append(entry.name)
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        stat_result = entry.stat()
+                        file_key = self._join(rel_key, entry.name)
+                        file_infos.append((file_key, self.build_file_info(Path(entry.path), Path(file_key), stat_result),
+                                           stat_result))
+                    except Exception as e:
+                        print(f"⚠️  警告：無法讀取檔案 {entry.path}: {e}")
+        except OSError:
+            return None
+        
+        return {
+            'dir_path': dir_path,
+            'rel_path': rel_key,
+            'stat': dir_stat,
+            'subdirectories': subdirs,
+            'walk_dirs': walk_dirs,
+            'files': dir_files,
+            'file_infos': file_infos
+        }
+    
+    def merge_directory_result(self, result):
+        """將單一目錄的掃描結果合併到知識庫與清單"""
+        rel_key = result['rel_path']
+        self.manifest.record_directory(rel_key, result['stat'], [name for name, _ in result['walk_dirs']], result['files'])
+        
+        if result['dir_path'] != self.root_path:
+            self.knowledge_base['directories'][rel_key] = self.build_directory_info(
+                result['dir_path'], Path(rel_key), result['subdirectories'], result['files'])
+        
+        for file_key, file_info, stat_result in result['file_infos']:
+            self.knowledge_base['files'][file_key] = file_info
+            self.manifest.record_file(file_key, stat_result)
+            if file_info['is_critical']:
+                self.knowledge_base['critical_files'].append(file_key)
+    
+    def build_directory_info(self, root_path, rel_path, dirs, files):
+        """建立目錄資訊"""
+        return {
+            'path': str(rel_path),
+            'absolute_path': str(root_path),
+            'parent': str(rel_path.parent) if rel_path.parent != Path('.') else 'root',
+            'subdirectories': list(dirs),
+            'file_count': len(files),
+            'purpose': self.classify_directory_purpose(root_path, dirs, files),
+            'depth': len(rel_path.parts)
+        }
     
     def classify_directory_purpose(self, dir_path, subdirs, files):
         """分類目錄用途"""
@@ -153,42 +553,18 @@ class RepositoryScanner:
         
         return 'unknown'
     
-    def scan_files(self):
-        """掃描檔案"""
-        print("📄 掃描檔案...")
-        
-        for root, dirs, files in os.walk(self.root_path):
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['__pycache__', 'node_modules', '.git']]
-            
-            root_path = Path(root)
-            for file in files:
-                if file.startswith('.'):
-                    continue
-                    
-                file_path = root_path / file
-                rel_path = file_path.relative_to(self.root_path)
-                
-                try:
-                    file_info = {
-                        'name': file,
-                        'path': str(rel_path),
-                        'directory': str(rel_path.parent),
-                        'extension': file_path.suffix.lower(),
-                        'size': file_path.stat().st_size,
-                        'type': self.classify_file_type(file_path.suffix),
-                        'is_executable': os.access(file_path, os.X_OK),
-                        'is_critical': self.is_critical_file(file_path)
-                    }
-                    
-                    self.knowledge_base['files'][str(rel_path)] = file_info
-                    
-                    if file_info['is_critical']:
-                        self.knowledge_base['critical_files'].append(str(rel_path))
-                        
-                except Exception as e:
-                    print(f"⚠️  警告：無法讀取檔案 {file_path}: {e}")
-        
-        print(f"✅ 掃描完成: {len(self.knowledge_base['files'])} 個檔案")
+    def build_file_info(self, file_path, rel_path, stat_result):
+        """建立檔案資訊"""
+        return {
+            'name': file_path.name,
+            'path': str(rel_path),
+            'directory': str(rel_path.parent),
+            'extension': file_path.suffix.lower(),
+            'size': stat_result.st_size,
+            'type': self.classify_file_type(file_path.suffix),
+            'is_executable': os.access(file_path, os.X_OK),
+            'is_critical': self.is_critical_file(file_path)
+        }
     
     def classify_file_type(self, extension):
         """分類檔案類型"""
@@ -245,63 +621,100 @@ class RepositoryScanner:
         file_name = file_path.name.lower()
         return any(pattern in file_name for pattern in critical_patterns)
     
-    def analyze_configurations(self):
-        """分析配置檔案"""
+    def analyze_configurations(self, file_paths=None, previous_hashes=None):
+        """分析配置檔案；大量檔案時以程序池並行解析
+
+        file_paths 為 None 時分析所有配置檔案；previous_hashes 中雜湊未變的檔案沿用既有解析結果。
+        """
         print("⚙️  分析配置檔案...")
         
-        for file_path, file_info in self.knowledge_base['files'].items():
-            if file_info['type'] in ['yaml', 'json', 'toml', 'config']:
-                try:
-                    full_path = self.root_path / file_path
-                    if full_path.exists() and full_path.stat().st_size < 100000:  # 只分析小於100KB的檔案
-                        config_data = self.parse_config_file(full_path, file_info['type'])
-                        if config_data:
-                            self.knowledge_base['configurations'][file_path] = config_data
-                except Exception as e:
-                    print(f"⚠️  警告：無法解析配置檔案 {file_path}: {e}")
-        
-        print(f"✅ 分析完成: {len(self.knowledge_base['configurations'])} 個配置檔案")
+        files = self.knowledge_base['files']
+        configurations = self.knowledge_base['configurations']
+        previous_hashes = previous_hashes or {}
+        if file_paths is None:
+            file_paths = list(files)
+        
+        paths, jobs = [], []
+        for file_path in file_paths:
+            file_info = files[file_path]
+            if file_info['type'] not in CONFIG_TYPES:
+                continue
+            if file_info['size'] >= MAX_CONFIG_SIZE:
+                configurations.pop(file_path, None)
+                continue
+            previous_hash = previous_hashes.get(file_path) if file_path in configurations else None
+            paths.append(file_path)
+            jobs.append((str(self.root_path / file_path), file_info['type'], previous_hash))
+        
+        results = self._parallel_map(load_config, jobs)
+        for file_path, job, (content_hash, config_data, error) in zip(paths, jobs, results, strict=True):
+            if error is not None:
+                print(f"⚠️  警告：無法解析配置檔案 {file_path}: {error}")
+                continue
+            self.manifest.set_hash(file_path, content_hash)
+            if content_hash == job[2]:
+                continue
+            if config_data:
+                configurations[file_path] = config_data
+            else:
+                configurations.pop(file_path, None)
+        
+        print(f"✅ 分析完成: {len(configurations)} 個配置檔案")
+    
+    def _parallel_map(self, func, jobs):
+        """以 func 處理每個工作（需為模組層級函數），數量足夠時使用程序池"""
+        if self.workers <= 1 or len(jobs) < POOL_THRESHOLD:
+            return [func(job) for job in jobs]
+        
+        chunksize = max(1, len(jobs) // (self.workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(func, jobs, chunksize=chunksize))
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️  警告：無法啟動程序池 ({e})，改為逐一解析")
+            return [func(job) for job in jobs]
     
     def parse_config_file(self, file_path, file_type):
         """解析配置檔案"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                if file_type in ['yaml', 'yml']:
-                    return yaml.safe_load(f)
-                elif file_type == 'json':
-                    return json.load(f)
-                else:
-                    # 對於其他類型，只記錄基本資訊
-                    return {
-                        'type': file_type,
-                        'size': file_path.stat().st_size,
-                        'note': 'Content not parsed for safety'
-                    }
-        except Exception:
-            return {
-                'type': file_type,
-                'error': 'Parse error',
-                'note': 'File exists but could not be parsed'
-            }
+        _, config_data, _ = load_config((str(file_path), file_type, None))
+        return config_data
+    
+    def build_dependency_graph(self):
+        """解析 import 與路徑引用，建立正向/反向依賴索引
+
+        原始引用快取在掃描清單中，只有清單中沒有引用（新增、修改或完整掃描）的檔案會被重新讀取。
+        """
+        print("🕸️  建立依賴圖...")
+        
+        files = self.knowledge_base['files']
+        builder = DependencyGraphBuilder(self.root_path, files, mapper=self._parallel_map)
+        pending = [p for p in files if self.manifest.get_references(p) is None]
+        for file_path, references in builder.extract(pending).items():
+            self.manifest.set_references(file_path, references or [])
+        
+        forward = builder.resolve({p: self.manifest.get_references(p) for p in files})
+        previous = self.knowledge_base.get('dependencies', {}).get('forward', {})
+        # 記錄依賴有變化的檔案，供 SQLite 後端只更新這些列
+        self.dependency_changes = {p: forward.get(p, []) for p in set(previous) | set(forward)
+                                   if previous.get(p) != forward.get(p)}
+        self.knowledge_base['dependencies'] = {'forward': forward, 'reverse': build_reverse_index(forward)}
+        
+        edges = sum(len(targets) for targets in forward.values())
+        print(f"✅ 依賴圖建立完成: {len(forward)} 個檔案, {edges} 條依賴")
     
     def build_relationships(self):
         """建立檔案關係圖"""
         print("🔗 建立檔案關係圖...")
         
-        # 建立目錄到檔案的關係
+        # 建立目錄到檔案的關係（透過索引，每個目錄為一次雜湊查找）
+        index = KnowledgeIndex(self.knowledge_base)
         for dir_path, dir_info in self.knowledge_base['directories'].items():
-            dir_info['files'] = []
-            
-            for file_path, file_info in self.knowledge_base['files'].items():
-                if file_info['directory'] == dir_path:
-                    dir_info['files'].append(file_path)
+            dir_info['files'] = list(index.files_in(dir_path))
         
         # 建立檔案類型統計
-        type_counts = defaultdict(int)
-        for file_info in self.knowledge_base['files'].values():
-            type_counts[file_info['type']] += 1
-        
-        self.knowledge_base['relationships']['file_types'] = dict(type_counts)
+        self.knowledge_base['relationships']['file_types'] = {
+            file_type: len(paths) for file_type, paths in index.type_files.items()
+        }
         
         print("✅ 關係圖建立完成")
     
@@ -309,11 +722,13 @@ class RepositoryScanner:
         """生成統計資訊"""
         print("📊 生成統計資訊...")
         
+        forward = self.knowledge_base.get('dependencies', {}).get('forward', {})
         stats = {
             'total_directories': len(self.knowledge_base['directories']),
             'total_files': len(self.knowledge_base['files']),
             'critical_files_count': len(self.knowledge_base['critical_files']),
             'configurations_count': len(self.knowledge_base['configurations']),
+            'dependency_edges': sum(len(targets) for targets in forward.values()),
             'directory_purposes': defaultdict(int),
             'file_types': defaultdict(int),
             'total_size': 0
@@ -364,19 +779,81 @@ class RepositoryScanner:
         
         print(f"✅ 識別完成: {len(self.knowledge_base['critical_files'])} 個關鍵檔案")
     
-    def save_knowledge_base(self, filename='knowledge_base.json'):
-        """保存知識庫"""
+    def save_knowledge_base(self, filename=None):
+        """保存知識庫（依副檔名選擇 JSON 或 SQLite 後端）"""
+        filename = filename or self.knowledge_base_path
         print(f"💾 保存知識庫到 {filename}...")
         
         # 清理無法序列化的對象
         clean_kb = self._clean_for_json(self.knowledge_base)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(clean_kb, f, indent=2, ensure_ascii=False)
+        backend = get_store_backend(filename)
+        if backend is JSONKnowledgeStore:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(clean_kb, f, indent=2, ensure_ascii=False)
+        else:
+            store = backend(filename, create=True)
+            try:
+                if self.changes is not None and filename == self.knowledge_base_path:
+                    self._save_changes(store, clean_kb)
+                else:
+                    store.save_all(clean_kb)
+            finally:
+                store.close()
+        
+        # 清單只有在對應的知識庫存在時才有意義，因此一併保存
+        self.manifest.save()
+        self.update_search_index(filename)
         
         print(f"✅ 知識庫已保存")
         return filename
     
+    def _save_changes(self, store, clean_kb):
+        """增量掃描後只寫入變化的列"""
+        changes = self.changes
+        files, directories = clean_kb['files'], clean_kb['directories']
+        configurations = clean_kb['configurations']
+        changed_files = changes['added'] + changes['modified']
+        
+        with store.transaction():
+            store.upsert_files({p: files[p] for p in changed_files})
+            store.delete_files(changes['removed'])
+            store.upsert_directories({d: directories[d] for d in changes['directories'] if d in directories})
+            store.delete_directories([d for d in changes['directories'] if d not in directories])
+            store.upsert_configurations({p: configurations[p] for p in changed_files if p in configurations})
+            store.delete_configurations([p for p in changed_files + changes['removed'] if p not in configurations])
+            store.set_critical_categories(clean_kb['critical_files_by_category'])
+            store.set_dependencies(self.dependency_changes)
+            for key in ['metadata', 'relationships', 'statistics']:
+                store.set_section(key, clean_kb[key])
+    
+    def update_search_index(self, filename):
+        """更新與知識庫並存的搜尋索引；索引對應先前的知識庫時只套用本次變化"""
+        files, directories = self.knowledge_base['files'], self.knowledge_base['directories']
+        index_path = SearchIndex.index_path(filename)
+        
+        index = None
+        if self.changes is not None and filename == self.knowledge_base_path:
+            index = SearchIndex.load(index_path)
+            if index is not None and index.signature != self.previous_signature:
+                index = None
+        
+        if index is None:
+            index = SearchIndex.build(((p, info['name']) for p, info in files.items()), directories)
+        else:
+            for file_path in self.changes['removed']:
+                index.remove_file(file_path)
+            for file_path in self.changes['added']:
+                index.add_file(file_path, files[file_path]['name'])
+            for dir_path in self.changes['directories']:
+                if dir_path in directories:
+                    index.add_directory(dir_path)
+                else:
+                    index.remove_directory(dir_path)
+        
+        index.signature = search_signature(self.knowledge_base)
+        index.save(index_path)
+    
     def _clean_for_json(self, obj):
         """清理對象以確保可以 JSON 序列化"""
         if isinstance(obj, dict):
@@ -405,6 +882,7 @@ class RepositoryScanner:
             f.write(f"- **總檔案數**: {stats['total_files']}\n")
             f.write(f"- **關鍵檔案數**: {stats['critical_files_count']}\n")
             f.write(f"- **配置檔案數**: {stats['configurations_count']}\n")
+            f.write(f"- **依賴關係數**: {stats.get('dependency_edges', 0)}\n")
             f.write(f"- **總大小**: {stats['total_size'] / 1024:.2f} KB\n\n")
             
             f.write("## 📁 目錄用途分佈\n\n")
@@ -437,17 +915,25 @@ class RepositoryScanner:
 
 def main():
     """主程式"""
+    parser = argparse.ArgumentParser(description='第一階段：儲存庫掃描和知識庫建立')
+    parser.add_argument('--full', action='store_true', help='忽略掃描清單，執行完整掃描')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='掃描與解析使用的工作線程/程序數（預設為 CPU 核心數）')
+    args = parser.parse_args()
+    
     print("="*60)
     print("🚀 第一階段：儲存庫掃描和知識庫建立")
     print("="*60 + "\n")
     
     # 創建掃描器
-    scanner = RepositoryScanner()
+    scanner = RepositoryScanner(workers=args.workers)
     
     # 執行掃描
-    if scanner.scan():
-        # 保存知識庫
-        kb_file = scanner.save_knowledge_base('knowledge_base.json')
+    if scanner.scan(incremental=not args.full):
+        # 保存知識庫（沒有變化時沿用既有檔案）
+        kb_file = scanner.knowledge_base_path
+        if scanner.has_changes():
+            scanner.save_knowledge_base(kb_file)
         
         # 生成報告
         report_file = scanner.generate_report('phase1_report.md')
@@ -3,27 +3,23 @@
 第二階段：操作前的檢查機制
 """
 
-import json
 import os
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, open_knowledge_store
+
 class OperationChecker:
-    def __init__(self, knowledge_base_path='knowledge_base.json'):
+    def __init__(self, knowledge_base_path=DEFAULT_KNOWLEDGE_BASE):
         self.knowledge_base_path = knowledge_base_path
-        self.knowledge_base = self.load_knowledge_base()
+        self.store = self.load_knowledge_base()
         self.operation_history = []
         self.checklist_results = []
         
     def load_knowledge_base(self):
-        """載入知識庫"""
-        try:
-            with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"❌ 無法載入知識庫: {e}")
-            return None
+        """載入知識庫（JSON 或 SQLite 後端）"""
+        return open_knowledge_store(self.knowledge_base_path)
     
     def check_before_operation(self, operation_type: str, target_path: str) -> Tuple[bool, List[str], List[str]]:
         """
@@ -118,17 +114,15 @@ class OperationChecker:
             }
         
         # 檢查是否在知識庫中
-        files = self.knowledge_base.get('files', {})
-        directories = self.knowledge_base.get('directories', {})
+        file_info = self.store.get_file(str(target))
+        dir_info = self.store.get_directory(str(target)) if file_info is None else None
         
-        if str(target) in files:
-            file_info = files[str(target)]
+        if file_info is not None:
             return {
                 'passed': True,
                 'message': f"檔案存在於知識庫中，類型: {file_info.get('type', 'unknown')}"
             }
-        elif str(target) in directories:
-            dir_info = directories[str(target)]
+        elif dir_info is not None:
             return {
                 'passed': True,
                 'message': f"目錄存在於知識庫中，用途: {dir_info.get('purpose', 'unknown')}"
@@ -167,29 +161,31 @@ class OperationChecker:
         }
     
     def find_dependent_files(self, target_path: str) -> List[str]:
-        """查找依賴此檔案的其他檔案"""
-        dependent_files = []
+        """查找直接或間接依賴此檔案（或目錄內檔案）的其他檔案"""
+        target = os.path.normpath(target_path)
         
-        # 簡單實現：查找同目錄下的檔案
-        target = Path(target_path)
-        if target.is_file():
-            parent_dir = str(target.parent)
-            files = self.knowledge_base.get('files', {})
-            
-            for file_path, file_info in files.items():
-                if file_info.get('directory') == parent_dir and file_path != str(target):
-                    dependent_files.append(file_path)
+        if not self.store.has_dependencies():
+            # 舊版知識庫沒有依賴圖：退回以同目錄檔案估計
+            print("ℹ️  知識庫沒有依賴圖，請重新執行 phase1_scanner.py --full")
+            if self.store.get_file(target) is None:
+                return []
+            return [p for p in self.store.files_in(os.path.dirname(target) or '.') if p != target]
+        
+        if self.store.get_file(target) is not None:
+            return self.store.impacted_by([target])
         
-        return dependent_files
+        # 目錄：目錄外依賴其中任何檔案的檔案
+        sources = self.store.files_under(target)
+        prefix = '' if target == '.' else target + os.sep
+        return [p for p in self.store.impacted_by(sources) if not p.startswith(prefix)]
     
     def check_knowledge(self, target_path: str) -> Dict:
         """檢查知識完整性"""
         # 檢查我們對此檔案的知識是否完整
-        files = self.knowledge_base.get('files', {})
-        directories = self.knowledge_base.get('directories', {})
+        file_info = self.store.get_file(str(target_path))
+        dir_info = self.store.get_directory(str(target_path)) if file_info is None else None
         
-        if str(target_path) in files:
-            file_info = files[str(target_path)]
+        if file_info is not None:
             has_type = file_info.get('type') != 'unknown'
             has_purpose = file_info.get('is_critical') is not None
             
@@ -203,8 +199,7 @@ class OperationChecker:
                     'passed': False,
                     'message': "檔案知識不完整"
                 }
-        elif str(target_path) in directories:
-            dir_info = directories[str(target_path)]
+        elif dir_info is not None:
             has_purpose = dir_info.get('purpose') != 'unknown'
             
             if has_purpose:
@@ -230,19 +225,18 @@ class OperationChecker:
         # 檢查是否為關鍵檔案
         if self.is_critical_file(target_path):
             # 檢查具體的關鍵類別
-            for category in critical_categories:
-                critical_files = self.knowledge_base.get('critical_files_by_category', {}).get(category, [])
-                if any(target_path in f for f in critical_files):
-                    if operation_type in ['delete', 'remove', 'rm']:
-                        return {
-                            'passed': False,
-                            'message': f"❌ 禁止操作：這是 {category} 關鍵檔案"
-                        }
-                    else:
-                        return {
-                            'passed': True,
-                            'message': f"⚠️  警告：這是 {category} 關鍵檔案"
-                        }
+            category = self.store.critical_category(target_path, critical_categories)
+            if category:
+                if operation_type in ['delete', 'remove', 'rm']:
+                    return {
+                        'passed': False,
+                        'message': f"❌ 禁止操作：這是 {category} 關鍵檔案"
+                    }
+                else:
+                    return {
+                        'passed': True,
+                        'message': f"⚠️  警告：這是 {category} 關鍵檔案"
+                    }
         
         return {
             'passed': True,
@@ -251,8 +245,7 @@ class OperationChecker:
     
     def is_critical_file(self, target_path: str) -> bool:
         """判斷是否為關鍵檔案"""
-        critical_files = self.knowledge_base.get('critical_files', [])
-        return any(target_path in f for f in critical_files)
+        return self.store.is_critical(target_path)
     
     def check_backup(self, target_path: str) -> Dict:
         """檢查備份狀態"""
@@ -332,13 +325,13 @@ def main():
     # 創建檢查器
     checker = OperationChecker()
     
-    if not checker.knowledge_base:
+    if not checker.store:
         print("❌ 無法載入知識庫，請先執行第一階段")
         return False
     
     print("✅ 知識庫載入成功")
-    print(f"📁 包含 {len(checker.knowledge_base.get('files', {}))} 個檔案")
-    print(f"📁 包含 {len(checker.knowledge_base.get('directories', {}))} 個目錄\n")
+    print(f"📁 包含 {checker.store.count_files()} 個檔案")
+    print(f"📁 包含 {checker.store.count_directories()} 個目錄\n")
     
     # 演示一些操作檢查
     test_operations = [
@@ -3,36 +3,49 @@
 第三階段：視覺化與查詢系統
 """
 
-import json
 import os
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, open_knowledge_store
+from search_index import SearchIndex
+
 class KnowledgeVisualizer:
-    def __init__(self, knowledge_base_path='knowledge_base.json'):
+    def __init__(self, knowledge_base_path=DEFAULT_KNOWLEDGE_BASE):
         self.knowledge_base_path = knowledge_base_path
-        self.knowledge_base = self.load_knowledge_base()
+        self.store = self.load_knowledge_base()
         self.queries_log = []
+        self._search_index = None
         
     def load_knowledge_base(self):
-        """載入知識庫"""
-        try:
-            with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"❌ 無法載入知識庫: {e}")
-            return None
+        """載入知識庫（JSON 或 SQLite 後端）"""
+        return open_knowledge_store(self.knowledge_base_path)
+    
+    @property
+    def search_index(self) -> SearchIndex:
+        """與知識庫並存的搜尋索引；不存在或與知識庫不一致時重建並保存"""
+        if self._search_index is None:
+            metadata = self.store.get_section('metadata') or {}
+            signature = [metadata.get('scan_date'), self.store.count_files(), self.store.count_directories()]
+            index_path = SearchIndex.index_path(self.knowledge_base_path)
+            index = SearchIndex.load(index_path)
+            if index is None or index.signature != signature:
+                index = SearchIndex.build(((p, os.path.basename(p)) for p in self.store.file_paths()),
+                                          self.store.directory_paths(), signature)
+                try:
+                    index.save(index_path)
+                except OSError as e:
+                    print(f"⚠️  警告：無法保存搜尋索引: {e}")
+            self._search_index = index
+        return self._search_index
     
     def query_file_context(self, file_path: str) -> Dict:
         """查詢檔案的完整上下文"""
         print(f"\n🔍 查詢檔案上下文: {file_path}")
         print("="*60)
         
-        files = self.knowledge_base.get('files', {})
-        directories = self.knowledge_base.get('directories', {})
-        
         context = {
             'file_path': file_path,
             'exists': False,
@@ -46,8 +59,8 @@ class KnowledgeVisualizer:
             'is_critical': False
         }
         
-        if file_path in files:
-            file_info = files[file_path]
+        file_info = self.store.get_file(file_path)
+        if file_info is not None:
             context.update({
                 'exists': True,
                 'type': file_info.get('type'),
@@ -57,8 +70,8 @@ class KnowledgeVisualizer:
             })
             
             # 獲取目錄用途
-            if file_info.get('directory') in directories:
-                dir_info = directories[file_info.get('directory')]
+            dir_info = self.store.get_directory(file_info.get('directory'))
+            if dir_info is not None:
                 context['purpose'] = dir_info.get('purpose')
             
             # 查找依賴關係
@@ -78,47 +91,20 @@ class KnowledgeVisualizer:
         return context
     
     def find_dependencies(self, file_path: str) -> List[str]:
-        """查找檔案依賴"""
-        dependencies = []
-        file_info = self.knowledge_base.get('files', {}).get(file_path, {})
-        
-        # 簡單實現：基於目錄和檔案類型
-        file_type = file_info.get('type', '')
-        directory = file_info.get('directory', '')
-        
-        # 查找同目錄下的相關檔案
-        files = self.knowledge_base.get('files', {})
-        for other_file, other_info in files.items():
-            if (other_info.get('directory') == directory and 
-                other_file != file_path and
-                other_info.get('type') == file_type):
-                dependencies.append(other_file)
-        
-        return dependencies[:10]  # 限制返回數量
+        """查找檔案直接依賴的檔案（import 與路徑引用）"""
+        return self.store.dependencies_of(file_path)
     
     def find_affected_files(self, file_path: str) -> List[str]:
-        """查找受影響的檔案"""
-        affected = []
-        file_info = self.knowledge_base.get('files', {}).get(file_path, {})
-        
-        # 查找可能依賴此檔案的其他檔案
-        directory = file_info.get('directory', '')
-        files = self.knowledge_base.get('files', {})
-        
-        for other_file, other_info in files.items():
-            if other_info.get('directory') == directory:
-                affected.append(other_file)
-        
-        return affected[:10]
+        """查找直接或間接依賴此檔案的檔案（依距離排序）"""
+        return self.store.impacted_by([file_path])
     
     def assess_file_risk(self, file_path: str) -> str:
         """評估檔案風險"""
         critical_categories = ['bootstrap', 'security', 'build', 'entry_points']
         
-        for category in critical_categories:
-            critical_files = self.knowledge_base.get('critical_files_by_category', {}).get(category, [])
-            if any(file_path in f for f in critical_files):
-                return f'high ({category})'
+        category = self.store.critical_category(file_path, critical_categories)
+        if category:
+            return f'high ({category})'
         
         return 'low'
     
@@ -127,9 +113,6 @@ class KnowledgeVisualizer:
         print(f"\n🔍 查詢目錄結構: {directory_path}")
         print("="*60)
         
-        directories = self.knowledge_base.get('directories', {})
-        files = self.knowledge_base.get('files', {})
-        
         structure = {
             'directory_path': directory_path,
             'exists': False,
@@ -140,8 +123,8 @@ class KnowledgeVisualizer:
             'file_types': defaultdict(int)
         }
         
-        if directory_path in directories:
-            dir_info = directories[directory_path]
+        dir_info = self.store.get_directory(directory_path)
+        if dir_info is not None:
             structure.update({
                 'exists': True,
                 'purpose': dir_info.get('purpose'),
@@ -149,16 +132,15 @@ class KnowledgeVisualizer:
             })
             
             # 獲取該目錄下的所有檔案
-            for file_path, file_info in files.items():
-                if file_info.get('directory') == directory_path:
-                    structure['files'].append({
-                        'name': file_info.get('name'),
-                        'type': file_info.get('type'),
-                        'size': file_info.get('size'),
-                        'is_critical': file_info.get('is_critical', False)
-                    })
-                    structure['total_size'] += file_info.get('size', 0)
-                    structure['file_types'][file_info.get('type')] += 1
+            for file_info in self.store.get_files(self.store.files_in(directory_path)).values():
+                structure['files'].append({
+                    'name': file_info.get('name'),
+                    'type': file_info.get('type'),
+                    'size': file_info.get('size'),
+                    'is_critical': file_info.get('is_critical', False)
+                })
+                structure['total_size'] += file_info.get('size', 0)
+                structure['file_types'][file_info.get('type')] += 1
         
         self.queries_log.append({
             'timestamp': datetime.now().isoformat(),
@@ -169,68 +151,86 @@ class KnowledgeVisualizer:
         
         return structure
     
-    def search_by_pattern(self, pattern: str, search_type: str = 'name') -> List[Dict]:
-        """根據模式搜尋"""
+    def search_by_pattern(self, pattern: str, search_type: str = 'name', ranked: bool = False,
+                          fuzzy: bool = False, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
+        """根據模式搜尋（ranked/fuzzy 只適用於名稱搜尋；offset/limit 為分頁）"""
+        return self.search_page(pattern, search_type, ranked, fuzzy, offset, limit)['results']
+    
+    def search_page(self, pattern: str, search_type: str = 'name', ranked: bool = False,
+                    fuzzy: bool = False, offset: int = 0, limit: Optional[int] = None) -> Dict:
+        """根據模式搜尋，返回該頁結果與符合總數"""
         print(f"\n🔍 搜尋: {pattern} (類型: {search_type})")
         print("="*60)
         
         results = []
-        files = self.knowledge_base.get('files', {})
-        directories = self.knowledge_base.get('directories', {})
+        total = 0
         
         if search_type == 'name':
-            # 搜尋檔案名稱
-            for file_path, file_info in files.items():
-                if pattern.lower() in file_info.get('name', '').lower():
-                    results.append({
+            # 透過 trigram 索引搜尋檔案名稱與目錄路徑
+            matches, total = self.search_index.search(pattern, ranked=ranked, fuzzy=fuzzy,
+                                                      offset=offset, limit=limit)
+            files = self.store.get_files(p for kind, p, _ in matches if kind == 'file')
+            directories = self.store.get_directories(p for kind, p, _ in matches if kind == 'directory')
+            
+            for kind, path, score in matches:
+                if kind == 'file' and path in files:
+                    file_info = files[path]
+                    result = {
                         'type': 'file',
-                        'path': file_path,
+                        'path': path,
                         'name': file_info.get('name'),
                         'file_type': file_info.get('type'),
                         'is_critical': file_info.get('is_critical', False)
-                    })
-            
-            # 搜尋目錄名稱
-            for dir_path, dir_info in directories.items():
-                if pattern.lower() in dir_path.lower():
-                    results.append({
+                    }
+                elif kind == 'directory' and path in directories:
+                    dir_info = directories[path]
+                    result = {
                         'type': 'directory',
-                        'path': dir_path,
+                        'path': path,
                         'purpose': dir_info.get('purpose'),
                         'file_count': dir_info.get('file_count', 0)
-                    })
+                    }
+                else:
+                    continue
+                if ranked or fuzzy:
+                    result['score'] = score
+                results.append(result)
         
         elif search_type == 'type':
             # 搜尋特定類型檔案
-            for file_path, file_info in files.items():
-                if file_info.get('type') == pattern:
-                    results.append({
-                        'type': 'file',
-                        'path': file_path,
-                        'name': file_info.get('name'),
-                        'size': file_info.get('size')
-                    })
+            paths = self.store.files_of_type(pattern)
+            total = len(paths)
+            page = paths[offset:offset + limit if limit is not None else None]
+            for file_path, file_info in self.store.get_files(page).items():
+                results.append({
+                    'type': 'file',
+                    'path': file_path,
+                    'name': file_info.get('name'),
+                    'size': file_info.get('size')
+                })
         
         elif search_type == 'purpose':
             # 搜尋特定用途的目錄
-            for dir_path, dir_info in directories.items():
-                if dir_info.get('purpose') == pattern:
-                    results.append({
-                        'type': 'directory',
-                        'path': dir_path,
-                        'file_count': dir_info.get('file_count', 0),
-                        'subdirectories': dir_info.get('subdirectories', [])
-                    })
+            paths = self.store.directories_with_purpose(pattern)
+            total = len(paths)
+            page = paths[offset:offset + limit if limit is not None else None]
+            for dir_path, dir_info in self.store.get_directories(page).items():
+                results.append({
+                    'type': 'directory',
+                    'path': dir_path,
+                    'file_count': dir_info.get('file_count', 0),
+                    'subdirectories': dir_info.get('subdirectories', [])
+                })
         
         self.queries_log.append({
             'timestamp': datetime.now().isoformat(),
             'query_type': 'search',
             'pattern': pattern,
             'search_type': search_type,
-            'results_count': len(results)
+            'results_count': total
         })
         
-        return results
+        return {'results': results, 'total': total, 'offset': offset, 'limit': limit}
     
     def generate_visualization_report(self, filename='phase3_report.md'):
         """生成視覺化報告"""
@@ -242,8 +242,8 @@ class KnowledgeVisualizer:
             f.write(f"**階段**: Phase 3 - Visualization and Query System\n\n")
             
             f.write("## 📊 系統概覽\n\n")
-            f.write(f"- **知識庫檔案數**: {len(self.knowledge_base.get('files', {}))}\n")
-            f.write(f"- **知識庫目錄數**: {len(self.knowledge_base.get('directories', {}))}\n")
+            f.write(f"- **知識庫檔案數**: {self.store.count_files()}\n")
+            f.write(f"- **知識庫目錄數**: {self.store.count_directories()}\n")
             f.write(f"- **查詢次數**: {len(self.queries_log)}\n\n")
             
             f.write("## 🔍 查詢功能\n\n")
@@ -277,13 +277,11 @@ class KnowledgeVisualizer:
             
             # 檔案類型統計
             f.write("### 檔案類型分佈\n\n")
-            file_types = defaultdict(int)
-            for file_info in self.knowledge_base.get('files', {}).values():
-                file_types[file_info.get('type', 'unknown')] += 1
+            file_types = self.store.count_by_type()
             
             f.write("| 類型 | 數量 | 百分比 |\n")
             f.write("|------|------|--------|\n")
-            total_files = len(self.knowledge_base.get('files', {}))
+            total_files = self.store.count_files()
             for file_type, count in sorted(file_types.items(), key=lambda x: x[1], reverse=True)[:10]:
                 percentage = (count / total_files * 100) if total_files > 0 else 0
                 f.write(f"| {file_type} | {count} | {percentage:.1f}% |\n")
@@ -291,13 +289,11 @@ class KnowledgeVisualizer:
             
             # 目錄用途統計
             f.write("### 目錄用途分佈\n\n")
-            dir_purposes = defaultdict(int)
-            for dir_info in self.knowledge_base.get('directories', {}).values():
-                dir_purposes[dir_info.get('purpose', 'unknown')] += 1
+            dir_purposes = self.store.count_by_purpose()
             
             f.write("| 用途 | 數量 | 百分比 |\n")
             f.write("|------|------|--------|\n")
-            total_dirs = len(self.knowledge_base.get('directories', {}))
+            total_dirs = self.store.count_directories()
             for purpose, count in sorted(dir_purposes.items(), key=lambda x: x[1], reverse=True)[:10]:
                 percentage = (count / total_dirs * 100) if total_dirs > 0 else 0
                 f.write(f"| {purpose} | {count} | {percentage:.1f}% |\n")
@@ -338,7 +334,7 @@ def main():
     # 創建視覺化器
     visualizer = KnowledgeVisualizer()
     
-    if not visualizer.knowledge_base:
+    if not visualizer.store:
         print("❌ 無法載入知識庫，請先執行第一階段")
         return False
     
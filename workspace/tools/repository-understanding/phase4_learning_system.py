@@ -3,19 +3,19 @@
 第四階段：持續學習機制
 """
 
-import json
 import os
-import shutil
 from pathlib import Path
 from datetime import datetime
 from collections import defaultdict
 from typing import Dict, List, Optional, Tuple
 import hashlib
 
+from knowledge_store import DEFAULT_KNOWLEDGE_BASE, open_knowledge_store
+
 class ContinuousLearningSystem:
-    def __init__(self, knowledge_base_path='knowledge_base.json'):
+    def __init__(self, knowledge_base_path=DEFAULT_KNOWLEDGE_BASE):
         self.knowledge_base_path = knowledge_base_path
-        self.knowledge_base = self.load_knowledge_base()
+        self.store = self.load_knowledge_base()
         self.learning_log = []
         self.operation_feedback = []
         self.knowledge_updates = []
@@ -23,13 +23,8 @@ class ContinuousLearningSystem:
         self.error_patterns = defaultdict(int)
         
     def load_knowledge_base(self):
-        """載入知識庫"""
-        try:
-            with open(self.knowledge_base_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"❌ 無法載入知識庫: {e}")
-            return None
+        """載入知識庫（JSON 或 SQLite 後端）"""
+        return open_knowledge_store(self.knowledge_base_path)
     
     def record_operation_feedback(self, operation: Dict, success: bool, feedback: str = ""):
         """記錄操作回饋"""
@@ -170,15 +165,9 @@ class ContinuousLearningSystem:
         }
         
         try:
-            # 應用更新
-            for key, value in updates.items():
-                if key in self.knowledge_base:
-                    if isinstance(self.knowledge_base[key], dict) and isinstance(value, dict):
-                        self.knowledge_base[key].update(value)
-                    else:
-                        self.knowledge_base[key] = value
-                else:
-                    self.knowledge_base[key] = value
+            # 應用更新（SQLite 後端只寫入受影響的列）
+            with self.store.transaction():
+                self.store.update(updates)
             
             update_entry['applied'] = True
             self.knowledge_updates.append(update_entry)
@@ -199,14 +188,13 @@ class ContinuousLearningSystem:
         if backup:
             # 創建備份
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = f"knowledge_base_backup_{timestamp}.json"
-            shutil.copy2(self.knowledge_base_path, backup_path)
+            backup_path = f"knowledge_base_backup_{timestamp}{Path(self.knowledge_base_path).suffix}"
+            self.store.backup(backup_path)
             print(f"💾 知識庫備份已創建: {backup_path}")
         
         # 保存當前知識庫
         try:
-            with open(self.knowledge_base_path, 'w', encoding='utf-8') as f:
-                json.dump(self.knowledge_base, f, indent=2, ensure_ascii=False)
+            self.store.save()
             print(f"✅ 知識庫已保存")
         except Exception as e:
             print(f"❌ 知識庫保存失敗: {e}")
@@ -233,8 +221,8 @@ class ContinuousLearningSystem:
                     current_dirs.add(str(dir_path))
         
         # 比較變化
-        known_files = set(self.knowledge_base.get('files', {}).keys())
-        known_dirs = set(self.knowledge_base.get('directories', {}).keys())
+        known_files = self.store.file_paths()
+        known_dirs = self.store.directory_paths()
         
         new_files = current_files - known_files
         deleted_files = known_files - current_files
@@ -282,6 +270,7 @@ class ContinuousLearningSystem:
                 'action_required': True
             }
             self.learning_log.append(learning_entry)
+            self.store.append_learning_log(learning_entry)
         else:
             print("✅ 未檢測到變化")
         
@@ -347,7 +336,7 @@ class ContinuousLearningSystem:
     def get_system_health(self) -> Dict:
         """獲取系統健康狀態"""
         return {
-            'knowledge_base_size': len(self.knowledge_base),
+            'knowledge_base_size': self.store.count_files(),
             'learning_active': len(self.learning_log) > 0,
             'best_practices_available': len(self.best_practices) > 0,
             'error_patterns_detected': len(self.error_patterns) > 0,
@@ -365,7 +354,7 @@ def main():
     # 創建學習系統
     learning_system = ContinuousLearningSystem()
     
-    if not learning_system.knowledge_base:
+    if not learning_system.store:
         print("❌ 無法載入知識庫，請先執行第一階段")
         return False
     
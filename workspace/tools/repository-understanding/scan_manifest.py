@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+掃描清單：記錄每個目錄與檔案的 stat 資訊，供增量掃描使用
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class ScanManifest:
+    """持久化的掃描清單 (路徑 -> mtime/size/inode/內容雜湊)"""
+
+    VERSION = 2
+
+    def __init__(self, manifest_path='scan_manifest.json'):
+        self.manifest_path = Path(manifest_path)
+        self.root = None
+        # 目錄相對路徑 ('.' 代表根目錄) -> {'mtime_ns', 'subdirectories' (需遞迴者), 'files'}
+        self.directories: Dict[str, Dict] = {}
+        # 檔案相對路徑 -> {'mtime_ns', 'size', 'inode', 'hash', 'references' (未解析的 import/路徑引用)}
+        self.files: Dict[str, Dict] = {}
+
+    def load(self, root_path) -> bool:
+        """載入清單，若不存在、版本不符或根目錄不同則返回 False"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get('version') != self.VERSION or data.get('root') != str(Path(root_path).absolute()):
+            return False
+
+        self.root = data['root']
+        self.directories = data.get('directories', {})
+        self.files = data.get('files', {})
+        return True
+
+    def save(self):
+        """保存清單"""
+        data = {
+            'version': self.VERSION,
+            'root': self.root,
+            'directories': self.directories,
+            'files': self.files
+        }
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    def reset(self, root_path):
+        """清空清單，用於完整掃描"""
+        self.root = str(Path(root_path).absolute())
+        self.directories = {}
+        self.files = {}
+
+    def record_directory(self, rel_path: str, stat_result, subdirectories, files):
+        """記錄目錄的 mtime 與內容列表"""
+        self.directories[rel_path] = {
+            'mtime_ns': stat_result.st_mtime_ns,
+            'subdirectories': list(subdirectories),
+            'files': list(files)
+        }
+
+    def directory_unchanged(self, rel_path: str, stat_result) -> bool:
+        """目錄的 mtime 未變表示沒有新增、刪除或更名的項目"""
+        entry = self.directories.get(rel_path)
+        return entry is not None and entry['mtime_ns'] == stat_result.st_mtime_ns
+
+    def record_file(self, rel_path: str, stat_result, content_hash: Optional[str] = None):
+        """記錄檔案的 stat 資訊"""
+        previous = self.files.get(rel_path)
+        unchanged = previous is not None and self._same_stat(previous, stat_result)
+        if content_hash is None and unchanged:
+            content_hash = previous.get('hash')
+        self.files[rel_path] = {
+            'mtime_ns': stat_result.st_mtime_ns,
+            'size': stat_result.st_size,
+            'inode': stat_result.st_ino,
+            'hash': content_hash
+        }
+        if unchanged and 'references' in previous:
+            self.files[rel_path]['references'] = previous['references']
+
+    def file_changed(self, rel_path: str, stat_result) -> bool:
+        """比較 stat 資訊判斷檔案是否變化"""
+        previous = self.files.get(rel_path)
+        return previous is None or not self._same_stat(previous, stat_result)
+
+    def get_hash(self, rel_path: str) -> Optional[str]:
+        entry = self.files.get(rel_path)
+        return entry.get('hash') if entry else None
+
+    def set_hash(self, rel_path: str, content_hash: str):
+        if rel_path in self.files:
+            self.files[rel_path]['hash'] = content_hash
+
+    def get_references(self, rel_path: str) -> Optional[List]:
+        """返回快取的原始引用；None 表示需要重新解析"""
+        entry = self.files.get(rel_path)
+        return entry.get('references') if entry else None
+
+    def set_references(self, rel_path: str, references: List):
+        if rel_path in self.files:
+            self.files[rel_path]['references'] = references
+
+    def remove_file(self, rel_path: str):
+        self.files.pop(rel_path, None)
+
+    def remove_directory(self, rel_path: str):
+        self.directories.pop(rel_path, None)
+
+    @staticmethod
+    def _same_stat(entry: Dict, stat_result) -> bool:
+        return (entry['mtime_ns'] == stat_result.st_mtime_ns and
+                entry['size'] == stat_result.st_size and
+                entry['inode'] == stat_result.st_ino)
+
+    @staticmethod
+    def hash_bytes(content: bytes) -> str:
+        """計算內容的 SHA-256"""
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def content_hash(file_path, chunk_size: int = 65536) -> str:
+        """以分塊方式計算檔案內容的 SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
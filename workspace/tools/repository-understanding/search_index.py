@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+名稱/路徑搜尋索引：三字元組 (trigram) 倒排索引 + 路徑片段索引
+
+- 檔案以檔名、目錄以完整路徑建立索引（與 KnowledgeStore.search_names 的語義相同）
+- 子字串查詢先以 trigram 交集取得候選，再逐一驗證，不需掃描所有項目
+- 片段索引（路徑的每一層與檔名中的單字）讓整段符合的結果排在子字串符合之前
+- 以 JSON 保存在知識庫旁（knowledge_base.json.search.json），掃描後增量更新
+"""
+
+import os
+import re
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+SEGMENT_SPLIT = re.compile(r'[^0-9a-z]+')
+FUZZY_THRESHOLD = 0.5  # 模糊比對至少需要符合的 trigram 比例
+
+# 排序分數：名稱完全符合（含去除副檔名）> 名稱開頭符合 > 片段符合 > 子字串 > 模糊
+SCORE_EXACT = 100
+SCORE_PREFIX = 80
+SCORE_SEGMENT = 60
+SCORE_SUBSTRING = 40
+SCORE_FUZZY = 30
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def segments(path: str) -> Set[str]:
+    """路徑片段：每一層的完整名稱與其中的單字"""
+    path = path.lower()
+    parts = set(path.split(os.sep))
+    for part in list(parts):
+        parts.update(SEGMENT_SPLIT.split(part))
+    parts.discard('')
+    return parts
+
+
+def search_signature(knowledge_base: Dict) -> List:
+    """知識庫的版本識別：掃描時間與檔案/目錄數量"""
+    return [knowledge_base.get('metadata', {}).get('scan_date'),
+            len(knowledge_base.get('files', {})),
+            len(knowledge_base.get('directories', {}))]
+
+
+class SearchIndex:
+    """可增量更新的 trigram 搜尋索引"""
+
+    VERSION = 1
+
+    def __init__(self):
+        # id -> (kind, path, key)；刪除的項目為 None
+        self.entries: List[Optional[Tuple[str, str, str]]] = []
+        self.ids: Dict[Tuple[str, str], int] = {}
+        self.trigrams: Dict[str, Set[int]] = defaultdict(set)
+        self.segments: Dict[str, Set[int]] = defaultdict(set)
+        self.signature = None
+
+    @staticmethod
+    def index_path(knowledge_base_path) -> str:
+        """索引檔案與知識庫並存：knowledge_base.json -> knowledge_base.json.search.json"""
+        return f"{knowledge_base_path}.search.json"
+
+    @classmethod
+    def build(cls, files: Iterable[Tuple[str, str]], directories: Iterable[str], signature=None) -> 'SearchIndex':
+        """由 (檔案路徑, 檔名) 與目錄路徑建立索引"""
+        index = cls()
+        for path, name in files:
+            index.add_file(path, name)
+        for path in directories:
+            index.add_directory(path)
+        index.signature = signature
+        return index
+
+    @classmethod
+    def load(cls, path) -> Optional['SearchIndex']:
+        """載入索引；不存在或版本不符時返回 None"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != cls.VERSION:
+            return None
+
+        index = cls()
+        index.entries = [tuple(e) if e else None for e in data['entries']]
+        index.ids = {(e[0], e[1]): i for i, e in enumerate(index.entries) if e}
+        index.trigrams.update((gram, set(ids)) for gram, ids in data['trigrams'].items())
+        index.segments.update((segment, set(ids)) for segment, ids in data['segments'].items())
+        index.signature = data.get('signature')
+        return index
+
+    def save(self, path):
+        """保存索引；刪除的項目過多時先重新編號"""
+        if len(self.ids) < len(self.entries) // 2:
+            self._compact()
+        data = {
+            'version': self.VERSION,
+            'signature': self.signature,
+            'entries': self.entries,
+            'trigrams': {gram: sorted(ids) for gram, ids in self.trigrams.items()},
+            'segments': {segment: sorted(ids) for segment, ids in self.segments.items()}
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    def _compact(self):
+        live = [e for e in self.entries if e]
+        self.entries, self.ids = [], {}
+        self.trigrams, self.segments = defaultdict(set), defaultdict(set)
+        for kind, path, key in live:
+            self._add(kind, path, key)
+
+    # ---- 更新 ----
+    def add_file(self, path: str, name: str):
+        self._add('file', path, name.lower())
+
+    def add_directory(self, path: str):
+        self._add('directory', path, path.lower())
+
+    def remove_file(self, path: str):
+        self._remove('file', path)
+
+    def remove_directory(self, path: str):
+        self._remove('directory', path)
+
+    def _add(self, kind, path, key):
+        entry_id = self.ids.get((kind, path))
+        if entry_id is not None:
+            if self.entries[entry_id][2] == key:
+                return
+            self._remove(kind, path)
+        entry_id = len(self.entries)
+        self.entries.append((kind, path, key))
+        self.ids[(kind, path)] = entry_id
+        for gram in trigrams(key):
+            self.trigrams[gram].add(entry_id)
+        for segment in segments(path):
+            self.segments[segment].add(entry_id)
+
+    def _remove(self, kind, path):
+        entry_id = self.ids.pop((kind, path), None)
+        if entry_id is None:
+            return
+        _, _, key = self.entries[entry_id]
+        self.entries[entry_id] = None
+        for index, tokens in ((self.trigrams, trigrams(key)), (self.segments, segments(path))):
+            for token in tokens:
+                postings = index.get(token)
+                if postings is not None:
+                    postings.discard(entry_id)
+                    if not postings:
+                        del index[token]
+
+    # ---- 查詢 ----
+    def search(self, pattern: str, kinds: Iterable[str] = ('file', 'directory'), ranked: bool = False,
+               fuzzy: bool = False, offset: int = 0, limit: Optional[int] = None) -> Tuple[List[Tuple[str, str, int]], int]:
+        """不分大小寫的子字串搜尋
+
+        返回 (該頁的 [(kind, path, score)], 符合總數)。未排序時檔案在前、依路徑排列；
+        fuzzy=True 時也返回 trigram 符合比例達 FUZZY_THRESHOLD 的項目。
+        """
+        query = pattern.lower()
+        kinds = set(kinds)
+        scores = {}
+        for entry_id in self._substring_matches(query):
+            kind, path, key = self.entries[entry_id]
+            if kind in kinds:
+                scores[entry_id] = self._score(entry_id, query, key)
+        if fuzzy:
+            for entry_id, ratio in self._fuzzy_matches(query, scores).items():
+                if self.entries[entry_id][0] in kinds:
+                    scores[entry_id] = int(SCORE_FUZZY * ratio)
+
+        if ranked or fuzzy:
+            order = sorted(scores, key=lambda i: (-scores[i], len(self.entries[i][2]), self.entries[i][1]))
+        else:
+            order = sorted(scores, key=lambda i: (self.entries[i][0] != 'file', self.entries[i][1]))
+        page = order[offset:offset + limit if limit is not None else None]
+        return [(self.entries[i][0], self.entries[i][1], scores[i]) for i in page], len(order)
+
+    def _substring_matches(self, query: str) -> List[int]:
+        if len(query) < 3:
+            # 太短無法使用 trigram，直接比對
+            return [i for i, e in enumerate(self.entries) if e and query in e[2]]
+
+        candidates = None
+        for postings in sorted((self.trigrams.get(g, set()) for g in trigrams(query)), key=len):
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        return [i for i in candidates if query in self.entries[i][2]]
+
+    def _fuzzy_matches(self, query: str, exclude) -> Dict[int, float]:
+        grams = trigrams(query)
+        if not grams:
+            return {}
+        counts = defaultdict(int)
+        for gram in grams:
+            for entry_id in self.trigrams.get(gram, ()):
+                counts[entry_id] += 1
+        return {i: c / len(grams) for i, c in counts.items()
+                if i not in exclude and c / len(grams) >= FUZZY_THRESHOLD}
+
+    def _score(self, entry_id: int, query: str, key: str) -> int:
+        # 以最後一層名稱比較，目錄才能與檔案一樣以名稱完全符合
+        name = os.path.basename(key)
+        if name == query or os.path.splitext(name)[0] == query:
+            return SCORE_EXACT
+        if name.startswith(query):
+            return SCORE_PREFIX
+        if entry_id in self.segments.get(query, ()):
+            return SCORE_SEGMENT
+        return SCORE_SUBSTRING
@@ -0,0 +1,93 @@
+"""
+檔案變化事件流測試：同一路徑的連續事件須合併為單一變化
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from change_feed import ChangeFeed, merge_change  # noqa: E402
+
+
+@pytest.mark.parametrize('events, expected', [
+    (['created'], 'created'),
+    (['created', 'modified', 'modified'], 'created'),
+    (['created', 'deleted'], None),
+    (['modified', 'modified'], 'modified'),
+    (['modified', 'deleted'], 'deleted'),
+    (['deleted', 'created'], 'modified'),
+    (['deleted', 'created', 'deleted'], 'deleted'),
+    (['created', 'deleted', 'created'], 'created'),
+])
+def test_merge_change(events, expected):
+    merged = None
+    for change in events:
+        merged = merge_change(merged, change)
+    assert merged == expected
+
+
+@pytest.fixture
+def feed(tmp_path):
+    batches = []
+    feed = ChangeFeed(tmp_path, batches.append,
+                      ignore_patterns=[str(tmp_path / 'knowledge-base.*')])
+    feed.batches = batches
+    return feed
+
+
+def test_events_for_one_path_are_coalesced(feed, tmp_path):
+    for change in ('created', 'modified', 'modified'):
+        feed.record(str(tmp_path / 'a.py'), change)
+    feed.record(str(tmp_path / 'b.py'), 'modified')
+    feed.record(str(tmp_path / 'b.py'), 'deleted')
+
+    assert feed.pending_count() == 2
+    feed.flush()
+
+    assert feed.batches == [{'a.py': 'created', 'b.py': 'deleted'}]
+    assert feed.stats['events_received'] == 5
+    assert feed.stats['events_coalesced'] == 3
+    assert feed.stats['paths_emitted'] == 2
+
+
+def test_created_then_deleted_cancels_out(feed, tmp_path):
+    feed.record(str(tmp_path / 'tmp.swp'), 'created')
+    feed.record(str(tmp_path / 'tmp.swp'), 'deleted')
+
+    assert feed.pending_count() == 0
+    feed.flush()
+    assert feed.batches == []
+
+
+def test_move_is_delete_plus_create(feed, tmp_path):
+    feed.record(str(tmp_path / 'old.py'), 'modified')
+    feed.record(str(tmp_path / 'old.py'), 'deleted')
+    feed.record(str(tmp_path / 'pkg' / 'new.py'), 'created')
+    feed.flush()
+
+    assert feed.batches == [{'old.py': 'deleted', os.path.join('pkg', 'new.py'): 'created'}]
+
+
+def test_ignored_paths_are_not_emitted(feed, tmp_path):
+    for path in (tmp_path / '.git' / 'index', tmp_path / 'node_modules' / 'x.js',
+                 tmp_path / 'knowledge-base.yaml', tmp_path.parent / 'outside.py', tmp_path):
+        feed.record(str(path), 'modified')
+    feed.record(str(tmp_path / 'src' / 'kept.py'), 'modified')
+    feed.flush()
+
+    assert feed.batches == [{os.path.join('src', 'kept.py'): 'modified'}]
+    assert feed.stats['events_ignored'] == 5
+
+
+def test_flush_starts_a_new_batch(feed, tmp_path):
+    feed.record(str(tmp_path / 'a.py'), 'created')
+    feed.flush()
+    feed.record(str(tmp_path / 'a.py'), 'deleted')
+    feed.flush()
+
+    # 前一批已送出，刪除不會與先前的建立互相抵銷
+    assert feed.batches == [{'a.py': 'created'}, {'a.py': 'deleted'}]
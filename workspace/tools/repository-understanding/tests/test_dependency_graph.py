@@ -0,0 +1,94 @@
+"""
+檔案依賴圖測試：import 解析、反向索引與影響查詢
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dependency_graph import (  # noqa: E402
+    DependencyGraphBuilder,
+    build_reverse_index,
+    extract_python_imports,
+    impacted_files,
+)
+
+SOURCES = {
+    'app/main.py': 'import os\nfrom app.core import engine\nfrom .util import helper\n',
+    'app/util.py': 'def helper():\n    import json\n    return json\n',
+    'app/core/__init__.py': '',
+    'app/core/engine.py': 'from . import models\nif True:\n    from ..util import helper\n',
+    'app/core/models.py': 'X = 1\n',
+    'web/index.js': "import { a } from './lib';\nconst b = require('./lib/b.js');\nimport x from 'react';\n",
+    'web/lib/index.ts': 'export const a = 1;\n',
+    'web/lib/b.js': 'module.exports = 2;\n',
+    'config/pipeline.yaml': 'steps:\n  - run: app/main.py\n  - docs: missing.md\n',
+}
+
+TYPES = {'.py': 'python', '.js': 'javascript', '.ts': 'typescript', '.yaml': 'yaml'}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    files = {}
+    for rel, content in SOURCES.items():
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        rel = os.path.normpath(rel)
+        files[rel] = {'type': TYPES[path.suffix], 'size': len(content)}
+    builder = DependencyGraphBuilder(tmp_path, files)
+    forward = builder.resolve(builder.extract(files))
+    return forward, build_reverse_index(forward)
+
+
+def _p(path):
+    return os.path.normpath(path)
+
+
+def test_extract_python_imports_skips_expressions():
+    refs = extract_python_imports('import a.b\nfrom ..c import d\nfrom f import *\ndef f():\n    from e import g\nx = "import z"\n')
+    assert refs == [['py', 0, 'a.b', []], ['py', 2, 'c', ['d']], ['py', 0, 'f', []],
+                    ['py', 0, 'e', ['g']]]
+
+
+def test_python_imports(graph):
+    forward, _ = graph
+    assert forward[_p('app/main.py')] == [_p('app/core/engine.py'), _p('app/util.py')]
+    assert forward[_p('app/core/engine.py')] == [_p('app/core/models.py'), _p('app/util.py')]
+    # 標準庫匯入不會成為邊
+    assert _p('app/util.py') not in forward
+
+
+def test_script_and_reference_imports(graph):
+    forward, _ = graph
+    assert forward[_p('web/index.js')] == [_p('web/lib/index.ts'), _p('web/lib/b.js')]
+    assert forward[_p('config/pipeline.yaml')] == [_p('app/main.py')]
+
+
+def test_reverse_index(graph):
+    _, reverse = graph
+    assert sorted(reverse[_p('app/util.py')]) == [_p('app/core/engine.py'), _p('app/main.py')]
+    assert reverse[_p('app/main.py')] == [_p('config/pipeline.yaml')]
+
+
+def test_impacted_files_orders_by_distance(graph):
+    _, reverse = graph
+
+    def lookup(paths):
+        return {p: reverse[p] for p in paths if p in reverse}
+
+    impacted = impacted_files(lookup, [_p('app/core/models.py')])
+    assert impacted == [_p('app/core/engine.py'), _p('app/main.py'), _p('config/pipeline.yaml')]
+    assert impacted_files(lookup, [_p('app/core/models.py')], max_depth=1) == [_p('app/core/engine.py')]
+    assert impacted_files(lookup, [_p('app/core/models.py')], limit=2) == impacted[:2]
+
+
+def test_impacted_files_handles_cycles():
+    reverse = {'a': ['b'], 'b': ['c'], 'c': ['a']}
+    impacted = impacted_files(lambda paths: {p: reverse[p] for p in paths if p in reverse}, ['a'])
+    assert impacted == ['b', 'c']
@@ -0,0 +1,104 @@
+"""
+知識庫二級索引測試：索引查找的結果須與逐項掃描知識庫一致
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from knowledge_index import KnowledgeIndex  # noqa: E402
+
+TYPES = ['python', 'yaml', 'markdown', 'json']
+PURPOSES = ['source_code', 'configuration', 'documentation']
+
+
+@pytest.fixture
+def knowledge_base():
+    rng = random.Random(3)
+    directories = {}
+    for top in range(4):
+        for sub in range(3):
+            for path in (f'd{top}', os.path.join(f'd{top}', f's{sub}')):
+                parent = os.path.dirname(path)
+                directories[path] = {'path': path, 'parent': parent or 'root',
+                                     'purpose': rng.choice(PURPOSES)}
+
+    files = {}
+    for i in range(200):
+        directory = rng.choice(['.'] + sorted(directories))
+        path = os.path.normpath(os.path.join(directory, f'f{i}.txt'))
+        files[path] = {'path': path, 'directory': directory, 'type': rng.choice(TYPES)}
+
+    critical = rng.sample(sorted(files), 20)
+    return {
+        'directories': directories,
+        'files': files,
+        'critical_files': critical,
+        'critical_files_by_category': {
+            'security': critical[:5],
+            'build': critical[5:12],
+            'entry_points': critical[12:],
+        },
+    }
+
+
+def _within(path, directory):
+    return path.startswith(directory + os.sep)
+
+
+def test_lookups_match_full_scan(knowledge_base):
+    index = KnowledgeIndex(knowledge_base)
+    files, directories = knowledge_base['files'], knowledge_base['directories']
+
+    for directory in ['.'] + list(directories):
+        assert index.files_in(directory) == [p for p, i in files.items() if i['directory'] == directory]
+        children = [d for d, i in directories.items()
+                    if (i['parent'] == 'root' and directory == '.') or i['parent'] == directory]
+        assert index.subdirectories_of(directory) == children
+    for file_type in TYPES + ['missing']:
+        assert index.files_of_type(file_type) == [p for p, i in files.items() if i['type'] == file_type]
+    for purpose in PURPOSES:
+        assert index.directories_with_purpose(purpose) == [
+            d for d, i in directories.items() if i['purpose'] == purpose]
+
+
+def test_critical_lookups_match_full_scan(knowledge_base):
+    index = KnowledgeIndex(knowledge_base)
+    critical = knowledge_base['critical_files']
+    categories = knowledge_base['critical_files_by_category']
+
+    for path in list(knowledge_base['files']) + list(knowledge_base['directories']):
+        expected = path in critical or any(_within(c, path) for c in critical)
+        assert index.is_critical(path) == expected
+
+        for order in (['security', 'build', 'entry_points'], ['entry_points', 'security']):
+            expected_category = next(
+                (c for c in order if path in categories[c] or any(_within(p, path) for p in categories[c])),
+                None)
+            assert index.critical_category(path, order) == expected_category
+
+
+def test_paths_are_normalized(knowledge_base):
+    index = KnowledgeIndex(knowledge_base)
+    directory = os.path.join('d1', 's2')
+
+    assert index.files_in('./' + directory + '/') == index.files_in(directory)
+    assert index.subdirectories_of('./d1') == index.subdirectories_of('d1')
+    assert index.is_critical('./' + knowledge_base['critical_files'][0])
+
+
+def test_rebuild_replaces_previous_index(knowledge_base):
+    index = KnowledgeIndex(knowledge_base)
+    moved = dict(knowledge_base, files={'x.py': {'path': 'x.py', 'directory': '.', 'type': 'python'}},
+                 critical_files=[], critical_files_by_category={})
+
+    index.build(moved)
+
+    assert index.files_in('.') == ['x.py']
+    assert index.files_of_type('yaml') == []
+    assert not any(index.is_critical(p) for p in knowledge_base['critical_files'])
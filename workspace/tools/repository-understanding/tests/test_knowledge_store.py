@@ -0,0 +1,138 @@
+"""
+知識庫儲存後端測試：SQLite 後端的查詢結果須與 JSON（記憶體）後端一致
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from knowledge_store import (  # noqa: E402
+    JSONKnowledgeStore,
+    KnowledgeStore,
+    SQLiteKnowledgeStore,
+    migrate_json_to_sqlite,
+    open_knowledge_store,
+)
+
+
+def _file(path, file_type, critical=False, size=10):
+    directory = str(Path(path).parent) if '/' in path else '.'
+    return {'path': path, 'name': Path(path).name, 'directory': directory, 'type': file_type,
+            'size': size, 'is_critical': critical}
+
+
+KNOWLEDGE_BASE = {
+    'metadata': {'version': '1.0'},
+    'directories': {
+        'src': {'path': 'src', 'parent': 'root', 'purpose': 'source'},
+        'src/core': {'path': 'src/core', 'parent': 'src', 'purpose': 'source'},
+        'config': {'path': 'config', 'parent': 'root', 'purpose': 'configuration'},
+    },
+    'files': {
+        'src/main.py': _file('src/main.py', 'python', critical=True),
+        'src/core/engine.py': _file('src/core/engine.py', 'python'),
+        'src/core/util.py': _file('src/core/util.py', 'python'),
+        'config/app.yaml': _file('config/app.yaml', 'yaml'),
+        'README.md': _file('README.md', 'markdown'),
+    },
+    'critical_files': ['src/main.py'],
+    'critical_files_by_category': {'entry_points': ['src/main.py'], 'security': []},
+    'configurations': {'config/app.yaml': {'keys': ['name']}},
+    'dependencies': {
+        'forward': {'src/main.py': ['src/core/engine.py'], 'src/core/engine.py': ['src/core/util.py']},
+        'reverse': {},
+    },
+}
+
+
+@pytest.fixture
+def stores(tmp_path):
+    json_store = JSONKnowledgeStore(str(tmp_path / 'kb.json'), create=True)
+    json_store.save_all(copy.deepcopy(KNOWLEDGE_BASE))
+    json_store.set_dependencies(KNOWLEDGE_BASE['dependencies']['forward'], replace=True)
+    sqlite_store = SQLiteKnowledgeStore(str(tmp_path / 'kb.db'), create=True)
+    sqlite_store.save_all(copy.deepcopy(KNOWLEDGE_BASE))
+    yield json_store, sqlite_store
+    sqlite_store.close()
+
+
+def test_store_is_abstract():
+    with pytest.raises(TypeError):
+        KnowledgeStore()
+
+
+@pytest.mark.parametrize('query', [
+    lambda s: s.get_file('src/main.py'),
+    lambda s: s.get_file('missing.py'),
+    lambda s: s.get_directory('src/core'),
+    lambda s: s.get_files(['README.md', 'missing', 'src/main.py']),
+    lambda s: sorted(s.files_in('src/core')),
+    lambda s: sorted(s.files_under('src')),
+    lambda s: sorted(s.files_under('.')),
+    lambda s: sorted(s.files_of_type('python')),
+    lambda s: sorted(s.directories_with_purpose('source')),
+    lambda s: s.has_dependencies(),
+    lambda s: s.dependencies_of('src/main.py'),
+    lambda s: s.dependents_of('src/core/util.py'),
+    lambda s: s.impacted_by(['src/core/util.py']),
+    lambda s: tuple(sorted(x) for x in s.search_names('ENG')),
+    lambda s: [s.is_critical(p) for p in ['src/main.py', 'src', 'src/core', 'README.md']],
+    lambda s: [s.critical_category(p) for p in ['src/main.py', 'src', 'config']],
+    lambda s: (s.file_paths(), s.directory_paths()),
+    lambda s: (s.count_files(), s.count_directories()),
+    lambda s: (s.count_by_type(), s.count_by_purpose()),
+    lambda s: s.get_section('metadata'),
+    lambda s: s.get_critical_categories(),
+])
+def test_queries_match(stores, query):
+    json_store, sqlite_store = stores
+    assert query(sqlite_store) == query(json_store)
+
+
+def test_updates_match(stores):
+    for store in stores:
+        with store.transaction():
+            store.upsert_files({'src/core/new.py': _file('src/core/new.py', 'python', critical=True)})
+            store.delete_files(['README.md'])
+            store.delete_directories(['config'])
+            store.set_dependencies({'src/core/engine.py': [], 'src/core/new.py': ['src/main.py']})
+            store.update({'metadata': {'scanned': True}, 'statistics': {'files': 4}})
+            store.append_learning_log({'timestamp': '2024-01-01T00:00:00', 'type': 'scan'})
+
+    json_store, sqlite_store = stores
+    for query in [
+        lambda s: s.file_paths(),
+        lambda s: s.directory_paths(),
+        lambda s: s.is_critical('src/core'),
+        lambda s: s.dependents_of('src/main.py'),
+        lambda s: s.dependencies_of('src/core/engine.py'),
+        lambda s: s.get_section('metadata'),
+        lambda s: s.get_section('statistics'),
+    ]:
+        assert query(sqlite_store) == query(json_store)
+    assert sqlite_store.load_all()['learning_log'] == json_store.load_all()['learning_log']
+
+
+def test_migrate_round_trip(tmp_path):
+    json_path = tmp_path / 'kb.json'
+    json_store = JSONKnowledgeStore(str(json_path), create=True)
+    json_store.save_all(copy.deepcopy(KNOWLEDGE_BASE))
+    json_store.set_dependencies(KNOWLEDGE_BASE['dependencies']['forward'], replace=True)
+    json_store.save()
+
+    db_path = tmp_path / 'kb.db'
+    migrate_json_to_sqlite(str(json_path), str(db_path))
+    sqlite_store = open_knowledge_store(str(db_path))
+    try:
+        assert isinstance(sqlite_store, SQLiteKnowledgeStore)
+        loaded = sqlite_store.load_all()
+        expected = json_store.load_all()
+        for key in ['files', 'directories', 'configurations', 'critical_files', 'critical_files_by_category',
+                    'dependencies', 'metadata']:
+            assert loaded[key] == expected[key]
+    finally:
+        sqlite_store.close()
@@ -0,0 +1,192 @@
+"""
+儲存庫掃描測試：增量掃描的結果須與完整重新掃描一致
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from phase1_scanner import RepositoryScanner  # noqa: E402
+
+TREE = {
+    'app/main.py': 'from app.core import engine\n',
+    'app/core/__init__.py': '',
+    'app/core/engine.py': 'from . import models\n',
+    'app/core/models.py': 'X = 1\n',
+    'config/app.yaml': 'name: demo\n',
+    'config/settings.json': '{"debug": false}\n',
+    'docs/README.md': '# Demo\n',
+    'node_modules/pkg/index.js': 'module.exports = 1;\n',
+    '.hidden/secret.txt': 'x\n',
+}
+
+
+def _write(root, rel, content):
+    """寫入檔案並把 mtime 往後推，確保變化一定被偵測到"""
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    previous = path.stat().st_mtime_ns if path.exists() else 0
+    path.write_text(content)
+    mtime = max(path.stat().st_mtime_ns, previous + 1_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def _touch_dir(path):
+    """推進目錄 mtime（部分檔案系統的時間粒度較粗）"""
+    mtime = path.stat().st_mtime_ns + 1_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / 'repo'
+    for rel, content in TREE.items():
+        _write(root, rel, content)
+    return root
+
+
+def _scanner(repo, state_dir, **kwargs):
+    return RepositoryScanner(repo, knowledge_base_path=str(state_dir / 'kb.json'),
+                             manifest_path=str(state_dir / 'manifest.json'), **kwargs)
+
+
+def _full_scan(repo, state_dir, **kwargs):
+    state_dir.mkdir(exist_ok=True)
+    scanner = _scanner(repo, state_dir, **kwargs)
+    assert scanner.scan()
+    return scanner
+
+
+def _normalized(knowledge_base):
+    """去除掃描時間等與內容無關的欄位，列表改為排序後比較"""
+    def sort_lists(obj):
+        if isinstance(obj, dict):
+            return {k: sort_lists(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return sorted(sort_lists(v) for v in obj)
+        return obj
+
+    return sort_lists({k: v for k, v in knowledge_base.items() if k != 'metadata'})
+
+
+def _incremental(repo, state_dir):
+    scanner = _scanner(repo, state_dir)
+    assert scanner.scan(incremental=True)
+    scanner.save_knowledge_base()
+    return scanner
+
+
+def _modify_tree(repo):
+    _write(repo, 'app/core/models.py', 'X = 2\nY = 3\n')
+    _write(repo, 'config/app.yaml', 'name: renamed\nreplicas: 2\n')
+    _write(repo, 'app/util.py', 'from app.core import models\n')
+    _write(repo, 'services/api/server.py', 'from app import util\n')
+    (repo / 'docs/README.md').unlink()
+    (repo / 'config/settings.json').unlink()
+    for directory in ('app', 'services', 'services/api', 'docs', 'config'):
+        _touch_dir(repo / directory)
+
+
+def test_unchanged_tree_keeps_knowledge_base(repo, tmp_path):
+    state = tmp_path / 'state'
+    full = _full_scan(repo, state)
+    full.save_knowledge_base()
+
+    scanner = _incremental(repo, state)
+
+    assert not scanner.has_changes()
+    assert _normalized(scanner.knowledge_base) == _normalized(full.knowledge_base)
+
+
+def test_incremental_scan_matches_full_rescan(repo, tmp_path):
+    state = tmp_path / 'state'
+    _full_scan(repo, state).save_knowledge_base()
+
+    _modify_tree(repo)
+    scanner = _incremental(repo, state)
+
+    assert scanner.knowledge_base['metadata']['scan_mode'] == 'incremental'
+    assert sorted(scanner.changes['added']) == [os.path.normpath('app/util.py'),
+                                                os.path.normpath('services/api/server.py')]
+    assert sorted(scanner.changes['removed']) == [os.path.normpath('config/settings.json'),
+                                                  os.path.normpath('docs/README.md')]
+    rescan = _full_scan(repo, tmp_path / 'rescan')
+    assert _normalized(scanner.knowledge_base) == _normalized(rescan.knowledge_base)
+
+    # 清單同樣要與完整掃描一致，下一次增量掃描才不會漏掉或重複處理檔案
+    assert scanner.manifest.directories.keys() == rescan.manifest.directories.keys()
+    assert scanner.manifest.files.keys() == rescan.manifest.files.keys()
+
+
+def test_removed_directory_is_dropped(repo, tmp_path):
+    state = tmp_path / 'state'
+    _full_scan(repo, state).save_knowledge_base()
+
+    for path in sorted((repo / 'app/core').iterdir(), reverse=True):
+        path.unlink()
+    (repo / 'app/core').rmdir()
+    _touch_dir(repo / 'app')
+    scanner = _incremental(repo, state)
+
+    assert os.path.normpath('app/core') not in scanner.knowledge_base['directories']
+    rescan = _full_scan(repo, tmp_path / 'rescan')
+    assert _normalized(scanner.knowledge_base) == _normalized(rescan.knowledge_base)
+
+
+def test_parallel_walk_matches_serial_walk(repo, tmp_path):
+    for i in range(20):
+        _write(repo, f'pkg{i % 4}/sub{i}/mod{i}.py', f'VALUE = {i}\n')
+    (repo / 'linked').symlink_to(repo / 'app', target_is_directory=True)
+
+    serial = _full_scan(repo, tmp_path / 'serial', workers=1)
+    parallel = _full_scan(repo, tmp_path / 'parallel', workers=8)
+
+    # 合併順序與執行緒完成順序無關，連列表順序也相同
+    del parallel.knowledge_base['metadata'], serial.knowledge_base['metadata']
+    assert parallel.knowledge_base == serial.knowledge_base
+    assert parallel.manifest.directories == serial.manifest.directories
+    # 與 os.walk 相同：排除與隱藏的目錄不列出，符號連結目錄列出但不遞迴
+    directories = serial.knowledge_base['directories']
+    assert len(directories) == 4 + 4 + 20
+    assert not any(d.startswith(('node_modules', '.hidden', 'linked')) for d in directories)
+    assert 'linked' not in serial.manifest.directories['.']['subdirectories']
+    assert os.path.normpath('linked/main.py') not in serial.knowledge_base['files']
+
+
+def test_apply_changes_matches_full_rescan(repo, tmp_path):
+    state = tmp_path / 'state'
+    _full_scan(repo, state).save_knowledge_base()
+
+    _modify_tree(repo)
+    _write(repo, 'services/api/handlers/users.py', 'from app.core import models\n')
+    scanner = _scanner(repo, state)
+    # 事件只回報最上層的新目錄，其下的子目錄須遞迴掃描
+    assert scanner.apply_changes(['app/core/models.py', 'config/app.yaml', 'app/util.py',
+                                  str(repo / 'services'), 'docs/README.md', 'config/settings.json',
+                                  'node_modules/pkg/index.js', '../outside.py'])
+    scanner.save_knowledge_base()
+
+    rescan = _full_scan(repo, tmp_path / 'rescan')
+    assert _normalized(scanner.knowledge_base) == _normalized(rescan.knowledge_base)
+    assert scanner.manifest.directories.keys() == rescan.manifest.directories.keys()
+    assert scanner.manifest.files.keys() == rescan.manifest.files.keys()
+
+
+def test_apply_changes_drops_deleted_directory(repo, tmp_path):
+    state = tmp_path / 'state'
+    _full_scan(repo, state).save_knowledge_base()
+
+    for path in sorted((repo / 'app/core').iterdir(), reverse=True):
+        path.unlink()
+    (repo / 'app/core').rmdir()
+    scanner = _scanner(repo, state)
+    assert scanner.apply_changes(['app/core'])
+    scanner.save_knowledge_base()
+
+    assert not any(f.startswith(os.path.normpath('app/core')) for f in scanner.knowledge_base['files'])
+    rescan = _full_scan(repo, tmp_path / 'rescan')
+    assert _normalized(scanner.knowledge_base) == _normalized(rescan.knowledge_base)
@@ -0,0 +1,116 @@
+"""
+搜尋索引測試：trigram 查詢的結果須與逐項比對子字串一致
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search_index import SearchIndex  # noqa: E402
+
+WORDS = ['core', 'engine', 'Config', 'test', 'util', 'api', 'model', 'Main', 'index', 'search']
+QUERIES = ['', 'e', 'co', 'con', 'CONFIG', 'engine', 'test_', '.py', 'el.', 'ndex', 'api/', 'zzz', 'util_model']
+
+
+def _corpus(rng, count):
+    directories = sorted({os.path.join(*rng.sample(WORDS, rng.randint(1, 3))) for _ in range(count // 4)})
+    files = {}
+    for _ in range(count):
+        name = '_'.join(rng.sample(WORDS, rng.randint(1, 2))) + rng.choice(['.py', '.yaml', '.md', ''])
+        files[os.path.join(rng.choice(directories), name)] = name
+    return files, directories
+
+
+def _naive(files, directories, query, kinds=('file', 'directory')):
+    query = query.lower()
+    matches = []
+    if 'file' in kinds:
+        matches += sorted(('file', p) for p, name in files.items() if query in name.lower())
+    if 'directory' in kinds:
+        matches += sorted(('directory', p) for p in directories if query in p.lower())
+    return matches
+
+
+def _paths(index, query, **kwargs):
+    results, total = index.search(query, **kwargs)
+    assert total == len(results)
+    return [(kind, path) for kind, path, _ in results]
+
+
+@pytest.fixture
+def corpus():
+    return _corpus(random.Random(7), 300)
+
+
+def test_search_matches_naive_scan(corpus):
+    files, directories = corpus
+    index = SearchIndex.build(files.items(), directories)
+
+    for query in QUERIES:
+        assert _paths(index, query) == _naive(files, directories, query)
+        for kinds in (('file',), ('directory',)):
+            assert _paths(index, query, kinds=kinds) == _naive(files, directories, query, kinds)
+        # 排序只改變順序，不改變符合的集合
+        assert sorted(_paths(index, query, ranked=True)) == sorted(_naive(files, directories, query))
+
+
+def test_pagination_covers_all_matches(corpus):
+    files, directories = corpus
+    index = SearchIndex.build(files.items(), directories)
+
+    expected = _naive(files, directories, 'e')
+    pages = []
+    for offset in range(0, len(expected), 25):
+        results, total = index.search('e', offset=offset, limit=25)
+        assert total == len(expected)
+        pages += [(kind, path) for kind, path, _ in results]
+    assert pages == expected
+
+
+def test_incremental_updates_match_rebuild(corpus, tmp_path):
+    files, directories = corpus
+    index = SearchIndex.build(files.items(), directories)
+    rng = random.Random(11)
+
+    for path in rng.sample(sorted(files), 230):
+        index.remove_file(path)
+        del files[path]
+    for path in rng.sample(directories, 10):
+        index.remove_directory(path)
+        directories.remove(path)
+    new_files, new_directories = _corpus(rng, 40)
+    for path, name in new_files.items():
+        index.add_file(path, name)
+    for path in new_directories:
+        if path not in directories:
+            index.add_directory(path)
+            directories.append(path)
+    files.update(new_files)
+    # 同一路徑改名：舊名稱不再符合
+    renamed = next(iter(new_files))
+    index.add_file(renamed, 'renamed.txt')
+    files[renamed] = 'renamed.txt'
+
+    # 刪除超過一半的項目，保存時會重新編號
+    index_path = tmp_path / 'kb.json.search.json'
+    index.save(index_path)
+    loaded = SearchIndex.load(index_path)
+    rebuilt = SearchIndex.build(files.items(), directories)
+
+    for query in QUERIES + ['renamed']:
+        expected = _naive(files, directories, query)
+        assert _paths(index, query) == expected
+        assert _paths(loaded, query) == expected
+        assert index.search(query, ranked=True) == rebuilt.search(query, ranked=True)
+
+
+def test_load_rejects_missing_or_stale_index(tmp_path):
+    assert SearchIndex.load(tmp_path / 'missing.json') is None
+    stale = tmp_path / 'stale.json'
+    stale.write_text('{"version": 0}')
+    assert SearchIndex.load(stale) is None